@@ -45,6 +45,7 @@ import salt.utils.event
 import salt.utils.minions
 import salt.utils.verify
 import salt.utils.jid
+import salt.utils.state_stream
 import salt.syspaths as syspaths
 from salt.exceptions import (
     EauthAuthenticationError, SaltInvocationError, SaltReqTimeoutError,
@@ -633,6 +634,11 @@ class LocalClient(object):
         The function signature is the same as :py:meth:`cmd` with the
         following exceptions.
 
+        :param progress: Also yield the batches of state results streamed by
+            minions with ``state_stream_batch`` or ``state_stream_interval``
+            set, as ``{'<minion id>': {'progress': {'ret': {...}, 'seq': 0,
+            'len': 800}}}``
+
         :return: A generator yielding the individual minion returns
 
         .. code-block:: python
@@ -890,6 +896,11 @@ class LocalClient(object):
                 if 'minions' in raw.get('data', {}):
                     minions.update(raw['data']['minions'])
                     continue
+                if kwargs.get('progress', False) \
+                        and salt.utils.state_stream.parse_tag(raw.get('tag', '')):
+                    # Results streamed by a running state run
+                    yield {raw['data']['id']: {'progress': raw['data']['data']}}
+                    continue
                 if 'return' not in raw['data']:
                     continue
                 if kwargs.get('raw', False):
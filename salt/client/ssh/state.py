@@ -21,6 +21,9 @@ import salt.roster
 import salt.state
 import salt.loader
 import salt.minion
+# The file references of the low state are found the same way the minion
+# state system does to prefetch their hashes
+from salt.state import lowstate_file_refs, salt_refs  # pylint: disable=unused-import
 
 
 class SSHState(salt.state.State):
@@ -73,54 +76,6 @@ class SSHHighState(salt.state.BaseHighState):
         return
 
 
-def lowstate_file_refs(chunks, extras=''):
-    '''
-    Create a list of file ref objects to reconcile
-    '''
-    refs = {}
-    for chunk in chunks:
-        if not isinstance(chunk, dict):
-            continue
-        saltenv = 'base'
-        crefs = []
-        for state in chunk:
-            if state == '__env__':
-                saltenv = chunk[state]
-            elif state.startswith('__'):
-                continue
-            crefs.extend(salt_refs(chunk[state]))
-        if crefs:
-            if saltenv not in refs:
-                refs[saltenv] = []
-            refs[saltenv].append(crefs)
-    if extras:
-        extra_refs = extras.split(',')
-        if extra_refs:
-            for env in refs:
-                for x in extra_refs:
-                    refs[env].append([x])
-    return refs
-
-
-def salt_refs(data, ret=None):
-    '''
-    Pull salt file references out of the states
-    '''
-    proto = 'salt://'
-    if ret is None:
-        ret = []
-    if isinstance(data, str):
-        if data.startswith(proto) and data not in ret:
-            ret.append(data)
-    if isinstance(data, list):
-        for comp in data:
-            salt_refs(comp, ret)
-    if isinstance(data, dict):
-        for comp in data:
-            salt_refs(data[comp], ret)
-    return ret
-
-
 def prep_trans_tar(file_client, chunks, file_refs, pillar=None):
     '''
     Generate the execution package from the saltenv file refs and a low state
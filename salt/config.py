@@ -181,6 +181,17 @@ VALID_OPTS = {
     # a master for remote execution.
     'use_master_when_local': bool,
 
+    # The number of files cache_files, cache_dir and cache_master download from
+    # the master at once
+    'file_client_concurrency': int,
+
+    # The size from which the cached copies of files updated on the master are
+    # updated by downloading the blocks which changed, False disables it
+    'file_delta_min_size': int,
+
+    # The master only computes the deltas of files up to this size
+    'file_delta_max_size': int,
+
     # A map of saltenvs and fileserver backend locations
     'file_roots': dict,
 
@@ -315,12 +326,31 @@ VALID_OPTS = {
     # Tells the highstate outputter to only report diffs of states that changed
     'state_output_diff': bool,
 
+    # Return the states which succeeded without changes in a compact form
+    'state_compact_returns': bool,
+
+    # Stream the results of state runs to the master every N chunks and/or
+    # every N seconds, 0 disables either
+    'state_stream_batch': int,
+    'state_stream_interval': int,
+
+    # Replace the streamed results by stubs on the minion
+    'state_stream_stubs': bool,
+
     # When true, states run in the order defined in an SLS file, unless requisites re-order them
     'state_auto_order': bool,
 
     # Fire events as state chunks are processed by the state compiler
     'state_events': bool,
 
+    # Request the hashes of all the salt:// files referenced by a state run from
+    # the master at once before the run starts
+    'state_prefetch_hashes': bool,
+
+    # Merge the chunks of a state run which can be aggregated into as few
+    # transactions as the requisites of the run allow
+    'state_aggregate_plan': bool,
+
     # The number of seconds a minion should wait before retry when attempting authentication
     'acceptance_wait_time': float,
 
@@ -462,6 +492,11 @@ VALID_OPTS = {
     'gitfs_env_whitelist': list,
     'gitfs_env_blacklist': list,
     'gitfs_ssl_verify': bool,
+
+    # The total size of the blobs kept in memory by each master process to serve
+    # the files of gitfs from, 0 disables it
+    'gitfs_blob_cache_size': int,
+
     'hgfs_remotes': list,
     'hgfs_mountpoint': str,
     'hgfs_root': str,
@@ -485,6 +520,19 @@ VALID_OPTS = {
     # Specify a list of external pillar systems to use
     'ext_pillar': list,
 
+    # The number of threads used to evaluate the ext_pillar sources
+    # concurrently. 1 evaluates them one after the other.
+    'ext_pillar_concurrency': int,
+
+    # The number of seconds a concurrently evaluated ext_pillar source may run
+    # before it is abandoned, and per source overrides of this value
+    'ext_pillar_timeout': float,
+    'ext_pillar_timeouts': dict,
+
+    # What to do when an ext_pillar source fails or times out. 'open' skips
+    # the source, 'closed' adds a pillar render error.
+    'ext_pillar_fail_mode': str,
+
     # Reserved for future use to version the pillar structure
     'pillar_version': int,
 
@@ -528,6 +576,10 @@ VALID_OPTS = {
     'fileserver_ignoresymlinks': bool,
     'fileserver_limit_traversal': bool,
 
+    # Watch the file_roots with inotify instead of walking them to list their files
+    # and detect their changes
+    'fileserver_inotify': bool,
+
     # The number of open files a daemon is allowed to have open. Frequently needs to be increased
     # higher than the system default in order to account for the way zeromq consumes file handles.
     'max_open_files': int,
@@ -558,6 +610,34 @@ VALID_OPTS = {
     # Specify whether the master should store end times for jobs as returns come in
     'job_cache_store_endtime': bool,
 
+    # Keep the mine data of all minions in memory in a dedicated process so that
+    # mine.get does not read the mine file of every targeted minion
+    'mine_store': bool,
+
+    # The number of seconds the MWorkers wait for an answer from the mine store
+    # before reading the mine files themselves
+    'mine_store_timeout': int,
+
+    # Write the master job cache from a dedicated process instead of from the
+    # MWorker which received the return
+    'job_cache_writer': bool,
+
+    # The number of returns which may be queued for the job cache writer before
+    # the MWorkers fall back to writing the job cache themselves
+    'job_cache_writer_hwm': int,
+
+    # The job cache writer writes returns in batches of this size, or after this
+    # many seconds, whichever comes first
+    'job_cache_writer_batch_size': int,
+    'job_cache_writer_batch_timeout': float,
+
+    # Journal the returns to disk as soon as the job cache writer receives them,
+    # so that the returns it did not write yet survive a crash of the writer
+    'job_cache_writer_durable': bool,
+
+    # How often, in seconds, the job cache writer fires its statistics event
+    'job_cache_writer_stats_interval': int,
+
     # The minion data cache is a cache of information about the minions stored on the master.
     # This information is primarily the pillar and grains data. The data is cached in the master
     # cachedir under the name of the minion and used to predetermine what minions are expected to
@@ -576,9 +656,18 @@ VALID_OPTS = {
     # The number of workers for the runner/wheel in the reactor
     'reactor_worker_threads': int,
 
-    # The queue size for workers in the reactor
+    # The queue size for workers in the reactor, both of the runner/wheel
+    # threads and of the reactor worker processes
     'reactor_worker_hwm': int,
 
+    # The number of processes rendering and executing reactions, events with
+    # the same tag are always handled by the same process
+    'reactor_workers': int,
+
+    # The interval in seconds at which the reactor worker queue depths are
+    # fired on the event bus, 0 disables it
+    'reactor_stats_interval': int,
+
     'serial': str,
     'search': str,
 
@@ -617,9 +706,37 @@ VALID_OPTS = {
     # Set a hard limit for the amount of memory modules can consume on a minion.
     'modules_max_memory': int,
 
+    # If this is set to True the package modules only query the packages named
+    # in the output of a transaction to update their cached list of installed
+    # packages, instead of listing all the installed packages again
+    'pkg_snapshot_incremental': bool,
+
     # The number of minutes between the minion refreshing its cache of grains
     'grains_refresh_every': int,
 
+    # Cache the return of every grain function separately, see grains_cache_ttl
+    'grains_func_cache': bool,
+
+    # A dict mapping grain function names (globs allowed) to the number of
+    # seconds their cached return is valid for. Grain functions not listed
+    # here use grains_cache_expiration.
+    'grains_cache_ttl': dict,
+
+    # Serve stale cached grains and regenerate them in a background thread
+    'grains_refresh_background': bool,
+
+    # The number of seconds a process waits at exit for a background grains
+    # refresh to finish
+    'grains_refresh_timeout': int,
+
+    # Run the grain functions in parallel in a pool of threads
+    'grains_parallel': bool,
+    'grains_parallel_workers': int,
+
+    # The number of seconds a grain function may run in parallel mode before
+    # it is skipped. 0 disables the timeout.
+    'grains_func_timeout': int,
+
     # Use lspci to gather system data for grains on a minion
     'enable_lspci': bool,
 
@@ -634,6 +751,10 @@ VALID_OPTS = {
     # If this is set to True the first newline after a Jinja block is removed
     'jinja_trim_blocks': bool,
 
+    # If this is set to True the compiled Jinja templates are kept on disk in
+    # the cachedir, and are only compiled again when their source changes
+    'jinja_bytecode_cache': bool,
+
     # FIXME Appears to be unused
     'minion_id_caching': bool,
 
@@ -676,6 +797,14 @@ VALID_OPTS = {
     # The length that the syndic event queue must hit before events are popped off and forwarded
     'syndic_jid_forward_cache_hwm': int,
 
+    # The number of returns of a job, or of events, after which the syndic
+    # forwards them without waiting for syndic_event_forward_timeout
+    'syndic_forward_batch_size': int,
+
+    # The interval in seconds at which the syndic fires its forwarding
+    # statistics, 0 disables them
+    'syndic_stats_interval': int,
+
     'ssh_passwd': str,
     'ssh_port': str,
     'ssh_sudo': bool,
@@ -781,10 +910,18 @@ DEFAULT_MINION_OPTS = {
     'cache_jobs': False,
     'grains_cache': False,
     'grains_cache_expiration': 300,
+    'grains_func_cache': False,
+    'grains_cache_ttl': {},
+    'grains_refresh_background': False,
+    'grains_refresh_timeout': 30,
+    'grains_parallel': False,
+    'grains_parallel_workers': 4,
+    'grains_func_timeout': 0,
     'conf_file': os.path.join(salt.syspaths.CONFIG_DIR, 'minion'),
     'sock_dir': os.path.join(salt.syspaths.SOCK_DIR, 'minion'),
     'backup_mode': '',
     'renderer': 'yaml_jinja',
+    'jinja_bytecode_cache': True,
     'failhard': False,
     'autoload_dynamic_modules': True,
     'environment': None,
@@ -797,6 +934,8 @@ DEFAULT_MINION_OPTS = {
     'top_file': '',
     'file_client': 'remote',
     'use_master_when_local': False,
+    'file_client_concurrency': 4,
+    'file_delta_min_size': False,
     'file_roots': {
         'base': [salt.syspaths.BASE_FILE_ROOTS_DIR,
                  salt.syspaths.SPM_FORMULA_PATH]
@@ -879,9 +1018,15 @@ DEFAULT_MINION_OPTS = {
     'state_verbose': True,
     'state_output': 'full',
     'state_output_diff': False,
+    'state_compact_returns': False,
+    'state_stream_batch': 0,
+    'state_stream_interval': 0,
+    'state_stream_stubs': True,
     'state_auto_order': True,
     'state_events': False,
     'state_aggregate': False,
+    'state_aggregate_plan': False,
+    'state_prefetch_hashes': True,
     'acceptance_wait_time': 10,
     'acceptance_wait_time_max': 0,
     'rejected_retry': False,
@@ -922,6 +1067,7 @@ DEFAULT_MINION_OPTS = {
     'tcp_keepalive_cnt': -1,
     'tcp_keepalive_intvl': -1,
     'modules_max_memory': -1,
+    'pkg_snapshot_incremental': True,
     'grains_refresh_every': 0,
     'minion_id_caching': True,
     'keysize': 2048,
@@ -1012,6 +1158,7 @@ DEFAULT_MASTER_OPTS = {
     'gitfs_env_whitelist': [],
     'gitfs_env_blacklist': [],
     'gitfs_ssl_verify': False,
+    'gitfs_blob_cache_size': 16777216,
     'hgfs_remotes': [],
     'hgfs_mountpoint': '',
     'hgfs_root': '',
@@ -1035,6 +1182,10 @@ DEFAULT_MASTER_OPTS = {
     'minionfs_whitelist': [],
     'minionfs_blacklist': [],
     'ext_pillar': [],
+    'ext_pillar_concurrency': 1,
+    'ext_pillar_timeout': 0,
+    'ext_pillar_timeouts': {},
+    'ext_pillar_fail_mode': 'open',
     'pillar_version': 2,
     'pillar_opts': False,
     'pillar_safe_render_error': True,
@@ -1054,12 +1205,14 @@ DEFAULT_MASTER_OPTS = {
     'file_recv': False,
     'file_recv_max_size': 100,
     'file_buffer_size': 1048576,
+    'file_delta_max_size': 67108864,
     'file_ignore_regex': None,
     'file_ignore_glob': None,
     'fileserver_backend': ['roots'],
     'fileserver_followsymlinks': True,
     'fileserver_ignoresymlinks': False,
     'fileserver_limit_traversal': False,
+    'fileserver_inotify': True,
     'max_open_files': 100000,
     'hash_type': 'md5',
     'conf_file': os.path.join(salt.syspaths.CONFIG_DIR, 'master'),
@@ -1075,6 +1228,14 @@ DEFAULT_MASTER_OPTS = {
     'ext_job_cache': '',
     'master_job_cache': 'local_cache',
     'job_cache_store_endtime': False,
+    'mine_store': False,
+    'mine_store_timeout': 5,
+    'job_cache_writer': False,
+    'job_cache_writer_hwm': 10000,
+    'job_cache_writer_batch_size': 100,
+    'job_cache_writer_batch_timeout': 0.5,
+    'job_cache_writer_durable': False,
+    'job_cache_writer_stats_interval': 60,
     'minion_data_cache': True,
     'enforce_mine_cache': False,
     'ipc_mode': _DFLT_IPC_MODE,
@@ -1098,6 +1259,8 @@ DEFAULT_MASTER_OPTS = {
     'reactor_refresh_interval': 60,
     'reactor_worker_threads': 10,
     'reactor_worker_hwm': 10000,
+    'reactor_workers': 1,
+    'reactor_stats_interval': 60,
     'event_return': '',
     'event_return_queue': 0,
     'event_return_whitelist': [],
@@ -1109,6 +1272,7 @@ DEFAULT_MASTER_OPTS = {
     'state_auto_order': True,
     'state_events': False,
     'state_aggregate': False,
+    'state_aggregate_plan': False,
     'search': '',
     'search_index_interval': 3600,
     'loop_interval': 60,
@@ -1137,6 +1301,7 @@ DEFAULT_MASTER_OPTS = {
     'syndic_wait': 5,
     'jinja_lstrip_blocks': False,
     'jinja_trim_blocks': False,
+    'jinja_bytecode_cache': True,
     'sign_pub_messages': False,
     'keysize': 2048,
     'transport': 'zeromq',
@@ -1145,6 +1310,8 @@ DEFAULT_MASTER_OPTS = {
     'syndic_event_forward_timeout': 0.5,
     'syndic_max_event_process_time': 0.5,
     'syndic_jid_forward_cache_hwm': 100,
+    'syndic_forward_batch_size': 1000,
+    'syndic_stats_interval': 60,
     'ssh_passwd': '',
     'ssh_port': '22',
     'ssh_sudo': False,
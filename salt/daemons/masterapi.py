@@ -29,6 +29,7 @@ import salt.search
 import salt.key
 import salt.fileserver
 import salt.utils.atomicfile
+import salt.utils.cache
 import salt.utils.event
 import salt.utils.verify
 import salt.utils.minions
@@ -412,6 +413,9 @@ class RemoteFuncs(object):
                 states=False,
                 rend=False)
         self.__setup_fileserver()
+        self.mine_store = None
+        if self.opts.get('mine_store') and self.opts['ipc_mode'] != 'tcp':
+            self.mine_store = salt.utils.cache.mine_store_cli(self.opts)
 
     def __setup_fileserver(self):
         '''
@@ -420,7 +424,10 @@ class RemoteFuncs(object):
         fs_ = salt.fileserver.Fileserver(self.opts)
         self._serve_file = fs_.serve_file
         self._file_hash = fs_.file_hash
+        self._file_delta = fs_.file_delta
+        self._file_hashes = fs_.file_hashes
         self._file_list = fs_.file_list
+        self._file_manifest = fs_.file_manifest
         self._file_list_emptydirs = fs_.file_list_emptydirs
         self._dir_list = fs_.dir_list
         self._symlink_list = fs_.symlink_list
@@ -488,6 +495,7 @@ class RemoteFuncs(object):
         mopts['state_auto_order'] = self.opts['state_auto_order']
         mopts['state_events'] = self.opts['state_events']
         mopts['state_aggregate'] = self.opts['state_aggregate']
+        mopts['state_aggregate_plan'] = self.opts['state_aggregate_plan']
         mopts['jinja_lstrip_blocks'] = self.opts['jinja_lstrip_blocks']
         mopts['jinja_trim_blocks'] = self.opts['jinja_trim_blocks']
         return mopts
@@ -560,6 +568,10 @@ class RemoteFuncs(object):
                 match_type,
                 greedy=False
                 )
+        if self.mine_store is not None:
+            stored = self.mine_store.get(load['fun'], minions)
+            if stored is not None:
+                return stored
         for minion in minions:
             mine = os.path.join(
                     self.opts['cachedir'],
@@ -596,6 +608,8 @@ class RemoteFuncs(object):
                         load['data'] = new
             with salt.utils.fopen(datap, 'w+b') as fp_:
                 fp_.write(self.serial.dumps(load['data']))
+            if self.mine_store is not None:
+                self.mine_store.update(load['id'], load['data'])
         return True
 
     def _mine_delete(self, load):
@@ -619,6 +633,8 @@ class RemoteFuncs(object):
                                 fp_.write(self.serial.dumps(mine_data))
                 except OSError:
                     return False
+            if self.mine_store is not None:
+                self.mine_store.delete(load['id'], load['fun'])
         return True
 
     def _mine_flush(self, load, skip_verify=False):
@@ -637,6 +653,8 @@ class RemoteFuncs(object):
                     os.remove(datap)
                 except OSError:
                     return False
+            if self.mine_store is not None:
+                self.mine_store.flush(load['id'])
         return True
 
     def _file_recv(self, load):
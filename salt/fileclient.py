@@ -6,11 +6,15 @@ from __future__ import absolute_import
 
 # Import python libs
 import contextlib
+import copy
 import logging
 import hashlib
 import os
 import shutil
 import ftplib
+import tempfile
+import threading
+from multiprocessing.pool import ThreadPool
 
 # Import salt libs
 from salt.exceptions import (
@@ -23,6 +27,8 @@ import salt.payload
 import salt.transport
 import salt.fileserver
 import salt.utils
+import salt.utils.atomicfile
+import salt.utils.delta
 import salt.utils.files
 import salt.utils.templates
 import salt.utils.url
@@ -33,6 +39,7 @@ from salt.utils.locales import sdecode
 from salt.utils.openstack.swift import SaltSwift
 
 # pylint: disable=no-name-in-module,import-error
+import salt.ext.six as six
 import salt.ext.six.moves.BaseHTTPServer as BaseHTTPServer
 from salt.ext.six.moves.urllib.error import HTTPError, URLError
 from salt.ext.six.moves.urllib.parse import urlparse, urlunparse
@@ -172,12 +179,9 @@ class Client(object):
             # Backwards compatibility
             saltenv = env
 
-        ret = []
         if isinstance(paths, str):
             paths = paths.split(',')
-        for path in paths:
-            ret.append(self.cache_file(path, saltenv))
-        return ret
+        return self._cache_urls(paths, saltenv)
 
     def cache_master(self, saltenv='base', env=None):
         '''
@@ -193,10 +197,16 @@ class Client(object):
             # Backwards compatibility
             saltenv = env
 
-        ret = []
-        for path in self.file_list(saltenv):
-            ret.append(self.cache_file(salt.utils.url.create(path), saltenv))
-        return ret
+        manifest = self._file_manifest(saltenv)
+        if manifest is None:
+            paths = self.file_list(saltenv)
+        else:
+            paths = sorted(manifest)
+        return self._cache_urls(
+            [salt.utils.url.create(path) for path in paths],
+            saltenv,
+            manifest
+        )
 
     def cache_dir(self, path, saltenv='base', include_empty=False,
                   include_pat=None, exclude_pat=None, env=None):
@@ -229,13 +239,20 @@ class Client(object):
         )
         # go through the list of all files finding ones that are in
         # the target directory and caching them
-        for fn_ in self.file_list(saltenv):
+        manifest = self._file_manifest(saltenv, path)
+        if manifest is None:
+            files = self.file_list(saltenv)
+        else:
+            files = sorted(manifest)
+        urls = []
+        for fn_ in files:
             if fn_.strip() and fn_.startswith(path):
                 if salt.utils.check_include_exclude(
                         fn_, include_pat, exclude_pat):
-                    fn_ = self.cache_file(salt.utils.url.create(fn_), saltenv)
-                    if fn_:
-                        ret.append(fn_)
+                    urls.append(salt.utils.url.create(fn_))
+        ret.extend(
+            fn_ for fn_ in self._cache_urls(urls, saltenv, manifest) if fn_
+        )
 
         if include_empty:
             # Break up the path into a list containing the bottom-level
@@ -260,6 +277,34 @@ class Client(object):
                     ret.append(minion_dir)
         return ret
 
+    def _file_manifest(self, saltenv='base', prefix=''):
+        '''
+        Return the hashes of the files under prefix on the file server by
+        path, None if the file server can not list them in one request
+        '''
+        return None
+
+    def hash_files(self, paths, saltenv='base'):
+        '''
+        Return the hashes of a list of files, by path
+        '''
+        return dict((path, self.hash_file(path, saltenv)) for path in paths)
+
+    def prefetch_hashes(self, paths, saltenv='base'):
+        '''
+        Look up the hashes of a list of files for the following calls to
+        hash_file and return them, the file clients which do not ask the
+        master do not keep them
+        '''
+        return self.hash_files(paths, saltenv)
+
+    def _cache_urls(self, urls, saltenv='base', manifest=None):
+        '''
+        Cache a list of files, the files of the manifest are only downloaded
+        if the hash of their cached copy differs
+        '''
+        return [self.cache_file(url, saltenv) for url in urls]
+
     def cache_local_file(self, path, **kwargs):
         '''
         Cache a local file on the minion in the localfiles cache
@@ -946,6 +991,11 @@ class RemoteClient(Client):
     '''
     Interact with the salt master file server.
     '''
+    # Whether files can be fetched over several channels at once
+    parallel = True
+    # Whether updated files are fetched as deltas of the cached copies
+    delta = True
+
     def __init__(self, opts):
         Client.__init__(self, opts)
         self.channel = salt.transport.Channel.factory(self.opts)
@@ -953,6 +1003,8 @@ class RemoteClient(Client):
             self.auth = self.channel.auth
         else:
             self.auth = ''
+        # Prefetched hashes of files on the master by saltenv and path
+        self.hash_cache = {}
 
     def _refresh_channel(self):
         '''
@@ -1030,7 +1082,84 @@ class RemoteClient(Client):
                     )
                 )
                 return dest2check
+            if self._fetch_delta(path, dest2check, saltenv, hash_server, gzip):
+                return dest2check
+
+        return self._fetch_file(path, dest, makedirs, saltenv, gzip)
+
+    def _fetch_delta(self, path, dest, saltenv='base', hash_server=None,
+                     gzip=None):
+        '''
+        Update the local copy of a file on the master, downloading only the
+        blocks which changed. Return False when the whole file has to be
+        downloaded.
+        '''
+        min_size = self.opts.get('file_delta_min_size', False)
+        if not self.delta or min_size is False \
+                or not isinstance(hash_server, dict):
+            return False
+        size = os.path.getsize(dest)
+        if size < min_size or hash_server.get('size', size) < min_size:
+            # Small files are downloaded faster as a whole
+            return False
 
+        block_size = salt.utils.delta.block_size(size)
+        with salt.utils.fopen(dest, 'rb') as fp_:
+            sigs = salt.utils.delta.signatures(fp_, block_size)
+        load = {'path': self._check_proto(path),
+                'saltenv': saltenv,
+                'block_size': block_size,
+                'signatures': sigs,
+                'cmd': '_file_delta'}
+        if gzip:
+            load['gzip'] = int(gzip)
+        data = self.channel.send(load)
+        if not isinstance(data, dict) or data.get('delta') is None:
+            # Masters older than the minion do not know the command, or the
+            # file changed too much
+            return False
+        ops = data['delta']
+        if data.get('gzip', None):
+            ops = [op_ if isinstance(op_, (list, tuple))
+                   else salt.utils.gzip_util.uncompress(op_)
+                   for op_ in ops]
+
+        fd_, tmp = tempfile.mkstemp(dir=os.path.dirname(dest))
+        try:
+            with os.fdopen(fd_, 'wb') as out, \
+                    salt.utils.fopen(dest, 'rb') as basis:
+                salt.utils.delta.patch(basis, ops, block_size, out)
+            hsum = salt.utils.get_hash(tmp, hash_server.get('hash_type', 'md5'))
+            if hsum != hash_server.get('hsum'):
+                log.warn('Bad delta of file {0}, downloading the whole '
+                         'file'.format(path))
+                return False
+            shutil.copymode(dest, tmp)
+            salt.utils.atomicfile.atomic_rename(tmp, dest)
+        except (IOError, OSError, TypeError, ValueError) as exc:
+            log.warn('Unable to apply the delta of file {0}: {1}'.format(
+                path, exc))
+            return False
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        log.info(
+            'Fetching file from saltenv {0!r}, ** done ** {1!r}, {2} bytes '
+            'changed'.format(
+                saltenv,
+                path,
+                sum(len(op_) for op_ in ops
+                    if not isinstance(op_, (list, tuple)))
+            )
+        )
+        return True
+
+    def _fetch_file(self, path, dest='', makedirs=False, saltenv='base',
+                    gzip=None):
+        '''
+        Download a file from the salt-master, without comparing it with a
+        local copy first
+        '''
         log.debug(
             'Fetching file from saltenv {0!r}, ** attempting ** {1!r}'.format(
                 saltenv, path
@@ -1121,6 +1250,91 @@ class RemoteClient(Client):
 
         return dest
 
+    def _file_manifest(self, saltenv='base', prefix=''):
+        '''
+        Return the hashes of the files under prefix on the master by path,
+        None if the master does not support the request
+        '''
+        load = {'saltenv': saltenv,
+                'prefix': prefix,
+                'cmd': '_file_manifest'}
+        ret = self.channel.send(load)
+        if not isinstance(ret, dict):
+            # Masters older than the minion do not know the command
+            return None
+        return ret
+
+    def _cache_urls(self, urls, saltenv='base', manifest=None):
+        '''
+        Cache a list of files, downloading them over up to
+        ``file_client_concurrency`` channels at once. The files of the
+        manifest are only downloaded if the hash of their cached copy differs,
+        without asking the master for their hash again.
+        '''
+        jobs = []
+        for url in urls:
+            path, senv = salt.utils.url.split_env(url)
+            if not path.startswith('salt://'):
+                jobs.append((url, saltenv, None, None))
+                continue
+            senv = senv or saltenv
+            rel_path = self._check_proto(path)
+            # The cache directories are created here, _cache_loc changes the
+            # umask of the process which must not happen in the threads
+            with self._cache_loc(rel_path, senv) as dest:
+                pass
+            hsum = None
+            if manifest is not None and senv == saltenv:
+                hsum = manifest.get(rel_path)
+            jobs.append((path, senv, dest, hsum))
+
+        workers = min(int(self.opts.get('file_client_concurrency', 1) or 1),
+                      len(jobs))
+        if not self.parallel or workers < 2:
+            return [self._cache_job(self, job) for job in jobs]
+
+        local = threading.local()
+        channels = []
+
+        def _run(job):
+            client = getattr(local, 'client', None)
+            if client is None:
+                # Channels can not be shared between threads
+                client = copy.copy(self)
+                client.channel = salt.transport.Channel.factory(self.opts)
+                channels.append(client.channel)
+                local.client = client
+            return self._cache_job(client, job)
+
+        pool = ThreadPool(workers)
+        try:
+            return pool.map(_run, jobs)
+        finally:
+            pool.close()
+            pool.join()
+            for channel in channels:
+                # The channels of the transports which can not be closed are
+                # destroyed with their last reference
+                if hasattr(channel, 'close'):
+                    channel.close()
+            del channels[:]
+
+    @staticmethod
+    def _cache_job(client, job):
+        path, saltenv, dest, hsum = job
+        if dest is None:
+            return client.cache_file(path, saltenv)
+        if hsum is None:
+            return client.get_file(path, dest, True, saltenv)
+        if os.path.isfile(dest) and salt.utils.get_hash(
+                dest, hsum.get('hash_type', 'md5')) == hsum.get('hsum'):
+            log.debug(
+                'Fetching file from saltenv {0!r}, ** skipped ** '
+                'latest already in cache {1!r}'.format(saltenv, path)
+            )
+            return dest
+        return client._fetch_file(path, dest, True, saltenv)
+
     def file_list(self, saltenv='base', prefix='', env=None):
         '''
         List the files on the master
@@ -1218,11 +1432,58 @@ class RemoteClient(Client):
                     path, form=hash_type)
                 ret['hash_type'] = hash_type
                 return ret
+        if (saltenv, path) in self.hash_cache:
+            return copy.copy(self.hash_cache[(saltenv, path)])
         load = {'path': path,
                 'saltenv': saltenv,
                 'cmd': '_file_hash'}
         return self.channel.send(load)
 
+    def hash_files(self, paths, saltenv='base'):
+        '''
+        Return the hashes of a list of files by path, the hashes of the files
+        on the master are requested at once for each salt environment
+        '''
+        ret = {}
+        by_env = {}
+        for path in paths:
+            if not path.startswith('salt://'):
+                ret[path] = self.hash_file(path, saltenv)
+                continue
+            rel_path, senv = salt.utils.url.parse(path)
+            by_env.setdefault(senv or saltenv, {}).setdefault(
+                rel_path, []
+            ).append(path)
+        for senv, rel_paths in six.iteritems(by_env):
+            load = {'paths': sorted(rel_paths),
+                    'saltenv': senv,
+                    'cmd': '_file_hashes'}
+            hashes = self.channel.send(load)
+            if not isinstance(hashes, dict):
+                # Masters older than the minion do not know the command
+                hashes = dict(
+                    (rel_path, self.hash_file(salt.utils.url.create(rel_path),
+                                              senv))
+                    for rel_path in rel_paths
+                )
+            for rel_path, urls in six.iteritems(rel_paths):
+                for url in urls:
+                    ret[url] = hashes.get(rel_path, '')
+        return ret
+
+    def prefetch_hashes(self, paths, saltenv='base'):
+        '''
+        Look up the hashes of a list of files on the master at once, the
+        following calls to hash_file for these files are answered without
+        asking the master again
+        '''
+        ret = self.hash_files(paths, saltenv)
+        for path, hsum in six.iteritems(ret):
+            if path.startswith('salt://'):
+                rel_path, senv = salt.utils.url.parse(path)
+                self.hash_cache[(senv or saltenv, rel_path)] = hsum
+        return ret
+
     def list_env(self, saltenv='base', env=None):
         '''
         Return a list of the files in the file server's specified environment
@@ -1273,10 +1534,15 @@ class FSClient(RemoteClient):
     A local client that uses the RemoteClient but substitutes the channel for
     the FSChan object
     '''
+    # The local file server is not thread safe
+    parallel = False
+    delta = False
+
     def __init__(self, opts):  # pylint: disable=W0231
         self.opts = opts
         self.channel = salt.fileserver.FSChan(opts)
         self.auth = DumbAuth()
+        self.hash_cache = {}
 
 
 class DumbAuth(object):
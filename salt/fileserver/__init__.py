@@ -15,7 +15,11 @@ import time
 # Import salt libs
 import salt.loader
 import salt.utils
+import salt.utils.delta
+import salt.utils.gzip_util
 import salt.utils.locales
+import salt.utils.pathtable
+import salt.utils.url
 
 # Import 3rd-party libs
 import salt.ext.six as six
@@ -23,6 +27,12 @@ import salt.ext.six as six
 
 log = logging.getLogger(__name__)
 
+# The file list caches mapped by this process, by path
+_FILE_LIST_TABLES = {}
+
+# How long a process may hold the lock of a file list cache
+_FILE_LIST_LOCK_TIMEOUT = 15 * 60
+
 
 def _unlock_cache(w_lock):
     '''
@@ -96,61 +106,94 @@ def wait_lock(lk_fn, dest, wait_timeout=0):
     return False
 
 
-def check_file_list_cache(opts, form, list_cache, w_lock):
+def _file_list_table(list_cache):
+    '''
+    Return the file list cache mapped into memory and its age, or None when
+    there is no valid cache
+    '''
+    table = _FILE_LIST_TABLES.get(list_cache)
+    try:
+        stat = os.stat(list_cache)
+    except OSError:
+        stat = None
+    if table is not None and (stat is None or table.key != (
+            stat.st_ino, stat.st_mtime, stat.st_size)):
+        # The cache was replaced, the lists already returned are copies
+        del _FILE_LIST_TABLES[list_cache]
+        table.close()
+        table = None
+    if stat is None:
+        return None, None
+    if table is None:
+        try:
+            table = salt.utils.pathtable.PathTable(list_cache)
+        except (IOError, OSError, ValueError) as exc:
+            # Missing, or written by an older version of Salt
+            log.trace('Unable to map {0}: {1}'.format(list_cache, exc))
+            return None, None
+        _FILE_LIST_TABLES[list_cache] = table
+    return table, time.time() - table.mtime
+
+
+def _stale_lock(w_lock):
+    '''
+    Return True if the process holding a lock died or hangs
+    '''
+    try:
+        return time.time() - os.path.getmtime(w_lock) > _FILE_LIST_LOCK_TIMEOUT
+    except OSError:
+        return False
+
+
+def check_file_list_cache(opts, form, list_cache, w_lock, prefix=''):
     '''
     Checks the cache file to see if there is a new enough file list cache, and
     returns the match (if found, along with booleans used by the fileserver
     backend to determine if the cache needs to be refreshed/written).
+
+    The file list caches are memory mapped and shared by the processes reading
+    them. While a process refreshes an expired cache, the others keep
+    returning the expired one until the new one replaces it. Only the paths
+    starting with ``prefix`` are returned.
     '''
-    refresh_cache = False
-    save_cache = True
-    serial = salt.payload.Serial(opts)
-    wait_lock(w_lock, list_cache, 5 * 60)
-    if not os.path.isfile(list_cache) and _lock_cache(w_lock):
-        refresh_cache = True
-    else:
-        attempt = 0
-        while attempt < 11:
-            try:
-                if os.path.exists(w_lock):
-                    # wait for a filelist lock for max 15min
-                    wait_lock(w_lock, list_cache, 15 * 60)
-                if os.path.exists(list_cache):
-                    # calculate filelist age is possible
-                    cache_stat = os.stat(list_cache)
-                    age = time.time() - cache_stat.st_mtime
-                else:
-                    # if filelist does not exists yet, mark it as expired
-                    age = opts.get('fileserver_list_cache_time', 30) + 1
-                if age < opts.get('fileserver_list_cache_time', 30):
-                    # Young enough! Load this sucker up!
-                    with salt.utils.fopen(list_cache, 'rb') as fp_:
-                        log.trace('Returning file_lists cache data from '
-                                  '{0}'.format(list_cache))
-                        return serial.load(fp_).get(form, []), False, False
-                elif _lock_cache(w_lock):
-                    # Set the w_lock and go
-                    refresh_cache = True
-                    break
-            except Exception:
-                time.sleep(0.2)
-                attempt += 1
+    cache_time = opts.get('fileserver_list_cache_time', 30)
+    timeout = time.time() + _FILE_LIST_LOCK_TIMEOUT
+    while True:
+        try:
+            table, age = _file_list_table(list_cache)
+            if table is not None and age < cache_time:
+                # Young enough!
+                log.trace('Returning file_lists cache data from '
+                          '{0}'.format(list_cache))
+                return table.get(form, prefix.strip('/')), False, False
+            if _lock_cache(w_lock):
+                # Set the w_lock and go
+                return None, True, True
+            if _stale_lock(w_lock):
+                _unlock_cache(w_lock)
                 continue
-        if attempt > 10:
-            save_cache = False
-            refresh_cache = True
-    return None, refresh_cache, save_cache
+            if table is not None:
+                # Another process is refreshing the cache
+                return table.get(form, prefix.strip('/')), False, False
+        except (IOError, OSError) as exc:
+            log.trace('Unable to use the file list cache {0}: {1}'.format(
+                list_cache, exc))
+            return None, True, False
+        if time.time() > timeout:
+            return None, True, False
+        # Another process is writing the first cache
+        time.sleep(0.2)
 
 
 def write_file_list_cache(opts, data, list_cache, w_lock):
     '''
-    Checks the cache file to see if there is a new enough file list cache, and
-    returns the match (if found, along with booleans used by the fileserver
-    backend to determine if the cache needs to be refreshed/written).
+    Write the file lists of an environment to the file list cache, replacing
+    the cache at once for the processes reading it, and release the lock
+    taken by check_file_list_cache.
     '''
-    serial = salt.payload.Serial(opts)
-    with salt.utils.fopen(list_cache, 'w+b') as fp_:
-        fp_.write(serial.dumps(data))
+    try:
+        salt.utils.pathtable.write(list_cache, data)
+    finally:
         _unlock_cache(w_lock)
         log.trace('Lockfile {0} removed'.format(w_lock))
 
@@ -450,6 +493,18 @@ class Fileserver(object):
                 log.debug('Updating {0} fileserver cache'.format(fsb))
                 self.servers[fstr]()
 
+    def watch(self, back=None):
+        '''
+        Start watching the enabled fileserver backends which support the
+        watch function for changes
+        '''
+        back = self._gen_back(back)
+        for fsb in back:
+            fstr = '{0}.watch'.format(fsb)
+            if fstr in self.servers:
+                log.debug('Watching {0} fileserver backend'.format(fsb))
+                self.servers[fstr]()
+
     def envs(self, back=None, sources=False):
         '''
         Return the environments for the named backend or all backends
@@ -555,6 +610,74 @@ class Fileserver(object):
             return self.servers[fstr](load, fnd)
         return ret
 
+    def file_delta(self, load):
+        '''
+        Return the operations rebuilding a file from the blocks of an older
+        copy, described by the signatures of its blocks. No delta is returned
+        when sending the whole file is cheaper.
+        '''
+        ret = {'delta': None,
+               'dest': ''}
+        if 'env' in load:
+            salt.utils.warn_until(
+                'Boron',
+                'Passing a salt environment should be done using \'saltenv\' '
+                'not \'env\'. This functionality will be removed in Salt '
+                'Boron.'
+            )
+            load['saltenv'] = load.pop('env')
+
+        if 'path' not in load or 'saltenv' not in load \
+                or 'signatures' not in load or 'block_size' not in load:
+            return ret
+        if not isinstance(load['saltenv'], six.string_types):
+            load['saltenv'] = six.text_type(load['saltenv'])
+        try:
+            block_size = int(load['block_size'])
+        except (TypeError, ValueError):
+            return ret
+        if block_size < salt.utils.delta.MIN_BLOCK_SIZE \
+                or not isinstance(load['signatures'], list):
+            return ret
+
+        fnd = self.find_file(salt.utils.locales.sdecode(load['path']),
+                load['saltenv'])
+        if not fnd.get('back') or not fnd.get('path') \
+                or not os.path.isfile(fnd['path']):
+            return ret
+        ret['dest'] = fnd['rel']
+        try:
+            with salt.utils.fopen(fnd['path'], 'rb') as fp_:
+                size = os.fstat(fp_.fileno()).st_size
+                if size > self.opts.get('file_delta_max_size', 67108864):
+                    return ret
+                # Give up when more than half of the file changed, or early
+                # when it does not look like the older copy at all
+                ops = salt.utils.delta.delta(
+                    fp_,
+                    load['signatures'],
+                    block_size,
+                    min(size // 2, salt.utils.delta.MAX_LITERAL),
+                    salt.utils.delta.MAX_MISS_BLOCKS
+                )
+        except (IOError, OSError, TypeError, ValueError) as exc:
+            log.debug(
+                'Unable to compute the delta of {0}: {1}'.format(
+                    fnd['path'], exc
+                )
+            )
+            return ret
+        if ops is None:
+            return ret
+        gzip = load.get('gzip', None)
+        if gzip:
+            ops = [op_ if isinstance(op_, list)
+                   else salt.utils.gzip_util.compress(op_, gzip)
+                   for op_ in ops]
+            ret['gzip'] = gzip
+        ret['delta'] = ops
+        return ret
+
     def file_hash(self, load):
         '''
         Return the hash of a given file
@@ -582,6 +705,83 @@ class Fileserver(object):
             return self.servers[fstr](load, fnd)
         return ''
 
+    def file_hashes(self, load):
+        '''
+        Return the hashes and the size and modification time of a list of
+        files, by path. Files which can not be found map to an empty string.
+        '''
+        if 'env' in load:
+            salt.utils.warn_until(
+                'Boron',
+                'Passing a salt environment should be done using \'saltenv\' '
+                'not \'env\'. This functionality will be removed in Salt '
+                'Boron.'
+            )
+            load['saltenv'] = load.pop('env')
+
+        ret = {}
+        if 'paths' not in load or 'saltenv' not in load:
+            return ret
+        if not isinstance(load['saltenv'], six.string_types):
+            load['saltenv'] = six.text_type(load['saltenv'])
+
+        for path in load['paths']:
+            ret[path] = ''
+            fnd = self.find_file(salt.utils.locales.sdecode(path),
+                    load['saltenv'])
+            if not fnd.get('back'):
+                continue
+            fstr = '{0}.file_hash'.format(fnd['back'])
+            if fstr not in self.servers:
+                continue
+            hsum = self.servers[fstr](
+                {'path': path, 'saltenv': load['saltenv']}, fnd
+            )
+            if not hsum:
+                continue
+            hsum = dict(hsum)
+            try:
+                stat = os.stat(fnd['path'])
+                hsum['size'] = stat.st_size
+                hsum['mtime'] = stat.st_mtime
+            except (OSError, TypeError):
+                pass
+            ret[path] = hsum
+        return ret
+
+    def file_manifest(self, load):
+        '''
+        Return the hashes of the files of an environment, or of the files
+        under the passed prefix, by path
+        '''
+        if 'env' in load:
+            salt.utils.warn_until(
+                'Boron',
+                'Passing a salt environment should be done using \'saltenv\' '
+                'not \'env\'. This functionality will be removed in Salt '
+                'Boron.'
+            )
+            load['saltenv'] = load.pop('env')
+
+        ret = {}
+        if 'saltenv' not in load:
+            return ret
+        if not isinstance(load['saltenv'], six.string_types):
+            load['saltenv'] = six.text_type(load['saltenv'])
+
+        for path in self.file_list(dict(load)):
+            fnd = self.find_file(salt.utils.url.escape(path), load['saltenv'])
+            if not fnd.get('back'):
+                continue
+            fstr = '{0}.file_hash'.format(fnd['back'])
+            if fstr in self.servers:
+                hsum = self.servers[fstr](
+                    {'path': path, 'saltenv': load['saltenv']}, fnd
+                )
+                if hsum:
+                    ret[path] = hsum
+        return ret
+
     def file_list(self, load):
         '''
         Return a list of files from the dominant environment
@@ -14,22 +14,35 @@ be in the :conf_master:`fileserver_backend` list to enable this backend.
 
 Fileserver environments are defined using the :conf_master:`file_roots`
 configuration option.
+
+When pyinotify is installed, the Maintenance process of the master watches the
+``file_roots`` with inotify and keeps the file list caches of the other
+processes up to date, instead of the processes walking the ``file_roots``, see
+:conf_master:`fileserver_inotify`.
 '''
 from __future__ import absolute_import
 
 # Import python libs
 import os
+import time
 import errno
 import logging
+import threading
 
 # Import salt libs
 import salt.fileserver
 import salt.utils
+import salt.utils.pathtable
+import salt.utils.treewatch
 from salt.utils.event import tagify
 import salt.ext.six as six
 
 log = logging.getLogger(__name__)
 
+# The index of the file_roots watched with inotify by watch() in this process
+_TREE = {}
+_TREE_LOCK = threading.Lock()
+
 
 def find_file(path, saltenv='base', env=None, **kwargs):
     '''
@@ -111,53 +124,208 @@ def serve_file(load, fnd):
     return ret
 
 
-def update():
+def _tree():
     '''
-    When we are asked to update (regular interval) lets reap the cache
+    Return the index of the file_roots watched by watch() in this process, or
+    None when the file_roots have to be walked
     '''
-    try:
-        salt.fileserver.reap_fileserver_cache_dir(
-            os.path.join(__opts__['cachedir'], 'roots/hash'),
-            find_file
+    tree = _TREE.get('tree')
+    if tree is None or not tree.watching:
+        return None
+    return tree
+
+
+def watch():
+    '''
+    Watch the file_roots with inotify in a thread of this process, and keep
+    the file list caches of the saltenvs up to date with the changes, so that
+    the other processes read the caches instead of walking the file_roots.
+    The master watches them in its Maintenance process.
+    '''
+    if not __opts__.get('fileserver_inotify', True) \
+            or not salt.utils.treewatch.HAS_PYINOTIFY:
+        return
+    roots = set()
+    for path_list in six.itervalues(__opts__['file_roots']):
+        roots.update(os.path.normpath(x) for x in path_list)
+    with _TREE_LOCK:
+        tree = _TREE.get('tree')
+        if tree is not None and tree.watching \
+                and tree.roots == sorted(roots):
+            return
+        if tree is not None:
+            tree.close()
+        tree = salt.utils.treewatch.TreeWatch(
+            roots,
+            followlinks=__opts__['fileserver_followsymlinks']
         )
-    except (IOError, OSError):
-        # Hash file won't exist if no files have yet been served up
-        pass
+        _TREE.clear()
+        _TREE['tree'] = tree
+        _TREE['new'] = True
+    if not tree.watching:
+        return
+    pending = not _write_tree_lists(tree)
+    thread = threading.Thread(target=_watch_loop, args=(tree, pending),
+                              name='roots-watch')
+    thread.daemon = True
+    thread.start()
+
+
+def _watch_loop(tree, pending=False):
+    '''
+    Apply the changes reported by inotify to the index and write the file
+    list caches of the saltenvs when they changed, or when ``pending`` they
+    could not all be written yet. The caches are touched before they expire,
+    so that the readers keep using them while nothing changes, and expire
+    once the file_roots are not watched anymore.
+    '''
+    refresh = max(1, __opts__.get('fileserver_list_cache_time', 30) / 2.0)
+    written = time.time()
+    while True:
+        tree.wait(1)
+        # Stop as soon as the file_roots are watched by another tree or not
+        # at all anymore, before touching the index of this one
+        if _TREE.get('tree') is not tree or not tree.watching:
+            break
+        with _TREE_LOCK:
+            changed = tree.poll()
+        if not tree.watching:
+            break
+        if changed or pending:
+            pending = not _write_tree_lists(tree)
+            written = time.time()
+        elif time.time() - written >= refresh:
+            _write_tree_lists(tree, touch=True)
+            written = time.time()
+
+
+def _list_cache(saltenv):
+    '''
+    Return the paths of the file list cache of a saltenv and of its lock
+    '''
+    list_cachedir = os.path.join(__opts__['cachedir'], 'file_lists/roots')
+    return (os.path.join(list_cachedir, '{0}.p'.format(saltenv)),
+            os.path.join(list_cachedir, '.{0}.w'.format(saltenv)))
 
-    mtime_map_path = os.path.join(__opts__['cachedir'], 'roots/mtime_map')
-    # data to send on event
-    data = {'changed': False,
-            'backend': 'roots'}
 
-    old_mtime_map = {}
-    # if you have an old map, load that
+def _write_tree_lists(tree, touch=False):
+    '''
+    Write the file list caches of all saltenvs from the index of the
+    file_roots, only refresh their modification time if ``touch`` is set.
+    Return False when the cache of a saltenv was being written by another
+    process, the caller has to write the caches again.
+    '''
+    ret = True
+    # The file_roots may be replaced while the caches are written
+    for saltenv in list(__opts__['file_roots']):
+        list_cache, w_lock = _list_cache(saltenv)
+        try:
+            if touch and os.path.isfile(list_cache):
+                os.utime(list_cache, None)
+                continue
+            if not os.path.isdir(os.path.dirname(list_cache)):
+                os.makedirs(os.path.dirname(list_cache))
+            # Take the lock the processes refreshing an expired cache take
+            if not salt.fileserver._lock_cache(w_lock):
+                if not salt.fileserver._stale_lock(w_lock):
+                    ret = False
+                    continue
+                salt.fileserver._unlock_cache(w_lock)
+                if not salt.fileserver._lock_cache(w_lock):
+                    ret = False
+                    continue
+            with _TREE_LOCK:
+                lists = _tree_lists(tree, saltenv)
+            salt.fileserver.write_file_list_cache(
+                __opts__, lists, list_cache, w_lock
+            )
+        except (IOError, OSError) as exc:
+            log.error(
+                'Unable to write the file list cache {0}: {1}'.format(
+                    list_cache, exc
+                )
+            )
+    return ret
+
+
+def _read_mtime_map(mtime_map_path):
+    '''
+    Read the mtime map written by the last update
+    '''
+    ret = {}
     if os.path.exists(mtime_map_path):
         with salt.utils.fopen(mtime_map_path, 'r') as fp_:
             for line in fp_:
                 try:
                     file_path, mtime = line.split(':', 1)
-                    old_mtime_map[file_path] = mtime
+                    ret[file_path] = mtime
                 except ValueError:
                     # Document the invalid entry in the log
                     log.warning('Skipped invalid cache mtime entry in {0}: {1}'
                                 .format(mtime_map_path, line))
+    return ret
 
-    # generate the new map
-    new_mtime_map = salt.fileserver.generate_mtime_map(__opts__['file_roots'])
-
-    # compare the maps, set changed to the return value
-    data['changed'] = salt.fileserver.diff_mtime_map(old_mtime_map, new_mtime_map)
 
-    # write out the new map
+def _write_mtime_map(mtime_map_path, mtime_map):
     mtime_map_path_dir = os.path.dirname(mtime_map_path)
     if not os.path.exists(mtime_map_path_dir):
         os.makedirs(mtime_map_path_dir)
     with salt.utils.fopen(mtime_map_path, 'w') as fp_:
-        for file_path, mtime in six.iteritems(new_mtime_map):
+        for file_path, mtime in six.iteritems(mtime_map):
             fp_.write('{file_path}:{mtime}\n'.format(file_path=file_path,
                                                      mtime=mtime))
 
-    if __opts__.get('fileserver_events', False):
+
+def update():
+    '''
+    When we are asked to update (regular interval) lets reap the cache
+    '''
+    try:
+        salt.fileserver.reap_fileserver_cache_dir(
+            os.path.join(__opts__['cachedir'], 'roots/hash'),
+            find_file
+        )
+    except (IOError, OSError):
+        # Hash file won't exist if no files have yet been served up
+        pass
+
+    mtime_map_path = os.path.join(__opts__['cachedir'], 'roots/mtime_map')
+    # data to send on event
+    data = {'changed': False,
+            'backend': 'roots'}
+
+    tree = _tree()
+    if tree is not None and not _TREE.pop('new', False):
+        # The changes were reported by inotify since the last update
+        with _TREE_LOCK:
+            generation = tree.generation
+            data['changed'] = generation != _TREE.get('updated')
+            if data['changed']:
+                new_mtime_map = tree.mtime_map()
+        _TREE['updated'] = generation
+        if data['changed']:
+            _write_mtime_map(mtime_map_path, new_mtime_map)
+    else:
+        old_mtime_map = _read_mtime_map(mtime_map_path)
+
+        # generate the new map
+        if tree is not None:
+            with _TREE_LOCK:
+                new_mtime_map = tree.mtime_map()
+                _TREE['updated'] = tree.generation
+        else:
+            new_mtime_map = salt.fileserver.generate_mtime_map(
+                __opts__['file_roots']
+            )
+
+        # compare the maps, set changed to the return value
+        data['changed'] = salt.fileserver.diff_mtime_map(old_mtime_map,
+                                                         new_mtime_map)
+
+        # write out the new map
+        _write_mtime_map(mtime_map_path, new_mtime_map)
+
+    if data['changed'] and __opts__.get('fileserver_events', False):
         # if there is a change, fire an event
         event = salt.utils.event.get_event(
                 'master',
@@ -261,18 +429,17 @@ def _file_lists(load, form):
     if load['saltenv'] not in __opts__['file_roots']:
         return []
 
-    list_cachedir = os.path.join(__opts__['cachedir'], 'file_lists/roots')
+    list_cache, w_lock = _list_cache(load['saltenv'])
+    list_cachedir = os.path.dirname(list_cache)
     if not os.path.isdir(list_cachedir):
         try:
             os.makedirs(list_cachedir)
         except os.error:
             log.critical('Unable to make cachedir {0}'.format(list_cachedir))
             return []
-    list_cache = os.path.join(list_cachedir, '{0}.p'.format(load['saltenv']))
-    w_lock = os.path.join(list_cachedir, '.{0}.w'.format(load['saltenv']))
     cache_match, refresh_cache, save_cache = \
         salt.fileserver.check_file_list_cache(
-            __opts__, form, list_cache, w_lock
+            __opts__, form, list_cache, w_lock, load.get('prefix', '')
         )
     if cache_match is not None:
         return cache_match
@@ -321,6 +488,33 @@ def _file_lists(load, form):
     return []
 
 
+def _tree_lists(tree, saltenv):
+    '''
+    Return the file lists of a saltenv from the index of the file_roots, as
+    _file_lists builds them by walking the file_roots
+    '''
+    ret = {
+        'files': [],
+        'dirs': [],
+        'empty_dirs': [],
+        'links': []
+    }
+    for path in __opts__['file_roots'][saltenv]:
+        root = os.path.normpath(path)
+        ret['dirs'].extend(sorted(tree.dirs[root]))
+        for dir_rel_fn in sorted(tree.empty_dirs(root)):
+            if not salt.fileserver.is_file_ignored(__opts__, dir_rel_fn):
+                ret['empty_dirs'].append(dir_rel_fn)
+        links = tree.links[root]
+        ret['links'].extend(os.path.basename(x) for x in sorted(links))
+        for rel_fn in sorted(tree.files[root]):
+            if __opts__['fileserver_ignoresymlinks'] and rel_fn in links:
+                continue
+            if not salt.fileserver.is_file_ignored(__opts__, rel_fn):
+                ret['files'].append(rel_fn)
+    return ret
+
+
 def file_list(load):
     '''
     Return a list of all files on the file server in a specified
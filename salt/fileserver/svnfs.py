@@ -700,7 +700,7 @@ def _file_lists(load, form):
     w_lock = os.path.join(list_cachedir, '.{0}.w'.format(load['saltenv']))
     cache_match, refresh_cache, save_cache = \
         salt.fileserver.check_file_list_cache(
-            __opts__, form, list_cache, w_lock
+            __opts__, form, list_cache, w_lock, load.get('prefix', '')
         )
     if cache_match is not None:
         return cache_match
@@ -10,6 +10,7 @@ import os
 import copy
 import json
 import stat
+import time
 import shutil
 import fnmatch
 import hashlib
@@ -18,8 +19,11 @@ import logging
 # Import salt libs
 import salt.crypt
 import salt.utils
+import salt.payload
 import salt.exceptions
 import salt.utils.event
+import salt.utils.keyindex
+import salt.utils.atomicfile
 import salt.daemons.masterapi
 from salt.utils import kinds
 from salt.utils.event import tagify
@@ -36,6 +40,10 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+# Directory in the cachedir holding the minion cache cleanups queued for the
+# Maintenance process
+CACHE_CLEANUP_DIR = 'key_cache_cleanup'
+
 
 def get_key(opts):
     if opts['transport'] in ('zeromq', 'tcp'):
@@ -534,6 +542,17 @@ class Key(object):
                                         self.DEN)
         return minions_accepted, minions_pre, minions_rejected, minions_denied
 
+    @property
+    def index(self):
+        '''
+        The in memory index of the managed keys of this process
+        '''
+        return salt.utils.keyindex.get_index(
+            self.opts['pki_dir'],
+            [os.path.basename(dir_)
+             for dir_ in self._check_minions_directories()]
+        )
+
     def gen_keys(self):
         '''
         Generate minion RSA public keypair
@@ -565,9 +584,10 @@ class Key(object):
         if not os.path.isdir(m_cache):
             return
         keys = self.list_keys()
-        minions = []
+        minions = set()
         for key, val in six.iteritems(keys):
-            minions.extend(val)
+            minions.update(val)
+        preserve_minions = set(preserve_minions)
         if not self.opts.get('preserve_minion_cache', False) or not preserve_minions:
             for minion in os.listdir(m_cache):
                 if minion not in minions and minion not in preserve_minions:
@@ -600,6 +620,16 @@ class Key(object):
         ret = {}
         if ',' in match and isinstance(match, str):
             match = match.split(',')
+        if isinstance(match, six.string_types) \
+                and not salt.utils.keyindex.is_glob(match):
+            # A single minion id, look it up instead of matching every key
+            for status, keys in six.iteritems(matches):
+                if status in self.index.statuses:
+                    if self.index.contains(status, match):
+                        ret[status] = [match]
+                elif match in keys:
+                    ret[status] = [match]
+            return ret
         for status, keys in six.iteritems(matches):
             for key in salt.utils.isorted(keys):
                 if isinstance(match, list):
@@ -621,11 +651,11 @@ class Key(object):
         specified keys
         '''
         ret = {}
-        cur_keys = self.list_keys()
+        index = self.index
         for status, keys in six.iteritems(match_dict):
             for key in salt.utils.isorted(keys):
                 for keydir in (self.ACC, self.PEND, self.REJ, self.DEN):
-                    if keydir and fnmatch.filter(cur_keys.get(keydir, []), key):
+                    if keydir and index.glob(keydir, key):
                         ret.setdefault(keydir, []).append(key)
         return ret
 
@@ -646,29 +676,7 @@ class Key(object):
         Return a dict of managed keys and what the key status are
         '''
 
-        key_dirs = []
-
-        # We have to differentiate between RaetKey._check_minions_directories
-        # and Zeromq-Keys. Raet-Keys only have three states while ZeroMQ-keys
-        # havd an additional 'denied' state.
-        if self.opts['transport'] in ('zeromq', 'tcp'):
-            key_dirs = self._check_minions_directories()
-        else:
-            key_dirs = self._check_minions_directories()
-
-        ret = {}
-
-        for dir_ in key_dirs:
-            ret[os.path.basename(dir_)] = []
-            try:
-                for fn_ in salt.utils.isorted(os.listdir(dir_)):
-                    if not fn_.startswith('.'):
-                        if os.path.isfile(os.path.join(dir_, fn_)):
-                            ret[os.path.basename(dir_)].append(fn_)
-            except (OSError, IOError):
-                # key dir kind is not created yet, just skip
-                continue
-        return ret
+        return self.index.all()
 
     def all_keys(self):
         '''
@@ -684,31 +692,15 @@ class Key(object):
         '''
         acc, pre, rej, den = self._check_minions_directories()
         ret = {}
-        if match.startswith('acc'):
-            ret[os.path.basename(acc)] = []
-            for fn_ in salt.utils.isorted(os.listdir(acc)):
-                if not fn_.startswith('.'):
-                    if os.path.isfile(os.path.join(acc, fn_)):
-                        ret[os.path.basename(acc)].append(fn_)
-        elif match.startswith('pre') or match.startswith('un'):
-            ret[os.path.basename(pre)] = []
-            for fn_ in salt.utils.isorted(os.listdir(pre)):
-                if not fn_.startswith('.'):
-                    if os.path.isfile(os.path.join(pre, fn_)):
-                        ret[os.path.basename(pre)].append(fn_)
-        elif match.startswith('rej'):
-            ret[os.path.basename(rej)] = []
-            for fn_ in salt.utils.isorted(os.listdir(rej)):
-                if not fn_.startswith('.'):
-                    if os.path.isfile(os.path.join(rej, fn_)):
-                        ret[os.path.basename(rej)].append(fn_)
-        elif match.startswith('den'):
-            ret[os.path.basename(den)] = []
-            for fn_ in salt.utils.isorted(os.listdir(den)):
-                if not fn_.startswith('.'):
-                    if os.path.isfile(os.path.join(den, fn_)):
-                        ret[os.path.basename(den)].append(fn_)
-        elif match.startswith('all'):
+        for prefixes, dir_ in ((('acc',), acc),
+                               (('pre', 'un'), pre),
+                               (('rej',), rej),
+                               (('den',), den)):
+            if any(match.startswith(prefix) for prefix in prefixes):
+                status = os.path.basename(dir_)
+                ret[status] = list(self.index.keys(status))
+                return ret
+        if match.startswith('all'):
             return self.all_keys()
         return ret
 
@@ -951,6 +943,144 @@ class Key(object):
                 ret[status][key] = salt.utils.pem_finger(path)
         return ret
 
+    def _bulk_matches(self, match):
+        if isinstance(match, dict):
+            return match
+        if isinstance(match, (list, tuple)):
+            matches = {}
+            for expr in match:
+                for status, keys in six.iteritems(self.name_match(expr)):
+                    matches.setdefault(status, [])
+                    matches[status].extend(
+                        key for key in keys if key not in matches[status]
+                    )
+            return matches
+        return self.name_match(match)
+
+    def bulk(self,
+             accept=None,
+             reject=None,
+             delete=None,
+             include_rejected=False,
+             include_accepted=False):
+        '''
+        Accept, reject and delete many keys in a single call. Each of
+        ``accept``, ``reject`` and ``delete`` is a glob, a comma separated
+        string or list of globs, or a dict of keys per status like the ones
+        returned by ``name_match``. They are handled in that order.
+
+        A single event listing the handled keys is fired instead of an event
+        per key, and removing the master side caches of deleted minions is
+        left to the Maintenance process. Returns the ids of the handled keys
+        per action.
+        '''
+        done = {'accept': [], 'reject': [], 'delete': []}
+        moves = (
+            ('accept', accept, self.ACC,
+             [self.PEND, self.REJ] if include_rejected else [self.PEND]),
+            ('reject', reject, self.REJ,
+             [self.PEND, self.ACC] if include_accepted else [self.PEND]),
+        )
+        for act, match, target, keydirs in moves:
+            if match is None:
+                continue
+            matches = self._bulk_matches(match)
+            for keydir in keydirs:
+                for key in matches.get(keydir, []):
+                    try:
+                        shutil.move(
+                                os.path.join(
+                                    self.opts['pki_dir'],
+                                    keydir,
+                                    key),
+                                os.path.join(
+                                    self.opts['pki_dir'],
+                                    target,
+                                    key)
+                                )
+                        done[act].append(key)
+                    except (IOError, OSError):
+                        pass
+        if delete is not None:
+            for status, keys in six.iteritems(self._bulk_matches(delete)):
+                for key in keys:
+                    try:
+                        os.remove(os.path.join(self.opts['pki_dir'], status, key))
+                        done['delete'].append(key)
+                    except (OSError, IOError):
+                        pass
+        self.index.invalidate()
+        self.queue_cache_cleanup(done['delete'])
+        if (done['delete'] or done['reject']) and self.opts.get('rotate_aes_key'):
+            salt.crypt.dropfile(self.opts['cachedir'], self.opts['user'])
+        if any(six.itervalues(done)):
+            eload = {'result': True, 'act': 'bulk'}
+            eload.update(done)
+            self.event.fire_event(eload, tagify('bulk', prefix='key'))
+        return done
+
+    def queue_cache_cleanup(self, minions):
+        '''
+        Queue the removal of the master side caches of the passed minions,
+        the queue is processed by the Maintenance process
+        '''
+        if not minions or self.opts.get('preserve_minion_cache', False):
+            return
+        qdir = os.path.join(self.opts['cachedir'], CACHE_CLEANUP_DIR)
+        if not os.path.isdir(qdir):
+            os.makedirs(qdir)
+        fn_ = os.path.join(
+            qdir,
+            '{0:.6f}_{1}.p'.format(time.time(), os.getpid())
+        )
+        serial = salt.payload.Serial(self.opts)
+        with salt.utils.atomicfile.atomic_open(fn_, 'w+b') as fp_:
+            serial.dump(list(minions), fp_)
+
+    def clean_queued_caches(self):
+        '''
+        Remove the master side caches queued by ``queue_cache_cleanup``, the
+        caches of minions which have a key again are kept
+        '''
+        qdir = os.path.join(self.opts['cachedir'], CACHE_CLEANUP_DIR)
+        try:
+            queued = sorted(os.listdir(qdir))
+        except OSError:
+            return 0
+        m_cache = os.path.join(self.opts['cachedir'], self.ACC)
+        serial = salt.payload.Serial(self.opts)
+        removed = 0
+        for fn_ in queued:
+            if not fn_.endswith('.p') or fn_.startswith('.'):
+                continue
+            path = os.path.join(qdir, fn_)
+            try:
+                with salt.utils.fopen(path, 'rb') as fp_:
+                    minions = serial.load(fp_)
+            except Exception as exc:
+                log.error(
+                    'Unable to read the queued cache cleanup {0}: {1}'.format(
+                        path, exc
+                    )
+                )
+                minions = []
+            for minion in minions:
+                if self.index.status(minion) is not None:
+                    continue
+                cdir = os.path.join(m_cache, minion)
+                if os.path.isdir(cdir):
+                    shutil.rmtree(cdir, ignore_errors=True)
+                    removed += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if removed:
+            log.debug(
+                'Removed the master caches of {0} minions'.format(removed)
+            )
+        return removed
+
 
 class RaetKey(Key):
     '''
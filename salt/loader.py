@@ -29,6 +29,7 @@ import salt.utils.lazy
 import salt.utils.odict
 import salt.utils.event
 import salt.utils.odict
+import salt.utils.grains_cache
 
 # Solve the Chicken and egg problem where grains need to run before any
 # of the modules are loaded and are generally available for any usage.
@@ -612,38 +613,19 @@ def grains(opts, force_refresh=False, proxy=None):
     else:
         opts['grains'] = {}
 
-    grains_data = {}
     funcs = grain_funcs(opts)
     if force_refresh:  # if we refresh, lets reload grain modules
         funcs.clear()
-    # Run core grains
-    for key, fun in six.iteritems(funcs):
-        if not key.startswith('core.'):
-            continue
-        log.trace('Loading {0} grain'.format(key))
-        ret = fun()
-        if not isinstance(ret, dict):
-            continue
-        grains_data.update(ret)
-
-    # Run the rest of the grains
-    for key, fun in six.iteritems(funcs):
-        if key.startswith('core.') or key == '_errors':
-            continue
-        try:
-            ret = fun()
-        except Exception:
-            log.critical(
-                'Failed to load grains defined in grain file {0} in '
-                'function {1}, error:\n'.format(
-                    key, fun
-                ),
-                exc_info=True
-            )
-            continue
-        if not isinstance(ret, dict):
-            continue
-        grains_data.update(ret)
+    # Core grains are run first so that custom grains can override them
+    ordered = [(key, fun) for key, fun in six.iteritems(funcs)
+               if key.startswith('core.')]
+    ordered.extend([(key, fun) for key, fun in six.iteritems(funcs)
+                    if not key.startswith('core.') and key != '_errors'])
+    grains_data = salt.utils.grains_cache.generate(
+        opts,
+        ordered,
+        force_refresh=force_refresh or opts.get('refresh_grains_cache', False)
+    )
 
     # Write cache if enabled
     if opts.get('grains_cache', False):
@@ -53,6 +53,7 @@ import salt.transport.server
 import salt.utils.atomicfile
 import salt.utils.event
 import salt.utils.job
+import salt.utils.state_stream
 import salt.utils.reactor
 import salt.utils.verify
 import salt.utils.minions
@@ -66,7 +67,7 @@ from salt.utils.debug import (
     enable_sigusr1_handler, enable_sigusr2_handler, inspect_stack
 )
 from salt.utils.event import tagify
-from salt.utils.master import ConnectedCache
+from salt.utils.master import ConnectedCache, MineStore
 
 try:
     import resource
@@ -172,6 +173,8 @@ class Maintenance(multiprocessing.Process):
         self.git_pillar = salt.daemons.masterapi.init_git_pillar(self.opts)
         # Set up search object
         self.search = salt.search.Search(self.opts)
+        # Remove the caches of minions whose keys were deleted in bulk
+        self.key = salt.key.get_key(self.opts)
 
     def run(self):
         '''
@@ -190,6 +193,15 @@ class Maintenance(multiprocessing.Process):
         last = int(time.time())
         # Clean out the fileserver backend cache
         salt.daemons.masterapi.clean_fsbackend(self.opts)
+        # Keep the file lists of the fileserver backends up to date for the
+        # other processes
+        try:
+            self.fileserver.watch()
+        except Exception as exc:
+            log.error(
+                'Exception {0} occurred while watching the fileserver'.format(exc),
+                exc_info_on_loglevel=logging.DEBUG
+            )
         # Clean out pub auth
         salt.daemons.masterapi.clean_pub_auth(self.opts)
 
@@ -199,11 +211,13 @@ class Maintenance(multiprocessing.Process):
             if (now - last) >= self.loop_interval:
                 salt.daemons.masterapi.clean_old_jobs(self.opts)
                 salt.daemons.masterapi.clean_expired_tokens(self.opts)
+                salt.utils.state_stream.clean_old(self.opts)
             self.handle_search(now, last)
             self.handle_git_pillar()
             self.handle_schedule()
             self.handle_presence(old_present)
             self.handle_key_rotate(now)
+            self.handle_key_cache_cleanup()
             salt.daemons.masterapi.fileserver_update(self.fileserver)
             salt.utils.verify.check_max_open_files(self.opts)
             last = now
@@ -283,6 +297,18 @@ class Maintenance(multiprocessing.Process):
                 'Exception {0} occurred in scheduled job'.format(exc)
             )
 
+    def handle_key_cache_cleanup(self):
+        '''
+        Remove the minion caches queued by bulk key operations
+        '''
+        try:
+            self.key.clean_queued_caches()
+        except Exception as exc:
+            log.error(
+                'Exception {0} occurred in the queued minion cache '
+                'cleanup'.format(exc)
+            )
+
     def handle_presence(self, old_present):
         '''
         Fire presence events if enabled
@@ -481,6 +507,25 @@ class Master(SMaster):
             log.info('Creating master event return process')
             process_manager.add_process(salt.utils.event.EventReturn, args=(self.opts,))
 
+        if self.opts.get('mine_store'):
+            if self.opts['ipc_mode'] == 'tcp':
+                log.warning('The mine store requires ipc_mode ipc, mine data '
+                            'is read from the minion data cache')
+            else:
+                log.info('Creating master mine store process')
+                process_manager.add_process(MineStore, args=(self.opts,))
+
+        if self.opts.get('job_cache_writer'):
+            if self.opts['ipc_mode'] == 'tcp':
+                log.warning('The job cache writer requires ipc_mode ipc, '
+                            'the job cache is written by the MWorkers')
+            elif not salt.utils.job.HAS_ZMQ:
+                log.warning('The job cache writer requires pyzmq, the job '
+                            'cache is written by the MWorkers')
+            else:
+                log.info('Creating master job cache writer process')
+                process_manager.add_process(salt.utils.job.JobCacheWriter, args=(self.opts,))
+
         ext_procs = self.opts.get('ext_processes', [])
         for proc in ext_procs:
             log.info('Creating ext_processes process: {0}'.format(proc))
@@ -793,6 +838,12 @@ class AESFuncs(object):
             rend=False)
         self.__setup_fileserver()
         self.masterapi = salt.daemons.masterapi.RemoteFuncs(opts)
+        # Hand the job cache writes to the job cache writer process
+        self.job_cache_queue = None
+        if self.opts.get('job_cache_writer') \
+                and self.opts['ipc_mode'] != 'tcp' \
+                and salt.utils.job.HAS_ZMQ:
+            self.job_cache_queue = salt.utils.job.JobCacheQueue(self.opts)
 
     def __setup_fileserver(self):
         '''
@@ -801,7 +852,10 @@ class AESFuncs(object):
         self.fs_ = salt.fileserver.Fileserver(self.opts)
         self._serve_file = self.fs_.serve_file
         self._file_hash = self.fs_.file_hash
+        self._file_delta = self.fs_.file_delta
+        self._file_hashes = self.fs_.file_hashes
         self._file_list = self.fs_.file_list
+        self._file_manifest = self.fs_.file_manifest
         self._file_list_emptydirs = self.fs_.file_list_emptydirs
         self._dir_list = self.fs_.dir_list
         self._symlink_list = self.fs_.symlink_list
@@ -976,6 +1030,7 @@ class AESFuncs(object):
         mopts['state_auto_order'] = self.opts['state_auto_order']
         mopts['state_events'] = self.opts['state_events']
         mopts['state_aggregate'] = self.opts['state_aggregate']
+        mopts['state_aggregate_plan'] = self.opts['state_aggregate_plan']
         mopts['jinja_lstrip_blocks'] = self.opts['jinja_lstrip_blocks']
         mopts['jinja_trim_blocks'] = self.opts['jinja_trim_blocks']
         return mopts
@@ -1176,6 +1231,9 @@ class AESFuncs(object):
             log.error('Received minion error from [{minion}]: '
                       '{data}'.format(minion=load['id'],
                                       data=load['data']['message']))
+        elif salt.utils.state_stream.parse_tag(load.get('tag', '')):
+            # Keep the streamed state results until the job returns
+            salt.utils.state_stream.save_batch(self.opts, load)
 
     def _return(self, load):
         '''
@@ -1187,9 +1245,14 @@ class AESFuncs(object):
 
         :param dict load: The minion payload
         '''
+        load = salt.utils.state_stream.assemble(self.opts, load)
         try:
             salt.utils.job.store_job(
-                self.opts, load, event=self.event, mminion=self.mminion)
+                self.opts,
+                load,
+                event=self.event,
+                mminion=self.mminion,
+                queue=self.job_cache_queue)
         except salt.exceptions.SaltCacheError:
             log.error('Could not store job information for load: {0}'.format(load))
 
@@ -85,7 +85,9 @@ import salt.pillar
 import salt.utils.args
 import salt.utils.event
 import salt.utils.minions
+import salt.utils.compound
 import salt.utils.schedule
+import salt.utils.syndic
 import salt.utils.error
 import salt.utils.zeromq
 import salt.defaults.exitcodes
@@ -1347,6 +1349,8 @@ class Minion(MinionBase):
 
         self.schedule.functions = self.functions
         self.schedule.returners = self.returners
+        if hasattr(self, 'matcher'):
+            self.matcher.clear_cache()
 
     # TODO: only allow one future in flight at a time?
     @tornado.gen.coroutine
@@ -1781,7 +1785,9 @@ class Syndic(Minion):
         opts['loop_interval'] = 1
         super(Syndic, self).__init__(opts, **kwargs)
         self.mminion = salt.minion.MasterMinion(opts)
-        self.jid_forward_cache = set()
+        self.jid_forward_cache = salt.utils.syndic.JidCache(
+            opts['syndic_jid_forward_cache_hwm']
+        )
 
     def _handle_decoded_payload(self, data):
         '''
@@ -1898,8 +1904,15 @@ class Syndic(Minion):
             self._handle_decoded_payload(payload['load'])
 
     def _reset_event_aggregation(self):
-        self.jids = {}
-        self.raw_events = []
+        self.forwarder = salt.utils.syndic.ReturnForwarder(
+            self.opts,
+            self._get_load,
+            jid_cache=self.jid_forward_cache
+        )
+
+    def _get_load(self, jid):
+        fstr = '{0}.get_load'.format(self.opts['master_job_cache'])
+        return self.mminion.returners[fstr](jid)
 
     def _process_event(self, raw):
         # TODO: cleanup: Move down into event class
@@ -1907,51 +1920,52 @@ class Syndic(Minion):
         mtag, data = self.local.event.unpack(raw, self.local.event.serial)
         event = {'data': data, 'tag': mtag}
         log.trace('Got event {0}'.format(event['tag']))
-        tag_parts = event['tag'].split('/')
-        if len(tag_parts) >= 4 and tag_parts[1] == 'job' and \
-            salt.utils.jid.is_jid(tag_parts[2]) and tag_parts[3] == 'ret' and \
-            'return' in event['data']:
+        if salt.utils.syndic.is_job_return(event):
             if 'jid' not in event['data']:
                 # Not a job return
                 return
-            jdict = self.jids.setdefault(event['tag'], {})
-            if not jdict:
-                jdict['__fun__'] = event['data'].get('fun')
-                jdict['__jid__'] = event['data']['jid']
-                jdict['__load__'] = {}
-                fstr = '{0}.get_load'.format(self.opts['master_job_cache'])
-                # Only need to forward each load once. Don't hit the disk
-                # for every minion return!
-                if event['data']['jid'] not in self.jid_forward_cache:
-                    jdict['__load__'].update(
-                        self.mminion.returners[fstr](event['data']['jid'])
-                        )
-                    self.jid_forward_cache.add(event['data']['jid'])
-                    if len(self.jid_forward_cache) > self.opts['syndic_jid_forward_cache_hwm']:
-                        # Pop the oldest jid from the cache
-                        tmp = sorted(list(self.jid_forward_cache))
-                        tmp.pop(0)
-                        self.jid_forward_cache = set(tmp)
-            if 'master_id' in event['data']:
-                # __'s to make sure it doesn't print out on the master cli
-                jdict['__master_id__'] = event['data']['master_id']
-            jdict[event['data']['id']] = event['data']['return']
-        else:
+            ready = self.forwarder.add_return(event)
+        elif 'retcode' not in event['data']:
             # Add generic event aggregation here
-            if 'retcode' not in event['data']:
-                self.raw_events.append(event)
+            ready = self.forwarder.add_event(event)
+        else:
+            return
+        if ready:
+            # Stream full batches right away instead of waiting for the
+            # next forward interval
+            self._forward_events(flush=False)
 
-    def _forward_events(self):
+    def _forward_events(self, flush=True):
         log.trace('Forwarding events')
-        if self.raw_events:
-            self._fire_master(events=self.raw_events,
+        events, returns = self.forwarder.take(flush)
+        for batch in events:
+            self._fire_master(events=batch,
                               pretag=tagify(self.opts['id'], base='syndic'),
                               )
-        for jid in self.jids:
-            self._return_pub(self.jids[jid],
+        for jid_ret in returns:
+            self._return_pub(jid_ret,
                              '_syndic_return',
                              timeout=self._return_retry_timer())
-        self._reset_event_aggregation()
+        if flush:
+            self._fire_forward_stats()
+
+    def _fire_forward_stats(self):
+        '''
+        Fire the forwarding statistics on the local event bus every
+        syndic_stats_interval seconds
+        '''
+        stats = self.forwarder.collect_stats(
+            self.opts.get('syndic_stats_interval', 60)
+        )
+        if stats is None:
+            return
+        log.debug('Syndic forwarding stats: {0}'.format(stats))
+        try:
+            self.local.event.fire_event(
+                stats, tagify([self.opts['id'], 'stats'], 'syndic')
+            )
+        except Exception as exc:
+            log.debug('Unable to fire syndic stats: {0}'.format(exc))
 
     def destroy(self):
         '''
@@ -2003,7 +2017,9 @@ class MultiSyndic(MinionBase):
         self.max_auth_wait = self.opts['acceptance_wait_time_max']
 
         self._has_master = threading.Event()
-        self.jid_forward_cache = set()
+        self.jid_forward_cache = salt.utils.syndic.JidCache(
+            self.opts['syndic_jid_forward_cache_hwm']
+        )
 
         if io_loop is None:
             self.io_loop = zmq.eventloop.ioloop.ZMQIOLoop()
@@ -2104,8 +2120,15 @@ class MultiSyndic(MinionBase):
             master_id = masters.pop(0)
 
     def _reset_event_aggregation(self):
-        self.jids = {}
-        self.raw_events = []
+        self.forwarder = salt.utils.syndic.ReturnForwarder(
+            self.opts,
+            self._get_load,
+            jid_cache=self.jid_forward_cache
+        )
+
+    def _get_load(self, jid):
+        fstr = '{0}.get_load'.format(self.opts['master_job_cache'])
+        return self.mminion.returners[fstr](jid)
 
     # Syndic Tune In
     def tune_in(self):
@@ -2142,74 +2165,111 @@ class MultiSyndic(MinionBase):
         event = {'data': data, 'tag': mtag}
         log.trace('Got event {0}'.format(event['tag']))
 
-        tag_parts = event['tag'].split('/')
-        if len(tag_parts) >= 4 and tag_parts[1] == 'job' and \
-            salt.utils.jid.is_jid(tag_parts[2]) and tag_parts[3] == 'ret' and \
-            'return' in event['data']:
+        if salt.utils.syndic.is_job_return(event):
             if 'jid' not in event['data']:
                 # Not a job return
                 return
             if self.syndic_mode == 'cluster' and event['data'].get('master_id', 0) == self.opts.get('master_id', 1):
                 log.debug('Return received with matching master_id, not forwarding')
                 return
-
-            jdict = self.jids.setdefault(event['tag'], {})
-            if not jdict:
-                jdict['__fun__'] = event['data'].get('fun')
-                jdict['__jid__'] = event['data']['jid']
-                jdict['__load__'] = {}
-                fstr = '{0}.get_load'.format(self.opts['master_job_cache'])
-                # Only need to forward each load once. Don't hit the disk
-                # for every minion return!
-                if event['data']['jid'] not in self.jid_forward_cache:
-                    jdict['__load__'].update(
-                        self.mminion.returners[fstr](event['data']['jid'])
-                        )
-                    self.jid_forward_cache.add(event['data']['jid'])
-                    if len(self.jid_forward_cache) > self.opts['syndic_jid_forward_cache_hwm']:
-                        # Pop the oldest jid from the cache
-                        tmp = sorted(list(self.jid_forward_cache))
-                        tmp.pop(0)
-                        self.jid_forward_cache = set(tmp)
-            if 'master_id' in event['data']:
-                # __'s to make sure it doesn't print out on the master cli
-                jdict['__master_id__'] = event['data']['master_id']
-            jdict[event['data']['id']] = event['data']['return']
+            ready = self.forwarder.add_return(event)
         else:
             # TODO: config to forward these? If so we'll have to keep track of who
             # has seen them
             # if we are the top level masters-- don't forward all the minion events
-            if self.syndic_mode == 'sync':
-                # Add generic event aggregation here
-                if 'retcode' not in event['data']:
-                    self.raw_events.append(event)
+            if self.syndic_mode != 'sync' or 'retcode' in event['data']:
+                return
+            # Add generic event aggregation here
+            ready = self.forwarder.add_event(event)
+        if ready:
+            # Stream full batches right away instead of waiting for the
+            # next forward interval
+            self._forward_events(flush=False)
 
-    def _forward_events(self):
+    def _forward_events(self, flush=True):
         log.trace('Forwarding events')
-        if self.raw_events:
+        events, returns = self.forwarder.take(flush)
+        for batch in events:
             self._call_syndic('_fire_master',
-                              kwargs={'events': self.raw_events,
+                              kwargs={'events': batch,
                                       'pretag': tagify(self.opts['id'], base='syndic'),
                                       'timeout': self.SYNDIC_EVENT_TIMEOUT,
                                       },
                               )
-        for jid, jid_ret in self.jids.items():
+        for jid_ret in returns:
             self._call_syndic('_return_pub',
                               args=(jid_ret, '_syndic_return'),
                               kwargs={'timeout': self.SYNDIC_EVENT_TIMEOUT},
                               master_id=jid_ret.get('__master_id__'),
                               )
+        if flush:
+            self._fire_forward_stats()
 
-        self._reset_event_aggregation()
+    def _fire_forward_stats(self):
+        '''
+        Fire the forwarding statistics on the local event bus every
+        syndic_stats_interval seconds
+        '''
+        stats = self.forwarder.collect_stats(
+            self.opts.get('syndic_stats_interval', 60)
+        )
+        if stats is None:
+            return
+        log.debug('MultiSyndic forwarding stats: {0}'.format(stats))
+        try:
+            self.local.event.fire_event(
+                stats, tagify([self.opts['id'], 'stats'], 'syndic')
+            )
+        except Exception as exc:
+            log.debug('Unable to fire syndic stats: {0}'.format(exc))
 
 
 class Matcher(object):
     '''
     Use to return the value for matching calls from the master
+
+    The results of the matchers which only depend on the minion id, grains
+    and pillar are kept until the grains or pillar dict of the opts is
+    replaced by a refresh, or until clear_cache is called.
     '''
+    # The maximum number of match results kept
+    CACHE_SIZE = 1000
+
     def __init__(self, opts, functions=None):
         self.opts = opts
         self.functions = functions
+        self._matches = {}
+        self._generation = (None, None)
+
+    def clear_cache(self):
+        '''
+        Forget the cached match results
+        '''
+        self._matches.clear()
+
+    def _cached(self, key, func, *args, **kwargs):
+        '''
+        Return the cached result of a matcher, calling it on a miss
+        '''
+        grains = self.opts.get('grains')
+        pillar = self.opts.get('pillar')
+        if grains is not self._generation[0] \
+                or pillar is not self._generation[1]:
+            # Keep references to make sure the identities are not reused
+            self._generation = (grains, pillar)
+            self._matches.clear()
+        try:
+            return self._matches[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable target, match without caching it
+            return func(*args, **kwargs)
+        ret = func(*args, **kwargs)
+        if len(self._matches) >= self.CACHE_SIZE:
+            self._matches.clear()
+        self._matches[key] = ret
+        return ret
 
     def confirm_top(self, match, data, nodegroups=None):
         '''
@@ -2249,6 +2309,9 @@ class Matcher(object):
         '''
         Returns true if the passed pcre regex matches
         '''
+        return self._cached(('pcre', tgt), self._pcre_match, tgt)
+
+    def _pcre_match(self, tgt):
         return bool(re.match(tgt, self.opts['id']))
 
     def list_match(self, tgt):
@@ -2268,7 +2331,9 @@ class Matcher(object):
             log.error('Got insufficient arguments for grains match '
                       'statement from master')
             return False
-        return salt.utils.subdict_match(
+        return self._cached(
+            ('grain', tgt, delimiter),
+            salt.utils.subdict_match,
             self.opts['grains'], tgt, delimiter=delimiter
         )
 
@@ -2281,8 +2346,10 @@ class Matcher(object):
             log.error('Got insufficient arguments for grains pcre match '
                       'statement from master')
             return False
-        return salt.utils.subdict_match(self.opts['grains'], tgt,
-                                        delimiter=delimiter, regex_match=True)
+        return self._cached(('grain_pcre', tgt, delimiter),
+                            salt.utils.subdict_match,
+                            self.opts['grains'], tgt,
+                            delimiter=delimiter, regex_match=True)
 
     def data_match(self, tgt):
         '''
@@ -2322,7 +2389,9 @@ class Matcher(object):
             log.error('Got insufficient arguments for pillar match '
                       'statement from master')
             return False
-        return salt.utils.subdict_match(
+        return self._cached(
+            ('pillar', tgt, delimiter),
+            salt.utils.subdict_match,
             self.opts['pillar'], tgt, delimiter=delimiter
         )
 
@@ -2335,7 +2404,9 @@ class Matcher(object):
             log.error('Got insufficient arguments for pillar PCRE match '
                       'statement from master')
             return False
-        return salt.utils.subdict_match(
+        return self._cached(
+            ('pillar_pcre', tgt, delimiter),
+            salt.utils.subdict_match,
             self.opts['pillar'], tgt, delimiter=delimiter, regex_match=True
         )
 
@@ -2348,16 +2419,20 @@ class Matcher(object):
             log.error('Got insufficient arguments for pillar match '
                       'statement from master')
             return False
-        return salt.utils.subdict_match(self.opts['pillar'],
-                                        tgt,
-                                        delimiter=delimiter,
-                                        exact_match=True)
+        return self._cached(('pillar_exact', tgt, delimiter),
+                            salt.utils.subdict_match,
+                            self.opts['pillar'],
+                            tgt,
+                            delimiter=delimiter,
+                            exact_match=True)
 
     def ipcidr_match(self, tgt):
         '''
         Matches based on IP address or CIDR notation
         '''
+        return self._cached(('ipcidr', tgt), self._ipcidr_match, tgt)
 
+    def _ipcidr_match(self, tgt):
         try:
             tgt = ipaddress.ip_network(tgt)
             # Target is a network
@@ -2410,71 +2485,45 @@ class Matcher(object):
         if HAS_RANGE:
             ref['R'] = 'range'
 
-        results = []
-        opers = ['and', 'or', 'not', '(', ')']
-
-        if isinstance(tgt, six.string_types):
-            words = tgt.split()
-        else:
-            words = tgt
-
-        for word in words:
-            target_info = salt.utils.minions.parse_target(word)
-
-            # Easy check first
-            if word in opers:
-                if results:
-                    if results[-1] == '(' and word in ('and', 'or'):
-                        log.error('Invalid beginning operator after "(": {0}'.format(word))
-                        return False
-                    if word == 'not':
-                        if not results[-1] in ('and', 'or', '('):
-                            results.append('and')
-                    results.append(word)
-                else:
-                    # seq start with binary oper, fail
-                    if word not in ['(', 'not']:
-                        log.error('Invalid beginning operator: {0}'.format(word))
-                        return False
-                    results.append(word)
-
-            elif target_info and target_info['engine']:
-                if 'N' == target_info['engine']:
-                    # Nodegroups should already be expanded/resolved to other engines
-                    log.error('Detected nodegroup expansion failure of "{0}"'.format(word))
-                    return False
-                engine = ref.get(target_info['engine'])
-                if not engine:
-                    # If an unknown engine is called at any time, fail out
-                    log.error('Unrecognized target engine "{0}" for'
-                              ' target expression "{1}"'.format(
-                                  target_info['engine'],
-                                  word,
-                                )
-                        )
-                    return False
-
-                engine_args = [target_info['pattern']]
-                engine_kwargs = {}
-                if target_info['delimiter']:
-                    engine_kwargs['delimiter'] = target_info['delimiter']
+        try:
+            tree = salt.utils.compound.parse(tgt)
+        except salt.utils.compound.CompoundError as exc:
+            log.error('Invalid compound target: {0}: {1}'.format(tgt, exc))
+            return False
 
-                results.append(
-                    str(getattr(self, '{0}_match'.format(engine))(*engine_args, **engine_kwargs))
-                )
+        for target in tree.targets():
+            if target.engine is None:
+                continue
+            if 'N' == target.engine:
+                # Nodegroups should already be expanded/resolved to other engines
+                log.error('Detected nodegroup expansion failure of "{0}"'.format(target.word))
+                return False
+            if not ref.get(target.engine):
+                # If an unknown engine is called at any time, fail out
+                log.error('Unrecognized target engine "{0}" for'
+                          ' target expression "{1}"'.format(
+                              target.engine,
+                              target.word,
+                            )
+                    )
+                return False
 
-            else:
+        def check(target):
+            if target.engine is None:
                 # The match is not explicitly defined, evaluate it as a glob
-                results.append(str(self.glob_match(word)))
+                return bool(self.glob_match(target.word))
+            engine_kwargs = {}
+            if target.delimiter:
+                engine_kwargs['delimiter'] = target.delimiter
+            return bool(getattr(self, '{0}_match'.format(ref[target.engine]))(
+                target.pattern, **engine_kwargs
+            ))
 
-        results = ' '.join(results)
-        log.debug('compound_match {0} ? "{1}" => "{2}"'.format(self.opts['id'], tgt, results))
-        try:
-            return eval(results)  # pylint: disable=W0123
-        except Exception:
-            log.error('Invalid compound target: {0} for results: {1}'.format(tgt, results))
-            return False
-        return False
+        if any(target.engine == 'R' for target in tree.targets()):
+            # Range clusters are looked up remotely, do not cache them
+            return salt.utils.compound.match(tree, check)
+        key = ('compound', tgt if isinstance(tgt, six.string_types) else tuple(tgt))
+        return self._cached(key, salt.utils.compound.match, tree, check)
 
     def nodegroup_match(self, tgt, nodegroups):
         '''
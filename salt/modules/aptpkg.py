@@ -34,6 +34,7 @@ from salt.ext.six.moves.urllib.request import Request as _Request, urlopen as _u
 # Import salt libs
 from salt.modules.cmdmod import _parse_env
 import salt.utils
+import salt.utils.pkg.deb
 from salt.exceptions import (
     CommandExecutionError, MinionError, SaltInvocationError
 )
@@ -240,8 +241,6 @@ def latest_version(*names, **kwargs):
     for name in names:
         ret[name] = ''
     pkgs = list_pkgs(versions_as_list=True)
-    repo = ['-o', 'APT::Default-Release={0}'.format(fromrepo)] \
-        if fromrepo else ''
 
     # Refresh before looking for the latest version available
     if refresh:
@@ -252,27 +251,16 @@ def latest_version(*names, **kwargs):
     for provides in six.itervalues(virtpkgs):
         all_virt.update(provides)
 
+    candidates = _get_candidates(names, fromrepo)
     for name in names:
-        cmd = ['apt-cache', '-q', 'policy', name]
-        if isinstance(repo, list):
-            cmd = cmd + repo
-        out = __salt__['cmd.run_all'](cmd, python_shell=False,
-                                      output_loglevel='trace')
-        candidate = ''
-        for line in out['stdout'].splitlines():
-            if 'Candidate' in line:
-                candidate = line.split()
-        if len(candidate) >= 2:
-            candidate = candidate[-1]
-            if candidate.lower() == '(none)':
-                # Virtual package is a candidate for installation if and only
-                # if it is not currently installed.
-                if name in all_virt and name not in pkgs:
-                    candidate = '1'
-                else:
-                    candidate = ''
-        else:
-            candidate = ''
+        candidate = candidates.get(name, '')
+        if candidate.lower() == '(none)':
+            # Virtual package is a candidate for installation if and only
+            # if it is not currently installed.
+            if name in all_virt and name not in pkgs:
+                candidate = '1'
+            else:
+                candidate = ''
 
         installed = pkgs.get(name, [])
         if not installed:
@@ -301,6 +289,33 @@ def latest_version(*names, **kwargs):
 available_version = salt.utils.alias_function(latest_version, 'available_version')
 
 
+def _get_candidates(names, fromrepo=None):
+    '''
+    Return the install candidates of the passed packages. The candidates are
+    kept until the next refresh of the package database, the ones which are
+    not known yet are looked up with a single apt-cache call.
+    '''
+    cache = __context__.setdefault('pkg._candidates', {}).setdefault(
+        fromrepo or '', {}
+    )
+    missing = [name for name in names if name not in cache]
+    if missing:
+        cmd = ['apt-cache', '-q', 'policy'] + missing
+        if fromrepo:
+            cmd.extend(['-o', 'APT::Default-Release={0}'.format(fromrepo)])
+        out = __salt__['cmd.run_all'](cmd, python_shell=False,
+                                      output_loglevel='trace')
+        policy = salt.utils.pkg.deb.parse_policy(out['stdout'])
+        for name in missing:
+            cache[name] = policy.get(name, '')
+        for name, candidate in six.iteritems(policy):
+            # Packages of a foreign architecture are listed as name:arch
+            base = name.rsplit(':', 1)[0]
+            if base in missing and not cache[base]:
+                cache[base] = candidate
+    return dict((name, cache[name]) for name in names)
+
+
 def version(*names, **kwargs):
     '''
     Returns a string representing the package version or an empty string if not
@@ -335,6 +350,7 @@ def refresh_db():
         salt '*' pkg.refresh_db
     '''
     ret = {}
+    __context__.pop('pkg._candidates', None)
     cmd = 'apt-get -q update'
     call = __salt__['cmd.run_all'](cmd, output_loglevel='trace')
     if call['retcode'] != 0:
@@ -665,10 +681,13 @@ def install(name=None,
     env = _parse_env(kwargs.get('env'))
     env.update(DPKG_ENV_VARS.copy())
 
+    out = []
     for cmd in cmds:
-        __salt__['cmd.run'](cmd, python_shell=False, output_loglevel='trace')
+        out.append(
+            __salt__['cmd.run'](cmd, python_shell=False, output_loglevel='trace')
+        )
 
-    __context__.pop('pkg.list_pkgs', None)
+    _update_snapshot('\n'.join(out))
     new = list_pkgs()
     ret = salt.utils.compare_dicts(old, new)
 
@@ -701,13 +720,13 @@ def _uninstall(action='remove', name=None, pkgs=None, **kwargs):
     cmd.extend(targets)
     env = _parse_env(kwargs.get('env'))
     env.update(DPKG_ENV_VARS.copy())
-    __salt__['cmd.run'](
+    out = __salt__['cmd.run'](
         cmd,
         env=env,
         python_shell=False,
         output_loglevel='trace'
     )
-    __context__.pop('pkg.list_pkgs', None)
+    _update_snapshot(out)
     new = list_pkgs()
     new_removed = list_pkgs(removed=True)
 
@@ -767,8 +786,8 @@ def autoremove(list_only=False, purge=False):
         if purge:
             cmd.append('--purge')
         cmd.append('autoremove')
-        __salt__['cmd.run'](cmd, python_shell=False)
-        __context__.pop('pkg.list_pkgs', None)
+        out = __salt__['cmd.run'](cmd, python_shell=False)
+        _update_snapshot(out)
         new = list_pkgs()
         return salt.utils.compare_dicts(old, new)
 
@@ -887,7 +906,7 @@ def upgrade(refresh=True, dist_upgrade=False, **kwargs):
         if 'stdout' in call:
             ret['comment'] += call['stdout']
     else:
-        __context__.pop('pkg.list_pkgs', None)
+        _update_snapshot(call['stdout'])
         new = list_pkgs()
         ret['changes'] = salt.utils.compare_dicts(old, new)
     return ret
@@ -1055,6 +1074,84 @@ def _clean_pkglist(pkgs):
             pkgs[name] = stripped
 
 
+def _dpkg_query(*names):
+    '''
+    Return the installed, removed and purge_desired packages known to dpkg,
+    all of them if no package name is passed
+    '''
+    ret = {'installed': {}, 'removed': {}, 'purge_desired': {}}
+    cmd = ['dpkg-query', '--showformat', salt.utils.pkg.deb.QUERYFORMAT, '-W']
+    cmd.extend(names)
+
+    out = __salt__['cmd.run_stdout'](
+            cmd,
+            output_loglevel='trace',
+            python_shell=False,
+            # dpkg-query fails when one of the packages is unknown
+            ignore_retcode=bool(names))
+    # Typical lines of output:
+    # install ok installed zsh 4.3.17-1ubuntu1 amd64
+    # deinstall ok config-files mc 3:4.8.1-2ubuntu1 amd64
+    for line in out.splitlines():
+        cols = line.split()
+        try:
+            linetype, status, name, version_num, arch = \
+                [cols[x] for x in (0, 2, 3, 4, 5)]
+        except (ValueError, IndexError):
+            continue
+        if __grains__.get('cpuarch', '') == 'x86_64':
+            osarch = __grains__.get('osarch', '')
+            if arch != 'all' and osarch == 'amd64' and osarch != arch:
+                name += ':{0}'.format(arch)
+        if len(cols):
+            if ('install' in linetype or 'hold' in linetype) and \
+                    'installed' in status:
+                __salt__['pkg_resource.add_pkg'](ret['installed'],
+                                                 name,
+                                                 version_num)
+            elif 'deinstall' in linetype:
+                __salt__['pkg_resource.add_pkg'](ret['removed'],
+                                                 name,
+                                                 version_num)
+            elif 'purge' in linetype and status == 'installed':
+                __salt__['pkg_resource.add_pkg'](ret['purge_desired'],
+                                                 name,
+                                                 version_num)
+    return ret
+
+
+def _get_snapshot():
+    '''
+    Return the snapshot of the dpkg database, it is read once and then kept
+    up to date by the transactions of this module
+    '''
+    if 'pkg._snapshot' not in __context__:
+        __context__['pkg._snapshot'] = _dpkg_query()
+    return __context__['pkg._snapshot']
+
+
+def _update_snapshot(output):
+    '''
+    Update the snapshot of the dpkg database after a transaction. Only the
+    packages named in the apt-get output are queried again, the whole
+    database is read again if none could be found.
+    '''
+    __context__.pop('pkg.list_pkgs', None)
+    if 'pkg._snapshot' not in __context__:
+        return
+    names = salt.utils.pkg.deb.parse_transaction(output)
+    if not names or not __opts__.get('pkg_snapshot_incremental', True):
+        __context__.pop('pkg._snapshot', None)
+        return
+    snapshot = __context__['pkg._snapshot']
+    for pkgs in six.itervalues(snapshot):
+        for name in list(pkgs):
+            if name.split(':', 1)[0] in names:
+                del pkgs[name]
+    for pkglist_type, pkgs in six.iteritems(_dpkg_query(*sorted(names))):
+        snapshot[pkglist_type].update(pkgs)
+
+
 def list_pkgs(versions_as_list=False,
               removed=False,
               purge_desired=False,
@@ -1106,42 +1203,7 @@ def list_pkgs(versions_as_list=False,
             __salt__['pkg_resource.stringify'](ret)
         return ret
 
-    ret = {'installed': {}, 'removed': {}, 'purge_desired': {}}
-    cmd = ['dpkg-query', '--showformat',
-           '${Status} ${Package} ${Version} ${Architecture}\n', '-W']
-
-    out = __salt__['cmd.run_stdout'](
-            cmd,
-            output_loglevel='trace',
-            python_shell=False)
-    # Typical lines of output:
-    # install ok installed zsh 4.3.17-1ubuntu1 amd64
-    # deinstall ok config-files mc 3:4.8.1-2ubuntu1 amd64
-    for line in out.splitlines():
-        cols = line.split()
-        try:
-            linetype, status, name, version_num, arch = \
-                [cols[x] for x in (0, 2, 3, 4, 5)]
-        except (ValueError, IndexError):
-            continue
-        if __grains__.get('cpuarch', '') == 'x86_64':
-            osarch = __grains__.get('osarch', '')
-            if arch != 'all' and osarch == 'amd64' and osarch != arch:
-                name += ':{0}'.format(arch)
-        if len(cols):
-            if ('install' in linetype or 'hold' in linetype) and \
-                    'installed' in status:
-                __salt__['pkg_resource.add_pkg'](ret['installed'],
-                                                 name,
-                                                 version_num)
-            elif 'deinstall' in linetype:
-                __salt__['pkg_resource.add_pkg'](ret['removed'],
-                                                 name,
-                                                 version_num)
-            elif 'purge' in linetype and status == 'installed':
-                __salt__['pkg_resource.add_pkg'](ret['purge_desired'],
-                                                 name,
-                                                 version_num)
+    ret = copy.deepcopy(_get_snapshot())
 
     # Check for virtual packages. We need dctrl-tools for this.
     if not removed:
@@ -660,6 +660,31 @@ def hash_file(path, saltenv='base', env=None):
     return __context__['cp.fileclient'].hash_file(path, saltenv)
 
 
+def hash_files(paths, saltenv='base', prefetch=False):
+    '''
+    Return the hashes of a list of files, the hashes of the files on the salt
+    master are requested at once.
+
+    prefetch
+        Keep the hashes of the files on the master for the following calls to
+        cp.hash_file and cp.cache_file, as long as the modules are loaded.
+        The state system prefetches the hashes of the files referenced by a
+        state run this way.
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' cp.hash_files salt://path/to/file1,salt://path/to/file2
+    '''
+    if isinstance(paths, six.string_types):
+        paths = paths.split(',')
+    _mk_client()
+    if prefetch:
+        return __context__['cp.fileclient'].prefetch_hashes(paths, saltenv)
+    return __context__['cp.fileclient'].hash_files(paths, saltenv)
+
+
 def push(path, keep_symlinks=False, upload_path=None):
     '''
     Push a file from the minion up to the master, the file will be saved to
@@ -26,6 +26,7 @@ import salt.config
 import salt.utils
 import salt.utils.jid
 import salt.utils.url
+import salt.utils.compact_state
 import salt.state
 import salt.payload
 from salt.exceptions import SaltInvocationError
@@ -66,6 +67,33 @@ def _filter_running(runnings):
     return ret
 
 
+def _compact_running(ret, kwargs):
+    '''
+    Return the compact form of the running data if it was asked for
+    '''
+    compact = kwargs.get('compact')
+    if compact is None:
+        compact = __salt__['config.option']('state_compact_returns', False)
+    if compact:
+        return salt.utils.compact_state.compact(ret)
+    return ret
+
+
+def _stream_opts(opts, kwargs):
+    '''
+    Only stream the results of the state runs of jobs published by the
+    master, the master puts the streamed results back into the return. Keep
+    the full results in the return when something on the minion gets it too.
+    '''
+    if kwargs.get('__pub_tgt') in (None, 'salt-call') \
+            or '__pub_schedule' in kwargs:
+        opts['state_stream_batch'] = 0
+        opts['state_stream_interval'] = 0
+    elif kwargs.get('__pub_ret') or opts.get('ext_job_cache') \
+            or opts.get('cache_jobs'):
+        opts['state_stream_stubs'] = False
+
+
 def _set_retcode(ret):
     '''
     Set the return code based on the data back from the state system
@@ -483,6 +511,9 @@ def highstate(test=None,
         with the running minion opts. This functionality is intended for using
         "roots" of salt directories (with their own minion config, pillars,
         file_roots) to run highstate out of.
+    compact : ``state_compact_returns``
+        Return the states which succeeded without changes as compact summary
+        rows, see :mod:`salt.utils.compact_state`.
 
     CLI Example:
 
@@ -539,6 +570,7 @@ def highstate(test=None,
     if 'pillarenv' in kwargs:
         opts['pillarenv'] = kwargs['pillarenv']
 
+    _stream_opts(opts, kwargs)
     try:
         st_ = salt.state.HighState(opts, pillar, kwargs.get('__pub_jid'), proxy=__proxy__)
     except NameError:
@@ -564,6 +596,7 @@ def highstate(test=None,
     cache_file = os.path.join(__opts__['cachedir'], 'highstate.p')
 
     _set_retcode(ret)
+    ret = _compact_running(ret, kwargs)
     # Work around Windows multiprocessing bug, set __opts__['test'] back to
     # value from before this function was run.
     __opts__['test'] = orig_test
@@ -616,6 +649,9 @@ def sls(mods,
         with the running minion opts. This functionality is intended for using
         "roots" of salt directories (with their own minion config, pillars,
         file_roots) to run highstate out of.
+    compact : ``state_compact_returns``
+        Return the states which succeeded without changes as compact summary
+        rows, see :mod:`salt.utils.compact_state`.
 
     CLI Example:
 
@@ -695,6 +731,7 @@ def sls(mods,
             '{0}.cache.p'.format(kwargs.get('cache_name', 'highstate'))
             )
 
+    _stream_opts(opts, kwargs)
     try:
         st_ = salt.state.HighState(opts, pillar, kwargs.get('__pub_jid'), proxy=__proxy__)
     except NameError:
@@ -759,7 +796,7 @@ def sls(mods,
         msg = 'Unable to write to highstate cache file {0}. Do you have permissions?'
         log.error(msg.format(cfn))
     os.umask(cumask)
-    return ret
+    return _compact_running(ret, kwargs)
 
 
 def top(topfn,
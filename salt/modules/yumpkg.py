@@ -423,24 +423,39 @@ def latest_version(*names, **kwargs):
     if refresh:
         refresh_db(**kwargs)
 
-    # Get updates for specified package(s)
-    # Sort by version number (highest to lowest) for loop below
-    updates = sorted(
-        _repoquery_pkginfo(
-            '{0} {1} --pkgnarrow=available {2}'
-            .format(repo_arg, exclude_arg, ' '.join(names))
-        ),
-        key=lambda pkginfo: _LooseVersion(pkginfo.version),
-        reverse=True
+    # The latest versions are kept until the next refresh of the package
+    # database, only the packages not looked up yet are passed to repoquery
+    cache = __context__.setdefault('pkg._latest', {}).setdefault(
+        (repo_arg, exclude_arg), {}
     )
+    missing = [x for x in names if x not in cache]
+    if missing:
+        # Get updates for specified package(s)
+        # Sort by version number (highest to lowest) for loop below
+        updates = sorted(
+            _repoquery_pkginfo(
+                '{0} {1} --pkgnarrow=available {2}'
+                .format(repo_arg, exclude_arg, ' '.join(missing))
+            ),
+            key=lambda pkginfo: _LooseVersion(pkginfo.version),
+            reverse=True
+        )
 
+        for name in missing:
+            cache[name] = ''
+            for pkg in (x for x in updates if x.name == name):
+                if pkg.arch == 'noarch' or pkg.arch == namearch_map[name] \
+                        or salt.utils.pkg.rpm.check_32(pkg.arch):
+                    cache[name] = pkg.version
+                    # no need to check another match, if there was one
+                    break
+
+    # A cached version may have been installed in the meantime, repoquery
+    # only reports the versions which are not installed
+    installed = list_pkgs(versions_as_list=True)
     for name in names:
-        for pkg in (x for x in updates if x.name == name):
-            if pkg.arch == 'noarch' or pkg.arch == namearch_map[name] \
-                    or salt.utils.pkg.rpm.check_32(pkg.arch):
-                ret[name] = pkg.version
-                # no need to check another match, if there was one
-                break
+        if cache[name] not in installed.get(name, []):
+            ret[name] = cache[name]
 
     # Return a string if only one package name passed
     if len(names) == 1:
@@ -542,12 +557,27 @@ def list_pkgs(versions_as_list=False, **kwargs):
             __salt__['pkg_resource.stringify'](ret)
             return ret
 
+    ret = _rpm_query()
+    __context__['pkg.list_pkgs'] = copy.deepcopy(ret)
+    if not versions_as_list:
+        __salt__['pkg_resource.stringify'](ret)
+    return ret
+
+
+def _rpm_query(*names):
+    '''
+    Return the installed packages, all of them if no package name is passed
+    '''
     ret = {}
-    cmd = ['rpm', '-qa', '--queryformat',
+    cmd = ['rpm', '-q' if names else '-qa', '--queryformat',
            salt.utils.pkg.rpm.QUERYFORMAT.replace('%{REPOID}', '(none)\n')]
+    cmd.extend(names)
     output = __salt__['cmd.run'](cmd,
                                  python_shell=False,
-                                 output_loglevel='trace')
+                                 output_loglevel='trace',
+                                 # rpm fails when one of the packages is not
+                                 # installed
+                                 ignore_retcode=bool(names))
     for line in output.splitlines():
         pkginfo = salt.utils.pkg.rpm.parse_pkginfo(
             line,
@@ -559,12 +589,46 @@ def list_pkgs(versions_as_list=False, **kwargs):
                                              pkginfo.version)
 
     __salt__['pkg_resource.sort_pkglist'](ret)
-    __context__['pkg.list_pkgs'] = copy.deepcopy(ret)
-    if not versions_as_list:
-        __salt__['pkg_resource.stringify'](ret)
     return ret
 
 
+def _base_name(name):
+    '''
+    Strip the architecture from a package name of the form name.arch
+    '''
+    comps = name.rsplit('.', 1)
+    if len(comps) == 2 and comps[1] in salt.utils.pkg.rpm.ARCHES:
+        return comps[0]
+    return name
+
+
+def _update_snapshot(output):
+    '''
+    Update the cached package list and latest versions after a transaction.
+    Only the packages named in the yum output are queried again, the whole
+    package list is read again if none could be found.
+    '''
+    names = salt.utils.pkg.rpm.parse_transaction(output)
+    if not names:
+        __context__.pop('pkg._latest', None)
+    else:
+        for cache in six.itervalues(__context__.get('pkg._latest', {})):
+            for name in [x for x in cache if _base_name(x) in names]:
+                del cache[name]
+    if 'pkg.list_pkgs' not in __context__:
+        return
+    if not names or not __opts__.get('pkg_snapshot_incremental', True):
+        __context__.pop('pkg.list_pkgs', None)
+        return
+    # The cached list may be held by the caller of list_pkgs, it is replaced
+    # instead of being modified in place
+    snapshot = dict((name, versions)
+                    for name, versions in six.iteritems(__context__['pkg.list_pkgs'])
+                    if _base_name(name) not in names)
+    snapshot.update(_rpm_query(*sorted(names)))
+    __context__['pkg.list_pkgs'] = snapshot
+
+
 def list_repo_pkgs(*args, **kwargs):
     '''
     .. versionadded:: 2014.1.0
@@ -812,6 +876,7 @@ def refresh_db(**kwargs):
         0: None,
         1: False,
     }
+    __context__.pop('pkg._latest', None)
 
     repo_arg = _get_repo_options(**kwargs)
     exclude_arg = _get_excludes_option(**kwargs)
@@ -1076,6 +1141,7 @@ def install(name=None,
             else:
                 downgrade.append(pkgstr)
 
+    out = []
     if targets:
         cmd = '{yum_command} -y {repo} {exclude} {branch} {gpgcheck} install {pkg}'.format(
             yum_command=_yum(),
@@ -1085,7 +1151,7 @@ def install(name=None,
             gpgcheck='--nogpgcheck' if skip_verify else '',
             pkg=' '.join(targets),
         )
-        __salt__['cmd.run'](cmd, output_loglevel='trace')
+        out.append(__salt__['cmd.run'](cmd, output_loglevel='trace'))
 
     if downgrade:
         cmd = '{yum_command} -y {repo} {exclude} {branch} {gpgcheck} downgrade {pkg}'.format(
@@ -1096,7 +1162,7 @@ def install(name=None,
             gpgcheck='--nogpgcheck' if skip_verify else '',
             pkg=' '.join(downgrade),
         )
-        __salt__['cmd.run'](cmd, output_loglevel='trace')
+        out.append(__salt__['cmd.run'](cmd, output_loglevel='trace'))
 
     if to_reinstall:
         cmd = '{yum_command} -y {repo} {exclude} {branch} {gpgcheck} reinstall {pkg}'.format(
@@ -1107,9 +1173,9 @@ def install(name=None,
             gpgcheck='--nogpgcheck' if skip_verify else '',
             pkg=' '.join(six.itervalues(to_reinstall)),
         )
-        __salt__['cmd.run'](cmd, output_loglevel='trace')
+        out.append(__salt__['cmd.run'](cmd, output_loglevel='trace'))
 
-    __context__.pop('pkg.list_pkgs', None)
+    _update_snapshot('\n'.join(out))
     new = list_pkgs()
 
     ret = salt.utils.compare_dicts(old, new)
@@ -1168,15 +1234,15 @@ def upgrade(refresh=True, skip_verify=False, **kwargs):
         refresh_db(**kwargs)
 
     old = list_pkgs()
-    cmd = '{yum_command} -q -y {repo} {exclude} {branch} {gpgcheck} upgrade'.format(
+    cmd = '{yum_command} -y {repo} {exclude} {branch} {gpgcheck} upgrade'.format(
         yum_command=_yum(),
         repo=repo_arg,
         exclude=exclude_arg,
         branch=branch_arg,
         gpgcheck='--nogpgcheck' if skip_verify else '')
 
-    __salt__['cmd.run'](cmd, output_loglevel='trace')
-    __context__.pop('pkg.list_pkgs', None)
+    out = __salt__['cmd.run'](cmd, output_loglevel='trace')
+    _update_snapshot(out)
     new = list_pkgs()
     ret = salt.utils.compare_dicts(old, new)
     if ret:
@@ -1186,7 +1252,7 @@ def upgrade(refresh=True, skip_verify=False, **kwargs):
 
 def remove(name=None, pkgs=None, **kwargs):  # pylint: disable=W0613
     '''
-    Remove packages with ``yum -q -y remove``.
+    Remove packages with ``yum -y remove``.
 
     name
         The name of the package to be deleted.
@@ -1221,11 +1287,11 @@ def remove(name=None, pkgs=None, **kwargs):  # pylint: disable=W0613
     if not targets:
         return {}
     quoted_targets = [_cmd_quote(target) for target in targets]
-    cmd = '{yum_command} -q -y remove {0}'.format(
+    cmd = '{yum_command} -y remove {0}'.format(
         ' '.join(quoted_targets),
         yum_command=_yum())
-    __salt__['cmd.run'](cmd, output_loglevel='trace')
-    __context__.pop('pkg.list_pkgs', None)
+    out = __salt__['cmd.run'](cmd, output_loglevel='trace')
+    _update_snapshot(out)
     new = list_pkgs()
     ret = salt.utils.compare_dicts(old, new)
     if ret:
@@ -1845,6 +1911,8 @@ def del_repo(repo, basedir=None, **kwargs):  # pylint: disable=W0613
             onlyrepo = False
 
     # If this is the only repo in the file, delete the file itself
+    # The latest versions depend on the configured repos
+    __context__.pop('pkg._latest', None)
     if onlyrepo:
         os.remove(repofile)
         return 'File {0} containing repo {1} has been removed'.format(
@@ -2010,6 +2078,7 @@ def mod_repo(repo, basedir=None, **kwargs):
     with salt.utils.fopen(repofile, 'w') as fileout:
         fileout.write(content)
 
+    __context__.pop('pkg._latest', None)
     return {repofile: filerepos}
 
 
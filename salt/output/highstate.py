@@ -70,6 +70,7 @@ import textwrap
 # Import salt libs
 import salt.utils
 import salt.output
+import salt.utils.compact_state
 from salt.utils.locales import sdecode
 
 # Import 3rd-party libs
@@ -87,6 +88,7 @@ def output(data):
 
 def _format_host(host, data):
     host = sdecode(host)
+    data = salt.utils.compact_state.expand(data)
 
     colors = salt.utils.get_colors(
             __opts__.get('color'),
@@ -7,6 +7,7 @@ Render the pillar data
 from __future__ import absolute_import
 import copy
 import os
+import time
 import collections
 import logging
 
@@ -16,6 +17,7 @@ import salt.fileclient
 import salt.minion
 import salt.crypt
 import salt.transport
+import salt.utils.process
 import salt.utils.url
 from salt.exceptions import SaltClientError
 from salt.template import compile_template
@@ -210,6 +212,10 @@ class Pillar(object):
         self.ext_pillars = salt.loader.pillars(ext_pillar_opts, self.functions)
         self.ignored_pillars = {}
         self.pillar_override = {}
+        # Populated by ext_pillar, the errors from failed sources when
+        # ext_pillar_fail_mode is closed and (source, seconds) tuples
+        self.ext_pillar_errors = []
+        self.ext_pillar_timings = []
         if pillar is not None:
             if isinstance(pillar, dict):
                 self.pillar_override = pillar
@@ -603,18 +609,110 @@ class Pillar(object):
                                             val)
         return ext
 
+    def _ext_pillar_source(self, pillar, val, pillar_dirs, key):
+        '''
+        Evaluate a single external pillar source, return the data it produced
+        '''
+        try:
+            return self._external_pillar_data(pillar,
+                                              val,
+                                              pillar_dirs,
+                                              key)
+        except TypeError as exc:
+            if str(exc).startswith('ext_pillar() takes exactly '):
+                log.warning('Deprecation warning: ext_pillar "{0}"'
+                            ' needs to accept minion_id as first'
+                            ' argument'.format(key))
+            else:
+                raise
+
+            return self._external_pillar_data(pillar,
+                                              val,
+                                              pillar_dirs,
+                                              key)
+
+    def _ext_pillar_failed(self, key, msg):
+        '''
+        Handle a failed or timed out external pillar source according to the
+        ``ext_pillar_fail_mode`` option, an invalid value fails closed
+        '''
+        fail_mode = self.opts.get('ext_pillar_fail_mode', 'open')
+        if fail_mode not in ('open', 'closed'):
+            log.error(
+                'Invalid ext_pillar_fail_mode {0!r}, must be \'open\' or '
+                '\'closed\', failing closed'.format(fail_mode)
+            )
+            fail_mode = 'closed'
+        if fail_mode == 'closed':
+            self.ext_pillar_errors.append(
+                'Failed to load ext_pillar {0}: {1}'.format(key, msg)
+            )
+
+    def _ext_pillar_timeout(self, key):
+        '''
+        Return the number of seconds the named external pillar source may run
+        when evaluated concurrently, 0 means no limit
+        '''
+        timeouts = self.opts.get('ext_pillar_timeouts') or {}
+        return timeouts.get(key, self.opts.get('ext_pillar_timeout', 0))
+
+    def _ext_pillar_concurrent(self, pillar, pillar_dirs, sources):
+        '''
+        Evaluate the external pillar sources in a pool of threads. Every source
+        is passed its own copy of the pillar data compiled before the external
+        pillars, the results are returned in configured order.
+        '''
+        calls = []
+        for key, val in sources:
+            calls.append(
+                salt.utils.process.TimedCall(
+                    self._ext_pillar_source,
+                    args=[copy.deepcopy(pillar), val, pillar_dirs, key],
+                    name=key
+                )
+            )
+        timed_out = salt.utils.process.run_timed_calls(
+            calls,
+            self.opts.get('ext_pillar_concurrency', 1),
+            lambda call: self._ext_pillar_timeout(call.name)
+        )
+        ret = []
+        for call in calls:
+            if call in timed_out:
+                msg = 'timed out after {0} seconds'.format(
+                    self._ext_pillar_timeout(call.name)
+                )
+                log.error('ext_pillar {0} {1}'.format(call.name, msg))
+                self._ext_pillar_failed(call.name, msg)
+                self.ext_pillar_timings.append((call.name, None))
+                continue
+            self.ext_pillar_timings.append((call.name, call.duration))
+            if call.exc_info is not None:
+                log.error(
+                    'Failed to load ext_pillar {0}: {1}'.format(
+                        call.name, call.exc_info[1]
+                    ),
+                    exc_info=call.exc_info
+                )
+                self._ext_pillar_failed(call.name, call.exc_info[1])
+                continue
+            ret.append(call.ret)
+        return ret
+
     def ext_pillar(self, pillar, pillar_dirs):
         '''
         Render the external pillar data
         '''
+        self.ext_pillar_errors = []
+        self.ext_pillar_timings = []
         if 'ext_pillar' not in self.opts:
             return pillar
         if not isinstance(self.opts['ext_pillar'], list):
             log.critical('The "ext_pillar" option is malformed')
             return pillar
-        ext = None
         # Bring in CLI pillar data
         pillar.update(self.pillar_override)
+        sources = []
         for run in self.opts['ext_pillar']:
             if not isinstance(run, dict):
                 log.critical('The "ext_pillar" option is malformed')
@@ -625,24 +723,21 @@ class Pillar(object):
                            'unavailable').format(key)
                     log.critical(err)
                     continue
+                sources.append((key, val))
+
+        if self.opts.get('ext_pillar_concurrency', 1) > 1 and len(sources) > 1:
+            for ext in self._ext_pillar_concurrent(pillar, pillar_dirs, sources):
+                if ext:
+                    pillar = merge(
+                        pillar,
+                        ext,
+                        self.merge_strategy,
+                        self.opts.get('renderer', 'yaml'))
+        else:
+            for key, val in sources:
+                start = time.time()
                 try:
-                    try:
-                        ext = self._external_pillar_data(pillar,
-                                                         val,
-                                                         pillar_dirs,
-                                                         key)
-                    except TypeError as exc:
-                        if str(exc).startswith('ext_pillar() takes exactly '):
-                            log.warning('Deprecation warning: ext_pillar "{0}"'
-                                        ' needs to accept minion_id as first'
-                                        ' argument'.format(key))
-                        else:
-                            raise
-
-                        ext = self._external_pillar_data(pillar,
-                                                         val,
-                                                         pillar_dirs,
-                                                         key)
+                    ext = self._ext_pillar_source(pillar, val, pillar_dirs, key)
                 except Exception as exc:
                     log.exception(
                             'Failed to load ext_pillar {0}: {1}'.format(
@@ -650,19 +745,29 @@ class Pillar(object):
                                 exc
                                 )
                             )
-            if ext:
-                pillar = merge(
-                    pillar,
-                    ext,
-                    self.merge_strategy,
-                    self.opts.get('renderer', 'yaml'))
-                ext = None
+                    self._ext_pillar_failed(key, exc)
+                    ext = None
+                self.ext_pillar_timings.append((key, time.time() - start))
+                if ext:
+                    pillar = merge(
+                        pillar,
+                        ext,
+                        self.merge_strategy,
+                        self.opts.get('renderer', 'yaml'))
+        for key, duration in self.ext_pillar_timings:
+            if duration is not None:
+                log.debug(
+                    'ext_pillar {0} took {1:.3f} seconds'.format(key, duration)
+                )
         return pillar
 
     def compile_pillar(self, ext=True, pillar_dirs=None):
         '''
         Render the pillar data and return
         '''
+        # Do not report the errors of a previous compile
+        self.ext_pillar_errors = []
+        self.ext_pillar_timings = []
         top, top_errors = self.get_top()
         if ext:
             if self.opts.get('ext_pillar_first', False):
@@ -681,6 +786,7 @@ class Pillar(object):
             matches = self.top_matches(top)
             pillar, errors = self.render_pillar(matches)
         errors.extend(top_errors)
+        errors.extend(self.ext_pillar_errors)
         if self.opts.get('pillar_opts', True):
             mopts = dict(self.opts)
             if 'grains' in mopts:
@@ -22,9 +22,13 @@ from salt.ext.six.moves import range
 
 log = logging.getLogger(__name__)
 
+# The libyaml scanner does not name the character it found
+_LIBYAML_TOKEN_ERROR = 'found character that cannot start any token'
+
 _ERROR_MAP = {
     ("found character '\\t' that cannot "
-     "start any token"): 'Illegal tab character'
+     "start any token"): 'Illegal tab character',
+    _LIBYAML_TOKEN_ERROR: 'Illegal tab character'
 }
 
 
@@ -37,6 +41,18 @@ def get_yaml_loader(argline):
     return yaml_loader
 
 
+def _mark_char(buf, mark):
+    '''
+    Return the character of the YAML data a scanner mark points to
+    '''
+    if isinstance(buf, six.binary_type):
+        buf = buf.decode('utf-8', 'replace')
+    try:
+        return buf.splitlines()[mark.line][mark.column]
+    except IndexError:
+        return None
+
+
 def render(yaml_data, saltenv='base', sls='', argline='', **kws):
     '''
     Accepts YAML as a string or as a file object and runs it through the YAML
@@ -50,9 +66,17 @@ def render(yaml_data, saltenv='base', sls='', argline='', **kws):
         try:
             data = load(yaml_data, Loader=get_yaml_loader(argline))
         except ScannerError as exc:
-            err_type = _ERROR_MAP.get(exc.problem, exc.problem)
+            # The marks of the libyaml scanner do not hold the buffer
+            buf = exc.problem_mark.buffer or yaml_data
+            problem = exc.problem
+            if problem == _LIBYAML_TOKEN_ERROR:
+                char = _mark_char(buf, exc.problem_mark)
+                if char is not None and char != '\t':
+                    problem = ('found character \'{0}\' that cannot start '
+                               'any token'.format(char))
+            err_type = _ERROR_MAP.get(problem, problem)
             line_num = exc.problem_mark.line + 1
-            raise SaltRenderError(err_type, line_num, exc.problem_mark.buffer)
+            raise SaltRenderError(err_type, line_num, buf)
         except ConstructorError as exc:
             raise SaltRenderError(exc)
         if len(warn_list) > 0:
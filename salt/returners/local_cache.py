@@ -18,6 +18,7 @@ import bisect
 import salt.payload
 import salt.utils
 import salt.utils.jid
+import salt.utils.compact_state
 import salt.exceptions
 
 log = logging.getLogger(__name__)
@@ -266,6 +267,7 @@ def get_jid(jid):
                 try:
                     ret_data = serial.load(
                         salt.utils.fopen(retp, 'rb'))
+                    ret_data = salt.utils.compact_state.expand(ret_data)
                     ret[fn_] = {'return': ret_data}
                     if os.path.isfile(outp):
                         ret[fn_]['out'] = serial.load(
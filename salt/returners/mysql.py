@@ -44,6 +44,20 @@ optional. The following ssl options are simply for illustration purposes:
     alternative.mysql.ssl_cert: '/etc/pki/mysql/certs/localhost.crt'
     alternative.mysql.ssl_key: '/etc/pki/mysql/certs/localhost.key'
 
+Connections are pooled per process. ``pool_size`` is the number of idle
+connections kept open, idle connections are pinged before reuse when they have
+not been used for ``pool_check_interval`` seconds. Returns and events can be
+written in batches with one multi-row insert, flushed once ``batch_size`` rows
+are queued or ``batch_timeout`` seconds after the first queued row. Batching
+is disabled when ``batch_size`` is 0.
+
+.. code-block:: yaml
+
+    mysql.pool_size: 5
+    mysql.pool_check_interval: 30
+    mysql.batch_size: 0
+    mysql.batch_timeout: 1
+
 Use the following mysql database schema:
 
 .. code-block:: sql
@@ -127,6 +141,7 @@ import logging
 
 # Import salt libs
 import salt.returners
+import salt.utils.dbpool
 import salt.utils.jid
 import salt.exceptions
 
@@ -160,7 +175,11 @@ def _get_options(ret=None):
                 'port': 3306,
                 'ssl_ca': None,
                 'ssl_cert': None,
-                'ssl_key': None}
+                'ssl_key': None,
+                'pool_size': 5,
+                'pool_check_interval': 30,
+                'batch_size': 0,
+                'batch_timeout': 1}
 
     attrs = {'host': 'host',
              'user': 'user',
@@ -169,7 +188,11 @@ def _get_options(ret=None):
              'port': 'port',
              'ssl_ca': 'ssl_ca',
              'ssl_cert': 'ssl_cert',
-             'ssl_key': 'ssl_key'}
+             'ssl_key': 'ssl_key',
+             'pool_size': 'pool_size',
+             'pool_check_interval': 'pool_check_interval',
+             'batch_size': 'batch_size',
+             'batch_timeout': 'batch_timeout'}
 
     _options = salt.returners.get_returner_options(__virtualname__,
                                                    ret,
@@ -177,77 +200,123 @@ def _get_options(ret=None):
                                                    __salt__=__salt__,
                                                    __opts__=__opts__,
                                                    defaults=defaults)
-    # Ensure port is an int
-    if 'port' in _options:
-        _options['port'] = int(_options['port'])
+    # Ensure port and pool settings are ints
+    for key in ('port', 'pool_size', 'pool_check_interval', 'batch_size'):
+        if key in _options:
+            _options[key] = int(_options[key] or 0)
     return _options
 
 
+def _connect(_options):
+    '''
+    Open a new connection to the MySQL server
+    '''
+    # An empty ssl_options dictionary passed to MySQLdb.connect will
+    # effectively connect w/o SSL.
+    ssl_options = {}
+    if _options.get('ssl_ca'):
+        ssl_options['ca'] = _options.get('ssl_ca')
+    if _options.get('ssl_cert'):
+        ssl_options['cert'] = _options.get('ssl_cert')
+    if _options.get('ssl_key'):
+        ssl_options['key'] = _options.get('ssl_key')
+    return MySQLdb.connect(host=_options.get('host'),
+                           user=_options.get('user'),
+                           passwd=_options.get('pass'),
+                           db=_options.get('db'),
+                           port=_options.get('port'),
+                           ssl=ssl_options)
+
+
+def _get_pool(_options):
+    '''
+    Return the connection pool of this process for the passed options
+    '''
+    return salt.utils.dbpool.get_pool(
+        __virtualname__,
+        _options,
+        _connect,
+        check=lambda conn: conn.ping(),
+        size=_options.get('pool_size'),
+        check_interval=_options.get('pool_check_interval')
+    )
+
+
 @contextmanager
-def _get_serv(ret=None, commit=False):
+def _get_serv(ret=None, commit=False, _options=None):
     '''
-    Return a mysql cursor
+    Return a mysql cursor from a pooled connection
     '''
-    _options = _get_options(ret)
+    if _options is None:
+        _options = _get_options(ret)
+    pool = _get_pool(_options)
 
-    connect = True
-    if __context__ and 'mysql_returner_conn' in __context__:
-        try:
-            log.debug('Trying to reuse MySQL connection pool')
-            conn = __context__['mysql_returner_conn']
-            conn.ping()
-            connect = False
-        except MySQLdb.connections.OperationalError as exc:
-            log.debug('OperationalError on ping: {0}'.format(exc))
-
-    if connect:
-        log.debug('Generating new MySQL connection pool')
-        try:
-            # An empty ssl_options dictionary passed to MySQLdb.connect will
-            # effectively connect w/o SSL.
-            ssl_options = {}
-            if _options.get('ssl_ca'):
-                ssl_options['ca'] = _options.get('ssl_ca')
-            if _options.get('ssl_cert'):
-                ssl_options['cert'] = _options.get('ssl_cert')
-            if _options.get('ssl_key'):
-                ssl_options['key'] = _options.get('ssl_key')
-            conn = MySQLdb.connect(host=_options.get('host'),
-                                   user=_options.get('user'),
-                                   passwd=_options.get('pass'),
-                                   db=_options.get('db'),
-                                   port=_options.get('port'),
-                                   ssl=ssl_options)
-
-            try:
-                __context__['mysql_returner_conn'] = conn
-            except TypeError:
-                pass
-        except MySQLdb.connections.OperationalError as exc:
-            raise salt.exceptions.SaltMasterError('MySQL returner could not connect to database: {exc}'.format(exc=exc))
+    try:
+        conn = pool.acquire()
+    except MySQLdb.connections.OperationalError as exc:
+        raise salt.exceptions.SaltMasterError('MySQL returner could not connect to database: {exc}'.format(exc=exc))
 
     cursor = conn.cursor()
 
+    # Only connections left without an open transaction go back to the pool
+    clean = False
     try:
         yield cursor
     except MySQLdb.DatabaseError as err:
         error = err.args
         sys.stderr.write(str(error))
         cursor.execute("ROLLBACK")
+        clean = not isinstance(err, MySQLdb.OperationalError)
         raise err
     else:
         if commit:
             cursor.execute("COMMIT")
         else:
             cursor.execute("ROLLBACK")
+        clean = True
+    finally:
+        pool.release(conn, discard=not clean)
+
+
+def _write_returns(_options, rows):
+    '''
+    Insert a batch of returns with one statement
+    '''
+    values, params = salt.utils.dbpool.values_clause(rows)
+    with _get_serv(commit=True, _options=_options) as cur:
+        sql = '''INSERT INTO `salt_returns`
+                (`fun`, `jid`, `return`, `id`, `success`, `full_ret` )
+                ''' + values
+        cur.execute(sql, params)
+
+
+def _write_events(_options, rows):
+    '''
+    Insert a batch of events with one statement
+    '''
+    values, params = salt.utils.dbpool.values_clause(rows)
+    with _get_serv(commit=True, _options=_options) as cur:
+        sql = '''INSERT INTO `salt_events` (`tag`, `data`, `master_id` )
+                 ''' + values
+        cur.execute(sql, params)
 
 
 def returner(ret):
     '''
     Return data to a mysql server
     '''
+    _options = _get_options(ret)
+    if _options.get('batch_size'):
+        salt.utils.dbpool.get_batcher(
+            'mysql.salt_returns', _options, _write_returns
+        ).add((ret['fun'], ret['jid'],
+               json.dumps(ret['return']),
+               ret['id'],
+               ret.get('success', False),
+               json.dumps(ret)))
+        return
     try:
-        with _get_serv(ret, commit=True) as cur:
+        with _get_serv(ret, commit=True, _options=_options) as cur:
             sql = '''INSERT INTO `salt_returns`
                     (`fun`, `jid`, `return`, `id`, `success`, `full_ret` )
                     VALUES (%s, %s, %s, %s, %s, %s)'''
@@ -269,7 +338,17 @@ def event_return(events):
     Requires that configuration be enabled via 'event_return'
     option in master config.
     '''
-    with _get_serv(events, commit=True) as cur:
+    _options = _get_options(events)
+    if _options.get('batch_size'):
+        batcher = salt.utils.dbpool.get_batcher(
+            'mysql.salt_events', _options, _write_events
+        )
+        for event in events:
+            batcher.add((event.get('tag', ''),
+                         json.dumps(event.get('data', '')),
+                         __opts__['id']))
+        return
+    with _get_serv(events, commit=True, _options=_options) as cur:
         for event in events:
             tag = event.get('tag', '')
             data = event.get('data', '')
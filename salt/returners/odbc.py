@@ -53,6 +53,20 @@ Configure as you see fit::
     returner.odbc.user: 'salt'
     returner.odbc.passwd: 'salt'
 
+Connections are pooled per process. ``pool_size`` is the number of idle
+connections kept open, idle connections are checked before reuse when they
+have not been used for ``pool_check_interval`` seconds. Returns can be written
+in batches in one transaction, flushed once ``batch_size`` returns are queued
+or ``batch_timeout`` seconds after the first queued return. Batching is
+disabled when ``batch_size`` is 0.
+
+.. code-block:: yaml
+
+    returner.odbc.pool_size: 5
+    returner.odbc.pool_check_interval: 30
+    returner.odbc.batch_size: 0
+    returner.odbc.batch_timeout: 1
+
 Alternative configuration values can be used by prefacing the configuration.
 Any values not found in the alternative configuration will be pulled from
 the default location::
@@ -120,8 +134,10 @@ from __future__ import absolute_import
 
 # Import python libs
 import json
+from contextlib import contextmanager
 
 # Import Salt libs
+import salt.utils.dbpool
 import salt.utils.jid
 import salt.returners
 
@@ -148,23 +164,36 @@ def _get_options(ret=None):
     '''
     Get the odbc options from salt.
     '''
+    defaults = {'pool_size': 5,
+                'pool_check_interval': 30,
+                'batch_size': 0,
+                'batch_timeout': 1}
+
     attrs = {'dsn': 'dsn',
              'user': 'user',
-             'passwd': 'passwd'}
+             'passwd': 'passwd',
+             'pool_size': 'pool_size',
+             'pool_check_interval': 'pool_check_interval',
+             'batch_size': 'batch_size',
+             'batch_timeout': 'batch_timeout'}
 
     _options = salt.returners.get_returner_options('returner.{0}'.format(__virtualname__),
                                                    ret,
                                                    attrs,
                                                    __salt__=__salt__,
-                                                   __opts__=__opts__)
+                                                   __opts__=__opts__,
+                                                   defaults=defaults)
+    # Ensure the pool settings are ints
+    for key in ('pool_size', 'pool_check_interval', 'batch_size'):
+        if key in _options:
+            _options[key] = int(_options[key] or 0)
     return _options
 
 
-def _get_conn(ret=None):
+def _connect(_options):
     '''
-    Return a MSSQL connection.
+    Open a new MSSQL connection.
     '''
-    _options = _get_options(ret)
     dsn = _options.get('dsn')
     user = _options.get('user')
     passwd = _options.get('passwd')
@@ -175,61 +204,116 @@ def _get_conn(ret=None):
             passwd))
 
 
-def _close_conn(conn):
+def _check_conn(conn):
     '''
-    Close the MySQL connection
+    Raise if the passed pooled connection is no longer usable
     '''
-    conn.commit()
-    conn.close()
+    cur = conn.cursor()
+    cur.execute('SELECT 1')
+    cur.close()
+    conn.rollback()
+
+
+def _get_pool(_options):
+    '''
+    Return the connection pool of this process for the passed options
+    '''
+    return salt.utils.dbpool.get_pool(
+        __virtualname__,
+        _options,
+        _connect,
+        check=_check_conn,
+        size=_options.get('pool_size'),
+        check_interval=_options.get('pool_check_interval')
+    )
+
+
+@contextmanager
+def _get_conn(ret=None):
+    '''
+    Yield a pooled ODBC connection, committed and handed back to the pool
+    when the block succeeds
+    '''
+    pool = _get_pool(_get_options(ret))
+    conn = pool.acquire()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        # The connection may be broken, do not hand it out again
+        pool.release(conn, discard=True)
+        raise
+    pool.release(conn)
+
+
+def _write_returns(_options, rows):
+    '''
+    Insert a batch of returns in one transaction
+    '''
+    pool = _get_pool(_options)
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        sql = '''INSERT INTO salt_returns
+                (fun, jid, retval, id, success, full_ret)
+                VALUES (?, ?, ?, ?, ?, ?)'''
+        cur.executemany(sql, rows)
 
 
 def returner(ret):
     '''
     Return data to an odbc server
     '''
-    conn = _get_conn(ret)
-    cur = conn.cursor()
-    sql = '''INSERT INTO salt_returns
-            (fun, jid, retval, id, success, full_ret)
-            VALUES (?, ?, ?, ?, ?, ?)'''
-    cur.execute(
-        sql, (
-            ret['fun'],
-            ret['jid'],
-            json.dumps(ret['return']),
-            ret['id'],
-            ret['success'],
-            json.dumps(ret)
+    _options = _get_options(ret)
+    if _options.get('batch_size'):
+        salt.utils.dbpool.get_batcher(
+            'odbc.salt_returns', _options, _write_returns
+        ).add((ret['fun'],
+               ret['jid'],
+               json.dumps(ret['return']),
+               ret['id'],
+               ret['success'],
+               json.dumps(ret)))
+        return
+    with _get_conn(ret) as conn:
+        cur = conn.cursor()
+        sql = '''INSERT INTO salt_returns
+                (fun, jid, retval, id, success, full_ret)
+                VALUES (?, ?, ?, ?, ?, ?)'''
+        cur.execute(
+            sql, (
+                ret['fun'],
+                ret['jid'],
+                json.dumps(ret['return']),
+                ret['id'],
+                ret['success'],
+                json.dumps(ret)
+            )
         )
-    )
-    _close_conn(conn)
 
 
 def save_load(jid, load):
     '''
     Save the load to the specified jid id
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''INSERT INTO jids (jid, load) VALUES (?, ?)'''
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''INSERT INTO jids (jid, load) VALUES (?, ?)'''
 
-    cur.execute(sql, (jid, json.dumps(load)))
-    _close_conn(conn)
+        cur.execute(sql, (jid, json.dumps(load)))
 
 
 def get_load(jid):
     '''
     Return the load data that marks a specified jid
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT load FROM jids WHERE jid = ?;'''
-
-    cur.execute(sql, (jid,))
-    data = cur.fetchone()
-    if data:
-        return json.loads(data)
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT load FROM jids WHERE jid = ?;'''
+
+        cur.execute(sql, (jid,))
+        data = cur.fetchone()
+        if data:
+            return json.loads(data)
     return {}
 
 
@@ -237,17 +321,16 @@ def get_jid(jid):
     '''
     Return the information returned when the specified job id was executed
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT id, full_ret FROM salt_returns WHERE jid = ?'''
-
-    cur.execute(sql, (jid,))
-    data = cur.fetchall()
-    ret = {}
-    if data:
-        for minion, full_ret in data:
-            ret[minion] = json.loads(full_ret)
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT id, full_ret FROM salt_returns WHERE jid = ?'''
+
+        cur.execute(sql, (jid,))
+        data = cur.fetchall()
+        ret = {}
+        if data:
+            for minion, full_ret in data:
+                ret[minion] = json.loads(full_ret)
     return ret
 
 
@@ -255,23 +338,22 @@ def get_fun(fun):
     '''
     Return a dict of the last function called for all minions
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT s.id,s.jid, s.full_ret
-            FROM salt_returns s
-            JOIN ( SELECT MAX(jid) AS jid FROM salt_returns GROUP BY fun, id) max
-            ON s.jid = max.jid
-            WHERE s.fun = ?
-            '''
-
-    cur.execute(sql, (fun,))
-    data = cur.fetchall()
-
-    ret = {}
-    if data:
-        for minion, _, retval in data:
-            ret[minion] = json.loads(retval)
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT s.id,s.jid, s.full_ret
+                FROM salt_returns s
+                JOIN ( SELECT MAX(jid) AS jid FROM salt_returns GROUP BY fun, id) max
+                ON s.jid = max.jid
+                WHERE s.fun = ?
+                '''
+
+        cur.execute(sql, (fun,))
+        data = cur.fetchall()
+
+        ret = {}
+        if data:
+            for minion, _, retval in data:
+                ret[minion] = json.loads(retval)
     return ret
 
 
@@ -279,16 +361,15 @@ def get_jids():
     '''
     Return a list of all job ids
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT distinct jid FROM jids'''
-
-    cur.execute(sql)
-    data = cur.fetchall()
-    ret = []
-    for jid in data:
-        ret.append(jid[0])
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT distinct jid FROM jids'''
+
+        cur.execute(sql)
+        data = cur.fetchall()
+        ret = []
+        for jid in data:
+            ret.append(jid[0])
     return ret
 
 
@@ -296,16 +377,15 @@ def get_minions():
     '''
     Return a list of minions
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT DISTINCT id FROM salt_returns'''
-
-    cur.execute(sql)
-    data = cur.fetchall()
-    ret = []
-    for minion in data:
-        ret.append(minion[0])
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT DISTINCT id FROM salt_returns'''
+
+        cur.execute(sql)
+        data = cur.fetchall()
+        ret = []
+        for minion in data:
+            ret.append(minion[0])
     return ret
 
 
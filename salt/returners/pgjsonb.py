@@ -28,6 +28,20 @@ either exclude these options or set them to None.
     returner.pgjsonb.ssl_cert: None
     returner.pgjsonb.ssl_key: None
 
+Connections are pooled per process. ``pool_size`` is the number of idle
+connections kept open, idle connections are checked before reuse when they
+have not been used for ``pool_check_interval`` seconds. Returns and events can
+be written in batches with one multi-row insert, flushed once ``batch_size``
+rows are queued or ``batch_timeout`` seconds after the first queued row.
+Batching is disabled when ``batch_size`` is 0.
+
+.. code-block:: yaml
+
+    returner.pgjsonb.pool_size: 5
+    returner.pgjsonb.pool_check_interval: 30
+    returner.pgjsonb.batch_size: 0
+    returner.pgjsonb.batch_timeout: 1
+
 Alternative configuration values can be used by prefacing the configuration
 with `alternative.`. Any values not found in the alternative configuration will
 be pulled from the default location. As stated above, SSL configuration is
@@ -132,6 +146,7 @@ import logging
 
 # Import salt libs
 import salt.returners
+import salt.utils.dbpool
 import salt.utils.jid
 import salt.exceptions
 
@@ -163,13 +178,21 @@ def _get_options(ret=None):
                 'user': 'salt',
                 'pass': 'salt',
                 'db': 'salt',
-                'port': 5432}
+                'port': 5432,
+                'pool_size': 5,
+                'pool_check_interval': 30,
+                'batch_size': 0,
+                'batch_timeout': 1}
 
     attrs = {'host': 'host',
              'user': 'user',
              'pass': 'pass',
              'db': 'db',
-             'port': 'port'}
+             'port': 'port',
+             'pool_size': 'pool_size',
+             'pool_check_interval': 'pool_check_interval',
+             'batch_size': 'batch_size',
+             'batch_timeout': 'batch_timeout'}
 
     _options = salt.returners.get_returner_options('returner.{0}'.format(__virtualname__),
                                                    ret,
@@ -177,61 +200,134 @@ def _get_options(ret=None):
                                                    __salt__=__salt__,
                                                    __opts__=__opts__,
                                                    defaults=defaults)
-    # Ensure port is an int
-    if 'port' in _options:
-        _options['port'] = int(_options['port'])
+    # Ensure port and pool settings are ints
+    for key in ('port', 'pool_size', 'pool_check_interval', 'batch_size'):
+        if key in _options:
+            _options[key] = int(_options[key] or 0)
     return _options
 
 
+def _connect(_options):
+    '''
+    Open a new connection to the Pg server
+    '''
+    # An empty ssl_options dictionary passed to MySQLdb.connect will
+    # effectively connect w/o SSL.
+    ssl_options = {}
+    if _options.get('ssl_ca'):
+        ssl_options['ca'] = _options.get('ssl_ca')
+    if _options.get('ssl_cert'):
+        ssl_options['cert'] = _options.get('ssl_cert')
+    if _options.get('ssl_key'):
+        ssl_options['key'] = _options.get('ssl_key')
+    return psycopg2.connect(host=_options.get('host'),
+                            user=_options.get('user'),
+                            password=_options.get('pass'),
+                            database=_options.get('db'),
+                            port=_options.get('port'))
+#                            ssl=ssl_options)
+
+
+def _check_conn(conn):
+    '''
+    Raise if the passed pooled connection is no longer usable
+    '''
+    if conn.closed:
+        raise psycopg2.InterfaceError('connection already closed')
+    cursor = conn.cursor()
+    cursor.execute('SELECT 1')
+    conn.rollback()
+
+
+def _get_pool(_options):
+    '''
+    Return the connection pool of this process for the passed options
+    '''
+    return salt.utils.dbpool.get_pool(
+        __virtualname__,
+        _options,
+        _connect,
+        check=_check_conn,
+        size=_options.get('pool_size'),
+        check_interval=_options.get('pool_check_interval')
+    )
+
+
 @contextmanager
-def _get_serv(ret=None, commit=False):
+def _get_serv(ret=None, commit=False, _options=None):
     '''
-    Return a Pg cursor
+    Return a Pg cursor from a pooled connection
     '''
-    _options = _get_options(ret)
+    if _options is None:
+        _options = _get_options(ret)
+    pool = _get_pool(_options)
     try:
-        # An empty ssl_options dictionary passed to MySQLdb.connect will
-        # effectively connect w/o SSL.
-        ssl_options = {}
-        if _options.get('ssl_ca'):
-            ssl_options['ca'] = _options.get('ssl_ca')
-        if _options.get('ssl_cert'):
-            ssl_options['cert'] = _options.get('ssl_cert')
-        if _options.get('ssl_key'):
-            ssl_options['key'] = _options.get('ssl_key')
-        conn = psycopg2.connect(host=_options.get('host'),
-                                user=_options.get('user'),
-                                password=_options.get('pass'),
-                                database=_options.get('db'),
-                                port=_options.get('port'))
-#                                ssl=ssl_options)
+        conn = pool.acquire()
     except psycopg2.OperationalError as exc:
         raise salt.exceptions.SaltMasterError('pgjsonb returner could not connect to database: {exc}'.format(exc=exc))
 
     cursor = conn.cursor()
 
+    # Only connections left without an open transaction go back to the pool
+    clean = False
     try:
         yield cursor
     except psycopg2.DatabaseError as err:
         error = err.args
         sys.stderr.write(str(error))
         cursor.execute("ROLLBACK")
+        clean = not isinstance(err, psycopg2.OperationalError)
         raise err
     else:
         if commit:
             cursor.execute("COMMIT")
         else:
             cursor.execute("ROLLBACK")
+        clean = True
     finally:
-        conn.close()
+        pool.release(conn, discard=not clean)
+
+
+def _write_returns(_options, rows):
+    '''
+    Insert a batch of returns with one statement
+    '''
+    values, params = salt.utils.dbpool.values_clause(rows)
+    with _get_serv(commit=True, _options=_options) as cur:
+        sql = '''INSERT INTO salt_returns
+                (fun, jid, return, id, success, full_ret, alter_time)
+                ''' + values
+        cur.execute(sql, params)
+
+
+def _write_events(_options, rows):
+    '''
+    Insert a batch of events with one statement
+    '''
+    values, params = salt.utils.dbpool.values_clause(rows)
+    with _get_serv(commit=True, _options=_options) as cur:
+        sql = '''INSERT INTO salt_events (tag, data, master_id, alter_time)
+                 ''' + values
+        cur.execute(sql, params)
 
 
 def returner(ret):
     '''
     Return data to a Pg server
     '''
+    _options = _get_options(ret)
+    if _options.get('batch_size'):
+        salt.utils.dbpool.get_batcher(
+            'pgjsonb.salt_returns', _options, _write_returns
+        ).add((ret['fun'], ret['jid'],
+               psycopg2.extras.Json(ret['return']),
+               ret['id'],
+               ret.get('success', False),
+               psycopg2.extras.Json(ret),
+               time.strftime('%Y-%m-%d %H:%M:%S %z', time.localtime())))
+        return
     try:
-        with _get_serv(ret, commit=True) as cur:
+        with _get_serv(ret, commit=True, _options=_options) as cur:
             sql = '''INSERT INTO salt_returns
                     (fun, jid, return, id, success, full_ret, alter_time)
                     VALUES (%s, %s, %s, %s, %s, %s, %s)'''
@@ -253,7 +349,18 @@ def event_return(events):
     Requires that configuration be enabled via 'event_return'
     option in master config.
     '''
-    with _get_serv(events, commit=True) as cur:
+    _options = _get_options(events)
+    if _options.get('batch_size'):
+        batcher = salt.utils.dbpool.get_batcher(
+            'pgjsonb.salt_events', _options, _write_events
+        )
+        for event in events:
+            batcher.add((event.get('tag', ''),
+                         psycopg2.extras.Json(event.get('data', '')),
+                         __opts__['id'],
+                         time.strftime('%Y-%m-%d %H:%M:%S %z', time.localtime())))
+        return
+    with _get_serv(events, commit=True, _options=_options) as cur:
         for event in events:
             tag = event.get('tag', '')
             data = event.get('data', '')
@@ -18,6 +18,20 @@ the following values configured in the minion or master config:
     returner.postgres.db: 'salt'
     returner.postgres.port: 5432
 
+Connections are pooled per process. ``pool_size`` is the number of idle
+connections kept open, idle connections are checked before reuse when they
+have not been used for ``pool_check_interval`` seconds. Returns can be written
+in batches in one transaction, flushed once ``batch_size`` returns are queued
+or ``batch_timeout`` seconds after the first queued return. Batching is
+disabled when ``batch_size`` is 0.
+
+.. code-block:: yaml
+
+    returner.postgres.pool_size: 5
+    returner.postgres.pool_check_interval: 30
+    returner.postgres.batch_size: 0
+    returner.postgres.batch_timeout: 1
+
 Alternative configuration values can be used by prefacing the configuration.
 Any values not found in the alternative configuration will be pulled from
 the default location:
@@ -92,8 +106,10 @@ from __future__ import absolute_import
 
 # Import python libs
 import json
+from contextlib import contextmanager
 
 # Import Salt libs
+import salt.utils.dbpool
 import salt.utils.jid
 import salt.returners
 
@@ -118,26 +134,38 @@ def _get_options(ret=None):
     '''
     Get the postgres options from salt.
     '''
+    defaults = {'pool_size': 5,
+                'pool_check_interval': 30,
+                'batch_size': 0,
+                'batch_timeout': 1}
+
     attrs = {'host': 'host',
              'user': 'user',
              'passwd': 'passwd',
              'db': 'db',
-             'port': 'port'}
+             'port': 'port',
+             'pool_size': 'pool_size',
+             'pool_check_interval': 'pool_check_interval',
+             'batch_size': 'batch_size',
+             'batch_timeout': 'batch_timeout'}
 
     _options = salt.returners.get_returner_options('returner.{0}'.format(__virtualname__),
                                                    ret,
                                                    attrs,
                                                    __salt__=__salt__,
-                                                   __opts__=__opts__)
+                                                   __opts__=__opts__,
+                                                   defaults=defaults)
+    # Ensure the pool settings are ints
+    for key in ('pool_size', 'pool_check_interval', 'batch_size'):
+        if key in _options:
+            _options[key] = int(_options[key] or 0)
     return _options
 
 
-def _get_conn(ret=None):
+def _connect(_options):
     '''
-    Return a postgres connection.
+    Open a new postgres connection.
     '''
-    _options = _get_options(ret)
-
     host = _options.get('host')
     user = _options.get('user')
     passwd = _options.get('passwd')
@@ -152,60 +180,116 @@ def _get_conn(ret=None):
             port=port)
 
 
-def _close_conn(conn):
+def _check_conn(conn):
     '''
-    Close the Postgres connection
+    Raise if the passed pooled connection is no longer usable
     '''
-    conn.commit()
-    conn.close()
+    if conn.closed:
+        raise psycopg2.InterfaceError('connection already closed')
+    cur = conn.cursor()
+    cur.execute('SELECT 1')
+    conn.rollback()
+
+
+def _get_pool(_options):
+    '''
+    Return the connection pool of this process for the passed options
+    '''
+    return salt.utils.dbpool.get_pool(
+        __virtualname__,
+        _options,
+        _connect,
+        check=_check_conn,
+        size=_options.get('pool_size'),
+        check_interval=_options.get('pool_check_interval')
+    )
+
+
+@contextmanager
+def _get_conn(ret=None):
+    '''
+    Yield a pooled postgres connection, committed and handed back to the pool
+    when the block succeeds
+    '''
+    pool = _get_pool(_get_options(ret))
+    conn = pool.acquire()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        # The connection may be broken, do not hand it out again
+        pool.release(conn, discard=True)
+        raise
+    pool.release(conn)
+
+
+def _write_returns(_options, rows):
+    '''
+    Insert a batch of returns with one statement
+    '''
+    pool = _get_pool(_options)
+    values, params = salt.utils.dbpool.values_clause(rows)
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        sql = '''INSERT INTO salt_returns
+                (fun, jid, return, id, success)
+                ''' + values
+        cur.execute(sql, params)
 
 
 def returner(ret):
     '''
     Return data to a postgres server
     '''
-    conn = _get_conn(ret)
-    cur = conn.cursor()
-    sql = '''INSERT INTO salt_returns
-            (fun, jid, return, id, success)
-            VALUES (%s, %s, %s, %s, %s)'''
-    cur.execute(
-        sql, (
-            ret['fun'],
-            ret['jid'],
-            json.dumps(ret['return']),
-            ret['id'],
-            ret['success']
+    _options = _get_options(ret)
+    if _options.get('batch_size'):
+        salt.utils.dbpool.get_batcher(
+            'postgres.salt_returns', _options, _write_returns
+        ).add((ret['fun'],
+               ret['jid'],
+               json.dumps(ret['return']),
+               ret['id'],
+               ret['success']))
+        return
+    with _get_conn(ret) as conn:
+        cur = conn.cursor()
+        sql = '''INSERT INTO salt_returns
+                (fun, jid, return, id, success)
+                VALUES (%s, %s, %s, %s, %s)'''
+        cur.execute(
+            sql, (
+                ret['fun'],
+                ret['jid'],
+                json.dumps(ret['return']),
+                ret['id'],
+                ret['success']
+            )
         )
-    )
-    _close_conn(conn)
 
 
 def save_load(jid, load):
     '''
     Save the load to the specified jid id
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''INSERT INTO jids (jid, load) VALUES (%s, %s)'''
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''INSERT INTO jids (jid, load) VALUES (%s, %s)'''
 
-    cur.execute(sql, (jid, json.dumps(load)))
-    _close_conn(conn)
+        cur.execute(sql, (jid, json.dumps(load)))
 
 
 def get_load(jid):
     '''
     Return the load data that marks a specified jid
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT load FROM jids WHERE jid = %s;'''
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT load FROM jids WHERE jid = %s;'''
 
-    cur.execute(sql, (jid,))
-    data = cur.fetchone()
+        cur.execute(sql, (jid,))
+        data = cur.fetchone()
     if data:
         return json.loads(data[0])
-    _close_conn(conn)
     return {}
 
 
@@ -213,17 +297,16 @@ def get_jid(jid):
     '''
     Return the information returned when the specified job id was executed
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT id, full_ret FROM salt_returns WHERE jid = %s'''
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT id, full_ret FROM salt_returns WHERE jid = %s'''
 
-    cur.execute(sql, (jid,))
-    data = cur.fetchall()
+        cur.execute(sql, (jid,))
+        data = cur.fetchall()
     ret = {}
     if data:
         for minion, full_ret in data:
             ret[minion] = json.loads(full_ret)
-    _close_conn(conn)
     return ret
 
 
@@ -231,23 +314,22 @@ def get_fun(fun):
     '''
     Return a dict of the last function called for all minions
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT s.id,s.jid, s.full_ret
-            FROM salt_returns s
-            JOIN ( SELECT MAX(jid) AS jid FROM salt_returns GROUP BY fun, id) max
-            ON s.jid = max.jid
-            WHERE s.fun = %s
-            '''
-
-    cur.execute(sql, (fun,))
-    data = cur.fetchall()
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT s.id,s.jid, s.full_ret
+                FROM salt_returns s
+                JOIN ( SELECT MAX(jid) AS jid FROM salt_returns GROUP BY fun, id) max
+                ON s.jid = max.jid
+                WHERE s.fun = %s
+                '''
+
+        cur.execute(sql, (fun,))
+        data = cur.fetchall()
 
     ret = {}
     if data:
         for minion, _, full_ret in data:
             ret[minion] = json.loads(full_ret)
-    _close_conn(conn)
     return ret
 
 
@@ -255,16 +337,15 @@ def get_jids():
     '''
     Return a list of all job ids
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT jid FROM jids'''
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT jid FROM jids'''
 
-    cur.execute(sql)
-    data = cur.fetchall()
+        cur.execute(sql)
+        data = cur.fetchall()
     ret = []
     for jid in data:
         ret.append(jid[0])
-    _close_conn(conn)
     return ret
 
 
@@ -272,16 +353,15 @@ def get_minions():
     '''
     Return a list of minions
     '''
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT DISTINCT id FROM salt_returns'''
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT DISTINCT id FROM salt_returns'''
 
-    cur.execute(sql)
-    data = cur.fetchall()
+        cur.execute(sql)
+        data = cur.fetchall()
     ret = []
     for minion in data:
         ret.append(minion[0])
-    _close_conn(conn)
     return ret
 
 
@@ -19,6 +19,20 @@ minion config:
     returner.sqlite3.database: /usr/lib/salt/salt.db
     returner.sqlite3.timeout: 5.0
 
+Connections are pooled per process. ``pool_size`` is the number of idle
+connections kept open, idle connections are checked before reuse when they
+have not been used for ``pool_check_interval`` seconds. Returns can be written
+in batches in one transaction, flushed once ``batch_size`` returns are queued
+or ``batch_timeout`` seconds after the first queued return. Batching is
+disabled when ``batch_size`` is 0.
+
+.. code-block:: yaml
+
+    returner.sqlite3.pool_size: 5
+    returner.sqlite3.pool_check_interval: 30
+    returner.sqlite3.batch_size: 0
+    returner.sqlite3.batch_timeout: 1
+
 Alternative configuration values can be used by prefacing the configuration.
 Any values not found in the alternative configuration will be pulled from
 the default location:
@@ -78,8 +92,10 @@ from __future__ import absolute_import
 import logging
 import json
 import datetime
+from contextlib import contextmanager
 
 # Import Salt libs
+import salt.utils.dbpool
 import salt.utils.jid
 import salt.returners
 
@@ -106,24 +122,37 @@ def _get_options(ret=None):
     '''
     Get the SQLite3 options from salt.
     '''
+    defaults = {'pool_size': 5,
+                'pool_check_interval': 30,
+                'batch_size': 0,
+                'batch_timeout': 1}
+
     attrs = {'database': 'database',
-             'timeout': 'timeout'}
+             'timeout': 'timeout',
+             'pool_size': 'pool_size',
+             'pool_check_interval': 'pool_check_interval',
+             'batch_size': 'batch_size',
+             'batch_timeout': 'batch_timeout'}
 
     _options = salt.returners.get_returner_options(__virtualname__,
                                                    ret,
                                                    attrs,
                                                    __salt__=__salt__,
-                                                   __opts__=__opts__)
+                                                   __opts__=__opts__,
+                                                   defaults=defaults)
+    # Ensure the pool settings are ints
+    for key in ('pool_size', 'pool_check_interval', 'batch_size'):
+        if key in _options:
+            _options[key] = int(_options[key] or 0)
     return _options
 
 
-def _get_conn(ret=None):
+def _connect(_options):
     '''
-    Return a sqlite3 database connection
+    Open a new sqlite3 database connection
     '''
-    # Possible todo: support detect_types, isolation_level, check_same_thread,
-    # factory, cached_statements. Do we really need to though?
-    _options = _get_options(ret)
+    # Possible todo: support detect_types, isolation_level, factory,
+    # cached_statements. Do we really need to though?
     database = _options.get('database')
     timeout = _options.get('timeout')
 
@@ -136,17 +165,56 @@ def _get_conn(ret=None):
     log.debug('Connecting the sqlite3 database: {0} timeout: {1}'.format(
               database,
               timeout))
-    conn = sqlite3.connect(database, timeout=float(timeout))
+    # Pooled connections are handed to one thread at a time, but not
+    # necessarily to the thread which opened them
+    conn = sqlite3.connect(database,
+                           timeout=float(timeout),
+                           check_same_thread=False)
     return conn
 
 
-def _close_conn(conn):
+def _get_pool(_options):
     '''
-    Close the sqlite3 database connection
+    Return the connection pool of this process for the passed options
     '''
-    log.debug('Closing the sqlite3 database connection')
-    conn.commit()
-    conn.close()
+    return salt.utils.dbpool.get_pool(
+        __virtualname__,
+        _options,
+        _connect,
+        size=_options.get('pool_size'),
+        check_interval=_options.get('pool_check_interval')
+    )
+
+
+@contextmanager
+def _get_conn(ret=None):
+    '''
+    Yield a pooled sqlite3 connection, committed and handed back to the pool
+    when the block succeeds
+    '''
+    pool = _get_pool(_get_options(ret))
+    conn = pool.acquire()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        # The connection may be broken, do not hand it out again
+        pool.release(conn, discard=True)
+        raise
+    pool.release(conn)
+
+
+def _write_returns(_options, rows):
+    '''
+    Insert a batch of returns in one transaction
+    '''
+    pool = _get_pool(_options)
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        sql = '''INSERT INTO salt_returns
+                 (fun, jid, id, fun_args, date, full_ret, success)
+                 VALUES (:fun, :jid, :id, :fun_args, :date, :full_ret, :success)'''
+        cur.executemany(sql, rows)
 
 
 def returner(ret):
@@ -154,20 +222,25 @@ def returner(ret):
     Insert minion return data into the sqlite3 database
     '''
     log.debug('sqlite3 returner <returner> called with data: {0}'.format(ret))
-    conn = _get_conn(ret)
-    cur = conn.cursor()
-    sql = '''INSERT INTO salt_returns
-             (fun, jid, id, fun_args, date, full_ret, success)
-             VALUES (:fun, :jid, :id, :fun_args, :date, :full_ret, :success)'''
-    cur.execute(sql,
-                {'fun': ret['fun'],
-                 'jid': ret['jid'],
-                 'id': ret['id'],
-                 'fun_args': str(ret['fun_args']) if ret['fun_args'] else None,
-                 'date': str(datetime.datetime.now()),
-                 'full_ret': json.dumps(ret['return']),
-                 'success': ret['success']})
-    _close_conn(conn)
+    row = {'fun': ret['fun'],
+           'jid': ret['jid'],
+           'id': ret['id'],
+           'fun_args': str(ret['fun_args']) if ret['fun_args'] else None,
+           'date': str(datetime.datetime.now()),
+           'full_ret': json.dumps(ret['return']),
+           'success': ret['success']}
+    _options = _get_options(ret)
+    if _options.get('batch_size'):
+        salt.utils.dbpool.get_batcher(
+            'sqlite3.salt_returns', _options, _write_returns
+        ).add(row)
+        return
+    with _get_conn(ret) as conn:
+        cur = conn.cursor()
+        sql = '''INSERT INTO salt_returns
+                 (fun, jid, id, fun_args, date, full_ret, success)
+                 VALUES (:fun, :jid, :id, :fun_args, :date, :full_ret, :success)'''
+        cur.execute(sql, row)
 
 
 def save_load(jid, load):
@@ -176,13 +249,12 @@ def save_load(jid, load):
     '''
     log.debug('sqlite3 returner <save_load> called jid:{0} load:{1}'
               .format(jid, load))
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''INSERT INTO jids (jid, load) VALUES (:jid, :load)'''
-    cur.execute(sql,
-                {'jid': jid,
-                 'load': json.dumps(load)})
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''INSERT INTO jids (jid, load) VALUES (:jid, :load)'''
+        cur.execute(sql,
+                    {'jid': jid,
+                     'load': json.dumps(load)})
 
 
 def get_load(jid):
@@ -190,15 +262,14 @@ def get_load(jid):
     Return the load from a specified jid
     '''
     log.debug('sqlite3 returner <get_load> called jid: {0}'.format(jid))
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT load FROM jids WHERE jid = :jid'''
-    cur.execute(sql,
-                {'jid': jid})
-    data = cur.fetchone()
-    if data:
-        return json.loads(data)
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT load FROM jids WHERE jid = :jid'''
+        cur.execute(sql,
+                    {'jid': jid})
+        data = cur.fetchone()
+        if data:
+            return json.loads(data)
     return {}
 
 
@@ -207,18 +278,17 @@ def get_jid(jid):
     Return the information returned from a specified jid
     '''
     log.debug('sqlite3 returner <get_jid> called jid: {0}'.format(jid))
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT id, full_ret FROM salt_returns WHERE jid = :jid'''
-    cur.execute(sql,
-                {'jid': jid})
-    data = cur.fetchone()
-    log.debug('query result: {0}'.format(data))
-    ret = {}
-    if data and len(data) > 1:
-        ret = {str(data[0]): {u'return': json.loads(data[1])}}
-        log.debug("ret: {0}".format(ret))
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT id, full_ret FROM salt_returns WHERE jid = :jid'''
+        cur.execute(sql,
+                    {'jid': jid})
+        data = cur.fetchone()
+        log.debug('query result: {0}'.format(data))
+        ret = {}
+        if data and len(data) > 1:
+            ret = {str(data[0]): {u'return': json.loads(data[1])}}
+            log.debug("ret: {0}".format(ret))
     return ret
 
 
@@ -227,26 +297,25 @@ def get_fun(fun):
     Return a dict of the last function called for all minions
     '''
     log.debug('sqlite3 returner <get_fun> called fun: {0}'.format(fun))
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT s.id, s.full_ret, s.jid
-            FROM salt_returns s
-            JOIN ( SELECT MAX(jid) AS jid FROM salt_returns GROUP BY fun, id) max
-            ON s.jid = max.jid
-            WHERE s.fun = :fun
-            '''
-    cur.execute(sql,
-                {'fun': fun})
-    data = cur.fetchall()
-    ret = {}
-    if data:
-        # Pop the jid off the list since it is not
-        # needed and I am trying to get a perfect
-        # pylint score :-)
-        data.pop()
-        for minion, ret in data:
-            ret[minion] = json.loads(ret)
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT s.id, s.full_ret, s.jid
+                FROM salt_returns s
+                JOIN ( SELECT MAX(jid) AS jid FROM salt_returns GROUP BY fun, id) max
+                ON s.jid = max.jid
+                WHERE s.fun = :fun
+                '''
+        cur.execute(sql,
+                    {'fun': fun})
+        data = cur.fetchall()
+        ret = {}
+        if data:
+            # Pop the jid off the list since it is not
+            # needed and I am trying to get a perfect
+            # pylint score :-)
+            data.pop()
+            for minion, ret in data:
+                ret[minion] = json.loads(ret)
     return ret
 
 
@@ -255,15 +324,14 @@ def get_jids():
     Return a list of all job ids
     '''
     log.debug('sqlite3 returner <get_fun> called')
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT jid FROM jids'''
-    cur.execute(sql)
-    data = cur.fetchall()
-    ret = []
-    for jid in data:
-        ret.append(jid[0])
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT jid FROM jids'''
+        cur.execute(sql)
+        data = cur.fetchall()
+        ret = []
+        for jid in data:
+            ret.append(jid[0])
     return ret
 
 
@@ -272,15 +340,14 @@ def get_minions():
     Return a list of minions
     '''
     log.debug('sqlite3 returner <get_minions> called')
-    conn = _get_conn(ret=None)
-    cur = conn.cursor()
-    sql = '''SELECT DISTINCT id FROM salt_returns'''
-    cur.execute(sql)
-    data = cur.fetchall()
-    ret = []
-    for minion in data:
-        ret.append(minion[0])
-    _close_conn(conn)
+    with _get_conn(ret=None) as conn:
+        cur = conn.cursor()
+        sql = '''SELECT DISTINCT id FROM salt_returns'''
+        cur.execute(sql)
+        data = cur.fetchall()
+        ret = []
+        for minion in data:
+            ret.append(minion[0])
     return ret
 
 
@@ -26,12 +26,17 @@ import re
 
 # Import salt libs
 import salt.utils
+import salt.crypt
 import salt.loader
 import salt.minion
+import salt.transport
 import salt.pillar
 import salt.fileclient
 import salt.utils.event
 import salt.utils.url
+import salt.utils.state_stream
+import salt.utils.requisite_graph
+import salt.utils.aggregate_plan
 import salt.syspaths as syspaths
 from salt.utils import immutabletypes
 from salt.template import compile_template, compile_template_str
@@ -146,6 +151,54 @@ def trim_req(req):
     return req
 
 
+def lowstate_file_refs(chunks, extras=''):
+    '''
+    Create a list of file ref objects to reconcile
+    '''
+    refs = {}
+    for chunk in chunks:
+        if not isinstance(chunk, dict):
+            continue
+        saltenv = 'base'
+        crefs = []
+        for state in chunk:
+            if state == '__env__':
+                saltenv = chunk[state]
+            elif state.startswith('__'):
+                continue
+            crefs.extend(salt_refs(chunk[state]))
+        if crefs:
+            if saltenv not in refs:
+                refs[saltenv] = []
+            refs[saltenv].append(crefs)
+    if extras:
+        extra_refs = extras.split(',')
+        if extra_refs:
+            for env in refs:
+                for x in extra_refs:
+                    refs[env].append([x])
+    return refs
+
+
+def salt_refs(data, ret=None):
+    '''
+    Pull salt file references out of the states
+    '''
+    proto = 'salt://'
+    if ret is None:
+        ret = []
+    if isinstance(data, six.string_types):
+        if data.startswith(proto) and data not in ret:
+            ret.append(data)
+    if isinstance(data, list):
+        for comp in data:
+            salt_refs(comp, ret)
+    if isinstance(data, dict):
+        for comp in data:
+            salt_refs(data[comp], ret)
+    return ret
+
+
 def state_args(id_, state, high):
     '''
     Return a set of the arguments passed to the named state
@@ -615,6 +668,11 @@ class State(object):
         self.pre = {}
         self.__run_num = 0
         self.jid = jid
+        self.stream = None
+        self._stream_channel = None
+        self.req_graph = None
+        self.agg_plan = {}
+        self.agg_saved = 0
         self.instance_id = str(id(self))
 
     def _gather_pillar(self):
@@ -653,16 +711,79 @@ class State(object):
                     return
                 self.mod_init.add(low['state'])
 
+    def _plan_aggregate(self, chunks):
+        '''
+        Plan the aggregation of the chunks of a run, the chunks of each
+        planned group are merged into the first one when it is executed
+        '''
+        self.agg_plan = {}
+        self.agg_saved = 0
+        if not self.functions['config.option']('state_aggregate_plan'):
+            return
+        states = set()
+        for low in chunks:
+            if low['state'] not in states \
+                    and '{0}.mod_aggregate'.format(low['state']) in self.states:
+                states.add(low['state'])
+        agg_opt = self.functions['config.option']('state_aggregate')
+        if isinstance(agg_opt, list):
+            states.intersection_update(agg_opt)
+        if not states:
+            return
+        groups = salt.utils.aggregate_plan.plan(
+            self.requisite_graph(chunks), states
+        )
+        for group in groups:
+            self.agg_plan[_gen_tag(group[0])] = group
+        if groups:
+            log.debug(
+                'Planned the aggregation of {0} states into {1} '
+                'transactions'.format(sum(len(x) for x in groups), len(groups))
+            )
+
+    def _prefetch_hashes(self, chunks):
+        '''
+        Ask the master for the hashes of all the salt:// files referenced by
+        the chunks of a run at once, instead of once per file when the states
+        using them are executed
+        '''
+        if not self.opts.get('state_prefetch_hashes', True) \
+                or 'cp.hash_files' not in self.functions:
+            return
+        for saltenv, crefs in six.iteritems(lowstate_file_refs(chunks)):
+            paths = sorted(set(ref for refs in crefs for ref in refs))
+            try:
+                self.functions['cp.hash_files'](paths, saltenv, prefetch=True)
+            except Exception as exc:
+                # The hashes are requested again one by one
+                log.debug(
+                    'Unable to prefetch the hashes of the files of saltenv '
+                    '{0}: {1}'.format(saltenv, exc)
+                )
+
     def _mod_aggregate(self, low, running, chunks):
         '''
         Execute the aggregation systems to runtime modify the low chunk
         '''
+        group = self.agg_plan.pop(_gen_tag(low), None)
+        if group is not None and not low.get('__agg__'):
+            agg_fun = '{0}.mod_aggregate'.format(low['state'])
+            try:
+                low = self.states[agg_fun](low, group, running)
+                low['__agg__'] = True
+            except TypeError:
+                log.error('Failed to execute aggregate for state {0}'.format(low['state']))
+                return low
+            self.agg_saved += len(
+                [chunk for chunk in group[1:] if chunk.get('__agg__')]
+            )
+            return low
         agg_opt = self.functions['config.option']('state_aggregate')
         if 'aggregate' in low:
             agg_opt = low['aggregate']
         if agg_opt is True:
             agg_opt = [low['state']]
-        else:
+        elif not isinstance(agg_opt, list):
             return low
         if low['state'] in agg_opt and not low.get('__agg__'):
             agg_fun = '{0}.mod_aggregate'.format(low['state'])
@@ -1679,6 +1800,15 @@ class State(object):
             return not running[tag]['result']
         return False
 
+    def requisite_graph(self, chunks):
+        '''
+        Return the requisite graph of a list of chunks, it is compiled once
+        per list of chunks
+        '''
+        if self.req_graph is None or not self.req_graph.compiled_for(chunks):
+            self.req_graph = salt.utils.requisite_graph.RequisiteGraph(chunks)
+        return self.req_graph
+
     def check_requisite(self, low, running, chunks, pre=False):
         '''
         Look into the running data to check the status of all requisite
@@ -1714,29 +1844,15 @@ class State(object):
                 'onchanges': []}
         if pre:
             reqs['prerequired'] = []
+        graph = self.requisite_graph(chunks)
         for r_state in reqs:
             if r_state in low and low[r_state] is not None:
-                for req in low[r_state]:
-                    req = trim_req(req)
-                    found = False
-                    for chunk in chunks:
-                        req_key = next(iter(req))
-                        req_val = req[req_key]
-                        if req_val is None:
-                            continue
-                        if req_key == 'sls':
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk['__sls__'], req_val):
-                                found = True
-                                reqs[r_state].append(chunk)
-                            continue
-                        if (fnmatch.fnmatch(chunk['name'], req_val) or
-                            fnmatch.fnmatch(chunk['__id__'], req_val)):
-                            if chunk['state'] == req_key:
-                                found = True
-                                reqs[r_state].append(chunk)
-                    if not found:
-                        return 'unmet', ()
+                found, lost = graph.resolve(
+                    [trim_req(req) for req in low[r_state]]
+                )
+                if lost:
+                    return 'unmet', ()
+                reqs[r_state].extend(found)
         fun_stats = set()
         for r_state, chunks in six.iteritems(reqs):
             if r_state == 'prereq':
@@ -1825,6 +1941,77 @@ class State(object):
             preload = {'jid': self.jid}
             self.functions['event.fire_master'](ret, tag, preload=preload)
 
+    def _get_stream(self):
+        '''
+        Return the stream of chunk results to the master, False if the
+        results are not streamed
+        '''
+        if self.stream is None:
+            batch = self.opts.get('state_stream_batch', 0)
+            interval = self.opts.get('state_stream_interval', 0)
+            if (batch or interval) and self.jid \
+                    and not self.opts.get('local') \
+                    and self.opts.get('master_uri') \
+                    and self.opts.get('transport') in ('zeromq', 'tcp'):
+                self.stream = salt.utils.state_stream.ChunkStream(
+                    self._send_stream,
+                    self.jid,
+                    self.opts['id'],
+                    batch_size=batch,
+                    interval=interval)
+            else:
+                self.stream = False
+        return self.stream
+
+    def _send_stream(self, data, tag):
+        '''
+        Send a batch of chunk results to the master, raises if it could not
+        be sent
+        '''
+        auth = salt.crypt.SAuth(self.opts)
+        load = {'id': self.opts['id'],
+                'jid': self.jid,
+                'tag': tag,
+                'data': data,
+                'tok': auth.gen_token('salt'),
+                'cmd': '_minion_event'}
+        # One channel for all the batches of the run
+        if self._stream_channel is None:
+            self._stream_channel = salt.transport.Channel.factory(self.opts)
+        self._stream_channel.send(load)
+
+    def _stub_streamed(self, running, streamed):
+        '''
+        Replace the results sent to the master by stubs, unless something on
+        the minion also gets the return
+        '''
+        if not self.opts.get('state_stream_stubs', True):
+            return
+        seq, tags = streamed
+        for tag in tags:
+            if tag in running:
+                running[tag] = salt.utils.state_stream.stub(running[tag], seq)
+
+    def stream_chunk(self, running, tag, length):
+        '''
+        Stream the result of a completed chunk to the master if the results
+        of state runs are streamed, see :mod:`salt.utils.state_stream`
+        '''
+        stream = self._get_stream()
+        if not stream or tag not in running:
+            return
+        streamed = stream.add(tag, running[tag], length)
+        if streamed is not None:
+            self._stub_streamed(running, streamed)
+
+    def stream_flush(self, running, length):
+        '''
+        Send the results of the chunks which were not streamed yet
+        '''
+        stream = self._get_stream()
+        if stream and isinstance(running, dict):
+            self._stub_streamed(running, stream.flush(length))
+
     def call_chunk(self, low, running, chunks):
         '''
         Check if a chunk has any requires, execute the requires and then
@@ -1844,37 +2031,24 @@ class State(object):
         if status == 'unmet':
             lost = {}
             reqs = []
+            graph = self.requisite_graph(chunks)
             for requisite in requisites:
                 lost[requisite] = []
                 if requisite not in low:
                     continue
                 for req in low[requisite]:
                     req = trim_req(req)
-                    found = False
                     req_key = next(iter(req))
-                    req_val = req[req_key]
-                    for chunk in chunks:
-                        if req_val is None:
-                            continue
-                        if req_key == 'sls':
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk['__sls__'], req_val):
-                                if requisite == 'prereq':
-                                    chunk['__prereq__'] = True
-                                reqs.append(chunk)
-                                found = True
-                            continue
-                        if (fnmatch.fnmatch(chunk['name'], req_val) or
-                            fnmatch.fnmatch(chunk['__id__'], req_val)):
-                            if chunk['state'] == req_key:
-                                if requisite == 'prereq':
-                                    chunk['__prereq__'] = True
-                                elif requisite == 'prerequired':
-                                    chunk['__prerequired__'] = True
-                                reqs.append(chunk)
-                                found = True
+                    found = graph.find(req_key, req[req_key])
                     if not found:
                         lost[requisite].append(req)
+                        continue
+                    for chunk in found:
+                        if requisite == 'prereq':
+                            chunk['__prereq__'] = True
+                        elif requisite == 'prerequired' and req_key != 'sls':
+                            chunk['__prerequired__'] = True
+                    reqs.extend(found)
             if lost['require'] or lost['watch'] or lost['prereq'] or lost['onfail'] or lost['onchanges'] or lost.get('prerequired'):
                 comment = 'The following requisites were not found:\n'
                 for requisite, lreqs in six.iteritems(lost):
@@ -1894,6 +2068,7 @@ class State(object):
                                 '__sls__': low['__sls__']}
                 self.__run_num += 1
                 self.event(running[tag], len(chunks), fire_event=low.get('fire_event'))
+                self.stream_chunk(running, tag, len(chunks))
                 return running
             for chunk in reqs:
                 # Check to see if the chunk has been run, only run it if
@@ -1919,6 +2094,7 @@ class State(object):
                                     '__sls__': low['__sls__']}
                         self.__run_num += 1
                         self.event(running[tag], len(chunks), fire_event=low.get('fire_event'))
+                        self.stream_chunk(running, tag, len(chunks))
                         return running
                     running = self.call_chunk(chunk, running, chunks)
                     if self.check_failhard(chunk, running):
@@ -2018,23 +2194,16 @@ class State(object):
                 running[tag] = self.call(low, chunks, running)
         if tag in running:
             self.event(running[tag], len(chunks), fire_event=low.get('fire_event'))
+            self.stream_chunk(running, tag, len(chunks))
         return running
 
     def call_listen(self, chunks, running):
         '''
         Find all of the listen routines and call the associated mod_watch runs
         '''
-        listeners = []
-        crefs = {}
-        for chunk in chunks:
-            crefs[(chunk['state'], chunk['name'])] = chunk
-            crefs[(chunk['state'], chunk['__id__'])] = chunk
-            if 'listen' in chunk:
-                listeners.append({(chunk['state'], chunk['name']): chunk['listen']})
-            if 'listen_in' in chunk:
-                for l_in in chunk['listen_in']:
-                    for key, val in six.iteritems(l_in):
-                        listeners.append({(key, val): [{chunk['state']: chunk['name']}]})
+        graph = self.requisite_graph(chunks)
+        listeners = graph.listeners
+        crefs = graph.refs
         mod_watchers = []
         errors = {}
         for l_dict in listeners:
@@ -2131,8 +2300,15 @@ class State(object):
         # the low data chunks
         if errors:
             return errors
+        self._plan_aggregate(chunks)
+        self._prefetch_hashes(chunks)
         ret = dict(list(disabled.items()) + list(self.call_chunks(chunks).items()))
         ret = self.call_listen(chunks, ret)
+        if self.agg_saved:
+            log.info(
+                'Aggregation saved {0} state transactions'.format(self.agg_saved)
+            )
+        self.stream_flush(ret, len(chunks))
 
         def _cleanup_accumulator_data():
             accum_data_path = os.path.join(
@@ -2323,6 +2499,7 @@ class BaseHighState(object):
             opts['default_top'] = mopts.get('default_top', opts.get('default_top'))
             opts['state_events'] = mopts.get('state_events')
             opts['state_aggregate'] = mopts.get('state_aggregate', opts.get('state_aggregate', False))
+            opts['state_aggregate_plan'] = mopts.get('state_aggregate_plan', opts.get('state_aggregate_plan', False))
             opts['jinja_lstrip_blocks'] = mopts.get('jinja_lstrip_blocks', False)
             opts['jinja_trim_blocks'] = mopts.get('jinja_trim_blocks', False)
         return opts
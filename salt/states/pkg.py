@@ -556,6 +556,41 @@ def _preflight_check(desired, fromrepo, **kwargs):
     return ret
 
 
+def _latest_versions(desired_pkgs, fromrepo, refresh, **kwargs):
+    '''
+    Return the latest versions of the desired packages. The first pkg.latest
+    state of a run looks up the packages of all the pkg.latest states using
+    the same fromrepo at once, the package modules keep the versions for the
+    following states.
+    '''
+    names = list(desired_pkgs)
+    try:
+        run_key = (__instance_id__, fromrepo)
+        lowstate = __lowstate__
+    except NameError:
+        run_key = None
+        lowstate = []
+    prefetched = __context__.setdefault('pkg._latest_prefetched', set())
+    if run_key is not None and run_key not in prefetched:
+        prefetched.add(run_key)
+        for low in lowstate:
+            if low.get('state') != 'pkg' or low.get('fun') != 'latest' \
+                    or low.get('fromrepo') != fromrepo or low.get('sources'):
+                continue
+            if low.get('pkgs'):
+                others = list(_repack_pkgs(low['pkgs']).keys())
+            else:
+                others = [low.get('name')]
+            names.extend(x for x in others if x and x not in names)
+    avail = __salt__['pkg.latest_version'](*names,
+                                           fromrepo=fromrepo,
+                                           refresh=refresh,
+                                           **kwargs)
+    if isinstance(avail, six.string_types):
+        return {names[0]: avail}
+    return dict((x, avail.get(x, '')) for x in desired_pkgs)
+
+
 def _nested_output(obj):
     '''
     Serialize obj and format for output
@@ -1396,10 +1431,7 @@ def latest(
 
     cur = __salt__['pkg.version'](*desired_pkgs, **kwargs)
     try:
-        avail = __salt__['pkg.latest_version'](*desired_pkgs,
-                                               fromrepo=fromrepo,
-                                               refresh=refresh,
-                                               **kwargs)
+        avail = _latest_versions(desired_pkgs, fromrepo, refresh, **kwargs)
     except CommandExecutionError as exc:
         return {'name': name,
                 'changes': {},
@@ -2016,7 +2048,11 @@ def mod_aggregate(low, chunks, running):
                 pkgs.extend(chunk['pkgs'])
                 chunk['__agg__'] = True
             elif 'name' in chunk:
-                pkgs.append(chunk['name'])
+                version = chunk.get('version')
+                if version:
+                    pkgs.append({chunk['name']: version})
+                else:
+                    pkgs.append(chunk['name'])
                 chunk['__agg__'] = True
     if pkgs:
         if 'pkgs' in low:
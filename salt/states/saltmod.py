@@ -22,6 +22,7 @@ import time
 # Import salt libs
 import salt.syspaths
 import salt.utils
+import salt.utils.compact_state
 import salt.utils.event
 import salt.ext.six as six
 from salt.ext.six import string_types
@@ -245,7 +246,8 @@ def state(
             m_state = False
         else:
             try:
-                m_ret = mdata['ret']
+                # The minion may have compacted the return of its state run
+                m_ret = salt.utils.compact_state.expand(mdata['ret'])
             except KeyError:
                 m_state = False
             if not m_state:
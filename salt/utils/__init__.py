@@ -1752,7 +1752,10 @@ def check_state_result(running):
         return False
 
     ret = True
-    for state_result in six.itervalues(running):
+    for tag, state_result in six.iteritems(running):
+        if tag == '__compact__':
+            # Compacted states all succeeded, see salt.utils.compact_state
+            continue
         if not isinstance(state_result, dict):
             # return false when hosts return a list instead of a dict
             ret = False
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+'''
+Planning of the aggregation of the low chunks of a state run
+
+The ``mod_aggregate`` function of a state module merges other chunks of the
+run into the chunk about to be executed, ``pkg`` uses it to install the
+packages of several ``pkg.installed`` states with a single call to the
+package manager. Which chunks can be merged safely depends on the requisites
+of the run: merging a chunk into an earlier one executes it earlier, before
+the states it requires may have run, and reports its changes on the earlier
+chunk, where the states watching it do not see them.
+
+:py:func:`plan` walks the requisite graph of the run once, in the order the
+chunks are executed, and groups the chunks which can be merged so that the
+number of groups is minimal:
+
+- only chunks of the same state function, with the same arguments apart from
+  their names and versions, are merged
+- chunks with conditions (``onlyif``, ``unless``), with requisites other than
+  ``require`` or watched by other chunks are never merged
+- a chunk is merged into a group only if the states it requires are executed
+  before the first chunk of the group
+'''
+
+# Import python libs
+from __future__ import absolute_import
+
+# Import 3rd-party libs
+import salt.ext.six as six
+
+# The requisites which make call_chunk execute their targets first
+ORDER_REQUISITES = ('require', 'watch', 'prereq', 'prerequired',
+                    'onfail', 'onchanges')
+
+# The requisites which look at the result or changes of their targets
+OBSERVING_REQUISITES = ('watch', 'prereq', 'prerequired', 'onfail',
+                        'onchanges')
+
+# Chunks using any of these are never merged
+EXCLUDE_KEYS = frozenset(OBSERVING_REQUISITES).union(
+    ('listen', 'listen_in', 'onlyif', 'unless', 'check_cmd', '__prereq__',
+     '__agg__')
+)
+
+# The arguments which may differ between merged chunks
+MEMBER_KEYS = frozenset(('name', 'names', 'pkgs', 'version', 'require',
+                         'order', 'aggregate', '__id__', '__sls__'))
+
+
+def _trim(req):
+    if not isinstance(req, dict) or len(req) != 1:
+        return None, None
+    key = next(iter(req))
+    return key.split('.')[0], req[key]
+
+
+def _targets(graph, chunk, requisites):
+    '''
+    Return the chunks targeted by the passed requisites of a chunk
+    '''
+    ret = []
+    for requisite in requisites:
+        reqs = chunk.get(requisite)
+        if not isinstance(reqs, list):
+            continue
+        for req in reqs:
+            key, val = _trim(req)
+            if key is not None:
+                ret.extend(graph.find(key, val))
+    return ret
+
+
+def execution_order(graph):
+    '''
+    Return the positions of the chunks of a requisite graph in the order
+    call_chunks executes them, by the id of the chunks: a chunk executes the
+    chunks it requires first, in the order of the run.
+    '''
+    pos = {}
+    active = set()
+    for chunk in graph.chunks:
+        if id(chunk) in pos:
+            continue
+        stack = [(chunk, iter(_targets(graph, chunk, ORDER_REQUISITES)))]
+        active.add(id(chunk))
+        while stack:
+            current, deps = stack[-1]
+            for dep in deps:
+                if id(dep) in pos or id(dep) in active:
+                    # Already executed or a recursive requisite
+                    continue
+                active.add(id(dep))
+                stack.append(
+                    (dep, iter(_targets(graph, dep, ORDER_REQUISITES)))
+                )
+                break
+            else:
+                stack.pop()
+                active.discard(id(current))
+                pos[id(current)] = len(pos)
+    return pos
+
+
+def _observed(graph):
+    '''
+    Return the ids of the chunks whose result or changes are looked at by
+    other chunks
+    '''
+    ret = set()
+    for chunk in graph.chunks:
+        ret.update(id(x) for x in _targets(graph, chunk, OBSERVING_REQUISITES))
+    for listener in graph.listeners:
+        for reqs in six.itervalues(listener):
+            for req in reqs:
+                key, val = _trim(req)
+                if key is not None:
+                    ret.update(id(x) for x in graph.find(key, val))
+    return ret
+
+
+def _args(chunk):
+    return dict((key, val) for key, val in six.iteritems(chunk)
+                if key not in MEMBER_KEYS)
+
+
+def plan(graph, states):
+    '''
+    Return the groups of chunks of a requisite graph which can be merged by
+    the ``mod_aggregate`` functions of the passed states, as lists of chunks
+    starting with the chunk executed first. Groups of a single chunk are not
+    returned.
+    '''
+    pos = execution_order(graph)
+    observed = _observed(graph)
+    groups = []
+    open_groups = {}
+    for chunk in sorted(graph.chunks, key=lambda x: pos[id(x)]):
+        if chunk.get('state') not in states \
+                or chunk.get('aggregate') is False \
+                or id(chunk) in observed \
+                or not EXCLUDE_KEYS.isdisjoint(chunk):
+            continue
+        ready = max([pos[id(x)] for x in _targets(graph, chunk, ('require',))]
+                    or [-1])
+        args = _args(chunk)
+        candidates = open_groups.setdefault((chunk['state'], chunk['fun']), [])
+        for group in reversed(candidates):
+            if group[0] <= ready:
+                # The older groups are executed before the requisites too
+                break
+            if group[1] == args:
+                group[2].append(chunk)
+                break
+        else:
+            group = None
+        if group is None or group[0] <= ready:
+            group = (pos[id(chunk)], args, [chunk])
+            candidates.append(group)
+            groups.append(group)
+    return [group[2] for group in groups if len(group[2]) > 1]
@@ -4,11 +4,13 @@ from __future__ import absolute_import, print_function
 import os
 import re
 import time
+import logging
 
 # Import salt libs
 import salt.config
 import salt.payload
 import salt.utils.dictupdate
+from salt.utils.odict import OrderedDict
 
 # Import third party libs
 from salt.ext.six.moves import range  # pylint: disable=import-error,redefined-builtin
@@ -18,6 +20,8 @@ try:
 except ImportError:
     HAS_ZMQ = False
 
+log = logging.getLogger(__name__)
+
 
 class CacheDict(dict):
     '''
@@ -57,6 +61,66 @@ class CacheDict(dict):
         return dict.__contains__(self, key)
 
 
+class LRUCache(object):
+    '''
+    Mapping which keeps its most recently used items, up to a total size
+
+    max_size
+        The maximum total size of the items, an item larger than this is not
+        kept at all
+
+    size
+        The function returning the size of an item, ``len`` by default, pass
+        ``lambda item: 1`` to limit the number of items
+    '''
+    def __init__(self, max_size, size=len):
+        self.max_size = max_size
+        self.size = 0
+        self._size = size
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        '''
+        Return an item and mark it as the most recently used
+        '''
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return default
+        self._items[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        '''
+        Add an item, evicting the least recently used items to make room
+        '''
+        self.pop(key)
+        size = self._size(value)
+        if size > self.max_size:
+            return
+        while self._items and self.size + size > self.max_size:
+            self.pop(next(iter(self._items)))
+        self._items[key] = value
+        self.size += size
+
+    def pop(self, key, default=None):
+        '''
+        Remove an item and return it
+        '''
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return default
+        self.size -= self._size(value)
+        return value
+
+
 class CacheCli(object):
     '''
     Connection client for the ConCache. Should be used by all
@@ -101,6 +165,108 @@ class CacheCli(object):
         return min_list
 
 
+class MineStoreCli(object):
+    '''
+    Connection client for the MineStore process, used by the MWorkers to
+    look up and update mine data. Use :py:func:`mine_store_cli` to get the
+    client of the current process.
+
+    Once the MineStore did not answer within ``mine_store_timeout`` seconds,
+    lookups return None right away for ``retry_interval`` seconds, so that
+    the callers read the mine files instead of waiting on every lookup.
+    '''
+    retry_interval = 30
+
+    def __init__(self, opts):
+        self.opts = opts
+        self.serial = salt.payload.Serial(self.opts)
+        self.timeout = self.opts.get('mine_store_timeout', 5)
+        self.req_sock = os.path.join(self.opts['sock_dir'], 'mine_store.ipc')
+        self.upd_sock = os.path.join(self.opts['sock_dir'], 'mine_upd.ipc')
+        self.context = zmq.Context()
+        self.req_out = None
+        self.retry_at = 0
+        self.upd_out = self.context.socket(zmq.PUSH)
+        self.upd_out.setsockopt(zmq.LINGER, 1000)
+        self.upd_out.connect('ipc://' + self.upd_sock)
+
+    def _connect(self):
+        self.req_out = self.context.socket(zmq.REQ)
+        self.req_out.setsockopt(zmq.LINGER, 0)
+        self.req_out.connect('ipc://' + self.req_sock)
+
+    def get(self, fun, minions=None):
+        '''
+        Return the mine data of the passed function for the passed minions,
+        or None if the MineStore did not answer in time
+        '''
+        if time.time() < self.retry_at:
+            return None
+        if self.req_out is None:
+            self._connect()
+        self.req_out.send(
+            self.serial.dumps(
+                {'fun': fun,
+                 'minions': list(minions) if minions is not None else None}
+            )
+        )
+        if self.req_out.poll(self.timeout * 1000):
+            return self.serial.loads(self.req_out.recv())
+        # A REQ socket cannot send again before it received its reply, start
+        # over with a new one
+        log.warning(
+            'The MineStore did not answer within {0} seconds, reading the '
+            'mine files for {1} seconds'.format(
+                self.timeout, self.retry_interval
+            )
+        )
+        self.req_out.close()
+        self.req_out = None
+        self.retry_at = time.time() + self.retry_interval
+        return None
+
+    def _send_update(self, load):
+        try:
+            self.upd_out.send(self.serial.dumps(load), zmq.NOBLOCK)
+        except zmq.ZMQError as exc:
+            log.error('Unable to update the MineStore: {0}'.format(exc))
+
+    def update(self, minion, data):
+        '''
+        Replace the mine data of a minion
+        '''
+        self._send_update({'cmd': 'update', 'id': minion, 'data': data})
+
+    def delete(self, minion, fun):
+        '''
+        Remove a single mine function of a minion
+        '''
+        self._send_update({'cmd': 'delete', 'id': minion, 'fun': fun})
+
+    def flush(self, minion):
+        '''
+        Remove all mine data of a minion
+        '''
+        self._send_update({'cmd': 'flush', 'id': minion})
+
+
+# The MineStore client of the current process, as a (pid, client) tuple
+_MINE_STORE_CLI = (None, None)
+
+
+def mine_store_cli(opts):
+    '''
+    Return the MineStore client of the current process, creating it on first
+    use
+    '''
+    global _MINE_STORE_CLI
+    pid, client = _MINE_STORE_CLI
+    if pid != os.getpid():
+        client = MineStoreCli(opts)
+        _MINE_STORE_CLI = (os.getpid(), client)
+    return client
+
+
 class CacheRegex(object):
     '''
     Create a regular expression object cache for the most frequently
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+'''
+Compact encoding of state run returns
+
+Most states of a highstate run succeed without changes, yet their complete
+return dicts are sent to the master, written to the job cache and fired on
+the event bus on every run. :py:func:`compact` keeps the returns of the
+failed and changed states as they are and replaces the others by a row in the
+``__compact__`` entry of the return. The comments of the replaced states are
+deduplicated, with the name of the state cut out of them, so that the
+``File /etc/motd is in the correct state`` comments of a thousand file states
+are sent once.
+
+:py:func:`expand` rebuilds the original return, the ``highstate`` outputter
+and the ``local_cache`` job cache expand compact returns transparently.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+
+# Import 3rd-party libs
+import salt.ext.six as six
+
+COMPACT_KEY = '__compact__'
+VERSION = 1
+
+# The keys of the state returns which can be compacted
+_COMPACT_KEYS = frozenset(('changes', 'comment', 'name', 'result',
+                           '__run_num__', 'start_time', 'duration'))
+
+
+def is_compact(ret):
+    '''
+    Return True if the passed state return is compacted
+    '''
+    return isinstance(ret, dict) and isinstance(ret.get(COMPACT_KEY), dict)
+
+
+def _tag_name(tag):
+    comps = tag.split('_|-')
+    if len(comps) == 4:
+        return comps[2]
+    return None
+
+
+def _compactable(state_ret):
+    return isinstance(state_ret, dict) \
+        and 'name' in state_ret and 'comment' in state_ret \
+        and state_ret.get('result') is True \
+        and not state_ret.get('changes') \
+        and _COMPACT_KEYS.issuperset(state_ret) \
+        and isinstance(state_ret['comment'], six.string_types) \
+        and isinstance(state_ret['name'], six.string_types)
+
+
+def compact(running):
+    '''
+    Return the compact form of the running dict of a state run, anything else
+    is returned unchanged
+    '''
+    if not isinstance(running, dict) or is_compact(running):
+        return running
+    ret = {}
+    comments = []
+    comment_index = {}
+    rows = []
+    for tag, state_ret in six.iteritems(running):
+        if not _compactable(state_ret):
+            ret[tag] = state_ret
+            continue
+        name = state_ret['name']
+        comment = state_ret['comment']
+        if name:
+            parts = tuple(comment.split(name))
+        else:
+            parts = (comment,)
+        if parts not in comment_index:
+            comment_index[parts] = len(comments)
+            comments.append(list(parts))
+        rows.append([
+            tag,
+            state_ret.get('__run_num__'),
+            state_ret.get('start_time'),
+            state_ret.get('duration'),
+            comment_index[parts],
+            # The name usually is part of the tag already
+            None if name == _tag_name(tag) else name,
+        ])
+    if not rows:
+        return running
+    ret[COMPACT_KEY] = {'version': VERSION,
+                        'comments': comments,
+                        'states': rows}
+    return ret
+
+
+def expand(ret):
+    '''
+    Return the full running dict of a compact state return, anything else is
+    returned unchanged
+    '''
+    if not is_compact(ret):
+        return ret
+    data = ret[COMPACT_KEY]
+    running = dict((tag, state_ret) for tag, state_ret in six.iteritems(ret)
+                   if tag != COMPACT_KEY)
+    comments = data.get('comments', [])
+    for tag, run_num, start_time, duration, comment, name in data.get('states', []):
+        if name is None:
+            name = _tag_name(tag)
+        state_ret = {'changes': {},
+                     'comment': name.join(comments[comment]),
+                     'name': name,
+                     'result': True}
+        if run_num is not None:
+            state_ret['__run_num__'] = run_num
+        if start_time is not None:
+            state_ret['start_time'] = start_time
+        if duration is not None:
+            state_ret['duration'] = duration
+        running[tag] = state_ret
+    return running
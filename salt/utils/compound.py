@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+'''
+Parser for compound target expressions
+
+A compound expression like ``web* and G@os:Debian and not L@web3,web4`` is
+parsed once into a tree of :py:class:`And`, :py:class:`Or`, :py:class:`Not`
+and :py:class:`Target` nodes, the trees of the last parsed expressions are
+kept by :py:func:`parse`. ``not`` binds tighter than ``and``, which binds
+tighter than ``or``. A ``not`` directly following a target implies ``and``
+and parentheses left open at the end of the expression are closed.
+
+The operands of ``and`` and ``or`` nodes are ordered by their
+:py:attr:`cost`, so that an evaluation which stops as soon as the result of
+a node is known runs the cheap matchers (lists, globs) before the ones which
+have to look at grains or pillar data.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import threading
+
+# Import salt libs
+import salt.utils.minions
+
+# Import 3rd-party libs
+import salt.ext.six as six
+
+OPERS = frozenset(('and', 'or', 'not', '(', ')'))
+
+# Relative cost of the target engines, None is a plain glob
+ENGINE_COSTS = {'L': 0,
+                None: 1,
+                'E': 2,
+                'N': 2,
+                'G': 3,
+                'P': 3,
+                'I': 3,
+                'J': 3,
+                'S': 3,
+                'R': 4}
+
+CACHE_SIZE = 1000
+
+_TREES = {}
+_LOCK = threading.Lock()
+
+
+class CompoundError(ValueError):
+    '''
+    Raised when a compound expression can not be parsed
+    '''
+
+
+class Target(object):
+    '''
+    A single target word of a compound expression
+    '''
+    def __init__(self, word):
+        self.word = word
+        info = salt.utils.minions.parse_target(word)
+        self.engine = info['engine']
+        self.delimiter = info['delimiter']
+        self.pattern = info['pattern']
+        self.cost = ENGINE_COSTS.get(self.engine, max(ENGINE_COSTS.values()))
+
+    def targets(self):
+        yield self
+
+    def __repr__(self):
+        return 'Target({0!r})'.format(self.word)
+
+
+class Not(object):
+    '''
+    The negation of a node
+    '''
+    def __init__(self, node):
+        self.node = node
+        self.cost = node.cost
+
+    def targets(self):
+        return self.node.targets()
+
+    def __repr__(self):
+        return 'Not({0!r})'.format(self.node)
+
+
+class _Group(object):
+    '''
+    Base class of the nodes combining several operands
+    '''
+    def __init__(self, nodes):
+        flat = []
+        for node in nodes:
+            if type(node) is type(self):
+                flat.extend(node.nodes)
+            else:
+                flat.append(node)
+        # sorted is stable, operands of the same cost keep their order
+        self.nodes = sorted(flat, key=lambda node: node.cost)
+        self.cost = max(node.cost for node in self.nodes)
+
+    def targets(self):
+        for node in self.nodes:
+            for target in node.targets():
+                yield target
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(type(self).__name__, self.nodes)
+
+
+class And(_Group):
+    '''
+    The intersection of several nodes
+    '''
+
+
+class Or(_Group):
+    '''
+    The union of several nodes
+    '''
+
+
+class _Parser(object):
+    def __init__(self, words):
+        self.words = words
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.words):
+            return self.words[self.pos]
+        return None
+
+    def next(self):
+        word = self.peek()
+        self.pos += 1
+        return word
+
+    def parse(self):
+        if not self.words:
+            raise CompoundError('Empty compound expression')
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise CompoundError(
+                'Unexpected "{0}" in compound expression'.format(self.peek())
+            )
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == 'or':
+            self.next()
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else Or(nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while self.peek() in ('and', 'not'):
+            if self.peek() == 'and':
+                self.next()
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else And(nodes)
+
+    def parse_not(self):
+        word = self.next()
+        if word == 'not':
+            return Not(self.parse_not())
+        if word == '(':
+            node = self.parse_or()
+            if self.peek() == ')':
+                self.next()
+            elif self.peek() is not None:
+                raise CompoundError(
+                    'Unexpected "{0}" in compound expression'.format(
+                        self.peek()
+                    )
+                )
+            return node
+        if word is None:
+            raise CompoundError('Compound expression ends with an operator')
+        if word in OPERS:
+            raise CompoundError(
+                'Unexpected operator "{0}" in compound expression'.format(word)
+            )
+        return Target(word)
+
+
+def parse(expr):
+    '''
+    Return the tree of a compound expression passed as a string or a list of
+    words, raise :py:class:`CompoundError` if it is invalid
+    '''
+    if isinstance(expr, six.string_types):
+        key = expr
+        words = expr.split()
+    elif isinstance(expr, (list, tuple)):
+        key = words = tuple(expr)
+    else:
+        raise CompoundError(
+            'Compound target is neither a string, list nor tuple'
+        )
+    with _LOCK:
+        tree = _TREES.get(key)
+    if tree is None:
+        tree = _Parser(words).parse()
+        with _LOCK:
+            if len(_TREES) >= CACHE_SIZE:
+                _TREES.clear()
+            _TREES[key] = tree
+    return tree
+
+
+def match(tree, check):
+    '''
+    Return whether a tree matches, ``check`` is called with the targets
+    whose result is needed and returns a bool
+    '''
+    if isinstance(tree, Target):
+        return check(tree)
+    if isinstance(tree, Not):
+        return not match(tree.node, check)
+    if isinstance(tree, And):
+        return all(match(node, check) for node in tree.nodes)
+    return any(match(node, check) for node in tree.nodes)
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+'''
+Connection pooling and batched inserts for the SQL returners
+
+Every process keeps one :py:class:`ConnectionPool` per returner and set of
+connection options, so that a master handling thousands of returns reuses a
+handful of connections instead of opening one per return. Idle connections
+are health checked before they are handed out again and transparently
+replaced when the database went away.
+
+:py:class:`RowBatcher` groups rows written by a returner and flushes them as
+one multi-row ``INSERT`` once ``batch_size`` rows are queued or
+``batch_timeout`` seconds have passed since the first queued row. The rows
+still queued are written when the process exits.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import time
+import logging
+import threading
+import collections
+import multiprocessing.util
+from contextlib import contextmanager
+
+# Import 3rd-party libs
+import salt.ext.six as six
+
+log = logging.getLogger(__name__)
+
+_POOLS = {}
+_BATCHERS = {}
+_LOCK = threading.Lock()
+
+
+def _key(name, options):
+    # The pid is part of the key so that a forked process never reuses the
+    # connections of its parent
+    return (os.getpid(), name, repr(sorted(options.items())))
+
+
+class ConnectionPool(object):
+    '''
+    A thread safe pool of database connections
+
+    connect
+        Callable returning a new connection
+
+    check
+        Callable passed a connection which raises if the connection is no
+        longer usable. It is only run on connections which have been idle for
+        more than ``check_interval`` seconds.
+
+    size
+        The maximum number of idle connections kept around, connections
+        released while the pool is full are closed
+    '''
+    def __init__(self, connect, check=None, size=5, check_interval=30):
+        self._connect = connect
+        self._check = check
+        self.size = size
+        self.check_interval = check_interval
+        self._idle = collections.deque()
+        self._lock = threading.Lock()
+        self.connections_created = 0
+
+    def acquire(self):
+        '''
+        Return a connection from the pool, opening a new one if none is idle
+        '''
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, last_used = self._idle.pop()
+            if self._check is None \
+                    or time.time() - last_used < self.check_interval:
+                return conn
+            try:
+                self._check(conn)
+                return conn
+            except Exception as exc:
+                log.debug(
+                    'Discarding broken pooled database connection: {0}'.format(
+                        exc
+                    )
+                )
+                self._close(conn)
+        log.debug('Opening new pooled database connection')
+        conn = self._connect()
+        self.connections_created += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        '''
+        Hand a connection back to the pool, connections which are known to be
+        broken should be discarded
+        '''
+        if not discard:
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append((conn, time.time()))
+                    return
+        self._close(conn)
+
+    @contextmanager
+    def connection(self):
+        '''
+        Context manager yielding a pooled connection. The transaction is
+        committed when the block succeeds and rolled back otherwise.
+        '''
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                self.release(conn, discard=True)
+            else:
+                self.release(conn)
+            raise
+        self.release(conn)
+
+    def close(self):
+        '''
+        Close all idle connections
+        '''
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def get_pool(name, options, connect, check=None, size=5, check_interval=30):
+    '''
+    Return the pool of the current process for the named returner and
+    connection options, creating it if needed. ``connect`` is passed the
+    options and must return a new connection.
+    '''
+    key = _key(name, options)
+    with _LOCK:
+        if key not in _POOLS:
+            _POOLS[key] = ConnectionPool(
+                lambda: connect(options),
+                check=check,
+                size=int(size or 1),
+                check_interval=check_interval
+            )
+        return _POOLS[key]
+
+
+class RowBatcher(object):
+    '''
+    Collect rows and hand them to ``write`` in batches of at most ``size``
+    rows, a partial batch is due ``timeout`` seconds after its first row was
+    added. Rows whose write failed are queued again and retried once the
+    timeout passed, up to ``max_queued`` rows are kept.
+    '''
+    def __init__(self, write, size=100, timeout=1.0, max_queued=None):
+        self._write = write
+        self.size = size
+        self.timeout = timeout
+        self.max_queued = max_queued or size * 100
+        self._rows = []
+        self._lock = threading.Lock()
+        # When the oldest queued row was added, or the last write failed
+        self._since = None
+        self._failed = False
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.batches_written = 0
+
+    def add(self, row):
+        '''
+        Queue a row, writing the batch if it is full
+        '''
+        rows = None
+        with self._lock:
+            self._rows.append(row)
+            if self._since is None:
+                self._since = time.time()
+            # Do not hammer a failing database on every added row
+            if len(self._rows) >= self.size and not self._failed:
+                rows = self._take()
+        if rows:
+            self._write_rows(rows)
+
+    def flush(self, force=True):
+        '''
+        Write all queued rows, only if they are due unless ``force`` is set
+        '''
+        while True:
+            with self._lock:
+                if self._since is None:
+                    return
+                if not force and time.time() < self._since + self.timeout:
+                    return
+                rows = self._take()
+            if not self._write_rows(rows):
+                return
+
+    def _take(self):
+        rows = self._rows[:self.size]
+        del self._rows[:self.size]
+        if not self._rows:
+            self._since = None
+        return rows
+
+    def _write_rows(self, rows):
+        start = time.time()
+        try:
+            self._write(rows)
+        except Exception as exc:
+            log.error(
+                'Failed to write a batch of {0} rows, retrying in {1} '
+                'seconds: {2}'.format(len(rows), self.timeout, exc),
+                exc_info=True
+            )
+            self._requeue(rows)
+            return False
+        with self._lock:
+            self._failed = False
+        self.rows_written += len(rows)
+        self.batches_written += 1
+        log.debug(
+            'Wrote a batch of {0} rows in {1:.3f} seconds'.format(
+                len(rows), time.time() - start
+            )
+        )
+        return True
+
+    def _requeue(self, rows):
+        with self._lock:
+            self._rows[:0] = rows
+            self._since = time.time()
+            self._failed = True
+            dropped = len(self._rows) - self.max_queued
+            if dropped > 0:
+                del self._rows[:dropped]
+                self.rows_dropped += dropped
+        if dropped > 0:
+            log.error(
+                'Dropped the {0} oldest rows, more than {1} rows are queued'
+                .format(dropped, self.max_queued)
+            )
+
+
+# The flusher thread of the current process, as a (pid, thread) tuple
+_FLUSHER = (None, None)
+_FLUSH_INTERVAL = 1.0
+
+
+def _flush_all(force=False):
+    '''
+    Write the queued rows of the batchers of the current process, only the
+    rows which are due unless ``force`` is set
+    '''
+    pid = os.getpid()
+    with _LOCK:
+        batchers = [batcher for key, batcher in six.iteritems(_BATCHERS)
+                    if key[0] == pid]
+    for batcher in batchers:
+        try:
+            batcher.flush(force=force)
+        except Exception as exc:
+            log.error('Failed to flush queued rows: {0}'.format(exc),
+                      exc_info=True)
+
+
+def _flush_loop():
+    while True:
+        _flush_all()
+        with _LOCK:
+            timeouts = [batcher.timeout for batcher in six.itervalues(_BATCHERS)]
+        time.sleep(min(timeouts + [_FLUSH_INTERVAL]))
+
+
+def _supervise_flusher():
+    '''
+    Start the flusher thread of the current process, or a new one if it died
+    or was started in the parent of a forked process. Must be called with
+    _LOCK held.
+    '''
+    global _FLUSHER
+    pid, thread = _FLUSHER
+    if pid == os.getpid() and thread.is_alive():
+        return
+    if pid != os.getpid():
+        # Flush the remaining rows when the process exits, the multiprocessing
+        # finalizers run in the processes started by multiprocessing, where
+        # atexit handlers do not, and at exit of the main process
+        multiprocessing.util.Finalize(
+            None, _flush_all, kwargs={'force': True}, exitpriority=10
+        )
+    else:
+        log.warning('The flusher thread of the batched rows died, restarting')
+    thread = threading.Thread(target=_flush_loop, name='dbpool-flusher')
+    # The queued rows are written by the finalizer, do not block the exit
+    thread.daemon = True
+    thread.start()
+    _FLUSHER = (os.getpid(), thread)
+
+
+def get_batcher(name, options, write):
+    '''
+    Return the batcher of the current process for the named returner table
+    and connection options, creating it if needed. ``write`` is passed the
+    options and the list of rows to insert. Due rows are written by a flusher
+    thread, queued rows are flushed when the process exits.
+    '''
+    key = _key(name, options)
+    with _LOCK:
+        if key not in _BATCHERS:
+            _BATCHERS[key] = RowBatcher(
+                lambda rows: write(options, rows),
+                size=int(options.get('batch_size') or 1),
+                timeout=float(options.get('batch_timeout') or 1)
+            )
+        _supervise_flusher()
+        return _BATCHERS[key]
+
+
+def values_clause(rows, placeholder='%s'):
+    '''
+    Return the ``VALUES`` clause of a multi-row insert for the passed list of
+    row tuples and the flattened list of parameters to pass along with it
+    '''
+    row_sql = '({0})'.format(', '.join([placeholder] * len(rows[0])))
+    params = []
+    for row in rows:
+        params.extend(row)
+    return 'VALUES ' + ', '.join([row_sql] * len(rows)), params
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+'''
+Block based delta encoding of files, the way rsync transfers them
+
+The receiver of an updated file describes the copy it already has with the
+signatures of its blocks: a weak rolling checksum (the adler32 of the block)
+and a truncated md5. The sender slides a window of the same size over the new
+content, looking the weak checksum of the window up among the signatures at
+every byte, and describes the new content as a list of operations:
+
+- ``[index, count]`` copies ``count`` blocks of the old copy starting at the
+  block ``index``
+- a string is data which was not found in the old copy
+
+The receiver rebuilds the file from its old copy with :py:func:`patch`.
+Only the blocks which changed are transferred, also when data was inserted
+or removed in the middle of the file.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import hashlib
+import math
+import zlib
+
+# The modulus of the adler32 checksums
+MOD_ADLER = 65521
+
+MIN_BLOCK_SIZE = 2048
+MAX_BLOCK_SIZE = 131072
+
+# The length of the hex md5 of the blocks kept in the signatures, the
+# rebuilt file is verified against the hash of the whole file
+STRONG_LEN = 16
+
+# The amount of data read from the file at once when computing a delta
+CHUNK_SIZE = 1048576
+
+# The scan moves one byte at a time over the data which is not found in the
+# older copy, the master gives up when more than this was not found, or when
+# none of the first MAX_MISS_BLOCKS blocks worth of data was found
+MAX_LITERAL = 1048576
+MAX_MISS_BLOCKS = 16
+
+
+def block_size(size):
+    '''
+    Return the size of the blocks used for a file of the passed size, about
+    the square root of the size, as rsync does
+    '''
+    size = int(math.sqrt(size)) // 1024 * 1024
+    return min(MAX_BLOCK_SIZE, max(MIN_BLOCK_SIZE, size))
+
+
+def weak_sum(data):
+    '''
+    Return the weak checksum of a block
+    '''
+    return zlib.adler32(data) & 0xffffffff
+
+
+def strong_sum(data):
+    '''
+    Return the strong checksum of a block
+    '''
+    return hashlib.md5(data).hexdigest()[:STRONG_LEN]
+
+
+def roll(weak, out, in_, size):
+    '''
+    Return the weak checksum of a window of ``size`` bytes moved by one byte,
+    the byte ``out`` leaving it and the byte ``in_`` entering it
+    '''
+    low = ((weak & 0xffff) - out + in_) % MOD_ADLER
+    high = ((weak >> 16) - size * out + low - 1) % MOD_ADLER
+    return (high << 16) | low
+
+
+def signatures(fp_, size):
+    '''
+    Return the signatures of the full blocks of a file object, as
+    ``[weak, strong]`` lists
+    '''
+    ret = []
+    while True:
+        data = fp_.read(size)
+        if len(data) < size:
+            break
+        ret.append([weak_sum(data), strong_sum(data)])
+    return ret
+
+
+def _add_copy(ops, index):
+    if ops and isinstance(ops[-1], list) \
+            and ops[-1][0] + ops[-1][1] == index:
+        ops[-1][1] += 1
+    else:
+        ops.append([index, 1])
+
+
+def delta(fp_, sigs, size, max_literal=None, max_miss=None):
+    '''
+    Return the operations rebuilding the content of a file object from the
+    blocks described by the signatures of an older copy. The file is read in
+    chunks of ``CHUNK_SIZE`` bytes.
+
+    max_literal
+        When more data than this was not found in the older copy, give up and
+        return None, sending the whole file is cheaper then
+
+    max_miss
+        Give up and return None when no block of the older copy was found in
+        the first ``max_miss`` blocks worth of data
+    '''
+    index = {}
+    for num, (weak, strong) in enumerate(sigs):
+        index.setdefault(weak, {}).setdefault(strong, num)
+
+    chunk_size = max(CHUNK_SIZE, size)
+    # The data read and not yet turned into operations, starting at the
+    # offset ``base`` of the file
+    data = b''
+    # The checksums are computed on byte strings, zlib.adler32 does not accept
+    # a bytearray on Python 2, the rolling checksum needs the bytes as ints
+    octets = bytearray()
+    base = 0
+    eof = False
+    matched = False
+    ops = []
+    literal = 0
+    start = pos = 0
+    weak = None
+    while True:
+        if pos + size > len(data) and not eof:
+            if pos - start >= chunk_size:
+                literal += pos - start
+                ops.append(data[start:pos])
+                start = pos
+            chunk = fp_.read(chunk_size)
+            if not chunk:
+                eof = True
+            data = data[start:] + chunk
+            octets = bytearray(data)
+            base += start
+            pos -= start
+            start = 0
+            continue
+        if pos + size > len(data):
+            break
+        if weak is None:
+            weak = weak_sum(data[pos:pos + size])
+        strongs = index.get(weak)
+        if strongs is not None:
+            num = strongs.get(strong_sum(data[pos:pos + size]))
+            if num is not None:
+                if start < pos:
+                    literal += pos - start
+                    ops.append(data[start:pos])
+                _add_copy(ops, num)
+                matched = True
+                pos += size
+                start = pos
+                weak = None
+                continue
+        if max_literal is not None and literal + pos - start > max_literal:
+            return None
+        if max_miss is not None and not matched \
+                and base + pos >= max_miss * size:
+            return None
+        if pos + size < len(data):
+            weak = roll(weak, octets[pos], octets[pos + size], size)
+        else:
+            # The next byte is not read yet
+            weak = None
+        pos += 1
+    if start < len(data):
+        literal += len(data) - start
+        if max_literal is not None and literal > max_literal:
+            return None
+        ops.append(data[start:])
+    return ops
+
+
+def patch(basis, ops, size, out):
+    '''
+    Write the content described by a list of operations to the file object
+    ``out``, copying the blocks from the file object ``basis``
+    '''
+    for op_ in ops:
+        if not isinstance(op_, (list, tuple)):
+            out.write(op_)
+            continue
+        basis.seek(op_[0] * size)
+        remaining = op_[1] * size
+        while remaining:
+            data = basis.read(min(remaining, 65536))
+            if not data:
+                raise ValueError(
+                    'Block {0} is beyond the end of the file'.format(op_[0])
+                )
+            out.write(data)
+            remaining -= len(data)
@@ -54,6 +54,7 @@ _INVALID_REPO = (
 
 # Import salt libs
 import salt.utils
+import salt.utils.cache
 import salt.utils.itertools
 import salt.utils.url
 import salt.fileserver
@@ -101,6 +102,22 @@ LIBGIT2_MINVER = '0.20.0'
 # instead of using distutils.version.LooseVersion
 DULWICH_MINVER = (0, 9, 4)
 
+# The mode of the tree entries of submodules
+S_IFGITLINK = 0o160000
+
+# The GitFS objects are created for every request, these caches live as long
+# as the process. The cache of the contents of the recently served blobs, by
+# blob SHA, see _blob_cache.
+_BLOBS = {}
+# The hashes of the blobs, by blob SHA and hash type
+_HASHES = salt.utils.cache.LRUCache(4096, size=lambda item: 1)
+# The blob SHA and the identity of the files of the gitfs cache known to be
+# up to date, by path, see _file_key
+_WRITTEN = {}
+# The root tree SHA and the lists of the files of the environments, by
+# remote, root and environment
+_LISTS = {}
+
 
 def failhard(role):
     '''
@@ -109,6 +126,32 @@ def failhard(role):
     raise FileserverConfigError('Failed to load {0}'.format(role))
 
 
+def _file_key(path):
+    '''
+    Return the identity of a file, which changes when any process writes it,
+    or None if it does not exist
+    '''
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime, stat.st_size)
+
+
+def _blob_cache(opts):
+    '''
+    Return the in-memory cache of the contents of the blobs, or None when
+    gitfs_blob_cache_size disables it
+    '''
+    max_size = opts.get('gitfs_blob_cache_size', 16777216)
+    if not max_size:
+        return None
+    cache = _BLOBS.get('cache')
+    if cache is None or cache.max_size != max_size:
+        cache = _BLOBS['cache'] = salt.utils.cache.LRUCache(max_size)
+    return cache
+
+
 class GitProvider(object):
     '''
     Base class for gitfs/git_pillar provider classes Should never be used
@@ -298,6 +341,156 @@ class GitProvider(object):
                 _check_ref(ret, base_ref, rname)
         return ret
 
+    def _subtree(self, tree, path):
+        '''
+        Return the tree at the path relative to the passed tree, or None if
+        there is no directory at this path
+        '''
+        for name in path.split(os.path.sep):
+            if not name:
+                continue
+            for entry_name, sha, mode in self._tree_entries(tree):
+                if entry_name == name and stat.S_ISDIR(mode):
+                    tree = self._tree_by_sha(sha)
+                    break
+            else:
+                return None
+        return tree
+
+    def _entry(self, lists, path, sha, mode, add):
+        '''
+        Add a tree entry, and everything below it if it is a directory, to
+        the lists, or remove it from them
+        '''
+        fmt = stat.S_IFMT(mode)
+        if fmt == S_IFGITLINK:
+            # Submodules are not served
+            return
+        if fmt == stat.S_IFDIR:
+            if add:
+                lists['dirs'].add(path)
+            else:
+                lists['dirs'].discard(path)
+            self._walk(self._tree_by_sha(sha), path, lists, add)
+        elif add:
+            lists['files'].add(path)
+            if fmt == stat.S_IFLNK:
+                lists['symlinks'][path] = self._blob_data(sha)
+        else:
+            lists['files'].discard(path)
+            lists['symlinks'].pop(path, None)
+
+    def _walk(self, tree, prefix, lists, add=True):
+        '''
+        Add everything below a tree to the lists, or remove it from them
+        '''
+        for name, sha, mode in self._tree_entries(tree):
+            self._entry(lists, os.path.join(prefix, name), sha, mode, add)
+
+    def _diff(self, old_tree, new_tree, prefix, lists):
+        '''
+        Update the lists of the old tree to the new tree, only descending
+        into the subtrees which changed
+        '''
+        old = dict((x[0], x[1:]) for x in self._tree_entries(old_tree))
+        new = dict((x[0], x[1:]) for x in self._tree_entries(new_tree))
+        for name in set(old).union(new):
+            if old.get(name) == new.get(name):
+                continue
+            path = os.path.join(prefix, name)
+            if name in old and name in new \
+                    and stat.S_ISDIR(old[name][1]) \
+                    and stat.S_ISDIR(new[name][1]):
+                self._diff(self._tree_by_sha(old[name][0]),
+                           self._tree_by_sha(new[name][0]),
+                           path,
+                           lists)
+                continue
+            if name in old:
+                self._entry(lists, path, old[name][0], old[name][1], False)
+            if name in new:
+                self._entry(lists, path, new[name][0], new[name][1], True)
+
+    def _lists(self, tgt_env):
+        '''
+        Return the files, symlinks and directories of the target environment.
+
+        The lists of the last commit of each environment listed by this
+        process are kept, when the environment moves to another commit the
+        lists are updated from the differences between the trees of the two
+        commits instead of traversing the whole new tree.
+        '''
+        ret = {'files': set(), 'symlinks': {}, 'dirs': set()}
+        key = (self.cachedir, self.root, tgt_env)
+        tree = self.get_tree(tgt_env)
+        if tree is not None and self.root:
+            tree = self._subtree(tree, self.root)
+        if tree is None:
+            _LISTS.pop(key, None)
+            return ret
+        sha = self._tree_sha(tree)
+        cached = _LISTS.get(key)
+        if cached is not None and cached[0] == sha:
+            lists = cached[1]
+        else:
+            lists = None
+            if cached is not None:
+                lists = {'files': set(cached[1]['files']),
+                         'symlinks': dict(cached[1]['symlinks']),
+                         'dirs': set(cached[1]['dirs'])}
+                try:
+                    self._diff(self._tree_by_sha(cached[0]), tree, '', lists)
+                except Exception as exc:
+                    log.debug(
+                        'Unable to diff the trees {0} and {1} of {2} remote '
+                        '\'{3}\', listing the whole tree: {4}'.format(
+                            cached[0], sha, self.role, self.id, exc
+                        )
+                    )
+                    lists = None
+            if lists is None:
+                lists = {'files': set(), 'symlinks': {}, 'dirs': set()}
+                self._walk(tree, '', lists)
+            _LISTS[key] = (sha, lists)
+        add_mountpoint = lambda path: os.path.join(self.mountpoint, path)
+        ret['files'] = set(add_mountpoint(x) for x in lists['files'])
+        ret['symlinks'] = dict(
+            (add_mountpoint(path), link_tgt)
+            for path, link_tgt in six.iteritems(lists['symlinks'])
+        )
+        ret['dirs'] = set(add_mountpoint(x) for x in lists['dirs'])
+        if self.mountpoint:
+            ret['dirs'].add(self.mountpoint)
+        return ret
+
+    def _tree_entries(self, tree):
+        '''
+        Yield the name, SHA and mode of the entries of a tree. This function
+        must be overridden in a sub-class
+        '''
+        raise NotImplementedError()
+
+    def _tree_by_sha(self, sha):
+        '''
+        Return the tree object with the passed SHA. This function must be
+        overridden in a sub-class
+        '''
+        raise NotImplementedError()
+
+    def _tree_sha(self, tree):
+        '''
+        Return the SHA of a tree object. This function must be overridden in a
+        sub-class
+        '''
+        raise NotImplementedError()
+
+    def _blob_data(self, sha):
+        '''
+        Return the contents of the blob with the passed SHA. This function
+        must be overridden in a sub-class
+        '''
+        raise NotImplementedError()
+
     def check_lock(self):
         '''
         Used by the provider-specific fetch() function to check the existence
@@ -417,9 +610,9 @@ class GitProvider(object):
 
     def dir_list(self, tgt_env):
         '''
-        This function must be overridden in a sub-class
+        Get list of directories for the target environment
         '''
-        raise NotImplementedError()
+        return self._lists(tgt_env)['dirs']
 
     def env_is_exposed(self, tgt_env):
         '''
@@ -446,9 +639,10 @@ class GitProvider(object):
 
     def file_list(self, tgt_env):
         '''
-        This function must be overridden in a sub-class
+        Get file list for the target environment
         '''
-        raise NotImplementedError()
+        lists = self._lists(tgt_env)
+        return lists['files'], lists['symlinks']
 
     def find_file(self, path, tgt_env):
         '''
@@ -478,6 +672,13 @@ class GitProvider(object):
         else:
             self.url = self.id
 
+    def read_blob(self, blob, max_size=None):
+        '''
+        Return the contents of the blob object, or None if it is larger than
+        max_size. This function must be overridden in a sub-class
+        '''
+        raise NotImplementedError()
+
     def verify_auth(self):
         '''
         Override this function in a sub-class to implement auth checking.
@@ -572,29 +773,30 @@ class GitPython(GitProvider):
                 pass
         return new
 
-    def dir_list(self, tgt_env):
+    def _blob_data(self, sha):
         '''
-        Get list of directories for the target environment using GitPython
+        Return the contents of the blob with the passed SHA
         '''
-        ret = set()
-        tree = self.get_tree(tgt_env)
-        if not tree:
-            return ret
-        if self.root:
-            try:
-                tree = tree / self.root
-            except KeyError:
-                return ret
-            relpath = lambda path: os.path.relpath(path, self.root)
-        else:
-            relpath = lambda path: path
-        add_mountpoint = lambda path: os.path.join(self.mountpoint, path)
-        for blob in tree.traverse():
-            if isinstance(blob, git.Tree):
-                ret.add(add_mountpoint(relpath(blob.path)))
-        if self.mountpoint:
-            ret.add(self.mountpoint)
-        return ret
+        return self.repo.odb.stream(gitdb.util.hex_to_bin(sha)).read()
+
+    def _tree_by_sha(self, sha):
+        '''
+        Return the git.Tree object with the passed SHA
+        '''
+        return git.Tree(self.repo, gitdb.util.hex_to_bin(sha), path='')
+
+    def _tree_entries(self, tree):
+        '''
+        Yield the name, SHA and mode of the entries of a git.Tree
+        '''
+        for obj in tree:
+            yield os.path.basename(obj.path), obj.hexsha, obj.mode
+
+    def _tree_sha(self, tree):
+        '''
+        Return the SHA of a git.Tree
+        '''
+        return tree.hexsha
 
     def envs(self):
         '''
@@ -648,39 +850,6 @@ class GitPython(GitProvider):
         cleaned = self.clean_stale_refs()
         return bool(new_objs or cleaned)
 
-    def file_list(self, tgt_env):
-        '''
-        Get file list for the target environment using GitPython
-        '''
-        files = set()
-        symlinks = {}
-        tree = self.get_tree(tgt_env)
-        if not tree:
-            # Not found, return empty objects
-            return files, symlinks
-        if self.root:
-            try:
-                tree = tree / self.root
-            except KeyError:
-                return files, symlinks
-            relpath = lambda path: os.path.relpath(path, self.root)
-        else:
-            relpath = lambda path: path
-        add_mountpoint = lambda path: os.path.join(self.mountpoint, path)
-        for file_blob in tree.traverse():
-            if not isinstance(file_blob, git.Blob):
-                continue
-            file_path = add_mountpoint(relpath(file_blob.path))
-            files.add(file_path)
-            if stat.S_ISLNK(file_blob.mode):
-                stream = six.StringIO()
-                file_blob.stream_data(stream)
-                stream.seek(0)
-                link_tgt = stream.read()
-                stream.close()
-                symlinks[file_path] = link_tgt
-        return files, symlinks
-
     def find_file(self, path, tgt_env):
         '''
         Find the specified file in the specified environment
@@ -743,6 +912,15 @@ class GitPython(GitProvider):
         except gitdb.exc.ODBError:
             return None
 
+    def read_blob(self, blob, max_size=None):
+        '''
+        Return the contents of the blob object, or None if it is larger than
+        max_size
+        '''
+        if max_size is not None and blob.size > max_size:
+            return None
+        return blob.data_stream.read()
+
     def write_file(self, blob, dest):
         '''
         Using the blob object, write the file to the destination path
@@ -944,47 +1122,30 @@ class Pygit2(GitProvider):
                 pass
         return new
 
-    def dir_list(self, tgt_env):
+    def _blob_data(self, sha):
         '''
-        Get a list of directories for the target environment using pygit2
+        Return the contents of the blob with the passed SHA
         '''
-        def _traverse(tree, blobs, prefix):
-            '''
-            Traverse through a pygit2 Tree object recursively, accumulating all
-            the empty directories within it in the "blobs" list
-            '''
-            for entry in iter(tree):
-                blob = self.repo[entry.oid]
-                if not isinstance(blob, pygit2.Tree):
-                    continue
-                blobs.append(os.path.join(prefix, entry.name))
-                if len(blob):
-                    _traverse(blob, blobs, os.path.join(prefix, entry.name))
+        return self.repo[sha].data
 
-        ret = set()
-        tree = self.get_tree(tgt_env)
-        if not tree:
-            return ret
-        if self.root:
-            try:
-                oid = tree[self.root].oid
-                tree = self.repo[oid]
-            except KeyError:
-                return ret
-            if not isinstance(tree, pygit2.Tree):
-                return ret
-            relpath = lambda path: os.path.relpath(path, self.root)
-        else:
-            relpath = lambda path: path
-        blobs = []
-        if len(tree):
-            _traverse(tree, blobs, self.root)
-        add_mountpoint = lambda path: os.path.join(self.mountpoint, path)
-        for blob in blobs:
-            ret.add(add_mountpoint(relpath(blob)))
-        if self.mountpoint:
-            ret.add(self.mountpoint)
-        return ret
+    def _tree_by_sha(self, sha):
+        '''
+        Return the pygit2.Tree object with the passed SHA
+        '''
+        return self.repo[sha]
+
+    def _tree_entries(self, tree):
+        '''
+        Yield the name, SHA and mode of the entries of a pygit2.Tree
+        '''
+        for entry in tree:
+            yield entry.name, entry.hex, entry.filemode
+
+    def _tree_sha(self, tree):
+        '''
+        Return the SHA of a pygit2.Tree
+        '''
+        return tree.hex
 
     def envs(self):
         '''
@@ -1055,55 +1216,6 @@ class Pygit2(GitProvider):
         cleaned = self.clean_stale_refs(local_refs=refs_post)
         return bool(received_objects or refs_pre != refs_post or cleaned)
 
-    def file_list(self, tgt_env):
-        '''
-        Get file list for the target environment using pygit2
-        '''
-        def _traverse(tree, blobs, prefix):
-            '''
-            Traverse through a pygit2 Tree object recursively, accumulating all
-            the file paths and symlink info in the "blobs" dict
-            '''
-            for entry in iter(tree):
-                obj = self.repo[entry.oid]
-                if isinstance(obj, pygit2.Blob):
-                    repo_path = os.path.join(prefix, entry.name)
-                    blobs.setdefault('files', []).append(repo_path)
-                    if stat.S_ISLNK(tree[entry.name].filemode):
-                        link_tgt = self.repo[tree[entry.name].oid].data
-                        blobs.setdefault('symlinks', {})[repo_path] = link_tgt
-                elif isinstance(obj, pygit2.Tree):
-                    _traverse(obj, blobs, os.path.join(prefix, entry.name))
-
-        files = set()
-        symlinks = {}
-        tree = self.get_tree(tgt_env)
-        if not tree:
-            # Not found, return empty objects
-            return files, symlinks
-        if self.root:
-            try:
-                # This might need to be changed to account for a root that
-                # spans more than one directory
-                oid = tree[self.root].oid
-                tree = self.repo[oid]
-            except KeyError:
-                return files, symlinks
-            if not isinstance(tree, pygit2.Tree):
-                return files, symlinks
-            relpath = lambda path: os.path.relpath(path, self.root)
-        else:
-            relpath = lambda path: path
-        blobs = {}
-        if len(tree):
-            _traverse(tree, blobs, self.root)
-        add_mountpoint = lambda path: os.path.join(self.mountpoint, path)
-        for repo_path in blobs.get('files', []):
-            files.add(add_mountpoint(relpath(repo_path)))
-        for repo_path, link_tgt in six.iteritems(blobs.get('symlinks', {})):
-            symlinks[add_mountpoint(relpath(repo_path))] = link_tgt
-        return files, symlinks
-
     def find_file(self, path, tgt_env):
         '''
         Find the specified file in the specified environment
@@ -1131,6 +1243,7 @@ class Pygit2(GitProvider):
                 else:
                     oid = tree[path].oid
                     blob = self.repo[oid]
+                    break
             except KeyError:
                 break
         return blob, blob.hex if blob is not None else blob
@@ -1269,6 +1382,15 @@ class Pygit2(GitProvider):
             )
             failhard(self.role)
 
+    def read_blob(self, blob, max_size=None):
+        '''
+        Return the contents of the blob object, or None if it is larger than
+        max_size
+        '''
+        if max_size is not None and blob.size > max_size:
+            return None
+        return blob.data
+
     def write_file(self, blob, dest):
         '''
         Using the blob object, write the file to the destination path
@@ -1291,41 +1413,30 @@ class Dulwich(GitProvider):  # pylint: disable=abstract-method
         GitProvider.__init__(self, opts, remote, per_remote_defaults,
                              override_params, cache_root, role)
 
-    def dir_list(self, tgt_env):
+    def _blob_data(self, sha):
         '''
-        Get a list of directories for the target environment using dulwich
+        Return the contents of the blob with the passed SHA
         '''
-        def _traverse(tree, blobs, prefix):
-            '''
-            Traverse through a dulwich Tree object recursively, accumulating
-            all the empty directories within it in the "blobs" list
-            '''
-            for item in six.iteritems(tree):
-                obj = self.repo.get_object(item.sha)
-                if not isinstance(obj, dulwich.objects.Tree):
-                    continue
-                blobs.append(os.path.join(prefix, item.path))
-                if len(self.repo.get_object(item.sha)):
-                    _traverse(obj, blobs, os.path.join(prefix, item.path))
+        return self.repo.get_object(sha).as_raw_string()
 
-        ret = set()
-        tree = self.get_tree(tgt_env)
-        tree = self.walk_tree(tree, self.root)
-        if not isinstance(tree, dulwich.objects.Tree):
-            return ret
-        blobs = []
-        if len(tree):
-            _traverse(tree, blobs, self.root)
-        if self.root:
-            relpath = lambda path: os.path.relpath(path, self.root)
-        else:
-            relpath = lambda path: path
-        add_mountpoint = lambda path: os.path.join(self.mountpoint, path)
-        for blob in blobs:
-            ret.add(add_mountpoint(relpath(blob)))
-        if self.mountpoint:
-            ret.add(self.mountpoint)
-        return ret
+    def _tree_by_sha(self, sha):
+        '''
+        Return the dulwich.objects.Tree object with the passed SHA
+        '''
+        return self.repo.get_object(sha)
+
+    def _tree_entries(self, tree):
+        '''
+        Yield the name, SHA and mode of the entries of a dulwich.objects.Tree
+        '''
+        for item in six.iteritems(tree):
+            yield item.path, item.sha, item.mode
+
+    def _tree_sha(self, tree):
+        '''
+        Return the SHA of a dulwich.objects.Tree
+        '''
+        return tree.id
 
     def envs(self):
         '''
@@ -1392,47 +1503,6 @@ class Dulwich(GitProvider):  # pylint: disable=abstract-method
             return True
         return False
 
-    def file_list(self, tgt_env):
-        '''
-        Get file list for the target environment using dulwich
-        '''
-        def _traverse(tree, blobs, prefix):
-            '''
-            Traverse through a dulwich Tree object recursively, accumulating
-            all the file paths and symlinks info in the "blobs" dict
-            '''
-            for item in six.iteritems(tree):
-                obj = self.repo.get_object(item.sha)
-                if isinstance(obj, dulwich.objects.Blob):
-                    repo_path = os.path.join(prefix, item.path)
-                    blobs.setdefault('files', []).append(repo_path)
-                    mode, oid = tree[item.path]
-                    if stat.S_ISLNK(mode):
-                        link_tgt = self.repo.get_object(oid).as_raw_string()
-                        blobs.setdefault('symlinks', {})[repo_path] = link_tgt
-                elif isinstance(obj, dulwich.objects.Tree):
-                    _traverse(obj, blobs, os.path.join(prefix, item.path))
-
-        files = set()
-        symlinks = {}
-        tree = self.get_tree(tgt_env)
-        tree = self.walk_tree(tree, self.root)
-        if not isinstance(tree, dulwich.objects.Tree):
-            return files, symlinks
-        blobs = {}
-        if len(tree):
-            _traverse(tree, blobs, self.root)
-        if self.root:
-            relpath = lambda path: os.path.relpath(path, self.root)
-        else:
-            relpath = lambda path: path
-        add_mountpoint = lambda path: os.path.join(self.mountpoint, path)
-        for repo_path in blobs.get('files', []):
-            files.add(add_mountpoint(relpath(repo_path)))
-        for repo_path, link_tgt in six.iteritems(blobs.get('symlinks', {})):
-            symlinks[add_mountpoint(relpath(repo_path))] = link_tgt
-        return files, symlinks
-
     def find_file(self, path, tgt_env):
         '''
         Find the specified file in the specified environment
@@ -1624,6 +1694,16 @@ class Dulwich(GitProvider):  # pylint: disable=abstract-method
                 return None
         return tree
 
+    def read_blob(self, blob, max_size=None):
+        '''
+        Return the contents of the blob object, or None if it is larger than
+        max_size
+        '''
+        data = blob.as_raw_string()
+        if max_size is not None and len(data) > max_size:
+            return None
+        return data
+
     def write_file(self, blob, dest):
         '''
         Using the blob object, write the file to the destination path
@@ -2208,13 +2288,32 @@ class GitFS(GitBase):
             if blob is None:
                 continue
 
+            fnd['rel'] = path
+            fnd['path'] = dest
+            # serve_file and file_hash look the blob up in the in-memory
+            # caches by its SHA
+            fnd['blob'] = blob_hexsha
+            data = None
+            blob_cache = _blob_cache(self.opts)
+            if blob_cache is not None:
+                data = blob_cache.get(blob_hexsha)
+                if data is None:
+                    data = repo.read_blob(blob, blob_cache.max_size)
+                    if data is not None:
+                        blob_cache[blob_hexsha] = data
+            # The cache is shared with the other processes, the file is up to
+            # date if nobody wrote it since this process checked it
+            dest_key = _file_key(dest)
+            if dest_key is not None \
+                    and _WRITTEN.get(dest) == (blob_hexsha, dest_key):
+                return fnd
+
             salt.fileserver.wait_lock(lk_fn, dest)
             if os.path.isfile(blobshadest) and os.path.isfile(dest):
                 with salt.utils.fopen(blobshadest, 'r') as fp_:
                     sha = fp_.read()
                     if sha == blob_hexsha:
-                        fnd['rel'] = path
-                        fnd['path'] = dest
+                        _WRITTEN[dest] = (blob_hexsha, _file_key(dest))
                         return fnd
             with salt.utils.fopen(lk_fn, 'w+') as fp_:
                 fp_.write('')
@@ -2224,15 +2323,18 @@ class GitFS(GitBase):
                 except Exception:
                     pass
             # Write contents of file to their destination in the FS cache
-            repo.write_file(blob, dest)
+            if data is not None:
+                with salt.utils.fopen(dest, 'wb') as fp_:
+                    fp_.write(data)
+            else:
+                repo.write_file(blob, dest)
             with salt.utils.fopen(blobshadest, 'w+') as fp_:
                 fp_.write(blob_hexsha)
+            _WRITTEN[dest] = (blob_hexsha, _file_key(dest))
             try:
                 os.remove(lk_fn)
             except OSError:
                 pass
-            fnd['rel'] = path
-            fnd['path'] = dest
             return fnd
 
         # No matching file was found in tgt_env. Return a dict with empty paths
@@ -2266,13 +2368,21 @@ class GitFS(GitBase):
             return ret
         ret['dest'] = fnd['rel']
         gzip = load.get('gzip', None)
-        with salt.utils.fopen(fnd['path'], 'rb') as fp_:
-            fp_.seek(load['loc'])
-            data = fp_.read(self.opts['file_buffer_size'])
-            if gzip and data:
-                data = salt.utils.gzip_util.compress(data, gzip)
-                ret['gzip'] = gzip
-            ret['data'] = data
+        blob_cache = _blob_cache(self.opts)
+        data = None
+        if blob_cache is not None and fnd.get('blob'):
+            data = blob_cache.get(fnd['blob'])
+        if data is not None:
+            # Serve the chunk from the copy of the blob in memory
+            data = data[load['loc']:load['loc'] + self.opts['file_buffer_size']]
+        else:
+            with salt.utils.fopen(fnd['path'], 'rb') as fp_:
+                fp_.seek(load['loc'])
+                data = fp_.read(self.opts['file_buffer_size'])
+        if gzip and data:
+            data = salt.utils.gzip_util.compress(data, gzip)
+            ret['gzip'] = gzip
+        ret['data'] = data
         return ret
 
     def file_hash(self, load, fnd):
@@ -2290,6 +2400,13 @@ class GitFS(GitBase):
         if not all(x in load for x in ('path', 'saltenv')):
             return ''
         ret = {'hash_type': self.opts['hash_type']}
+        # The blob SHA is a SHA1 of the header and the contents of the blob,
+        # not the hash_type digest the minions compare with their files, but
+        # it identifies the contents so the digest is only computed once.
+        hash_key = (fnd.get('blob'), self.opts['hash_type'])
+        if hash_key[0] and hash_key in _HASHES:
+            ret['hsum'] = _HASHES.get(hash_key)
+            return ret
         relpath = fnd['rel']
         path = fnd['path']
         hashdest = os.path.join(self.hash_cachedir,
@@ -2302,11 +2419,12 @@ class GitFS(GitBase):
             ret['hsum'] = salt.utils.get_hash(path, self.opts['hash_type'])
             with salt.utils.fopen(hashdest, 'w+') as fp_:
                 fp_.write(ret['hsum'])
-            return ret
         else:
             with salt.utils.fopen(hashdest, 'rb') as fp_:
                 ret['hsum'] = fp_.read()
-            return ret
+        if hash_key[0]:
+            _HASHES[hash_key] = ret['hsum']
+        return ret
 
     def _file_lists(self, load, form):
         '''
@@ -2340,7 +2458,7 @@ class GitFS(GitBase):
         )
         cache_match, refresh_cache, save_cache = \
             salt.fileserver.check_file_list_cache(
-                self.opts, form, list_cache, w_lock
+                self.opts, form, list_cache, w_lock, load.get('prefix', '')
             )
         if cache_match is not None:
             return cache_match
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+'''
+Per grain function caching and execution helpers used by
+:py:func:`salt.loader.grains`.
+
+Every grain function (``core.os_data``, ``core.hostname``, ``mygrains.foo``
+...) has its return cached separately, together with the time it was
+generated, so that expensive grains which rarely change (hardware,
+virtualization) can be kept for a long time while cheap or volatile ones
+(network) are regenerated often. The TTL for a grain function is looked up
+in the ``grains_cache_ttl`` option, which maps grain function names (globs
+are allowed) to a number of seconds:
+
+.. code-block:: yaml
+
+    grains_func_cache: True
+    grains_cache_ttl:
+      core._virtual: 604800
+      core._hw_data: 604800
+      core.ip*_interfaces: 300
+      core.fqdn_ip*: 300
+
+Grain functions which do not match any entry fall back to
+``grains_cache_expiration``.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import time
+import atexit
+import fnmatch
+import logging
+import threading
+
+# Import salt libs
+import salt.payload
+import salt.utils
+import salt.utils.atomicfile
+import salt.utils.process
+
+# Import third party libs
+import salt.ext.six as six
+
+log = logging.getLogger(__name__)
+
+CACHE_FILE = 'grains.funcs.cache.p'
+
+# The background refreshes still running, as (thread, abandon event, timeout)
+_REFRESHES = []
+_REFRESH_LOCK = threading.Lock()
+
+
+class GrainsFuncCache(object):
+    '''
+    On disk cache of the return data of the individual grain functions
+    '''
+    def __init__(self, opts):
+        self.opts = opts
+        self.serial = salt.payload.Serial(opts)
+        self.cache_file = os.path.join(opts['cachedir'], CACHE_FILE)
+        self.default_ttl = opts.get('grains_cache_expiration', 300)
+        self.ttls = opts.get('grains_cache_ttl') or {}
+        self._lock = threading.Lock()
+
+    def ttl(self, key):
+        '''
+        Return the TTL in seconds for the named grain function
+        '''
+        if key in self.ttls:
+            return self.ttls[key]
+        for pattern in sorted(self.ttls):
+            if fnmatch.fnmatch(key, pattern):
+                return self.ttls[pattern]
+        return self.default_ttl
+
+    def is_fresh(self, key, entry, now=None):
+        '''
+        Return True if the cache entry for the named grain function has not
+        yet expired
+        '''
+        if now is None:
+            now = time.time()
+        return now - entry.get('time', 0) <= self.ttl(key)
+
+    def load(self):
+        '''
+        Return the cached entries, a dict mapping the grain function name to
+        a dict holding the generation ``time`` and the returned ``data``
+        '''
+        if not os.path.isfile(self.cache_file):
+            return {}
+        try:
+            with salt.utils.fopen(self.cache_file, 'rb') as fp_:
+                entries = self.serial.load(fp_)
+        except Exception as exc:
+            log.debug(
+                'Unable to read grains function cache {0}: {1}'.format(
+                    self.cache_file, exc
+                )
+            )
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return entries
+
+    def store(self, updates):
+        '''
+        Merge the passed entries into the on disk cache. The file is replaced
+        atomically so that concurrent readers never see a partial cache.
+        '''
+        if not updates:
+            return
+        with self._lock:
+            entries = self.load()
+            entries.update(updates)
+            cumask = os.umask(0o77)
+            try:
+                with salt.utils.atomicfile.atomic_open(
+                        self.cache_file, 'w+b') as fp_:
+                    self.serial.dump(entries, fp_)
+            except TypeError:
+                # Can't serialize pydsl
+                log.debug('Unable to serialize grains function cache')
+            except (IOError, OSError):
+                log.error(
+                    'Unable to write to grains function cache file {0}'.format(
+                        self.cache_file
+                    )
+                )
+            finally:
+                os.umask(cumask)
+
+
+def _log_failure(call):
+    if call.name.startswith('core.'):
+        log.error(
+            'Failed to load core grain function {0}'.format(call.name),
+            exc_info=call.exc_info
+        )
+    else:
+        log.critical(
+            'Failed to load grains defined in grain file {0} in '
+            'function {1}, error:\n'.format(call.name, call.func),
+            exc_info=call.exc_info
+        )
+
+
+def call_grain_funcs(funcs, parallel=False, workers=4, timeout=0):
+    '''
+    Call the passed grain functions and return a dict mapping the name of
+    every grain function which returned a dict to its return.
+
+    funcs
+        A list of ``(key, function)`` tuples
+
+    parallel
+        Run the grain functions in a pool of ``workers`` threads. Functions
+        which take more than ``timeout`` seconds (0 disables the timeout) are
+        abandoned, they do not block the caller.
+    '''
+    calls = [salt.utils.process.TimedCall(fun, name=key)
+             for key, fun in funcs]
+    if not parallel or len(calls) < 2:
+        for call in calls:
+            log.trace('Loading {0} grain'.format(call.name))
+            call()
+    else:
+        for call in salt.utils.process.run_timed_calls(calls, workers, timeout):
+            log.warning(
+                'Grain function {0} did not return within {1} seconds, '
+                'skipping it'.format(call.name, timeout)
+            )
+
+    ret = {}
+    for call in calls:
+        if not call.done.is_set():
+            continue
+        if call.exc_info is not None:
+            _log_failure(call)
+            continue
+        if call.duration is not None:
+            log.trace(
+                'Grain function {0} took {1:.3f} seconds'.format(
+                    call.name, call.duration
+                )
+            )
+        if isinstance(call.ret, dict):
+            ret[call.name] = call.ret
+    return ret
+
+
+def _merge(keys, results):
+    '''
+    Merge grain function returns in the order the functions were loaded, core
+    grains first, so that the result does not depend on which function
+    finished first
+    '''
+    grains_data = {}
+    for key in keys:
+        if key in results:
+            grains_data.update(results[key])
+    return grains_data
+
+
+def _track_refresh(thread, abandon, timeout):
+    '''
+    Register a background refresh to be waited for at exit
+    '''
+    with _REFRESH_LOCK:
+        _REFRESHES[:] = [refresh for refresh in _REFRESHES
+                         if refresh[0].is_alive()]
+        _REFRESHES.append((thread, abandon, timeout))
+
+
+def _join_refreshes():
+    '''
+    Give the background refreshes at most ``grains_refresh_timeout`` seconds
+    to finish, short lived processes like salt-call then still write the
+    regenerated grains to the cache. A refresh which does not finish in time
+    is abandoned and does not update the cache.
+    '''
+    with _REFRESH_LOCK:
+        refreshes = _REFRESHES[:]
+        del _REFRESHES[:]
+    start = time.time()
+    for thread, abandon, timeout in refreshes:
+        thread.join(max(0, start + timeout - time.time()))
+        if thread.is_alive():
+            abandon.set()
+            log.warning(
+                'Background grains refresh did not finish within {0} '
+                'seconds, the grains cache is not updated'.format(timeout)
+            )
+
+
+atexit.register(_join_refreshes)
+
+
+def generate(opts, funcs, force_refresh=False):
+    '''
+    Generate the grains from the passed ``(key, function)`` tuples, honoring
+    the per function cache, parallel execution and background refresh
+    options.
+    '''
+    parallel = opts.get('grains_parallel', False)
+    workers = opts.get('grains_parallel_workers', 4)
+    timeout = opts.get('grains_func_timeout', 0)
+    keys = [key for key, _ in funcs]
+
+    if not opts.get('grains_func_cache', False):
+        return _merge(
+            keys, call_grain_funcs(funcs, parallel, workers, timeout)
+        )
+
+    cache = GrainsFuncCache(opts)
+    entries = {} if force_refresh else cache.load()
+    now = time.time()
+    results = {}
+    stale = []
+    missing = []
+    for key, fun in funcs:
+        if key in entries:
+            results[key] = entries[key].get('data', {})
+            if not cache.is_fresh(key, entries[key], now):
+                stale.append((key, fun))
+        else:
+            missing.append((key, fun))
+    if stale or missing:
+        log.debug(
+            'Grains function cache: {0} fresh, {1} stale, {2} missing'.format(
+                len(funcs) - len(stale) - len(missing),
+                len(stale),
+                len(missing)
+            )
+        )
+
+    def _refresh(to_run, abandon=None):
+        fresh = call_grain_funcs(to_run, parallel, workers, timeout)
+        if abandon is not None and abandon.is_set():
+            return fresh
+        stamp = time.time()
+        cache.store(
+            dict((key, {'time': stamp, 'data': data})
+                 for key, data in six.iteritems(fresh))
+        )
+        return fresh
+
+    if stale and opts.get('grains_refresh_background', False):
+        # Serve the stale data now, grains which were never cached still
+        # have to be generated before returning
+        results.update(_refresh(missing))
+        log.debug(
+            'Refreshing {0} stale grain functions in the background'.format(
+                len(stale)
+            )
+        )
+        # A daemon thread, a hung grain function must not block the exit of
+        # the process. The refresh is waited for at exit for a bounded time.
+        abandon = threading.Event()
+        thread = threading.Thread(target=_refresh,
+                                  args=(stale, abandon),
+                                  name='GrainsRefresh')
+        thread.daemon = True
+        _track_refresh(
+            thread, abandon, opts.get('grains_refresh_timeout', 30)
+        )
+        thread.start()
+    else:
+        results.update(_refresh(stale + missing))
+    return _merge(keys, results)
@@ -5,6 +5,7 @@ Jinja loading utils to enable a more powerful backend for jinja templates
 
 # Import python libs
 from __future__ import absolute_import
+import os
 import json
 import pprint
 import logging
@@ -24,12 +25,14 @@ import yaml
 import salt
 import salt.utils
 import salt.utils.url
+import salt.utils.atomicfile
 import salt.fileclient
 from salt.utils.odict import OrderedDict
 
 log = logging.getLogger(__name__)
 
 __all__ = [
+    'SaltBytecodeCache',
     'SaltCacheLoader',
     'SerializerExtension'
 ]
@@ -144,6 +147,86 @@ class SaltCacheLoader(BaseLoader):
         raise TemplateNotFound(template)
 
 
+class SaltBytecodeCache(jinja2.BytecodeCache):
+    '''
+    A jinja bytecode cache keeping the compiled templates in memory and, if a
+    directory is passed, on disk. Jinja stores the checksum of the source of
+    a template with its bytecode and recompiles templates whose source
+    changed.
+
+    The bytecode depends on the options of the environment, a cache must
+    only be used by environments sharing the same options.
+
+    The code objects of template files are kept too, by path and
+    modification time, so that callers which know the file did not change
+    skip loading the bytecode.
+    '''
+    CACHE_SIZE = 500
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.memory = {}
+        self.codes = {}
+
+    def get_code(self, name, mtime, source):
+        '''
+        Return the code object of the template file ``name`` modified at
+        ``mtime``, if it was compiled from ``source``
+        '''
+        cached = self.codes.get((name, mtime))
+        if cached is not None and cached[0] == source:
+            return cached[1]
+
+    def set_code(self, name, mtime, source, code):
+        '''
+        Keep the code object of the template file ``name`` modified at
+        ``mtime``
+        '''
+        if len(self.codes) >= self.CACHE_SIZE:
+            self.codes.clear()
+        self.codes[(name, mtime)] = (source, code)
+
+    def _path(self, key):
+        return path.join(self.directory, '{0}.cache'.format(key))
+
+    def _remember(self, key, data):
+        if key not in self.memory and len(self.memory) >= self.CACHE_SIZE:
+            self.memory.clear()
+        self.memory[key] = data
+
+    def load_bytecode(self, bucket):
+        data = self.memory.get(bucket.key)
+        if data is None and self.directory:
+            try:
+                with salt.utils.fopen(self._path(bucket.key), 'rb') as ifile:
+                    data = ifile.read()
+            except (IOError, OSError):
+                return
+        if data is None:
+            return
+        bucket.bytecode_from_string(data)
+        if bucket.code is not None:
+            self._remember(bucket.key, data)
+
+    def dump_bytecode(self, bucket):
+        data = bucket.bytecode_to_string()
+        self._remember(bucket.key, data)
+        if not self.directory:
+            return
+        try:
+            if not path.isdir(self.directory):
+                os.makedirs(self.directory)
+            with salt.utils.atomicfile.atomic_open(
+                    self._path(bucket.key), 'wb') as ofile:
+                ofile.write(data)
+        except (IOError, OSError) as exc:
+            log.debug(
+                'Unable to write jinja bytecode cache {0}: {1}'.format(
+                    self._path(bucket.key), exc
+                )
+            )
+
+
 class PrintableDict(OrderedDict):
     '''
     Ensures that dict str() and repr() are YAML friendly.
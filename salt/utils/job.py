@@ -2,21 +2,44 @@
 
 # Import Python libs
 from __future__ import absolute_import
+import os
+import time
+import errno
+import struct
+import signal
 import logging
+import collections
+import multiprocessing
 
 # Import Salt libs
 import salt.minion
+import salt.payload
+import salt.utils
+import salt.utils.event
 import salt.utils.verify
 import salt.utils.jid
 from salt.utils.event import tagify
 
+# Import third party libs
+from salt.ext.six.moves import range  # pylint: disable=import-error,redefined-builtin
+try:
+    import zmq
+    HAS_ZMQ = True
+except ImportError:
+    HAS_ZMQ = False
+
 
 log = logging.getLogger(__name__)
 
 
-def store_job(opts, load, event=None, mminion=None):
+def store_job(opts, load, event=None, mminion=None, queue=None):
     '''
     Store job information using the configured master_job_cache
+
+    If a :py:class:`JobCacheQueue` is passed the job cache is written by the
+    :py:class:`JobCacheWriter` process instead, the event is still fired
+    before returning. When the queue is full the job cache is written before
+    firing the event, as without a queue.
     '''
     # Generate EndTime
     endtime = salt.utils.jid.jid_to_time(salt.utils.jid.gen_jid())
@@ -51,15 +74,13 @@ def store_job(opts, load, event=None, mminion=None):
             emsg = "Returner '{0}' does not support function save_load".format(job_cache)
             log.error(emsg)
             raise KeyError(emsg)
-    elif salt.utils.jid.is_jid(load['jid']):
-        # Store the jid
-        jidstore_fstr = '{0}.prep_jid'.format(job_cache)
-        try:
-            mminion.returners[jidstore_fstr](False, passed_jid=load['jid'])
-        except KeyError:
-            emsg = "Returner '{0}' does not support function prep_jid".format(job_cache)
-            log.error(emsg)
-            raise KeyError(emsg)
+        store_jid = False
+    else:
+        store_jid = salt.utils.jid.is_jid(load['jid'])
+
+    queued = queue is not None and queue.put(load, endtime, store_jid)
+    if store_jid and not queued:
+        _store_jid(opts, load, mminion)
 
     if event:
         # If the return data is invalid, just ignore it
@@ -67,6 +88,32 @@ def store_job(opts, load, event=None, mminion=None):
         event.fire_event(load, tagify([load['jid'], 'ret', load['id']], 'job'))
         event.fire_ret_load(load)
 
+    if not queued:
+        _store_return(opts, load, mminion, endtime)
+
+
+def write_job_cache(opts, load, mminion, endtime, store_jid=True):
+    '''
+    Write a minion return to the master job cache
+    '''
+    if store_jid:
+        _store_jid(opts, load, mminion)
+    _store_return(opts, load, mminion, endtime)
+
+
+def _store_jid(opts, load, mminion):
+    job_cache = opts['master_job_cache']
+    jidstore_fstr = '{0}.prep_jid'.format(job_cache)
+    try:
+        mminion.returners[jidstore_fstr](False, passed_jid=load['jid'])
+    except KeyError:
+        emsg = "Returner '{0}' does not support function prep_jid".format(job_cache)
+        log.error(emsg)
+        raise KeyError(emsg)
+
+
+def _store_return(opts, load, mminion, endtime):
+    job_cache = opts['master_job_cache']
     # if you have a job_cache, or an ext_job_cache, don't write to
     # the regular master cache
     if not opts['job_cache'] or opts.get('ext_job_cache'):
@@ -98,6 +145,387 @@ def store_job(opts, load, event=None, mminion=None):
         raise KeyError(emsg)
 
 
+def _writer_uri(opts):
+    return 'ipc://{0}'.format(
+        os.path.join(opts['sock_dir'], 'job_cache_writer.ipc')
+    )
+
+
+class JobCacheQueue(object):
+    '''
+    Hand minion returns from a MWorker to the :py:class:`JobCacheWriter`
+    process. When the writer does not keep up and its queue is full the
+    returns are written by the caller, which slows the MWorkers down to the
+    speed of the job cache instead of dropping returns.
+    '''
+    def __init__(self, opts):
+        self.opts = opts
+        self.serial = salt.payload.Serial(opts)
+        self.context = zmq.Context()
+        self.socket = self.context.socket(zmq.PUSH)
+        self.socket.setsockopt(zmq.LINGER, 1000)
+        if hasattr(zmq, 'SNDHWM'):
+            self.socket.setsockopt(zmq.SNDHWM, opts['job_cache_writer_hwm'])
+        if hasattr(zmq, 'IMMEDIATE'):
+            # Do not queue returns while the writer is not running
+            self.socket.setsockopt(zmq.IMMEDIATE, 1)
+        self.socket.connect(_writer_uri(opts))
+        self.overflows = 0
+
+    def put(self, load, endtime, store_jid):
+        '''
+        Queue a return, returns False if the queue is full
+        '''
+        try:
+            self.socket.send(
+                self.serial.dumps(
+                    {'load': load, 'endtime': endtime, 'store_jid': store_jid}
+                ),
+                zmq.NOBLOCK
+            )
+        except zmq.ZMQError as exc:
+            if exc.errno != errno.EAGAIN:
+                raise
+            self.overflows += 1
+            log.warning(
+                'Job cache writer queue is full, writing return for job {0} '
+                'synchronously ({1} times so far)'.format(
+                    load['jid'], self.overflows
+                )
+            )
+            return False
+        return True
+
+
+class JobCacheWriter(multiprocessing.Process):
+    '''
+    A dedicated process which receives the minion returns queued by the
+    MWorkers and writes them to the master job cache in batches.
+
+    The writer reads the returns off its socket as they arrive, up to
+    ``job_cache_writer_hwm`` of them, so that ``queue_depth`` in its
+    statistics is the number of returns waiting to be written. A return
+    which could not be written is queued again, up to ``max_attempts``
+    times, and the writer waits ``retry_interval`` seconds before writing
+    the next batch.
+
+    Without ``job_cache_writer_durable`` the job cache is written at most
+    once: the returns the writer received but did not write yet are lost if
+    it crashes. With it every return is appended to a journal in the cachedir
+    as soon as it is received, with one fsync per read from the socket, and
+    the journal is replayed when the writer starts, so the returns are written
+    at least once. The returns still waiting in the socket when the writer
+    crashes are lost either way.
+
+    The offset in the journal of the first return which was not written yet
+    is kept in a checkpoint file, the journal is only rewritten when the
+    written returns take more than ``journal_compact_size`` bytes of it.
+    '''
+    max_attempts = 5
+    retry_interval = 5
+    journal_compact_size = 16777216
+
+    def __init__(self, opts):
+        multiprocessing.Process.__init__(self)
+        self.opts = opts
+        self.batch_size = opts['job_cache_writer_batch_size']
+        self.batch_timeout = opts['job_cache_writer_batch_timeout']
+        self.max_queued = opts['job_cache_writer_hwm']
+        self.durable = opts['job_cache_writer_durable']
+        self.journal = os.path.join(opts['cachedir'], 'job_cache_writer.p')
+        self.checkpoint = os.path.join(opts['cachedir'],
+                                       'job_cache_writer.ckpt')
+        # The queued returns, as (return, journal offset of its end) tuples
+        self.queue = collections.deque()
+        self.journal_size = 0
+        self.retry_at = 0
+        self.stop = False
+        self.stats = {'received': 0,
+                      'written': 0,
+                      'errors': 0,
+                      'dropped': 0,
+                      'batches': 0,
+                      'queue_depth': 0,
+                      'write_latency_avg': 0.0,
+                      'write_latency_max': 0.0}
+
+    def sig_stop(self, signum, frame):
+        self.stop = True  # tell it to stop
+
+    def _journal_append(self, items, path=None):
+        '''
+        Append returns to the journal, each one prefixed with its length, and
+        return the queue entries of the returns
+        '''
+        entries = []
+        with salt.utils.fopen(path or self.journal, 'ab') as fp_:
+            for item in items:
+                data = self.serial.dumps(item)
+                fp_.write(struct.pack('>I', len(data)) + data)
+                self.journal_size += 4 + len(data)
+                entries.append((item, self.journal_size))
+            fp_.flush()
+            os.fsync(fp_.fileno())
+        return entries
+
+    def _queue(self, items):
+        '''
+        Queue returns, journaling them first in durable mode
+        '''
+        if self.durable:
+            self.queue.extend(self._journal_append(items))
+        else:
+            self.queue.extend((item, None) for item in items)
+
+    def _journal_done(self, offset):
+        '''
+        Record that the returns of the journal up to offset were handled
+        '''
+        if not self.queue:
+            # Nothing left to replay
+            for path in (self.checkpoint, self.journal):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.journal_size = 0
+            return
+        if offset >= self.journal_compact_size:
+            self._journal_compact()
+            return
+        # A lost checkpoint only replays returns which were already written,
+        # it does not need an fsync
+        tmp = '{0}.tmp'.format(self.checkpoint)
+        with salt.utils.fopen(tmp, 'w') as fp_:
+            fp_.write(str(offset))
+        os.rename(tmp, self.checkpoint)
+
+    def _journal_compact(self):
+        '''
+        Replace the journal with the returns which are still queued
+        '''
+        tmp = '{0}.tmp'.format(self.journal)
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        queued = [item for item, _ in self.queue]
+        self.journal_size = 0
+        self.queue = collections.deque(self._journal_append(queued, tmp))
+        os.rename(tmp, self.journal)
+        try:
+            os.remove(self.checkpoint)
+        except OSError:
+            pass
+
+    def _replay_journal(self):
+        if not os.path.isfile(self.journal):
+            return
+        offset = 0
+        try:
+            with salt.utils.fopen(self.checkpoint, 'r') as fp_:
+                offset = int(fp_.read())
+        except (IOError, OSError, ValueError):
+            pass
+        items = []
+        valid = 0
+        try:
+            with salt.utils.fopen(self.journal, 'rb') as fp_:
+                while True:
+                    head = fp_.read(4)
+                    if len(head) < 4:
+                        break
+                    size = struct.unpack('>I', head)[0]
+                    data = fp_.read(size)
+                    if len(data) < size:
+                        # The writer died while appending this return, it
+                        # was never acknowledged
+                        break
+                    valid += 4 + size
+                    if valid > offset:
+                        items.append(self.serial.loads(data))
+        except Exception as exc:
+            log.error(
+                'Unable to read job cache journal {0}: {1}'.format(
+                    self.journal, exc
+                )
+            )
+        if items:
+            log.info(
+                'Replaying {0} returns from the job cache journal'.format(
+                    len(items)
+                )
+            )
+        # Start over with the returns to replay only
+        for path in (self.checkpoint, self.journal):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.journal_size = 0
+        if items:
+            self._queue(items)
+
+    def receive(self, socket):
+        '''
+        Read the returns waiting in the socket, until job_cache_writer_hwm
+        returns are queued
+        '''
+        items = []
+        while len(self.queue) + len(items) < self.max_queued:
+            try:
+                items.append(self.serial.loads(socket.recv(zmq.NOBLOCK)))
+            except zmq.ZMQError as exc:
+                if exc.errno != errno.EAGAIN:
+                    raise
+                break
+        if not items:
+            return 0
+        self._queue(items)
+        self.stats['received'] += len(items)
+        return len(items)
+
+    def flush(self, count=None):
+        '''
+        Write the next batch of queued returns to the job cache, or the next
+        ``count`` returns, the returns which could not be written are queued
+        again
+        '''
+        if not self.queue:
+            return
+        count = min(len(self.queue), count or self.batch_size)
+        failed = []
+        offset = None
+        start = time.time()
+        for _ in range(count):
+            item, offset = self.queue.popleft()
+            item_start = time.time()
+            try:
+                write_job_cache(self.opts,
+                                item['load'],
+                                self.mminion,
+                                item['endtime'],
+                                item.get('store_jid', True))
+            except Exception as exc:
+                self.stats['errors'] += 1
+                item['attempts'] = item.get('attempts', 0) + 1
+                if item['attempts'] < self.max_attempts:
+                    failed.append(item)
+                    level = logging.WARNING
+                else:
+                    self.stats['dropped'] += 1
+                    level = logging.ERROR
+                log.log(
+                    level,
+                    'Could not store return for job {0} (attempt {1} of '
+                    '{2}): {3}'.format(
+                        item['load'].get('jid'),
+                        item['attempts'],
+                        self.max_attempts,
+                        exc
+                    ),
+                    exc_info_on_loglevel=logging.DEBUG
+                )
+                continue
+            latency = time.time() - item_start
+            self.stats['write_latency_max'] = max(
+                self.stats['write_latency_max'], latency
+            )
+            self.stats['written'] += 1
+        # Running average over all batches
+        self.stats['batches'] += 1
+        self.stats['write_latency_avg'] += (
+            (time.time() - start) / count
+            - self.stats['write_latency_avg']
+        ) / self.stats['batches']
+        log.debug(
+            'Wrote {0} returns to the job cache in {1:.3f} seconds, {2} '
+            'returns queued'.format(
+                count - len(failed), time.time() - start, len(self.queue)
+            )
+        )
+        if failed:
+            # Journal the failed returns again, their old records are
+            # skipped by the checkpoint
+            self._queue(failed)
+            self.retry_at = time.time() + self.retry_interval
+        if self.durable:
+            self._journal_done(offset)
+
+    def fire_stats(self):
+        '''
+        Fire the writer statistics on the master event bus
+        '''
+        self.stats['queue_depth'] = len(self.queue)
+        self.event.fire_event(
+            dict(self.stats), tagify(['job_cache', 'writer', 'stats'], 'salt')
+        )
+
+    def run(self):
+        '''
+        Receive and write returns until told to stop
+        '''
+        # Properly exit if a SIGTERM is signalled
+        signal.signal(signal.SIGTERM, self.sig_stop)
+
+        salt.utils.appendproctitle(self.__class__.__name__)
+        self.serial = salt.payload.Serial(self.opts)
+        self.mminion = salt.minion.MasterMinion(
+            self.opts, states=False, rend=False
+        )
+        self.event = salt.utils.event.get_master_event(
+            self.opts, self.opts['sock_dir'], listen=False
+        )
+        context = zmq.Context()
+        socket = context.socket(zmq.PULL)
+        if hasattr(zmq, 'RCVHWM'):
+            socket.setsockopt(zmq.RCVHWM, self.opts['job_cache_writer_hwm'])
+        uri = _writer_uri(self.opts)
+        socket.bind(uri)
+        os.chmod(uri[6:], 0o600)
+        poller = zmq.Poller()
+        poller.register(socket, zmq.POLLIN)
+
+        self._replay_journal()
+        stats_interval = self.opts['job_cache_writer_stats_interval']
+        last_stats = time.time()
+        first_queued = time.time() if self.queue else None
+        try:
+            while not self.stop:
+                # Do not wait for more returns while a full batch is queued
+                now = time.time()
+                timeout = 100
+                if len(self.queue) >= self.batch_size and now >= self.retry_at:
+                    timeout = 0
+                try:
+                    socks = dict(poller.poll(timeout))
+                except zmq.ZMQError as exc:
+                    if exc.errno == errno.EINTR:
+                        continue
+                    raise
+                if socks.get(socket) == zmq.POLLIN:
+                    if self.receive(socket) and first_queued is None:
+                        first_queued = time.time()
+                now = time.time()
+                if self.queue and now >= self.retry_at \
+                        and (len(self.queue) >= self.batch_size
+                             or now - first_queued >= self.batch_timeout):
+                    self.flush()
+                    first_queued = now if self.queue else None
+                if stats_interval and now - last_stats >= stats_interval:
+                    self.fire_stats()
+                    last_stats = now
+        finally:  # write all we have at this moment
+            # Only try once, the returns which fail again stay in the journal
+            remaining = len(self.queue)
+            while remaining > 0:
+                count = min(remaining, self.batch_size)
+                self.flush(count)
+                remaining -= count
+            socket.close()
+            context.term()
+
+
 def get_retcode(ret):
     '''
     Determine a retcode for a given return
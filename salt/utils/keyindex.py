@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+'''
+In memory index of the minion keys in the master pki dir
+
+Listing tens of thousands of keys on every ``salt-key -L``, glob target or
+``key.accept`` means listing and stat'ing every key file each time. The
+:py:class:`KeyIndex` of a process lists every key directory once and serves
+listings, glob and regular expression matches and status lookups from
+memory. Before every use the modification time of each key directory is
+checked, a directory is only listed again when it changed.
+
+Directory modification times have a limited resolution, a change made in the
+same tick the directory was listed would not be noticed. Directories which
+were modified less than :py:data:`RACY_INTERVAL` seconds before they were
+listed are therefore listed again on the next use.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import re
+import time
+import fnmatch
+import threading
+
+# Import salt libs
+import salt.utils
+
+RACY_INTERVAL = 2
+
+_GLOB_CHARS = re.compile(r'[*?[]')
+_INDEXES = {}
+_LOCK = threading.Lock()
+
+
+def is_glob(expr):
+    '''
+    Return True if the passed expression holds glob characters
+    '''
+    return bool(_GLOB_CHARS.search(expr))
+
+
+class KeyIndex(object):
+    '''
+    The key files found in the passed key directories of the pki dir
+    '''
+    def __init__(self, pki_dir, statuses):
+        self.pki_dir = pki_dir
+        self.statuses = list(statuses)
+        self._lock = threading.Lock()
+        # status -> (dir mtime, time listed, sorted keys, set of keys)
+        self._dirs = {}
+
+    def _listing(self, status):
+        path = os.path.join(self.pki_dir, status)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            # key dir kind is not created yet
+            return [], frozenset()
+        with self._lock:
+            cached = self._dirs.get(status)
+            if cached is not None and cached[0] == mtime \
+                    and cached[1] - mtime > RACY_INTERVAL:
+                return cached[2], cached[3]
+        listed = time.time()
+        keys = []
+        try:
+            for fn_ in os.listdir(path):
+                if not fn_.startswith('.'):
+                    if os.path.isfile(os.path.join(path, fn_)):
+                        keys.append(fn_)
+        except (OSError, IOError):
+            return [], frozenset()
+        keys = salt.utils.isorted(keys)
+        entry = (mtime, listed, keys, frozenset(keys))
+        with self._lock:
+            self._dirs[status] = entry
+        return entry[2], entry[3]
+
+    def invalidate(self, status=None):
+        '''
+        Forget the listing of a key directory, or of all of them
+        '''
+        with self._lock:
+            if status is None:
+                self._dirs.clear()
+            else:
+                self._dirs.pop(status, None)
+
+    def keys(self, status):
+        '''
+        Return the sorted list of keys with the passed status, the list must
+        not be modified
+        '''
+        return self._listing(status)[0]
+
+    def contains(self, status, key):
+        '''
+        Return True if the key has the passed status
+        '''
+        return key in self._listing(status)[1]
+
+    def status(self, key):
+        '''
+        Return the status of a key, None if it is unknown
+        '''
+        for status in self.statuses:
+            if self.contains(status, key):
+                return status
+        return None
+
+    def glob(self, status, expr):
+        '''
+        Return the sorted keys with the passed status matching a glob
+        '''
+        if not is_glob(expr):
+            return [expr] if self.contains(status, expr) else []
+        return fnmatch.filter(self.keys(status), expr)
+
+    def pcre(self, status, expr):
+        '''
+        Return the sorted keys with the passed status matching a regular
+        expression
+        '''
+        reg = re.compile(expr)
+        return [key for key in self.keys(status) if reg.match(key)]
+
+    def all(self):
+        '''
+        Return a dict mapping every status to its sorted keys
+        '''
+        return dict((status, list(self.keys(status)))
+                    for status in self.statuses)
+
+
+def get_index(pki_dir, statuses):
+    '''
+    Return the key index of the current process for the passed pki dir
+    '''
+    key = (pki_dir, tuple(statuses))
+    with _LOCK:
+        if key not in _INDEXES:
+            _INDEXES[key] = KeyIndex(pki_dir, statuses)
+        return _INDEXES[key]
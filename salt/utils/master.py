@@ -10,6 +10,7 @@
 # Import python libs
 from __future__ import absolute_import
 import os
+import errno
 import logging
 import multiprocessing
 import signal
@@ -666,6 +667,164 @@ class ConnectedCache(multiprocessing.Process):
         log.debug('ConCache Shutting down')
 
 
+class MineStore(multiprocessing.Process):
+    '''
+    Keeps the mine data of all minions in memory, indexed by mine function,
+    so that the MWorkers can answer a mine.get for any number of minions
+    with a single lookup instead of reading the mine.p file of every
+    matched minion. The mine.p files in the minion data cache remain the
+    persistent copy, the index is rebuilt from them when the store starts.
+    '''
+    def __init__(self, opts):
+        super(MineStore, self).__init__()
+        self.opts = opts
+        # mine function -> minion id -> data
+        self.index = {}
+        self.req_sock = os.path.join(self.opts['sock_dir'], 'mine_store.ipc')
+        self.upd_sock = os.path.join(self.opts['sock_dir'], 'mine_upd.ipc')
+        self.running = True
+
+    def signal_handler(self, sig, frame):
+        '''
+        handle signals and shutdown
+        '''
+        self.running = False
+
+    def cleanup(self):
+        '''
+        remove sockets on shutdown
+        '''
+        for sock in (self.req_sock, self.upd_sock):
+            if os.path.exists(sock):
+                os.remove(sock)
+
+    def load(self):
+        '''
+        Build the index from the mine.p files in the minion data cache
+        '''
+        serial = salt.payload.Serial(self.opts)
+        mdir = os.path.join(self.opts['cachedir'], 'minions')
+        if not os.path.isdir(mdir):
+            return
+        for minion in os.listdir(mdir):
+            datap = os.path.join(mdir, minion, 'mine.p')
+            try:
+                with salt.utils.fopen(datap, 'rb') as fp_:
+                    data = serial.load(fp_)
+            except Exception:
+                continue
+            if isinstance(data, dict):
+                self.update(minion, data)
+        log.info(
+            'MineStore loaded {0} mine functions'.format(len(self.index))
+        )
+
+    def update(self, minion, data):
+        '''
+        Replace the mine data of a minion
+        '''
+        self.flush(minion)
+        for fun, fdata in six.iteritems(data):
+            self.index.setdefault(fun, {})[minion] = fdata
+
+    def delete(self, minion, fun):
+        '''
+        Remove a single mine function of a minion
+        '''
+        self.index.get(fun, {}).pop(minion, None)
+
+    def flush(self, minion):
+        '''
+        Remove all mine data of a minion
+        '''
+        for fun in list(self.index):
+            self.index[fun].pop(minion, None)
+            if not self.index[fun]:
+                del self.index[fun]
+
+    def get(self, fun, minions=None):
+        '''
+        Return the mine data for the passed function, limited to the passed
+        minions
+        '''
+        fdata = self.index.get(fun, {})
+        if minions is None:
+            return dict((minion, data) for minion, data in six.iteritems(fdata)
+                        if data)
+        minions = set(minions)
+        if len(minions) > len(fdata):
+            return dict((minion, data) for minion, data in six.iteritems(fdata)
+                        if data and minion in minions)
+        return dict((minion, fdata[minion]) for minion in minions
+                    if fdata.get(minion))
+
+    def run(self):
+        '''
+        Answer mine requests from the MWorkers and apply their updates
+        '''
+        salt.utils.appendproctitle(self.__class__.__name__)
+        signal.signal(signal.SIGTERM, self.signal_handler)
+        self.cleanup()
+        self.load()
+        serial = salt.payload.Serial(self.opts)
+        context = zmq.Context()
+        req_in = context.socket(zmq.REP)
+        req_in.setsockopt(zmq.LINGER, 100)
+        req_in.bind('ipc://' + self.req_sock)
+        upd_in = context.socket(zmq.PULL)
+        upd_in.setsockopt(zmq.LINGER, 100)
+        upd_in.bind('ipc://' + self.upd_sock)
+        for sock in (self.req_sock, self.upd_sock):
+            os.chmod(sock, 0o600)
+
+        poller = zmq.Poller()
+        poller.register(req_in, zmq.POLLIN)
+        poller.register(upd_in, zmq.POLLIN)
+        log.info('MineStore started')
+
+        while self.running:
+            try:
+                socks = dict(poller.poll(1000))
+            except zmq.ZMQError as zmq_err:
+                if zmq_err.errno == errno.EINTR:
+                    continue
+                log.exception(zmq_err)
+                break
+
+            # Apply all pending updates before answering requests
+            if socks.get(upd_in) == zmq.POLLIN:
+                while True:
+                    try:
+                        msg = serial.loads(upd_in.recv(zmq.NOBLOCK))
+                    except zmq.ZMQError:
+                        break
+                    try:
+                        cmd = msg['cmd']
+                        if cmd == 'update':
+                            self.update(msg['id'], msg['data'])
+                        elif cmd == 'delete':
+                            self.delete(msg['id'], msg['fun'])
+                        elif cmd == 'flush':
+                            self.flush(msg['id'])
+                    except (KeyError, TypeError, AttributeError):
+                        log.error('MineStore received malformed update')
+
+            if socks.get(req_in) == zmq.POLLIN:
+                msg = serial.loads(req_in.recv())
+                try:
+                    reply = self.get(msg['fun'], msg.get('minions'))
+                except (KeyError, TypeError):
+                    log.error('MineStore received malformed request')
+                    reply = {}
+                req_in.send(serial.dumps(reply))
+
+        req_in.close()
+        upd_in.close()
+        context.term()
+        self.cleanup()
+        log.debug('MineStore shutting down')
+
+
 def ping_all_connected_minions(opts):
     client = salt.client.LocalClient()
     ckminions = salt.utils.minions.CkMinions(opts)
@@ -7,13 +7,16 @@ expected to return
 # Import python libs
 from __future__ import absolute_import
 import os
-import fnmatch
 import re
 import logging
 
 # Import salt libs
 import salt.payload
 import salt.utils
+import salt.utils.cache
+import salt.utils.network
+import salt.utils.keyindex
+import salt.utils.compound
 from salt.defaults import DEFAULT_TARGET_DELIM
 from salt.exceptions import CommandExecutionError
 
@@ -161,6 +164,129 @@ def nodegroup_comp(nodegroup, nodegroups, skip=None, first_call=True):
         return nodegroups[nodegroup]
 
 
+def _ipcidr_match(tgt, grains):
+    '''
+    Return whether the addresses in the passed grains match an IP/CIDR target
+    '''
+    try:
+        tgt = ipaddress.ip_network(tgt)
+        # Target is a network
+        proto = 'ipv{0}'.format(tgt.version)
+        if proto not in grains:
+            return False
+        return salt.utils.network.in_subnet(tgt, grains[proto])
+    except:  # pylint: disable=bare-except
+        try:
+            # Target should be an address
+            proto = 'ipv{0}'.format(ipaddress.ip_address(tgt).version)
+            if proto not in grains:
+                return False
+            return tgt in grains[proto]
+        except:  # pylint: disable=bare-except
+            log.error('Invalid IP/CIDR target {0}"'.format(tgt))
+    return True
+
+
+class _CompoundEvaluator(object):
+    '''
+    Evaluate the tree of a compound target against the accepted minions
+
+    Every node is evaluated against the candidate minions which can still
+    change the result, an ``and`` stops once no candidates are left and an
+    ``or`` once all candidates matched. The grain, pillar and ipcidr targets
+    of the tree are all evaluated in the same pass over the minion data
+    cache, which only loads the data of the candidates.
+    '''
+    def __init__(self, ckminions, tree, pillar_exact=False):
+        self.ckminions = ckminions
+        self.pillar_exact = pillar_exact
+        self.data_targets = [target for target in tree.targets()
+                             if target.engine in ('G', 'P', 'I', 'J', 'S')]
+        self.data_matches = dict((id(target), set())
+                                 for target in self.data_targets)
+        self.loaded = set()
+
+    def evaluate(self, node, candidates):
+        '''
+        Return the candidates matching a node
+        '''
+        if not candidates:
+            return set()
+        if isinstance(node, salt.utils.compound.Target):
+            return self.evaluate_target(node, candidates)
+        if isinstance(node, salt.utils.compound.Not):
+            return candidates - self.evaluate(node.node, candidates)
+        if isinstance(node, salt.utils.compound.And):
+            for child in node.nodes:
+                candidates = self.evaluate(child, candidates)
+                if not candidates:
+                    break
+            return candidates
+        matched = set()
+        for child in node.nodes:
+            matched |= self.evaluate(child, candidates - matched)
+            if len(matched) == len(candidates):
+                break
+        return matched
+
+    def evaluate_target(self, target, candidates):
+        '''
+        Return the candidates matching a single target
+        '''
+        ckminions = self.ckminions
+        if target.engine in ('G', 'P', 'I', 'J', 'S'):
+            self.load(candidates)
+            return self.data_matches[id(target)] & candidates
+        if target.engine == 'L':
+            found = ckminions._check_list_minions(target.pattern, True)
+        elif target.engine == 'E':
+            found = ckminions._check_pcre_minions(target.pattern, True)
+        elif target.engine == 'R':
+            found = ckminions._check_range_minions(target.pattern, True)
+        else:
+            found = ckminions._check_glob_minions(target.word, True)
+        return candidates.intersection(found)
+
+    def load(self, candidates):
+        '''
+        Evaluate the data targets for the candidates not evaluated yet
+        '''
+        missing = candidates - self.loaded
+        if not missing:
+            return
+        self.loaded.update(missing)
+        cdir = os.path.join(self.ckminions.opts['cachedir'], 'minions')
+        for id_ in missing:
+            datap = os.path.join(cdir, id_, 'data.p')
+            data = None
+            if os.path.isfile(datap):
+                try:
+                    with salt.utils.fopen(datap, 'rb') as fp_:
+                        data = self.ckminions.serial.load(fp_)
+                except (IOError, OSError):
+                    pass
+            for target in self.data_targets:
+                # Err on the side of too many minions if nothing is cached
+                if data is None or self.match_data(target, data):
+                    self.data_matches[id(target)].add(id_)
+
+    def match_data(self, target, data):
+        '''
+        Return whether the cached data of a minion match a data target
+        '''
+        if target.engine == 'S':
+            return _ipcidr_match(target.pattern, data.get('grains') or {})
+        search = 'grains' if target.engine in ('G', 'P') else 'pillar'
+        exact = self.pillar_exact and search == 'pillar'
+        return salt.utils.subdict_match(
+            data.get(search) or {},
+            target.pattern,
+            delimiter=target.delimiter or DEFAULT_TARGET_DELIM,
+            regex_match=target.engine in ('P', 'J') and not exact,
+            exact_match=exact
+        )
+
+
 class CkMinions(object):
     '''
     Used to check what minions should respond from a target
@@ -179,19 +305,24 @@ class CkMinions(object):
         else:
             self.acc = 'accepted'
 
+    def _pki_index(self):
+        '''
+        Return the in memory index of the accepted minion keys
+        '''
+        return salt.utils.keyindex.get_index(self.opts['pki_dir'], [self.acc])
+
+    def _pki_minions(self):
+        '''
+        Return the sorted list of minions with accepted keys, the list must
+        not be modified
+        '''
+        return self._pki_index().keys(self.acc)
+
     def _check_glob_minions(self, expr, greedy):  # pylint: disable=unused-argument
         '''
         Return the minions found by looking via globs
         '''
-        pki_dir = os.path.join(self.opts['pki_dir'], self.acc)
-        try:
-            files = []
-            for fn_ in salt.utils.isorted(os.listdir(pki_dir)):
-                if not fn_.startswith('.') and os.path.isfile(os.path.join(pki_dir, fn_)):
-                    files.append(fn_)
-            return fnmatch.filter(files, expr)
-        except OSError:
-            return []
+        return self._pki_index().glob(self.acc, expr)
 
     def _check_list_minions(self, expr, greedy):  # pylint: disable=unused-argument
         '''
@@ -199,25 +330,14 @@ class CkMinions(object):
         '''
         if isinstance(expr, six.string_types):
             expr = [m for m in expr.split(',') if m]
-        ret = []
-        for minion in expr:
-            if os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, minion)):
-                ret.append(minion)
-        return ret
+        index = self._pki_index()
+        return [minion for minion in expr if index.contains(self.acc, minion)]
 
     def _check_pcre_minions(self, expr, greedy):  # pylint: disable=unused-argument
         '''
         Return the minions found by looking via regular expressions
         '''
-        try:
-            minions = []
-            for fn_ in salt.utils.isorted(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-                if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                    minions.append(fn_)
-            reg = re.compile(expr)
-            return [m for m in minions if reg.match(m)]
-        except OSError:
-            return []
+        return self._pki_index().pcre(self.acc, expr)
 
     def _check_cache_minions(self,
                              expr,
@@ -232,11 +352,7 @@ class CkMinions(object):
         cache_enabled = self.opts.get('minion_data_cache', False)
 
         if greedy:
-            mlist = []
-            for fn_ in salt.utils.isorted(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-                if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                    mlist.append(fn_)
-            minions = set(mlist)
+            minions = set(self._pki_minions())
         elif cache_enabled:
             minions = os.listdir(os.path.join(self.opts['cachedir'], 'minions'))
         else:
@@ -314,11 +430,7 @@ class CkMinions(object):
         cache_enabled = self.opts.get('minion_data_cache', False)
 
         if greedy:
-            mlist = []
-            for fn_ in salt.utils.isorted(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-                if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                    mlist.append(fn_)
-            minions = set(mlist)
+            minions = set(self._pki_minions())
         elif cache_enabled:
             minions = os.listdir(os.path.join(self.opts['cachedir'], 'minions'))
         else:
@@ -342,27 +454,7 @@ class CkMinions(object):
                 except (IOError, OSError):
                     continue
 
-                match = True
-                tgt = expr
-                try:
-                    tgt = ipaddress.ip_network(tgt)
-                    # Target is a network
-                    proto = 'ipv{0}'.format(tgt.version)
-                    if proto not in self.opts['grains']:
-                        match = False
-                    else:
-                        match = salt.utils.network.in_subnet(tgt, self.opts['grains'][proto])
-                except:  # pylint: disable=bare-except
-                    try:
-                       # Target should be an address
-                        proto = 'ipv{0}'.format(ipaddress.ip_address(tgt).version)
-                        if proto not in self.opts['grains']:
-                            match = False
-                        else:
-                            match = tgt in self.opts['grains'][proto]
-                    except:  # pylint: disable=bare-except
-                        log.error('Invalid IP/CIDR target {0}"'.format(tgt))
-
+                match = _ipcidr_match(expr, grains or {})
                 if not match and id_ in minions:
                     minions.remove(id_)
 
@@ -387,11 +479,7 @@ class CkMinions(object):
             )
             cache_enabled = self.opts.get('minion_data_cache', False)
             if greedy:
-                mlist = []
-                for fn_ in salt.utils.isorted(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-                    if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                        mlist.append(fn_)
-                return mlist
+                return list(self._pki_minions())
             elif cache_enabled:
                 return os.listdir(os.path.join(self.opts['cachedir'], 'minions'))
             else:
@@ -420,136 +508,22 @@ class CkMinions(object):
         if not isinstance(expr, six.string_types) and not isinstance(expr, (list, tuple)):
             log.error('Compound target that is neither string, list nor tuple')
             return []
-        mlist = []
-        for fn_ in salt.utils.isorted(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-            if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                mlist.append(fn_)
-        minions = set(mlist)
+        minions = set(self._pki_minions())
         log.debug('minions: {0}'.format(minions))
 
         if self.opts.get('minion_data_cache', False):
-            ref = {'G': self._check_grain_minions,
-                   'P': self._check_grain_pcre_minions,
-                   'I': self._check_pillar_minions,
-                   'J': self._check_pillar_pcre_minions,
-                   'L': self._check_list_minions,
-                   'N': None,    # nodegroups should already be expanded
-                   'S': self._check_ipcidr_minions,
-                   'E': self._check_pcre_minions,
-                   'R': self._all_minions}
-            if pillar_exact:
-                ref['I'] = self._check_pillar_exact_minions
-                ref['J'] = self._check_pillar_exact_minions
-
-            results = []
-            unmatched = []
-            opers = ['and', 'or', 'not', '(', ')']
-
-            if isinstance(expr, six.string_types):
-                words = expr.split()
-            else:
-                words = expr
-
-            for word in words:
-                target_info = parse_target(word)
-
-                # Easy check first
-                if word in opers:
-                    if results:
-                        if results[-1] == '(' and word in ('and', 'or'):
-                            log.error('Invalid beginning operator after "(": {0}'.format(word))
-                            return []
-                        if word == 'not':
-                            if not results[-1] in ('&', '|', '('):
-                                results.append('&')
-                            results.append('(')
-                            results.append(str(set(minions)))
-                            results.append('-')
-                            unmatched.append('-')
-                        elif word == 'and':
-                            results.append('&')
-                        elif word == 'or':
-                            results.append('|')
-                        elif word == '(':
-                            results.append(word)
-                            unmatched.append(word)
-                        elif word == ')':
-                            if not unmatched or unmatched[-1] != '(':
-                                log.error('Invalid compound expr (unexpected '
-                                          'right parenthesis): {0}'
-                                          .format(expr))
-                                return []
-                            results.append(word)
-                            unmatched.pop()
-                            if unmatched and unmatched[-1] == '-':
-                                results.append(')')
-                                unmatched.pop()
-                        else:  # Won't get here, unless oper is added
-                            log.error('Unhandled oper in compound expr: {0}'
-                                      .format(expr))
-                            return []
-                    else:
-                        # seq start with oper, fail
-                        if word == 'not':
-                            results.append('(')
-                            results.append(str(set(minions)))
-                            results.append('-')
-                            unmatched.append('-')
-                        elif word == '(':
-                            results.append(word)
-                            unmatched.append(word)
-                        else:
-                            log.error(
-                                'Expression may begin with'
-                                ' binary operator: {0}'.format(word)
-                            )
-                            return []
-
-                elif target_info and target_info['engine']:
-                    if 'N' == target_info['engine']:
-                        # Nodegroups should already be expanded/resolved to other engines
-                        log.error('Detected nodegroup expansion failure of "{0}"'.format(word))
-                        return []
-                    engine = ref.get(target_info['engine'])
-                    if not engine:
-                        # If an unknown engine is called at any time, fail out
-                        log.error(
-                            'Unrecognized target engine "{0}" for'
-                            ' target expression "{1}"'.format(
-                                target_info['engine'],
-                                word,
-                            )
-                        )
-                        return []
-
-                    engine_args = [target_info['pattern']]
-                    if target_info['engine'] in ('G', 'P', 'I', 'J'):
-                        engine_args.append(target_info['delimiter'] or ':')
-                    engine_args.append(True)
-
-                    results.append(str(set(engine(*engine_args))))
-                    if unmatched and unmatched[-1] == '-':
-                        results.append(')')
-                        unmatched.pop()
-
-                else:
-                    # The match is not explicitly defined, evaluate as a glob
-                    results.append(str(set(self._check_glob_minions(word, True))))
-                    if unmatched and unmatched[-1] == '-':
-                        results.append(')')
-                        unmatched.pop()
-
-            # Add a closing ')' for each item left in unmatched
-            results.extend([')' for item in unmatched])
-
-            results = ' '.join(results)
-            log.debug('Evaluating final compound matching expr: {0}'
-                      .format(results))
             try:
-                return list(eval(results))  # pylint: disable=W0123
-            except Exception:
-                log.error('Invalid compound target: {0}'.format(expr))
+                tree = salt.utils.compound.parse(expr)
+            except salt.utils.compound.CompoundError as exc:
+                log.error('Invalid compound target {0}: {1}'.format(expr, exc))
                 return []
+            for target in tree.targets():
+                if target.engine == 'N':
+                    # Nodegroups should already be expanded/resolved to other engines
+                    log.error('Detected nodegroup expansion failure of "{0}"'.format(target.word))
+                    return []
+            evaluator = _CompoundEvaluator(self, tree, pillar_exact)
+            return list(evaluator.evaluate(tree, minions))
 
         return list(minions)
 
@@ -594,11 +568,7 @@ class CkMinions(object):
         '''
         Return a list of all minions that have auth'd
         '''
-        mlist = []
-        for fn_ in salt.utils.isorted(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-            if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                mlist.append(fn_)
-        return mlist
+        return list(self._pki_minions())
 
     def check_minions(self,
                       expr,
@@ -887,6 +857,10 @@ def mine_get(tgt, fun, tgt_type='glob', opts=None):
     minions = checker.check_minions(
             tgt,
             tgt_type)
+    if opts.get('mine_store') and opts.get('ipc_mode') != 'tcp':
+        stored = salt.utils.cache.mine_store_cli(opts).get(fun, minions)
+        if stored is not None:
+            return stored
     for minion in minions:
         mine = os.path.join(
                 opts['cachedir'],
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+'''
+Memory mapped tables of sorted paths, used to share the file lists of the
+fileserver backends between the processes of the master
+
+A table file holds named columns of paths, each column being either a list of
+paths or a mapping of paths to strings (the symlinks of gitfs). The paths of a
+column are sorted and stored as one blob, preceded by the offsets of the
+paths in the blob, so that a reader maps the file into memory once and looks
+a path or a prefix up with a binary search, without loading the column. The
+pages of the file are shared by all the processes mapping it.
+
+Tables are never modified, :py:func:`write` writes a new table next to the
+old one and renames it over the old one, the readers which mapped the old
+table keep using it until they notice the new one.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import mmap
+import os
+import struct
+import tempfile
+
+# Import salt libs
+import salt.utils
+import salt.utils.atomicfile
+
+# Import 3rd-party libs
+import salt.ext.six as six
+
+MAGIC = b'SPT1'
+
+_HEADER = struct.Struct('<4sI')
+# Name length, kind, count, offset of the keys, offset of the values
+_COLUMN = struct.Struct('<HBIQQ')
+_OFFSET = struct.Struct('<Q')
+
+_LIST = 0
+_DICT = 1
+
+
+def _encode(path):
+    if isinstance(path, six.text_type):
+        return path.encode('utf-8')
+    return path
+
+
+def _decode(data):
+    if six.PY3:
+        return data.decode('utf-8')
+    return data
+
+
+def _strings(items):
+    '''
+    Return the offsets and the blob of a list of strings, the offsets are
+    relative to the start of the blob
+    '''
+    offsets = [0]
+    for item in items:
+        offsets.append(offsets[-1] + len(item))
+    return offsets, b''.join(items)
+
+
+def write(path, data):
+    '''
+    Write a table of the lists (or dicts) of paths of the passed dict,
+    atomically replacing the table at ``path``
+    '''
+    columns = []
+    for name in sorted(data):
+        value = data[name]
+        if isinstance(value, dict):
+            pairs = sorted((_encode(key), _encode(val))
+                           for key, val in six.iteritems(value))
+            keys = [x[0] for x in pairs]
+            columns.append((_encode(name), _DICT, keys, [x[1] for x in pairs]))
+        else:
+            columns.append(
+                (_encode(name), _LIST, sorted(_encode(x) for x in value), None)
+            )
+
+    # The positions of the sections of the file, after the header
+    pos = _HEADER.size + sum(_COLUMN.size + len(x[0]) for x in columns)
+    head = [_HEADER.pack(MAGIC, len(columns))]
+    body = []
+    for name, kind, keys, values in columns:
+        sections = []
+        for strings in (keys, values):
+            if strings is None:
+                sections.append(0)
+                continue
+            offsets, blob = _strings(strings)
+            sections.append(pos)
+            start = pos + _OFFSET.size * len(offsets)
+            body.append(struct.pack(
+                '<{0}Q'.format(len(offsets)), *[start + x for x in offsets]
+            ))
+            body.append(blob)
+            pos = start + len(blob)
+        head.append(_COLUMN.pack(len(name), kind, len(keys), *sections))
+        head.append(name)
+
+    fd_, tmp = tempfile.mkstemp(prefix='.', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd_, 'wb') as fp_:
+            fp_.write(b''.join(head))
+            for chunk in body:
+                fp_.write(chunk)
+        salt.utils.atomicfile.atomic_rename(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class _Column(object):
+    '''
+    A column of sorted strings in a memory mapped table
+    '''
+    def __init__(self, mmap_, offset, count):
+        self._mmap = mmap_
+        self._offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        start, end = struct.unpack_from(
+            '<2Q', self._mmap, self._offset + _OFFSET.size * index
+        )
+        return self._mmap[start:end]
+
+    def bisect(self, key):
+        '''
+        Return the index of the first string not lower than ``key``
+        '''
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self[mid] < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def range(self, start, end):
+        '''
+        Return the strings from ``start`` to ``end``
+        '''
+        if start >= end:
+            return []
+        offsets = struct.unpack_from(
+            '<{0}Q'.format(end - start + 1),
+            self._mmap,
+            self._offset + _OFFSET.size * start
+        )
+        data = self._mmap[offsets[0]:offsets[-1]]
+        base = offsets[0]
+        return [_decode(data[offsets[num] - base:offsets[num + 1] - base])
+                for num in range(end - start)]
+
+
+class PathTable(object):
+    '''
+    A table written by :py:func:`write`, mapped into memory
+
+    path
+        The path of the table file
+    '''
+    def __init__(self, path):
+        with salt.utils.fopen(path, 'rb') as fp_:
+            stat = os.fstat(fp_.fileno())
+            # The identity of the file, a new table is a new file
+            self.key = (stat.st_ino, stat.st_mtime, stat.st_size)
+            self.mtime = stat.st_mtime
+            if stat.st_size < _HEADER.size:
+                raise ValueError('{0} is not a path table'.format(path))
+            self._mmap = mmap.mmap(fp_.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, count = _HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC:
+                raise ValueError('{0} is not a path table'.format(path))
+            self._columns = {}
+            pos = _HEADER.size
+            for _ in range(count):
+                name_len, kind, size, keys, values = \
+                    _COLUMN.unpack_from(self._mmap, pos)
+                pos += _COLUMN.size
+                name = _decode(self._mmap[pos:pos + name_len])
+                pos += name_len
+                self._columns[name] = (
+                    kind,
+                    _Column(self._mmap, keys, size),
+                    _Column(self._mmap, values, size) if values else None
+                )
+        except (struct.error, ValueError):
+            self.close()
+            raise ValueError('{0} is not a path table'.format(path))
+
+    def close(self):
+        '''
+        Unmap the table
+        '''
+        self._mmap.close()
+
+    def get(self, name, prefix=''):
+        '''
+        Return the paths of a column starting with ``prefix``, as a list, or
+        as a dict for the columns written from a dict. A missing column is an
+        empty list.
+        '''
+        if name not in self._columns:
+            return []
+        kind, keys, values = self._columns[name]
+        start, end = 0, len(keys)
+        prefix = _encode(prefix)
+        if prefix:
+            start = keys.bisect(prefix)
+            # The strings starting with the prefix are sorted together
+            end = start
+            while end < len(keys) and keys[end].startswith(prefix):
+                end += 1
+        if kind == _DICT:
+            return dict(zip(keys.range(start, end), values.range(start, end)))
+        return keys.range(start, end)
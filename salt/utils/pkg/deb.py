@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+'''
+Common functions for working with deb packages
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import re
+
+QUERYFORMAT = '${Status} ${Package} ${Version} ${Architecture}\n'
+
+# The lines of the dpkg output, as printed by apt-get, naming the packages
+# installed, upgraded, removed or purged by a transaction
+_TRANSACTION_RE = re.compile(
+    r'^(?:Unpacking|Setting up|Removing|Purging configuration files for) '
+    r'(\S+) \(',
+    re.MULTILINE
+)
+
+
+def parse_transaction(output):
+    '''
+    Return the set of the names of the packages touched by an apt-get
+    transaction, without their architecture
+    '''
+    return set(name.split(':', 1)[0]
+               for name in _TRANSACTION_RE.findall(output or ''))
+
+
+def parse_policy(output):
+    '''
+    Return the candidate versions in the output of ``apt-cache policy``
+    called with one or more packages, by the package names of the output
+    '''
+    ret = {}
+    name = None
+    for line in (output or '').splitlines():
+        if not line:
+            continue
+        if not line[0].isspace() and line.endswith(':'):
+            name = line[:-1]
+            continue
+        cols = line.split()
+        if name is not None and cols[0] == 'Candidate:' and len(cols) >= 2:
+            ret[name] = cols[-1]
+    return ret
@@ -5,6 +5,7 @@ Common
 
 # Import python libs
 from __future__ import absolute_import
+import re
 import logging
 
 # Import salt libs
@@ -32,6 +33,14 @@ ARCHES = ARCHES_64 + ARCHES_32 + ARCHES_PPC + ARCHES_S390 + \
 
 QUERYFORMAT = '%{NAME}_|-%{VERSION}_|-%{RELEASE}_|-%{ARCH}_|-%{REPOID}'
 
+# The progress lines of yum and dnf naming the packages installed, upgraded,
+# downgraded or removed by a transaction
+_TRANSACTION_RE = re.compile(
+    r'^[ \t]*(?:Installing|Updating|Upgrading|Downgrading|Reinstalling|'
+    r'Erasing|Removing|Obsoleting|Cleanup|Verifying)[ \t]*:[ \t]*(\S+)',
+    re.MULTILINE
+)
+
 
 def _osarch():
     '''
@@ -85,3 +94,33 @@ def parse_pkginfo(line, osarch=None):
         pkg_version += '-{0}'.format(release)
 
     return pkginfo(name, pkg_version, arch, repoid)
+
+
+def nevra_name(nevra):
+    '''
+    Return the name of a package from its name-[epoch:]version-release.arch
+    string, as printed by yum and dnf
+    '''
+    # yum prints the epoch before the name
+    if ':' in nevra.split('-', 1)[0]:
+        nevra = nevra.split(':', 1)[1]
+    comps = nevra.rsplit('.', 1)
+    if len(comps) == 2 and comps[1] in ARCHES + ('noarch',):
+        nevra = comps[0]
+    comps = nevra.rsplit('-', 2)
+    if len(comps) != 3:
+        return None
+    return comps[0]
+
+
+def parse_transaction(output):
+    '''
+    Return the set of the names of the packages touched by a yum or dnf
+    transaction
+    '''
+    ret = set()
+    for nevra in _TRANSACTION_RE.findall(output or ''):
+        name = nevra_name(nevra)
+        if name:
+            ret.add(name)
+    return ret
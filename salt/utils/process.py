@@ -203,6 +203,86 @@ class ThreadPool(object):
                 log.debug(err, exc_info=True)
 
 
+class TimedCall(object):
+    '''
+    Wrap a function call so that it can be run in a worker thread while
+    another thread waits for it with a timeout and inspects the outcome
+    '''
+    def __init__(self, func, args=None, kwargs=None, name=None):
+        self.func = func
+        self.args = args or []
+        self.kwargs = kwargs or {}
+        self.name = name if name is not None else getattr(func, '__name__', '')
+        self.started = None
+        self.duration = None
+        self.ret = None
+        self.exc_info = None
+        self.done = threading.Event()
+
+    def __call__(self):
+        self.started = time.time()
+        try:
+            self.ret = self.func(*self.args, **self.kwargs)
+        except Exception:
+            self.exc_info = sys.exc_info()
+        finally:
+            self.duration = time.time() - self.started
+            self.done.set()
+
+    def wait(self, timeout=0):
+        '''
+        Wait for the call to finish. The timeout is counted from the moment
+        the function actually started running, not from when it was queued,
+        0 waits forever. Returns False if the call did not finish in time.
+        '''
+        while not self.done.is_set():
+            if timeout and self.started is not None \
+                    and time.time() - self.started > timeout:
+                return False
+            self.done.wait(0.05)
+        return True
+
+
+def run_timed_calls(calls, num_threads=4, timeout=0):
+    '''
+    Run the passed list of :py:class:`TimedCall` objects in at most
+    ``num_threads`` daemonized threads and wait for them. ``timeout`` is
+    either a number of seconds applied to every call or a callable which is
+    passed the call and returns its timeout. Calls which take longer are
+    abandoned, their thread is left to finish on its own. Returns the list of
+    calls which did not finish in time.
+    '''
+    pending = queue.Queue()
+    for call in calls:
+        pending.put(call)
+
+    def _thread_target():
+        while True:
+            try:
+                call = pending.get_nowait()
+            except queue.Empty:
+                return
+            call()
+
+    def _start_thread():
+        thread = threading.Thread(target=_thread_target)
+        thread.daemon = True
+        thread.start()
+
+    for _ in range(min(max(num_threads, 1), len(calls))):
+        _start_thread()
+
+    timed_out = []
+    for call in calls:
+        call_timeout = timeout(call) if callable(timeout) else timeout
+        if not call.wait(call_timeout):
+            timed_out.append(call)
+            # The thread running the abandoned call is lost, replace it so
+            # that the calls still queued get to run
+            _start_thread()
+    return timed_out
+
+
 class ProcessManager(object):
     '''
     A class which will manage processes that should be running
@@ -2,8 +2,13 @@
 from __future__ import absolute_import
 
 # Import python libs
-import fnmatch
+import os
+import re
+import codecs
 import glob
+import time
+import zlib
+import fnmatch
 import logging
 import multiprocessing
 
@@ -12,15 +17,69 @@ import yaml
 # Import salt libs
 import salt.runner
 import salt.state
+import salt.template
 import salt.utils
 import salt.utils.cache
 import salt.utils.event
 import salt.utils.process
 from salt.ext.six import string_types, iterkeys
+from salt.ext.six.moves import queue  # pylint: disable=import-error
 from salt._compat import string_types
 log = logging.getLogger(__name__)
 
 
+class TagRouter(object):
+    '''
+    Compiled form of the reactor map. Tags without glob characters are looked
+    up in a dict, globs are translated to regular expressions once, and the
+    reactors matching a tag are memoized so that repeated tags (minion start
+    events, beacons) skip the matching altogether.
+    '''
+    _GLOB_CHARS = re.compile(r'[*?[]')
+
+    def __init__(self, react_map, cache_size=10000):
+        self.exact = {}
+        self.globs = []
+        self.cache_size = cache_size
+        self._matches = {}
+        for index, ropt in enumerate(react_map or []):
+            if not isinstance(ropt, dict):
+                continue
+            if len(ropt) != 1:
+                continue
+            key = next(iterkeys(ropt))
+            val = ropt[key]
+            if isinstance(val, string_types):
+                val = [val]
+            elif not isinstance(val, list):
+                continue
+            if self._GLOB_CHARS.search(key):
+                self.globs.append(
+                    (index, re.compile(fnmatch.translate(key)), val)
+                )
+            else:
+                self.exact.setdefault(key, []).append((index, val))
+
+    def match(self, tag):
+        '''
+        Return the list of reactors for the passed tag, in the order they
+        appear in the reactor map
+        '''
+        if tag in self._matches:
+            return self._matches[tag]
+        matched = list(self.exact.get(tag, []))
+        for index, regex, val in self.globs:
+            if regex.match(tag):
+                matched.append((index, val))
+        reactors = []
+        for _, val in sorted(matched, key=lambda item: item[0]):
+            reactors.extend(val)
+        if len(self._matches) >= self.cache_size:
+            self._matches.clear()
+        self._matches[tag] = reactors
+        return reactors
+
+
 class Reactor(multiprocessing.Process, salt.state.Compiler):
     '''
     Read in the reactor configuration variable and compare it to events
@@ -34,6 +93,50 @@ class Reactor(multiprocessing.Process, salt.state.Compiler):
         local_minion_opts['file_client'] = 'local'
         self.minion = salt.minion.MasterMinion(local_minion_opts)
         salt.state.Compiler.__init__(self, opts, self.minion.rend)
+        self._router = None
+        self._router_mtime = None
+        self.workers = []
+        # Resolved reaction files and their sources, the sources are
+        # invalidated when the file changes on disk
+        self._files = salt.utils.cache.CacheDict(
+            opts.get('reactor_refresh_interval', 60)
+        )
+        self._sources = {}
+
+    def _reaction_files(self, glob_ref):
+        '''
+        Return the local files a reaction reference resolves to. ``salt://``
+        references are cached from the fileserver at most once every
+        ``reactor_refresh_interval`` seconds.
+        '''
+        if glob_ref not in self._files:
+            path = glob_ref
+            if glob_ref.startswith('salt://'):
+                path = self.minion.functions['cp.cache_file'](glob_ref)
+            files = glob.glob(path) if path else []
+            if not files:
+                # Do not cache misses, the file may show up any moment
+                return files
+            self._files[glob_ref] = files
+        return self._files[glob_ref]
+
+    def _reaction_source(self, fn_):
+        '''
+        Return the modification time and the source of a reaction file, it is
+        only read again when its modification time or size changed
+        '''
+        try:
+            stat = os.stat(fn_)
+        except OSError:
+            self._sources.pop(fn_, None)
+            return None, ''
+        key = (stat.st_mtime, stat.st_size)
+        cached = self._sources.get(fn_)
+        if cached is None or cached[0] != key:
+            with codecs.open(fn_, 'r', salt.template.SLS_ENCODING) as fp_:
+                cached = (key, fp_.read())
+            self._sources[fn_] = cached
+        return stat.st_mtime, cached[1]
 
     def render_reaction(self, glob_ref, tag, data):
         '''
@@ -42,15 +145,25 @@ class Reactor(multiprocessing.Process, salt.state.Compiler):
         '''
         react = {}
 
-        if glob_ref.startswith('salt://'):
-            glob_ref = self.minion.functions['cp.cache_file'](glob_ref)
-
-        for fn_ in glob.glob(glob_ref):
+        for fn_ in self._reaction_files(glob_ref):
             try:
-                res = self.render_template(
-                    fn_,
+                mtime, source = self._reaction_source(fn_)
+                if not source.strip():
+                    continue
+                # The jinja renderer reuses the template compiled from the
+                # file while its modification time is unchanged
+                res = salt.template.compile_template(
+                    ':string:',
+                    self.rend,
+                    self.opts['renderer'],
+                    input_data=source,
+                    tmplpath=fn_,
+                    _tmpl_mtime=mtime,
                     tag=tag,
                     data=data)
+                if not res:
+                    continue
+                res = self.pad_funcs(res)
 
                 # for #20841, inject the sls name here since verify_high()
                 # assumes it exists in case there are any errors
@@ -62,44 +175,50 @@ class Reactor(multiprocessing.Process, salt.state.Compiler):
                 log.error('Failed to render "{0}": '.format(fn_), exc_info=True)
         return react
 
+    def _load_router(self):
+        '''
+        Return the compiled reactor map, a reactor map file is only parsed
+        again when it changed
+        '''
+        if not isinstance(self.opts['reactor'], string_types):
+            if self._router is None:
+                self._router = TagRouter(self.opts['reactor'])
+            return self._router
+        try:
+            mtime = os.path.getmtime(self.opts['reactor'])
+        except OSError:
+            mtime = None
+        if self._router is not None and mtime == self._router_mtime:
+            return self._router
+        react_map = []
+        try:
+            with salt.utils.fopen(self.opts['reactor']) as fp_:
+                react_map = yaml.safe_load(fp_.read())
+        except (OSError, IOError):
+            log.error(
+                'Failed to read reactor map: "{0}"'.format(
+                    self.opts['reactor']
+                    )
+                )
+        except Exception:
+            log.error(
+                'Failed to parse YAML in reactor map: "{0}"'.format(
+                    self.opts['reactor']
+                    )
+                )
+        if not isinstance(react_map, list):
+            react_map = []
+        self._router = TagRouter(react_map)
+        self._router_mtime = mtime
+        return self._router
+
     def list_reactors(self, tag):
         '''
         Take in the tag from an event and return a list of the reactors to
         process
         '''
         log.debug('Gathering reactors for tag {0}'.format(tag))
-        reactors = []
-        if isinstance(self.opts['reactor'], string_types):
-            try:
-                with salt.utils.fopen(self.opts['reactor']) as fp_:
-                    react_map = yaml.safe_load(fp_.read())
-            except (OSError, IOError):
-                log.error(
-                    'Failed to read reactor map: "{0}"'.format(
-                        self.opts['reactor']
-                        )
-                    )
-            except Exception:
-                log.error(
-                    'Failed to parse YAML in reactor map: "{0}"'.format(
-                        self.opts['reactor']
-                        )
-                    )
-        else:
-            react_map = self.opts['reactor']
-        for ropt in react_map:
-            if not isinstance(ropt, dict):
-                continue
-            if len(ropt) != 1:
-                continue
-            key = next(iterkeys(ropt))
-            val = ropt[key]
-            if fnmatch.fnmatch(tag, key):
-                if isinstance(val, string_types):
-                    reactors.append(val)
-                elif isinstance(val, list):
-                    reactors.extend(val)
-        return reactors
+        return self._load_router().match(tag)
 
     def reactions(self, tag, data, reactors):
         '''
@@ -130,12 +249,41 @@ class Reactor(multiprocessing.Process, salt.state.Compiler):
         for chunk in chunks:
             self.wrap.run(chunk)
 
+    def react(self, tag, data, reactors):
+        '''
+        Render and execute the reactions for a single event
+        '''
+        chunks = self.reactions(tag, data, reactors)
+        if chunks:
+            try:
+                self.call_reactions(chunks)
+            except SystemExit:
+                log.warning('Exit ignored by reactor')
+
     def run(self):
         '''
         Enter into the server loop
         '''
         salt.utils.appendproctitle(self.__class__.__name__)
 
+        self.workers = []
+        if self.opts['reactor_workers'] > 1:
+            # The workers are forked before any sockets are opened
+            self.workers = [
+                ReactorWorker(self, num)
+                for num in range(self.opts['reactor_workers'])
+            ]
+            for worker in self.workers:
+                worker.start()
+        else:
+            self.wrap = ReactWrap(self.opts)
+
+        try:
+            self._run()
+        finally:
+            self.stop_workers()
+
+    def _run(self):
         # instantiate some classes inside our new process
         self.event = salt.utils.event.get_event(
                 'master',
@@ -143,21 +291,152 @@ class Reactor(multiprocessing.Process, salt.state.Compiler):
                 self.opts['transport'],
                 opts=self.opts,
                 listen=True)
-        self.wrap = ReactWrap(self.opts)
 
+        stats_interval = self.opts['reactor_stats_interval']
+        last_stats = time.time()
         for data in self.event.iter_events(full=True):
+            if self.workers and stats_interval \
+                    and time.time() - last_stats >= stats_interval:
+                self.fire_stats()
+                last_stats = time.time()
             # skip all events fired by ourselves
-            if data['data'].get('user') == self.wrap.event_user:
+            if data['data'].get('user') == ReactWrap.event_user:
                 continue
             reactors = self.list_reactors(data['tag'])
             if not reactors:
                 continue
-            chunks = self.reactions(data['tag'], data['data'], reactors)
-            if chunks:
+            if not self.workers:
+                self.react(data['tag'], data['data'], reactors)
+                continue
+            # Events with the same tag always go to the same worker, so that
+            # their reactions run in the order the events were fired
+            num = (zlib.crc32(salt.utils.to_bytes(data['tag'])) & 0xffffffff) \
+                % len(self.workers)
+            self.dispatch(num, (data['tag'], data['data'], reactors))
+
+    def dispatch(self, num, item):
+        '''
+        Queue an event on a worker, a dead worker is replaced first. This
+        blocks while the worker is reactor_worker_hwm events behind.
+        '''
+        while True:
+            worker = self.workers[num]
+            if not worker.is_alive():
+                worker = self.restart_worker(num)
+            try:
+                worker.put(*item, timeout=1)
+                return
+            except queue.Full:
+                # Check again that the worker did not die in the meantime
+                continue
+
+    def restart_worker(self, num):
+        '''
+        Replace a dead worker, the events queued on it are lost
+        '''
+        old = self.workers[num]
+        old.join(1)
+        log.error(
+            'Reactor worker {0} died with exit status {1}, restarting it, '
+            'dropped {2} queued events'.format(
+                num, old.exitcode, old.depth()
+            )
+        )
+        # Unlike the first workers, this one is forked with the event socket
+        # of the reactor open, it never uses it
+        worker = ReactorWorker(self, num)
+        worker.dispatched = old.dispatched
+        worker.start()
+        self.workers[num] = worker
+        return worker
+
+    def stop_workers(self, timeout=5):
+        '''
+        Stop the workers once they handled the events queued on them, workers
+        which do not stop in time are terminated
+        '''
+        for worker in self.workers:
+            if worker.is_alive():
                 try:
-                    self.call_reactions(chunks)
-                except SystemExit:
-                    log.warning('Exit ignored by reactor')
+                    worker.queue.put(None, timeout=0.1)
+                except queue.Full:
+                    worker.terminate()
+        deadline = time.time() + timeout
+        for worker in self.workers:
+            worker.join(max(0, deadline - time.time()))
+            if worker.is_alive():
+                worker.terminate()
+                worker.join(1)
+
+    def fire_stats(self):
+        '''
+        Log and fire the queue depths of the reactor workers
+        '''
+        stats = {'user': ReactWrap.event_user, 'workers': {}}
+        for worker in self.workers:
+            stats['workers'][worker.num] = {
+                'queued': worker.depth(),
+                'dispatched': worker.dispatched,
+                'alive': worker.is_alive(),
+            }
+        log.debug('Reactor worker stats: {0}'.format(stats['workers']))
+        self.event.fire_event(stats, 'salt/reactor/stats')
+
+
+class ReactorWorker(multiprocessing.Process):
+    '''
+    Render and execute the reactions dispatched to it by the reactor, in the
+    order they were dispatched. A worker stops on a None event, or when the
+    reactor went away.
+    '''
+    def __init__(self, reactor, num):
+        multiprocessing.Process.__init__(self)
+        self.reactor = reactor
+        self.num = num
+        self.queue = multiprocessing.Queue(
+            reactor.opts['reactor_worker_hwm'] or 0
+        )
+        self.dispatched = 0
+        self.parent = os.getpid()
+
+    def put(self, tag, data, reactors, timeout=None):
+        '''
+        Queue an event, this blocks when the worker is reactor_worker_hwm
+        events behind and raises Queue.Full after ``timeout`` seconds
+        '''
+        self.queue.put((tag, data, reactors), timeout=timeout)
+        self.dispatched += 1
+
+    def depth(self):
+        '''
+        Return the number of queued events, or None where the platform does
+        not support it
+        '''
+        try:
+            return self.queue.qsize()
+        except NotImplementedError:
+            return None
+
+    def run(self):
+        salt.utils.appendproctitle(
+            '{0}-{1}'.format(self.__class__.__name__, self.num)
+        )
+        self.reactor.wrap = ReactWrap(self.reactor.opts)
+        while True:
+            try:
+                item = self.queue.get(timeout=5)
+            except queue.Empty:
+                if os.getppid() != self.parent:
+                    log.warning(
+                        'Reactor worker {0} lost its reactor, exiting'.format(
+                            self.num
+                        )
+                    )
+                    break
+                continue
+            if item is None:
+                break
+            self.reactor.react(*item)
 
 
 class ReactWrap(object):
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+'''
+Index of the low chunks of a state run used to resolve requisites
+
+A requisite like ``- require: - file: /etc/motd`` is resolved to the chunks
+whose state is ``file`` and whose name or ID matches ``/etc/motd``, a
+``- require: - sls: base`` to the chunks of the matching SLS files. Scanning
+the whole list of chunks for every requisite of every chunk makes the
+resolution quadratic in the size of the run, the :py:class:`RequisiteGraph`
+indexes the chunks once by state, name, ID and SLS so that a requisite
+without glob characters is resolved by a dictionary lookup. Resolved
+requisites are remembered for the lifetime of the graph.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import fnmatch
+
+# Import 3rd-party libs
+import salt.ext.six as six
+
+GLOB_CHARS = frozenset('*?[')
+
+
+def _is_glob(val):
+    return isinstance(val, six.string_types) and not GLOB_CHARS.isdisjoint(val)
+
+
+def _norm(val):
+    '''
+    Normalize a value the way fnmatch does before comparing it
+    '''
+    if isinstance(val, six.string_types):
+        return os.path.normcase(val)
+    return val
+
+
+def _add(index, key, pos):
+    try:
+        index.setdefault(key, []).append(pos)
+    except TypeError:
+        # Unhashable names can not be referenced by a requisite anyway
+        pass
+
+
+class RequisiteGraph(object):
+    '''
+    Requisite lookups over a list of low chunks
+
+    chunks
+        The list of low chunks, as returned by ``compile_high_data``
+    '''
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.size = len(chunks)
+        self._by_state = {}
+        self._by_name = {}
+        self._by_id = {}
+        self._by_sls = {}
+        self._found = {}
+        # The references and listeners used by the listen requisites
+        self.refs = {}
+        self.listeners = []
+        for pos, chunk in enumerate(chunks):
+            state = chunk['state']
+            _add(self._by_state, state, pos)
+            _add(self._by_name, (state, _norm(chunk['name'])), pos)
+            _add(self._by_id, (state, _norm(chunk['__id__'])), pos)
+            _add(self._by_sls, _norm(chunk.get('__sls__')), pos)
+            try:
+                self.refs[(state, chunk['name'])] = chunk
+                self.refs[(state, chunk['__id__'])] = chunk
+            except TypeError:
+                pass
+            if 'listen' in chunk:
+                self.listeners.append(
+                    {(state, chunk['name']): chunk['listen']}
+                )
+            if 'listen_in' in chunk:
+                for l_in in chunk['listen_in']:
+                    for key, val in six.iteritems(l_in):
+                        self.listeners.append(
+                            {(key, val): [{state: chunk['name']}]}
+                        )
+
+    def compiled_for(self, chunks):
+        '''
+        Return True if the graph indexes the passed list of chunks
+        '''
+        return self.chunks is chunks and self.size == len(chunks)
+
+    def _positions(self, key, val):
+        if key == 'sls':
+            if _is_glob(val):
+                pos = []
+                for sls, sls_pos in six.iteritems(self._by_sls):
+                    if isinstance(sls, six.string_types) \
+                            and fnmatch.fnmatch(sls, val):
+                        pos.extend(sls_pos)
+                return sorted(pos)
+            return self._by_sls.get(_norm(val), [])
+        if _is_glob(val):
+            return [pos for pos in self._by_state.get(key, [])
+                    if fnmatch.fnmatch(self.chunks[pos]['name'], val)
+                    or fnmatch.fnmatch(self.chunks[pos]['__id__'], val)]
+        ref = (key, _norm(val))
+        by_name = self._by_name.get(ref, [])
+        by_id = self._by_id.get(ref, [])
+        if not by_id:
+            return by_name
+        if not by_name:
+            return by_id
+        return sorted(set(by_name).union(by_id))
+
+    def find(self, key, val):
+        '''
+        Return the chunks matched by the requisite ``{key: val}``, in the
+        order of the run
+        '''
+        if val is None:
+            return []
+        try:
+            return self._found[(key, val)]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable value, it matches nothing
+            return []
+        found = [self.chunks[pos] for pos in self._positions(key, val)]
+        self._found[(key, val)] = found
+        return found
+
+    def resolve(self, reqs):
+        '''
+        Return the chunks matched by a list of trimmed requisites and the
+        requisites which matched nothing
+        '''
+        found = []
+        lost = []
+        for req in reqs:
+            req_key = next(iter(req))
+            matched = self.find(req_key, req[req_key])
+            if matched:
+                found.extend(matched)
+            else:
+                lost.append(req)
+        return found, lost
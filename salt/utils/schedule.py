@@ -257,6 +257,7 @@ dictionary, othewise it will be ignored.
 from __future__ import absolute_import
 import os
 import time
+import heapq
 import datetime
 import itertools
 import multiprocessing
@@ -319,6 +320,11 @@ class Schedule(object):
         self.schedule_returner = self.option('schedule_returner')
         # Keep track of the lowest loop interval needed in this variable
         self.loop_interval = six.MAXSIZE
+        # Compiled jobs and the heap of the times they are due
+        self._jobs = {}
+        self._due = {}
+        self._queue = []
+        self._generation = None
         clean_proc_dir(opts)
 
     def option(self, opt):
@@ -369,6 +375,7 @@ class Schedule(object):
         # remove from self.intervals
         if name in self.intervals:
             del self.intervals[name]
+        self._invalidate(name)
 
         if persist:
             self.persist()
@@ -396,6 +403,7 @@ class Schedule(object):
             log.info('Added new job {0} to scheduler'.format(new_job))
 
         self.opts['schedule'].update(data)
+        self._invalidate(new_job)
 
         # Fire the complete event back along with updated list of schedule
         evt = salt.utils.event.get_event('minion', opts=self.opts, listen=False)
@@ -415,6 +423,7 @@ class Schedule(object):
         else:
             self.opts['schedule'][name]['enabled'] = True
             schedule = self.opts['schedule']
+        self._invalidate(name)
 
         # Fire the complete event back along with updated list of schedule
         evt = salt.utils.event.get_event('minion', opts=self.opts, listen=False)
@@ -436,6 +445,7 @@ class Schedule(object):
         else:
             self.opts['schedule'][name]['enabled'] = False
             schedule = self.opts['schedule']
+        self._invalidate(name)
 
         # Fire the complete event back along with updated list of schedule
         evt = salt.utils.event.get_event('minion', opts=self.opts, listen=False)
@@ -459,6 +469,7 @@ class Schedule(object):
             if name in self.opts['schedule']:
                 self.delete_job(name, persist, where=where)
             self.opts['schedule'][name] = schedule
+        self._invalidate(name)
 
         if persist:
             self.persist()
@@ -530,6 +541,7 @@ class Schedule(object):
 
         # Remove all jobs from self.intervals
         self.intervals = {}
+        self._invalidate()
 
         if 'schedule' in self.opts:
             if 'schedule' in schedule:
@@ -729,421 +741,476 @@ class Schedule(object):
                     # we can cleanly handle.
                     raise
 
-    def eval(self):
+    def _invalidate(self, name=None):
         '''
-        Evaluate and execute the schedule
+        Drop the compiled form of the named job, or of all jobs, so that it is
+        compiled again and evaluated on the next call to eval()
         '''
-        schedule = self.option('schedule')
-        if not isinstance(schedule, dict):
-            raise ValueError('Schedule must be of type dict.')
-        if 'enabled' in schedule and not schedule['enabled']:
+        if name is None:
+            self._jobs = {}
+            self._due = {}
+            self._queue = []
+        else:
+            self._jobs.pop(name, None)
+            self._due.pop(name, None)
+
+    def _push(self, job, due):
+        '''
+        Set the time the job has to be evaluated next, None means the job is
+        not evaluated again until its definition changes
+        '''
+        if due is None:
+            self._due.pop(job, None)
             return
+        self._due[job] = due
+        heapq.heappush(self._queue, (due, job))
+        if len(self._queue) > 2 * len(self._due) + 64:
+            # Drop the entries superseded by a later push
+            self._queue = [(due_, job_) for due_, job_ in self._queue
+                           if self._due.get(job_) == due_]
+            heapq.heapify(self._queue)
+
+    def _sync(self, schedule, now):
+        '''
+        Compile the jobs which were added or replaced since the last call.
+        Jobs are only compared by identity, changes made in place have to go
+        through the methods of this class which invalidate the job.
+        '''
+        generation = (id(self.functions),
+                      id(self.opts.get('pillar')),
+                      id(self.opts.get('grains')))
+        if generation != self._generation:
+            # The functions were reloaded or the pillar or grains, which may
+            # hold "whens", were refreshed
+            self._invalidate()
+            self._generation = generation
+        for job in [job for job in self._jobs if job not in schedule]:
+            self._invalidate(job)
         for job, data in six.iteritems(schedule):
-            if job == 'enabled' or not data:
-                continue
-            if not isinstance(data, dict):
-                log.error('Scheduled job "{0}" should have a dict value, not {1}'.format(job, type(data)))
+            if job == 'enabled':
                 continue
-            # Job is disabled, continue
-            if 'enabled' in data and not data['enabled']:
+            entry = self._jobs.get(job)
+            if entry is not None and entry['data'] is data:
                 continue
-            if 'function' in data:
-                func = data['function']
-            elif 'func' in data:
-                func = data['func']
-            elif 'fun' in data:
-                func = data['fun']
-            else:
-                func = None
-            if func not in self.functions:
-                log.info(
-                    'Invalid function: {0} in job {1}. Ignoring.'.format(
-                        func, job
-                    )
-                )
-                continue
-            if 'name' not in data:
-                data['name'] = job
-            # Add up how many seconds between now and then
-            when = 0
-            seconds = 0
-            cron = 0
-            now = int(time.time())
-
-            if 'until' in data:
-                if not _WHEN_SUPPORTED:
-                    log.error('Missing python-dateutil.'
-                              'Ignoring until.')
-                else:
-                    until__ = dateutil_parser.parse(data['until'])
-                    until = int(time.mktime(until__.timetuple()))
-
-                    if until <= now:
-                        log.debug('Until time has passed '
-                                  'skipping job: {0}.'.format(data['name']))
-                        continue
-
-            if 'after' in data:
-                if not _WHEN_SUPPORTED:
-                    log.error('Missing python-dateutil.'
-                              'Ignoring after.')
-                else:
-                    after__ = dateutil_parser.parse(data['after'])
-                    after = int(time.mktime(after__.timetuple()))
+            self._jobs[job] = self._compile_job(job, data)
+            self._push(job, now)
 
-                    if after >= now:
-                        log.debug('After time has not passed '
-                                  'skipping job: {0}.'.format(data['name']))
-                        continue
+    def _parse_when(self, when):
+        '''
+        Resolve a "when" string, which may name an entry of the "whens" pillar
+        or grain, to a timestamp. Return None when it cannot be parsed.
+        '''
+        for source, name in ((self.opts.get('pillar', {}), 'Pillar item'),
+                             (self.opts.get('grains', {}), 'Grain')):
+            if 'whens' in source and when in source['whens']:
+                if not isinstance(source['whens'], dict):
+                    log.error('{0} "whens" must be dict. '
+                              'Ignoring'.format(name))
+                    return None
+                when = source['whens'][when]
+                break
+        try:
+            when__ = dateutil_parser.parse(when)
+        except ValueError:
+            log.error('Invalid date string {0}. Ignoring'.format(when))
+            return None
+        return int(time.mktime(when__.timetuple()))
 
-            # Used for quick lookups when detecting invalid option combinations.
-            schedule_keys = set(data.keys())
+    def _compile_job(self, job, data):
+        '''
+        Validate a job and parse its date and cron strings once, return the
+        compiled job. Errors are logged here, a job with an ``error`` is never
+        run.
+        '''
+        entry = {'data': data,
+                 'error': True,
+                 'func': None,
+                 'until': None,
+                 'after': None,
+                 'kind': None,
+                 'once': None,
+                 'whens': [],
+                 'when_list': False,
+                 'cron': None,
+                 'range': None}
+        if not data:
+            return entry
+        if not isinstance(data, dict):
+            log.error('Scheduled job "{0}" should have a dict value, not {1}'.format(job, type(data)))
+            return entry
+        if 'function' in data:
+            entry['func'] = data['function']
+        elif 'func' in data:
+            entry['func'] = data['func']
+        elif 'fun' in data:
+            entry['func'] = data['fun']
 
-            time_elements = ('seconds', 'minutes', 'hours', 'days')
-            scheduling_elements = ('when', 'cron', 'once')
+        if 'until' in data:
+            if not _WHEN_SUPPORTED:
+                log.error('Missing python-dateutil.'
+                          'Ignoring until.')
+            else:
+                until__ = dateutil_parser.parse(data['until'])
+                entry['until'] = int(time.mktime(until__.timetuple()))
 
-            invalid_sched_combos = [set(i)
-                    for i in itertools.combinations(scheduling_elements, 2)]
+        if 'after' in data:
+            if not _WHEN_SUPPORTED:
+                log.error('Missing python-dateutil.'
+                          'Ignoring after.')
+            else:
+                after__ = dateutil_parser.parse(data['after'])
+                entry['after'] = int(time.mktime(after__.timetuple()))
 
-            if any(i <= schedule_keys for i in invalid_sched_combos):
-                log.error('Unable to use "{0}" options together. Ignoring.'
-                        .format('", "'.join(scheduling_elements)))
-                continue
+        # Used for quick lookups when detecting invalid option combinations.
+        schedule_keys = set(data.keys())
 
-            invalid_time_combos = []
-            for item in scheduling_elements:
-                all_items = itertools.chain([item], time_elements)
-                invalid_time_combos.append(
-                    set(itertools.combinations(all_items, 2)))
+        time_elements = ('seconds', 'minutes', 'hours', 'days')
+        scheduling_elements = ('when', 'cron', 'once')
 
-            if any(set(x) <= schedule_keys for x in invalid_time_combos):
-                log.error('Unable to use "{0}" with "{1}" options. Ignoring'
-                        .format('", "'.join(time_elements),
-                            '", "'.join(scheduling_elements)))
-                continue
+        invalid_sched_combos = [set(i)
+                for i in itertools.combinations(scheduling_elements, 2)]
 
-            if True in [True for item in time_elements if item in data]:
-                # Add up how many seconds between now and then
-                seconds += int(data.get('seconds', 0))
-                seconds += int(data.get('minutes', 0)) * 60
-                seconds += int(data.get('hours', 0)) * 3600
-                seconds += int(data.get('days', 0)) * 86400
-            elif 'once' in data:
-                once_fmt = data.get('once_fmt', '%Y-%m-%dT%H:%M:%S')
+        if any(i <= schedule_keys for i in invalid_sched_combos):
+            log.error('Unable to use "{0}" options together. Ignoring.'
+                    .format('", "'.join(scheduling_elements)))
+            return entry
 
-                try:
-                    once = datetime.datetime.strptime(data['once'], once_fmt)
-                    once = int(time.mktime(once.timetuple()))
-                except (TypeError, ValueError):
-                    log.error('Date string could not be parsed: %s, %s',
-                            data['once'], once_fmt)
-                    continue
+        invalid_time_combos = []
+        for item in scheduling_elements:
+            all_items = itertools.chain([item], time_elements)
+            invalid_time_combos.append(
+                set(itertools.combinations(all_items, 2)))
 
-                if now != once:
-                    continue
-                else:
-                    seconds = 1
+        if any(set(x) <= schedule_keys for x in invalid_time_combos):
+            log.error('Unable to use "{0}" with "{1}" options. Ignoring'
+                    .format('", "'.join(time_elements),
+                        '", "'.join(scheduling_elements)))
+            return entry
 
-            elif 'when' in data:
-                if not _WHEN_SUPPORTED:
-                    log.error('Missing python-dateutil.'
-                              'Ignoring job {0}'.format(job))
-                    continue
+        if True in [True for item in time_elements if item in data]:
+            entry['kind'] = 'interval'
+        elif 'once' in data:
+            once_fmt = data.get('once_fmt', '%Y-%m-%dT%H:%M:%S')
 
-                if isinstance(data['when'], list):
-                    _when = []
-                    for i in data['when']:
-                        if ('whens' in self.opts['pillar'] and
-                                i in self.opts['pillar']['whens']):
-                            if not isinstance(self.opts['pillar']['whens'],
-                                              dict):
-                                log.error('Pillar item "whens" must be dict.'
-                                          'Ignoring')
-                                continue
-                            __when = self.opts['pillar']['whens'][i]
-                            try:
-                                when__ = dateutil_parser.parse(__when)
-                            except ValueError:
-                                log.error('Invalid date string. Ignoring')
-                                continue
-                        elif ('whens' in self.opts['grains'] and
-                              i in self.opts['grains']['whens']):
-                            if not isinstance(self.opts['grains']['whens'],
-                                              dict):
-                                log.error('Grain "whens" must be dict.'
-                                          'Ignoring')
-                                continue
-                            __when = self.opts['grains']['whens'][i]
-                            try:
-                                when__ = dateutil_parser.parse(__when)
-                            except ValueError:
-                                log.error('Invalid date string. Ignoring')
-                                continue
-                        else:
-                            try:
-                                when__ = dateutil_parser.parse(i)
-                            except ValueError:
-                                log.error('Invalid date string {0}.'
-                                          'Ignoring job {1}.'.format(i, job))
-                                continue
-                        when = int(time.mktime(when__.timetuple()))
-                        if when >= now:
-                            _when.append(when)
-                    _when.sort()
-                    if _when:
-                        # Grab the first element
-                        # which is the next run time
-                        when = _when[0]
-
-                        # If we're switching to the next run in a list
-                        # ensure the job can run
-                        if '_when' in data and data['_when'] != when:
-                            data['_when_run'] = True
-                            data['_when'] = when
-                        seconds = when - now
-
-                        # scheduled time is in the past
-                        if seconds < 0:
-                            continue
-
-                        if '_when_run' not in data:
-                            data['_when_run'] = True
-
-                        # Backup the run time
-                        if '_when' not in data:
-                            data['_when'] = when
-
-                        # A new 'when' ensure _when_run is True
-                        if when > data['_when']:
-                            data['_when'] = when
-                            data['_when_run'] = True
+            try:
+                once = datetime.datetime.strptime(data['once'], once_fmt)
+                entry['once'] = int(time.mktime(once.timetuple()))
+            except (TypeError, ValueError):
+                log.error('Date string could not be parsed: %s, %s',
+                        data['once'], once_fmt)
+                return entry
+            entry['kind'] = 'once'
+
+        elif 'when' in data:
+            if not _WHEN_SUPPORTED:
+                log.error('Missing python-dateutil.'
+                          'Ignoring job {0}'.format(job))
+                return entry
+
+            if isinstance(data['when'], list):
+                entry['when_list'] = True
+                for i in data['when']:
+                    when = self._parse_when(i)
+                    if when is not None:
+                        entry['whens'].append(when)
+            else:
+                when = self._parse_when(data['when'])
+                if when is None:
+                    return entry
+                entry['whens'].append(when)
+            entry['whens'].sort()
+            entry['kind'] = 'when'
+
+        elif 'cron' in data:
+            if not _CRON_SUPPORTED:
+                log.error('Missing python-croniter. Ignoring job {0}'.format(job))
+                return entry
+            try:
+                croniter.croniter(data['cron'], int(time.time())).get_next()
+            except (ValueError, KeyError):
+                log.error('Invalid cron string. Ignoring')
+                return entry
+            entry['cron'] = data['cron']
+            entry['kind'] = 'cron'
+        else:
+            return entry
+
+        if 'range' in data:
+            if not _RANGE_SUPPORTED:
+                log.error('Missing python-dateutil. Ignoring job {0}'.format(job))
+                return entry
+            if not isinstance(data['range'], dict):
+                log.error('schedule.handle_func: Invalid, range must be specified as a dictionary. \
+                         Ignoring job {0}.'.format(job))
+                return entry
+            try:
+                start = int(time.mktime(dateutil_parser.parse(data['range']['start']).timetuple()))
+            except ValueError:
+                log.error('Invalid date string for start. Ignoring job {0}.'.format(job))
+                return entry
+            try:
+                end = int(time.mktime(dateutil_parser.parse(data['range']['end']).timetuple()))
+            except ValueError:
+                log.error('Invalid date string for end. Ignoring job {0}.'.format(job))
+                return entry
+            if end <= start:
+                log.error('schedule.handle_func: Invalid range, end must be larger than start. \
+                         Ignoring job {0}.'.format(job))
+                return entry
+            entry['range'] = (start, end, data['range'].get('invert', False))
+
+        entry['error'] = False
+        return entry
+
+    @staticmethod
+    def _interval(data):
+        '''
+        Return the interval of a job in seconds
+        '''
+        seconds = int(data.get('seconds', 0))
+        seconds += int(data.get('minutes', 0)) * 60
+        seconds += int(data.get('hours', 0)) * 3600
+        seconds += int(data.get('days', 0)) * 86400
+        return seconds
+
+    def _next_cron(self, entry, now):
+        # Cron jobs run the second before the cron time
+        cron = int(croniter.croniter(entry['cron'], now).get_next())
+        if cron - 1 <= now:
+            cron = int(croniter.croniter(entry['cron'], cron).get_next())
+        return cron - 1
 
-                    else:
-                        continue
+    def eval(self):
+        '''
+        Evaluate and execute the schedule
 
-                else:
-                    if ('whens' in self.opts['pillar'] and
-                            data['when'] in self.opts['pillar']['whens']):
-                        if not isinstance(self.opts['pillar']['whens'], dict):
-                            log.error('Pillar item "whens" must be dict.'
-                                      'Ignoring')
-                            continue
-                        _when = self.opts['pillar']['whens'][data['when']]
-                        try:
-                            when__ = dateutil_parser.parse(_when)
-                        except ValueError:
-                            log.error('Invalid date string. Ignoring')
-                            continue
-                    elif ('whens' in self.opts['grains'] and
-                          data['when'] in self.opts['grains']['whens']):
-                        if not isinstance(self.opts['grains']['whens'], dict):
-                            log.error('Grain "whens" must be dict. Ignoring')
-                            continue
-                        _when = self.opts['grains']['whens'][data['when']]
-                        try:
-                            when__ = dateutil_parser.parse(_when)
-                        except ValueError:
-                            log.error('Invalid date string. Ignoring')
-                            continue
-                    else:
-                        try:
-                            when__ = dateutil_parser.parse(data['when'])
-                        except ValueError:
-                            log.error('Invalid date string. Ignoring')
-                            continue
-                    when = int(time.mktime(when__.timetuple()))
-                    now = int(time.time())
-                    seconds = when - now
-
-                    # scheduled time is in the past
-                    if seconds < 0:
-                        continue
-
-                    if '_when_run' not in data:
-                        data['_when_run'] = True
-
-                    # Backup the run time
-                    if '_when' not in data:
-                        data['_when'] = when
-
-                    # A new 'when' ensure _when_run is True
-                    if when > data['_when']:
-                        data['_when'] = when
-                        data['_when_run'] = True
+        Jobs are compiled once and kept in a heap ordered by the time they are
+        due, only the jobs which are due are evaluated.
+        '''
+        schedule = self.option('schedule')
+        if not isinstance(schedule, dict):
+            raise ValueError('Schedule must be of type dict.')
+        if 'enabled' in schedule and not schedule['enabled']:
+            return
+        now = int(time.time())
+        self._sync(schedule, now)
+        while self._queue and self._queue[0][0] <= now:
+            due, job = heapq.heappop(self._queue)
+            if self._due.get(job) != due:
+                # Superseded by a later push
+                continue
+            del self._due[job]
+            entry = self._jobs[job]
+            self._push(job, self._eval_job(job, entry['data'], entry, now))
 
+    def _eval_job(self, job, data, entry, now):
+        '''
+        Evaluate a single due job, run it if needed and return the time it is
+        due next
+        '''
+        if entry['error']:
+            return None
+        # Job is disabled
+        if 'enabled' in data and not data['enabled']:
+            return None
+        func = entry['func']
+        if func not in self.functions:
+            log.info(
+                'Invalid function: {0} in job {1}. Ignoring.'.format(
+                    func, job
+                )
+            )
+            return None
+        if 'name' not in data:
+            data['name'] = job
+        # Add up how many seconds between now and then
+        seconds = 0
+
+        if entry['until'] is not None and entry['until'] <= now:
+            log.debug('Until time has passed '
+                      'skipping job: {0}.'.format(data['name']))
+            return None
+
+        if entry['after'] is not None and entry['after'] >= now:
+            log.debug('After time has not passed '
+                      'skipping job: {0}.'.format(data['name']))
+            return entry['after'] + 1
+
+        if entry['kind'] == 'interval':
+            seconds = self._interval(data)
+        elif entry['kind'] == 'once':
+            if now != entry['once']:
+                return entry['once'] if entry['once'] > now else None
+            seconds = 1
+        elif entry['kind'] == 'when':
+            _when = [when for when in entry['whens'] if when >= now]
+            if not _when:
+                return None
+            # Grab the first element which is the next run time
+            when = _when[0]
+
+            # If we're switching to the next run in a list
+            # ensure the job can run
+            if entry['when_list'] and '_when' in data and data['_when'] != when:
+                data['_when_run'] = True
+                data['_when'] = when
+            seconds = when - now
+
+            if '_when_run' not in data:
+                data['_when_run'] = True
+
+            # Backup the run time
+            if '_when' not in data:
+                data['_when'] = when
+
+            # A new 'when' ensure _when_run is True
+            if when > data['_when']:
+                data['_when'] = when
+                data['_when_run'] = True
+        elif entry['kind'] == 'cron':
+            cron = int(croniter.croniter(entry['cron'], now).get_next())
+            seconds = cron - now
+
+        # Check if the seconds variable is lower than current lowest
+        # loop interval needed. If it is lower than overwrite variable
+        # external loops using can then check this variable for how often
+        # they need to reschedule themselves
+        # Not used with 'when' parameter, causes run away jobs and CPU
+        # spikes.
+        if 'when' not in data:
+            if seconds < self.loop_interval:
+                self.loop_interval = seconds
+        run = False
+
+        if 'splay' in data:
+            if 'when' in data:
+                log.error('Unable to use "splay" with "when" option at this time. Ignoring.')
             elif 'cron' in data:
-                if not _CRON_SUPPORTED:
-                    log.error('Missing python-croniter. Ignoring job {0}'.format(job))
-                    continue
+                log.error('Unable to use "splay" with "cron" option at this time. Ignoring.')
+            else:
+                if '_seconds' not in data:
+                    log.debug('The _seconds parameter is missing, '
+                              'most likely the first run or the schedule '
+                              'has been refreshed refresh.')
+                    if 'seconds' in data:
+                        data['_seconds'] = data['seconds']
+                    else:
+                        data['_seconds'] = 0
+
+        if 'when' in data:
+            if seconds == 0:
+                if data['_when_run']:
+                    data['_when_run'] = False
+                    run = True
+        elif 'cron' in data:
+            if seconds == 1:
+                run = True
+        elif job in self.intervals:
+            if now - self.intervals[job] >= seconds:
+                run = True
+        else:
+            # If run_on_start is True, the job will run when the Salt
+            # minion start.  If the value is False will run at the next
+            # scheduled run.  Default is True.
+            if 'run_on_start' in data:
+                if data['run_on_start']:
+                    run = True
+                else:
+                    self.intervals[job] = int(time.time())
+            else:
+                run = True
 
-                now = int(time.mktime(datetime.datetime.now().timetuple()))
-                try:
-                    cron = int(croniter.croniter(data['cron'], now).get_next())
-                except (ValueError, KeyError):
-                    log.error('Invalid cron string. Ignoring')
-                    continue
-                seconds = cron - now
+        if run and entry['range'] is not None:
+            start, end, invert = entry['range']
+            if invert:
+                run = now <= start or now >= end
             else:
-                continue
+                run = now >= start and now <= end
 
-            # Check if the seconds variable is lower than current lowest
-            # loop interval needed. If it is lower than overwrite variable
-            # external loops using can then check this variable for how often
-            # they need to reschedule themselves
-            # Not used with 'when' parameter, causes run away jobs and CPU
-            # spikes.
-            if 'when' not in data:
-                if seconds < self.loop_interval:
-                    self.loop_interval = seconds
-            run = False
-
-            if 'splay' in data:
-                if 'when' in data:
-                    log.error('Unable to use "splay" with "when" option at this time. Ignoring.')
-                elif 'cron' in data:
-                    log.error('Unable to use "splay" with "cron" option at this time. Ignoring.')
-                else:
-                    if '_seconds' not in data:
-                        log.debug('The _seconds parameter is missing, '
-                                  'most likely the first run or the schedule '
-                                  'has been refreshed refresh.')
-                        if 'seconds' in data:
-                            data['_seconds'] = data['seconds']
-                        else:
-                            data['_seconds'] = 0
+        if run:
+            self._run_job(job, func, data, now)
+        return self._next_due(job, data, entry, now)
 
+    def _next_due(self, job, data, entry, now):
+        '''
+        Return the time a job which was just evaluated is due next
+        '''
+        if entry['kind'] == 'interval':
             if job in self.intervals:
-                if 'when' in data:
-                    if seconds == 0:
-                        if data['_when_run']:
-                            data['_when_run'] = False
-                            run = True
-                elif 'cron' in data:
-                    if seconds == 1:
-                        run = True
-                else:
-                    if now - self.intervals[job] >= seconds:
-                        run = True
+                return max(now + 1, self.intervals[job] + self._interval(data))
+            return now + 1
+        elif entry['kind'] == 'once':
+            return entry['once'] if entry['once'] > now else None
+        elif entry['kind'] == 'when':
+            _when = [when for when in entry['whens'] if when > now]
+            return _when[0] if _when else None
+        elif entry['kind'] == 'cron':
+            return self._next_cron(entry, now)
+        return None
+
+    def _run_job(self, job, func, data, now):
+        '''
+        Start a job which is due
+        '''
+        if 'splay' in data:
+            if 'when' in data:
+                log.error('Unable to use "splay" with "when" option at this time. Ignoring.')
             else:
-                if 'when' in data:
-                    if seconds == 0:
-                        if data['_when_run']:
-                            data['_when_run'] = False
-                            run = True
-                elif 'cron' in data:
-                    if seconds == 1:
-                        run = True
-                else:
-                    # If run_on_start is True, the job will run when the Salt
-                    # minion start.  If the value is False will run at the next
-                    # scheduled run.  Default is True.
-                    if 'run_on_start' in data:
-                        if data['run_on_start']:
-                            run = True
-                        else:
-                            self.intervals[job] = int(time.time())
+                if isinstance(data['splay'], dict):
+                    if data['splay']['end'] >= data['splay']['start']:
+                        splay = random.randint(data['splay']['start'], data['splay']['end'])
                     else:
-                        run = True
+                        log.error('schedule.handle_func: Invalid Splay, end must be larger than start. \
+                                 Ignoring splay.')
+                        splay = None
+                else:
+                    splay = random.randint(0, data['splay'])
 
-            if run:
-                if 'range' in data:
-                    if not _RANGE_SUPPORTED:
-                        log.error('Missing python-dateutil. Ignoring job {0}'.format(job))
-                        continue
+                if splay:
+                    log.debug('schedule.handle_func: Adding splay of '
+                              '{0} seconds to next run.'.format(splay))
+                    if 'seconds' in data:
+                        data['seconds'] = data['_seconds'] + splay
                     else:
-                        if isinstance(data['range'], dict):
-                            try:
-                                start = int(time.mktime(dateutil_parser.parse(data['range']['start']).timetuple()))
-                            except ValueError:
-                                log.error('Invalid date string for start. Ignoring job {0}.'.format(job))
-                                continue
-                            try:
-                                end = int(time.mktime(dateutil_parser.parse(data['range']['end']).timetuple()))
-                            except ValueError:
-                                log.error('Invalid date string for end. Ignoring job {0}.'.format(job))
-                                continue
-                            if end > start:
-                                if 'invert' in data['range'] and data['range']['invert']:
-                                    if now <= start or now >= end:
-                                        run = True
-                                    else:
-                                        run = False
-                                else:
-                                    if now >= start and now <= end:
-                                        run = True
-                                    else:
-                                        run = False
-                            else:
-                                log.error('schedule.handle_func: Invalid range, end must be larger than start. \
-                                         Ignoring job {0}.'.format(job))
-                                continue
-                        else:
-                            log.error('schedule.handle_func: Invalid, range must be specified as a dictionary. \
-                                     Ignoring job {0}.'.format(job))
-                            continue
-
-            if not run:
-                continue
+                        data['seconds'] = 0 + splay
+
+        log.info('Running scheduled job: {0}'.format(job))
+
+        if 'jid_include' not in data or data['jid_include']:
+            data['jid_include'] = True
+            log.debug('schedule: This job was scheduled with jid_include, '
+                      'adding to cache (jid_include defaults to True)')
+            if 'maxrunning' in data:
+                log.debug('schedule: This job was scheduled with a max '
+                          'number of {0}'.format(data['maxrunning']))
             else:
-                if 'splay' in data:
-                    if 'when' in data:
-                        log.error('Unable to use "splay" with "when" option at this time. Ignoring.')
-                    else:
-                        if isinstance(data['splay'], dict):
-                            if data['splay']['end'] >= data['splay']['start']:
-                                splay = random.randint(data['splay']['start'], data['splay']['end'])
-                            else:
-                                log.error('schedule.handle_func: Invalid Splay, end must be larger than start. \
-                                         Ignoring splay.')
-                                splay = None
-                        else:
-                            splay = random.randint(0, data['splay'])
-
-                        if splay:
-                            log.debug('schedule.handle_func: Adding splay of '
-                                      '{0} seconds to next run.'.format(splay))
-                            if 'seconds' in data:
-                                data['seconds'] = data['_seconds'] + splay
-                            else:
-                                data['seconds'] = 0 + splay
-
-                log.info('Running scheduled job: {0}'.format(job))
-
-            if 'jid_include' not in data or data['jid_include']:
-                data['jid_include'] = True
-                log.debug('schedule: This job was scheduled with jid_include, '
-                          'adding to cache (jid_include defaults to True)')
-                if 'maxrunning' in data:
-                    log.debug('schedule: This job was scheduled with a max '
-                              'number of {0}'.format(data['maxrunning']))
-                else:
-                    log.info('schedule: maxrunning parameter was not specified for '
-                             'job {0}, defaulting to 1.'.format(job))
-                    data['maxrunning'] = 1
-
-            if salt.utils.is_windows():
-                # Temporarily stash our function references.
-                # You can't pickle function references, and pickling is
-                # required when spawning new processes on Windows.
-                functions = self.functions
-                self.functions = {}
-                returners = self.returners
-                self.returners = {}
-            try:
-                if self.opts.get('multiprocessing', True):
-                    thread_cls = multiprocessing.Process
-                else:
-                    thread_cls = threading.Thread
-                proc = thread_cls(target=self.handle_func, args=(func, data))
-                proc.start()
-                if self.opts.get('multiprocessing', True):
-                    proc.join()
-            finally:
-                self.intervals[job] = now
-            if salt.utils.is_windows():
-                # Restore our function references.
-                self.functions = functions
-                self.returners = returners
+                log.info('schedule: maxrunning parameter was not specified for '
+                         'job {0}, defaulting to 1.'.format(job))
+                data['maxrunning'] = 1
+
+        if salt.utils.is_windows():
+            # Temporarily stash our function references.
+            # You can't pickle function references, and pickling is
+            # required when spawning new processes on Windows.
+            functions = self.functions
+            self.functions = {}
+            returners = self.returners
+            self.returners = {}
+        try:
+            if self.opts.get('multiprocessing', True):
+                thread_cls = multiprocessing.Process
+            else:
+                thread_cls = threading.Thread
+            proc = thread_cls(target=self.handle_func, args=(func, data))
+            proc.start()
+            if self.opts.get('multiprocessing', True):
+                proc.join()
+        finally:
+            self.intervals[job] = now
+        if salt.utils.is_windows():
+            # Restore our function references.
+            self.functions = functions
+            self.returners = returners
 
 
 def clean_proc_dir(opts):
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+'''
+Streaming of state results to the master while a state run is in progress
+
+When ``state_stream_batch`` or ``state_stream_interval`` is set on the
+minion, the results of the completed chunks of a state run are sent to the
+master in batches, every ``state_stream_batch`` chunks or every
+``state_stream_interval`` seconds, on the
+``salt/job/<jid>/prog/<minion id>/batch/<seq>`` tag. Only the state runs of
+jobs published by the master are streamed, ``salt-call`` and the scheduled
+jobs are not.
+
+Streamed results are replaced in the running data of the minion by small
+stubs holding what the requisite system needs, which keeps the memory of long
+runs and the size of their final return bounded. The results are not
+replaced when something on the minion gets the return too (a returner of the
+job, ``ext_job_cache`` or ``cache_jobs``), or when ``state_stream_stubs`` is
+False.
+
+The master stores the batches it receives in its cachedir and puts the
+streamed results back in place of the stubs when the final return of the
+job arrives, before the return is fired on the event bus and stored in the
+job cache.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import time
+import shutil
+import logging
+
+# Import salt libs
+import salt.payload
+import salt.utils
+import salt.utils.jid
+import salt.utils.atomicfile
+from salt.utils.event import tagify
+from salt.utils.odict import OrderedDict
+
+# Import 3rd-party libs
+import salt.ext.six as six
+
+log = logging.getLogger(__name__)
+
+STREAM_KEY = '__streamed__'
+STREAM_DIR = 'state_stream'
+
+
+def stream_tag(jid, minion, seq):
+    '''
+    Return the event tag of a batch of streamed state results
+    '''
+    return tagify([jid, 'prog', minion, 'batch', str(seq)], 'job')
+
+
+def parse_tag(tag):
+    '''
+    Return the jid, minion id and sequence number of a batch tag, None if the
+    tag is not the tag of a batch
+    '''
+    comps = tag.split('/')
+    if len(comps) != 7 or comps[:2] != ['salt', 'job'] \
+            or comps[3] != 'prog' or comps[5] != 'batch':
+        return None
+    jid, minion, seq = comps[2], comps[4], comps[6]
+    if not salt.utils.jid.is_jid(jid) or not seq.isdigit():
+        return None
+    return jid, minion, int(seq)
+
+
+def stub(chunk_ret, seq):
+    '''
+    Return the stub replacing a streamed chunk result in the running data
+    '''
+    ret = {'result': chunk_ret.get('result'),
+           # The requisites only check whether there were changes
+           'changes': {STREAM_KEY: True} if chunk_ret.get('changes') else {},
+           'comment': 'Result streamed to the master in batch {0}'.format(seq),
+           STREAM_KEY: seq}
+    for key in ('name', '__run_num__', '__sls__'):
+        if key in chunk_ret:
+            ret[key] = chunk_ret[key]
+    return ret
+
+
+class ChunkStream(object):
+    '''
+    Collect the results of completed chunks and send them in batches
+
+    send
+        Callable passed the data of a batch and its tag
+    '''
+    def __init__(self, send, jid, minion, batch_size=0, interval=0):
+        self.send = send
+        self.jid = jid
+        self.minion = minion
+        self.batch_size = int(batch_size or 0)
+        self.interval = float(interval or 0)
+        # The results by tag, in the order the chunks completed
+        self.pending = OrderedDict()
+        self.seq = 0
+        self.last = time.time()
+
+    def due(self):
+        '''
+        Return True if the pending results should be sent
+        '''
+        if self.batch_size and len(self.pending) >= self.batch_size:
+            return True
+        return bool(self.interval) and time.time() - self.last >= self.interval
+
+    def add(self, tag, chunk_ret, length=None):
+        '''
+        Add the result of a chunk, returns what :py:meth:`flush` returns if
+        a batch was sent and None otherwise
+        '''
+        self.pending[tag] = chunk_ret
+        if self.due():
+            return self.flush(length)
+        return None
+
+    def flush(self, length=None):
+        '''
+        Send the pending results, return the sequence number of the batch
+        and the tags of the sent results
+        '''
+        self.last = time.time()
+        if not self.pending:
+            return self.seq, []
+        seq = self.seq
+        pending, self.pending = self.pending, OrderedDict()
+        data = {'ret': dict(pending), 'seq': seq, 'len': length}
+        try:
+            self.send(data, stream_tag(self.jid, self.minion, seq))
+        except Exception as exc:
+            # The results stay in the final return
+            log.error(
+                'Failed to stream state results to the master: {0}'.format(exc)
+            )
+            return seq, []
+        self.seq += 1
+        return seq, list(pending)
+
+
+def _stream_dir(opts, jid, minion):
+    return os.path.join(opts['cachedir'], STREAM_DIR, jid, minion)
+
+
+def _valid_minion(minion):
+    return bool(minion) and os.sep not in minion and not minion.startswith('.')
+
+
+def save_batch(opts, load):
+    '''
+    Store a batch of streamed state results received by the master
+    '''
+    parsed = parse_tag(load.get('tag', ''))
+    if parsed is None:
+        return False
+    jid, minion, seq = parsed
+    if minion != load.get('id') or not _valid_minion(minion):
+        log.warning(
+            'Minion {0} sent streamed state results for {1}'.format(
+                load.get('id'), minion
+            )
+        )
+        return False
+    ret = load.get('data', {}).get('ret')
+    if not isinstance(ret, dict):
+        return False
+    sdir = _stream_dir(opts, jid, minion)
+    if not os.path.isdir(sdir):
+        try:
+            os.makedirs(sdir)
+        except OSError:
+            # Created by another worker in the meantime
+            pass
+    serial = salt.payload.Serial(opts)
+    with salt.utils.atomicfile.atomic_open(
+            os.path.join(sdir, '{0}.p'.format(seq)), 'w+b') as fp_:
+        serial.dump(ret, fp_)
+    return True
+
+
+def assemble(opts, load):
+    '''
+    Put the streamed state results back into the final return of a minion
+    '''
+    ret = load.get('return')
+    if 'jid' not in load or 'id' not in load \
+            or not _valid_minion(load['id']) \
+            or not salt.utils.jid.is_jid(load['jid']):
+        return load
+    sdir = _stream_dir(opts, load['jid'], load['id'])
+    stubs = []
+    if isinstance(ret, dict):
+        stubs = [tag for tag, chunk_ret in six.iteritems(ret)
+                 if isinstance(chunk_ret, dict) and STREAM_KEY in chunk_ret]
+    if not stubs:
+        # The results were streamed without being replaced by stubs, or not
+        # streamed at all
+        if os.path.isdir(sdir):
+            shutil.rmtree(sdir, ignore_errors=True)
+        return load
+    serial = salt.payload.Serial(opts)
+    streamed = {}
+    try:
+        batches = os.listdir(sdir)
+    except OSError:
+        batches = []
+    for fn_ in batches:
+        if fn_.startswith('.') or not fn_.endswith('.p'):
+            continue
+        try:
+            with salt.utils.fopen(os.path.join(sdir, fn_), 'rb') as fp_:
+                streamed.update(serial.load(fp_))
+        except (IOError, OSError, ValueError) as exc:
+            log.error(
+                'Unable to read streamed state results {0}: {1}'.format(
+                    fn_, exc
+                )
+            )
+    missing = 0
+    for tag in stubs:
+        if tag in streamed:
+            ret[tag] = streamed[tag]
+        else:
+            missing += 1
+    if missing:
+        log.warning(
+            '{0} streamed state results of {1} for job {2} are missing'.format(
+                missing, load['id'], load['jid']
+            )
+        )
+    shutil.rmtree(sdir, ignore_errors=True)
+    return load
+
+
+def clean_old(opts):
+    '''
+    Remove the streamed results of jobs which never returned
+    '''
+    base = os.path.join(opts['cachedir'], STREAM_DIR)
+    if not os.path.isdir(base):
+        return
+    keep_jobs = int(opts.get('keep_jobs', 24))
+    cutoff = time.time() - keep_jobs * 3600
+    for jid in os.listdir(base):
+        path = os.path.join(base, jid)
+        try:
+            if keep_jobs and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            if not os.listdir(path):
+                os.rmdir(path)
+        except OSError:
+            pass
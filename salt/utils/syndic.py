@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+'''
+Aggregation of the returns and events a syndic forwards to its higher level
+master
+
+Returns are grouped per job return tag like before, but a group is handed
+over for forwarding as soon as it holds ``syndic_forward_batch_size``
+returns instead of growing until the next ``syndic_event_forward_timeout``
+tick. The job loads sent along with the first return of a jid are looked up
+through :py:class:`JidCache`, an LRU bounded by
+``syndic_jid_forward_cache_hwm`` which evicts in constant time.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import time
+import logging
+import collections
+
+# Import salt libs
+import salt.utils.jid
+
+log = logging.getLogger(__name__)
+
+
+def is_job_return(event):
+    '''
+    Return True if the passed event is the return of a job
+    '''
+    tag_parts = event['tag'].split('/')
+    return len(tag_parts) >= 4 and tag_parts[1] == 'job' and \
+        salt.utils.jid.is_jid(tag_parts[2]) and tag_parts[3] == 'ret' and \
+        'return' in event['data']
+
+
+class JidCache(object):
+    '''
+    Least recently used mapping of jids to their job load
+    '''
+    def __init__(self, size):
+        self.size = max(int(size), 1)
+        self._loads = collections.OrderedDict()
+
+    def __contains__(self, jid):
+        return jid in self._loads
+
+    def __len__(self):
+        return len(self._loads)
+
+    def get(self, jid, default=None):
+        '''
+        Return the cached load of the jid, marking it as recently used
+        '''
+        if jid not in self._loads:
+            return default
+        load = self._loads.pop(jid)
+        self._loads[jid] = load
+        return load
+
+    def add(self, jid, load):
+        '''
+        Cache the load of a jid, evicting the least recently used jid when
+        the cache is full
+        '''
+        self._loads.pop(jid, None)
+        self._loads[jid] = load
+        if len(self._loads) > self.size:
+            self._loads.popitem(last=False)
+
+
+class ReturnForwarder(object):
+    '''
+    Collect the job returns and events to forward to the higher level master
+
+    get_load
+        Callable passed a jid which returns its load from the job cache, it
+        is only called for jids which are not in ``jid_cache``
+    '''
+    def __init__(self, opts, get_load, jid_cache=None):
+        self.opts = opts
+        self.get_load = get_load
+        self.batch_size = int(opts.get('syndic_forward_batch_size', 0) or 0)
+        if jid_cache is None:
+            jid_cache = JidCache(opts.get('syndic_jid_forward_cache_hwm', 100))
+        self.jid_cache = jid_cache
+        self.jids = collections.OrderedDict()
+        self.ready = []
+        self.raw_events = []
+        self._counts = {}
+        self.stats = {'returns_received': 0,
+                      'returns_forwarded': 0,
+                      'return_batches': 0,
+                      'events_received': 0,
+                      'events_forwarded': 0,
+                      'load_fetches': 0}
+        self._last_stats = time.time()
+        self._last_counts = dict(self.stats)
+
+    def add_return(self, event):
+        '''
+        Add a job return, return True if a batch is ready to be forwarded
+        '''
+        data = event['data']
+        jdict = self.jids.get(event['tag'])
+        if jdict is None:
+            jdict = {'__fun__': data.get('fun'),
+                     '__jid__': data['jid'],
+                     '__load__': {}}
+            # Only need to forward each load once. Don't hit the disk
+            # for every minion return!
+            if data['jid'] not in self.jid_cache:
+                load = self.get_load(data['jid']) or {}
+                self.stats['load_fetches'] += 1
+                self.jid_cache.add(data['jid'], load)
+                jdict['__load__'].update(load)
+            else:
+                self.jid_cache.get(data['jid'])
+            self.jids[event['tag']] = jdict
+            self._counts[event['tag']] = 0
+        if 'master_id' in data:
+            # __'s to make sure it doesn't print out on the master cli
+            jdict['__master_id__'] = data['master_id']
+        if data['id'] not in jdict:
+            self._counts[event['tag']] += 1
+        jdict[data['id']] = data['return']
+        self.stats['returns_received'] += 1
+        if self.batch_size and self._counts[event['tag']] >= self.batch_size:
+            self._ready(event['tag'])
+        return bool(self.ready) or self._events_ready()
+
+    def add_event(self, event):
+        '''
+        Add a generic event, return True if a batch is ready to be forwarded
+        '''
+        self.raw_events.append(event)
+        self.stats['events_received'] += 1
+        return bool(self.ready) or self._events_ready()
+
+    def _ready(self, tag):
+        self.ready.append(self.jids.pop(tag))
+        del self._counts[tag]
+
+    def _events_ready(self):
+        return bool(self.batch_size) and len(self.raw_events) >= self.batch_size
+
+    @property
+    def backlog(self):
+        '''
+        The number of returns and events waiting to be forwarded
+        '''
+        returns = sum(self._counts.values())
+        for jdict in self.ready:
+            returns += len([key for key in jdict if not key.startswith('__')])
+        return returns + len(self.raw_events)
+
+    def take(self, flush=True):
+        '''
+        Return the batches to forward as a tuple of the list of event batches
+        and the list of aggregated returns. Without ``flush`` only full
+        batches are returned.
+        '''
+        if flush:
+            for tag in list(self.jids):
+                self._ready(tag)
+        returns, self.ready = self.ready, []
+
+        events = []
+        size = self.batch_size or len(self.raw_events) or 1
+        while self.raw_events and (flush or len(self.raw_events) >= size):
+            events.append(self.raw_events[:size])
+            self.raw_events = self.raw_events[size:]
+
+        for jdict in returns:
+            self.stats['returns_forwarded'] += len(
+                [key for key in jdict if not key.startswith('__')]
+            )
+        self.stats['return_batches'] += len(returns)
+        self.stats['events_forwarded'] += sum(len(batch) for batch in events)
+        return events, returns
+
+    def collect_stats(self, interval):
+        '''
+        Return the forwarding statistics if ``interval`` seconds have passed
+        since they were last collected, None otherwise
+        '''
+        now = time.time()
+        elapsed = now - self._last_stats
+        if not interval or elapsed < interval:
+            return None
+        stats = dict(self.stats)
+        stats['backlog'] = self.backlog
+        stats['jid_cache'] = len(self.jid_cache)
+        for key in ('returns_forwarded', 'events_forwarded'):
+            stats['{0}_per_second'.format(key)] = round(
+                (self.stats[key] - self._last_counts[key]) / elapsed, 2
+            )
+        self._last_stats = now
+        self._last_counts = dict(self.stats)
+        return stats
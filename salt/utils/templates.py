@@ -12,6 +12,7 @@ import imp
 import logging
 import tempfile
 import traceback
+import threading
 import sys
 
 # Import third party libs
@@ -22,11 +23,13 @@ import jinja2.ext
 import salt.utils
 import salt.utils.yamlencoding
 import salt.utils.locales
+import salt.version
 from salt.exceptions import (
     SaltRenderError, CommandExecutionError, SaltInvocationError
 )
 from salt.utils.jinja import ensure_sequence_filter, show_full_context
 from salt.utils.jinja import SaltCacheLoader as JinjaSaltCacheLoader
+from salt.utils.jinja import SaltBytecodeCache as JinjaSaltBytecodeCache
 from salt.utils.jinja import SerializerExtension as JinjaSerializerExtension
 from salt.utils.odict import OrderedDict
 from salt import __path__ as saltpath
@@ -42,6 +45,14 @@ TEMPLATE_DIRNAME = os.path.join(saltpath[0], 'templates')
 SLS_ENCODING = 'utf-8'  # this one has no BOM.
 SLS_ENCODER = codecs.getencoder(SLS_ENCODING)
 
+# The jinja environments of each thread are reused between renders
+JINJA_ENV_CACHE_SIZE = 20
+_JINJA_ENVS = threading.local()
+
+# The jinja bytecode caches, by directory and environment options
+_JINJA_BYTECODE_CACHES = {}
+_JINJA_BYTECODE_LOCK = threading.Lock()
+
 ALIAS_WARN = (
         'Starting in 2015.5, cmd.run uses python_shell=False by default, '
         'which doesn\'t support shellisms (pipes, env variables, etc). '
@@ -290,33 +301,52 @@ def _get_jinja_error(trace, context=None):
     return line, out
 
 
-def render_jinja_tmpl(tmplstr, context, tmplpath=None):
-    opts = context['opts']
-    saltenv = context['saltenv']
-    loader = None
-    newline = False
-
-    if tmplstr and not isinstance(tmplstr, six.text_type):
-        # http://jinja.pocoo.org/docs/api/#unicode
-        tmplstr = tmplstr.decode(SLS_ENCODING)
-
-    if tmplstr.endswith('\n'):
-        newline = True
+def _jinja_env_options(opts):
+    '''
+    Return the options of the jinja environments which change the bytecode
+    of the templates
+    '''
+    options = []
+    # Pass through trim_blocks and lstrip_blocks Jinja parameters
+    # trim_blocks removes newlines around Jinja blocks
+    # lstrip_blocks strips tabs and spaces from the beginning of
+    # line to the start of a block.
+    if opts.get('jinja_trim_blocks', False):
+        options.append('trim_blocks')
+    if opts.get('jinja_lstrip_blocks', False):
+        options.append('lstrip_blocks')
+    return tuple(options)
 
-    if not saltenv:
-        if tmplpath:
-            # i.e., the template is from a file outside the state tree
-            #
-            # XXX: FileSystemLoader is not being properly instantiated here is
-            # it? At least it ain't according to:
-            #
-            #   http://jinja.pocoo.org/docs/api/#jinja2.FileSystemLoader
-            loader = jinja2.FileSystemLoader(
-                context, os.path.dirname(tmplpath))
-    else:
-        loader = JinjaSaltCacheLoader(opts, saltenv, pillar_rend=context.get('_pillar_rend', False))
 
-    env_args = {'extensions': [], 'loader': loader}
+def _jinja_bytecode_cache(opts, options):
+    '''
+    Return the bytecode cache shared by the environments with the passed
+    options, the compiled templates are stored on disk in the cachedir if
+    jinja_bytecode_cache is set
+    '''
+    directory = None
+    if opts.get('jinja_bytecode_cache', False) and opts.get('cachedir'):
+        directory = os.path.join(
+            opts['cachedir'],
+            'jinja',
+            # The bytecode depends on the salt extensions too
+            '-'.join((salt.version.__version__,) + options)
+        )
+    key = (directory, options)
+    with _JINJA_BYTECODE_LOCK:
+        if key not in _JINJA_BYTECODE_CACHES:
+            _JINJA_BYTECODE_CACHES[key] = JinjaSaltBytecodeCache(directory)
+        return _JINJA_BYTECODE_CACHES[key]
+
+
+def _new_jinja_env(opts, loader):
+    '''
+    Return a new jinja environment
+    '''
+    options = _jinja_env_options(opts)
+    env_args = {'extensions': [],
+                'loader': loader,
+                'bytecode_cache': _jinja_bytecode_cache(opts, options)}
 
     if hasattr(jinja2.ext, 'with_'):
         env_args['extensions'].append('jinja2.ext.with_')
@@ -326,14 +356,10 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
         env_args['extensions'].append('jinja2.ext.loopcontrols')
     env_args['extensions'].append(JinjaSerializerExtension)
 
-    # Pass through trim_blocks and lstrip_blocks Jinja parameters
-    # trim_blocks removes newlines around Jinja blocks
-    # lstrip_blocks strips tabs and spaces from the beginning of
-    # line to the start of a block.
-    if opts.get('jinja_trim_blocks', False):
+    if 'trim_blocks' in options:
         log.debug('Jinja2 trim_blocks is enabled')
         env_args['trim_blocks'] = True
-    if opts.get('jinja_lstrip_blocks', False):
+    if 'lstrip_blocks' in options:
         log.debug('Jinja2 lstrip_blocks is enabled')
         env_args['lstrip_blocks'] = True
 
@@ -353,6 +379,104 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
     jinja_env.globals['show_full_context'] = show_full_context
 
     jinja_env.tests['list'] = salt.utils.is_list
+    return jinja_env
+
+
+def _get_jinja_env(opts, saltenv, pillar_rend):
+    '''
+    Return the jinja environment of a salt environment, environments are
+    reused by the renders of the same thread and reset before each render
+    '''
+    if opts['file_roots'] is opts['pillar_roots']:
+        searchpath = tuple(opts['file_roots'].get(saltenv, ()))
+    else:
+        searchpath = None
+    key = (saltenv,
+           pillar_rend,
+           searchpath,
+           opts.get('cachedir'),
+           opts.get('file_client'),
+           opts.get('id'),
+           opts.get('master_uri'),
+           opts.get('allow_undefined', False),
+           opts.get('jinja_bytecode_cache', False),
+           _jinja_env_options(opts))
+    envs = getattr(_JINJA_ENVS, 'envs', None)
+    if envs is None:
+        envs = _JINJA_ENVS.envs = {}
+    if key not in envs:
+        if len(envs) >= JINJA_ENV_CACHE_SIZE:
+            envs.clear()
+        loader = JinjaSaltCacheLoader(opts, saltenv, pillar_rend=pillar_rend)
+        jinja_env = _new_jinja_env(opts, loader)
+        envs[key] = (jinja_env, dict(jinja_env.globals))
+    jinja_env, base_globals = envs[key]
+    # Start from a clean environment, the render of a template stores its
+    # context in the globals and the imported templates are cached with the
+    # globals they were rendered with
+    jinja_env.globals.clear()
+    jinja_env.globals.update(base_globals)
+    if jinja_env.cache is not None:
+        jinja_env.cache.clear()
+    # The templates are fetched again once per render
+    jinja_env.loader.cached = []
+    return jinja_env
+
+
+def _jinja_from_string(jinja_env, tmplstr, tmplpath=None, mtime=None):
+    '''
+    Return the template of a string, the compiled templates of files are
+    kept in the bytecode cache of the environment. If the modification time
+    of the file is passed the code object is reused while it is unchanged.
+    '''
+    bcc = jinja_env.bytecode_cache
+    if bcc is None or not tmplpath:
+        return jinja_env.from_string(tmplstr)
+    code = None
+    if mtime is not None:
+        code = bcc.get_code(tmplpath, mtime, tmplstr)
+    if code is None:
+        bucket = bcc.get_bucket(jinja_env, tmplpath, None, tmplstr)
+        code = bucket.code
+        if code is None:
+            code = jinja_env.compile(tmplstr)
+            bucket.code = code
+            bcc.set_bucket(bucket)
+        if mtime is not None:
+            bcc.set_code(tmplpath, mtime, tmplstr, code)
+    return jinja_env.template_class.from_code(
+        jinja_env, code, jinja_env.make_globals(None), None
+    )
+
+
+def render_jinja_tmpl(tmplstr, context, tmplpath=None):
+    opts = context['opts']
+    saltenv = context['saltenv']
+    loader = None
+    newline = False
+
+    if tmplstr and not isinstance(tmplstr, six.text_type):
+        # http://jinja.pocoo.org/docs/api/#unicode
+        tmplstr = tmplstr.decode(SLS_ENCODING)
+
+    if tmplstr.endswith('\n'):
+        newline = True
+
+    if not saltenv:
+        if tmplpath:
+            # i.e., the template is from a file outside the state tree
+            #
+            # XXX: FileSystemLoader is not being properly instantiated here is
+            # it? At least it ain't according to:
+            #
+            #   http://jinja.pocoo.org/docs/api/#jinja2.FileSystemLoader
+            loader = jinja2.FileSystemLoader(
+                context, os.path.dirname(tmplpath))
+        jinja_env = _new_jinja_env(opts, loader)
+    else:
+        jinja_env = _get_jinja_env(
+            opts, saltenv, context.get('_pillar_rend', False)
+        )
 
     decoded_context = {}
     for key, value in six.iteritems(context):
@@ -363,7 +487,9 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
         decoded_context[key] = salt.utils.locales.sdecode(value)
 
     try:
-        template = jinja_env.from_string(tmplstr)
+        template = _jinja_from_string(
+            jinja_env, tmplstr, tmplpath, context.get('_tmpl_mtime')
+        )
         template.globals.update(decoded_context)
         output = template.render(**decoded_context)
     except jinja2.exceptions.TemplateSyntaxError as exc:
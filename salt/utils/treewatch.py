@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+'''
+In-memory index of directory trees kept up to date with inotify
+
+The roots fileserver backend lists the files of the ``file_roots`` by walking
+them and detects their changes by walking them again to compare modification
+times. A :py:class:`TreeWatch` walks the trees once, then watches every
+directory with inotify and applies the changes reported by the kernel to its
+index, so that listing the files and detecting changes no longer touch the
+filesystem.
+
+When pyinotify is not installed or a directory can not be watched, for
+instance because ``fs.inotify.max_user_watches`` is reached, the index stops
+watching and :py:attr:`TreeWatch.watching` is False, the callers go back to
+walking the trees.
+
+:depends:   - pyinotify Python module >= 0.9.5
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import logging
+import os
+
+# Import third party libs
+try:
+    import pyinotify
+    HAS_PYINOTIFY = True
+    MASK = pyinotify.IN_CREATE | pyinotify.IN_DELETE | pyinotify.IN_MODIFY \
+        | pyinotify.IN_ATTRIB | pyinotify.IN_MOVED_FROM \
+        | pyinotify.IN_MOVED_TO | pyinotify.IN_DELETE_SELF \
+        | pyinotify.IN_CLOSE_WRITE
+except ImportError:
+    HAS_PYINOTIFY = False
+
+log = logging.getLogger(__name__)
+
+
+def _under(path, rel):
+    return path == rel or path.startswith(rel + os.sep)
+
+
+class TreeWatch(object):
+    '''
+    The files, directories and modification times of a list of directory
+    trees, by root and path relative to the root
+
+    roots
+        The directories to index
+
+    followlinks
+        Descend into the symlinked directories
+
+    watch
+        Watch the directories with inotify, when pyinotify is available
+    '''
+    def __init__(self, roots, followlinks=True, watch=True):
+        self.roots = sorted(set(os.path.normpath(x) for x in roots))
+        self.followlinks = followlinks
+        # {root: {rel path: mtime}}, the mtime is None for dangling symlinks
+        self.files = {}
+        # {root: set(rel path)}
+        self.dirs = {}
+        self.links = {}
+        # Symlinked directories which are not descended into
+        self.dir_links = {}
+        # {real path: set(path)}, the paths of the directories reached
+        # through several symlinks, inotify reports their changes under one
+        # of their paths only
+        self._aliases = {}
+        # Incremented whenever the index changes
+        self.generation = 0
+        self.watching = False
+        self._wm = None
+        self._notifier = None
+        self._events = []
+        if watch and HAS_PYINOTIFY:
+            self._wm = pyinotify.WatchManager()
+            self._notifier = pyinotify.Notifier(self._wm, self._events.append)
+            self.watching = True
+        self.rescan()
+
+    def _stop(self, reason):
+        if not self.watching:
+            return
+        log.warning(
+            'Not watching {0} with inotify anymore: {1}'.format(
+                ', '.join(self.roots), reason
+            )
+        )
+        self.close()
+
+    def close(self):
+        '''
+        Stop watching the trees and release the inotify instance
+        '''
+        if not self.watching:
+            return
+        self.watching = False
+        try:
+            self._notifier.stop()
+        except (OSError, IOError):
+            pass
+        self._notifier = self._wm = None
+        del self._events[:]
+
+    def _watch(self, path):
+        if not self.watching:
+            return
+        wdd = self._wm.add_watch(path, MASK, quiet=True)
+        if wdd.get(path, -1) < 0:
+            self._stop('unable to watch {0}'.format(path))
+
+    def rescan(self):
+        '''
+        Index the trees from scratch
+        '''
+        self._aliases = {}
+        for root in self.roots:
+            self.files[root] = {}
+            self.dirs[root] = set()
+            self.links[root] = set()
+            self.dir_links[root] = set()
+            self._scan(root, '.')
+        self.generation += 1
+
+    def _scan(self, root, rel):
+        '''
+        Index a directory and everything below it
+        '''
+        files = self.files[root]
+        # The real paths of the parent directories, a directory which is one
+        # of its own parents is a symlink loop
+        parents = set()
+        parent = rel
+        while parent not in ('.', ''):
+            parent = os.path.dirname(parent)
+            parents.add(os.path.realpath(os.path.join(root, parent)))
+        stack = [(rel, frozenset(parents))]
+        while stack:
+            rel, parents = stack.pop()
+            full = os.path.normpath(os.path.join(root, rel))
+            real = os.path.realpath(full)
+            if real in parents:
+                continue
+            parents = parents | set([real])
+            self._aliases.setdefault(real, set()).add(full)
+            # Watch before listing so that no entry added in between is missed
+            self._watch(full)
+            try:
+                names = os.listdir(full)
+            except OSError:
+                continue
+            self.dirs[root].add(rel)
+            for name in names:
+                child_rel = name if rel == '.' else os.path.join(rel, name)
+                child = os.path.join(full, name)
+                is_link = os.path.islink(child)
+                if os.path.isdir(child):
+                    if is_link and not self.followlinks:
+                        self.dir_links[root].add(child_rel)
+                    else:
+                        stack.append((child_rel, parents))
+                    continue
+                try:
+                    files[child_rel] = os.path.getmtime(child)
+                except OSError:
+                    files[child_rel] = None
+                if is_link:
+                    self.links[root].add(child_rel)
+
+    def _drop(self, root, rel):
+        '''
+        Remove a path and everything below it from the index
+        '''
+        if rel == '.':
+            self.files[root] = {}
+            self.dirs[root] = set()
+            self.links[root] = set()
+            self.dir_links[root] = set()
+            return
+        files = self.files[root]
+        files.pop(rel, None)
+        if rel not in self.dirs[root] and rel not in self.dir_links[root]:
+            self.links[root].discard(rel)
+            return
+        for path in [x for x in files if _under(x, rel)]:
+            del files[path]
+        for key in ('dirs', 'links', 'dir_links'):
+            index = getattr(self, key)
+            index[root] = set(x for x in index[root] if not _under(x, rel))
+
+    def _update(self, root, rel):
+        '''
+        Index the current state of a path
+        '''
+        full = os.path.join(root, rel)
+        self._drop(root, rel)
+        if os.path.isdir(full):
+            if os.path.islink(full) and not self.followlinks:
+                self.dir_links[root].add(rel)
+            else:
+                self._scan(root, rel)
+        elif os.path.lexists(full):
+            try:
+                self.files[root][rel] = os.path.getmtime(full)
+            except OSError:
+                self.files[root][rel] = None
+            if os.path.islink(full):
+                self.links[root].add(rel)
+
+    def _roots_of(self, path):
+        return [root for root in self.roots
+                if path == root or path.startswith(root.rstrip(os.sep) + os.sep)]
+
+    def wait(self, timeout):
+        '''
+        Wait up to ``timeout`` seconds for inotify to report changes, return
+        True if it did
+        '''
+        if not self.watching:
+            return False
+        try:
+            return bool(self._notifier.check_events(timeout=timeout * 1000))
+        except (OSError, IOError) as exc:
+            self._stop(exc)
+            return False
+
+    def poll(self):
+        '''
+        Apply the changes reported by inotify since the last poll to the
+        index, return True if anything changed
+        '''
+        if not self.watching:
+            return False
+        try:
+            while self._notifier.check_events(timeout=0):
+                self._notifier.read_events()
+                self._notifier.process_events()
+        except (OSError, IOError) as exc:
+            self._stop(exc)
+            return False
+        if not self._events:
+            return False
+        events = self._events[:]
+        del self._events[:]
+        if any(event.mask & pyinotify.IN_Q_OVERFLOW for event in events):
+            log.debug('The inotify queue overflowed, rescanning')
+            self.rescan()
+            return True
+        paths = set()
+        for event in events:
+            if not getattr(event, 'pathname', None):
+                continue
+            path = os.path.normpath(event.pathname)
+            paths.add(path)
+            # The same change seen through the other symlinks
+            parent, name = os.path.split(path)
+            for alias in self._aliases.get(os.path.realpath(parent), ()):
+                paths.add(os.path.join(alias, name))
+        for path in paths:
+            for root in self._roots_of(path):
+                rel = os.path.relpath(path, root)
+                if rel == '.' and not os.path.isdir(root):
+                    self._drop(root, rel)
+                elif rel != '.':
+                    self._update(root, rel)
+        self.generation += 1
+        return True
+
+    def mtime_map(self):
+        '''
+        Return the modification times of the files by absolute path, as
+        :py:func:`salt.fileserver.generate_mtime_map` does
+        '''
+        ret = {}
+        for root in self.roots:
+            for rel, mtime in self.files[root].items():
+                if mtime is not None:
+                    ret[os.path.join(root, rel)] = mtime
+        return ret
+
+    def empty_dirs(self, root):
+        '''
+        Return the directories of a root which contain nothing
+        '''
+        parents = set(os.path.dirname(x) or '.' for x in self.files[root])
+        for index in (self.dirs[root], self.dir_links[root]):
+            parents.update(os.path.dirname(x) or '.' for x in index
+                           if x != '.')
+        return [x for x in self.dirs[root] if x not in parents and x != '.']
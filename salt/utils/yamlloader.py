@@ -13,6 +13,10 @@ try:
 except Exception:
     pass
 
+# The libyaml bindings are optional, SaltYamlSafeLoader uses them when they
+# are available
+HAS_LIBYAML = hasattr(yaml, 'CSafeLoader')
+
 # This function is safe and needs to stay as yaml.load. The load function
 # accepts a custom loader, and every time this function is used in Salt
 # the custom loader defined below is used. This should be altered though to
@@ -29,14 +33,17 @@ warnings.simplefilter('always', category=DuplicateKeyWarning)
 
 
 # with code integrated from https://gist.github.com/844388
-class SaltYamlSafeLoader(yaml.SafeLoader, object):
+class _SaltYamlSafeConstructor(object):
     '''
     Create a custom YAML loader that uses the custom constructor. This allows
     for the YAML loading defaults to be manipulated based on needs within salt
     to make things like sls file more intuitive.
+
+    Mixed into the pure python and the libyaml based safe loaders, which
+    share the python constructor and only differ by their scanner and parser.
     '''
     def __init__(self, stream, dictclass=dict):
-        yaml.SafeLoader.__init__(self, stream)
+        super(_SaltYamlSafeConstructor, self).__init__(stream)
         if dictclass is not dict:
             # then assume ordered dict and use it for both !map and !omap
             self.add_constructor(
@@ -95,4 +102,21 @@ class SaltYamlSafeLoader(yaml.SafeLoader, object):
                 # an empty string. Change it to '0'.
                 if node.value == '':
                     node.value = '0'
-        return super(SaltYamlSafeLoader, self).construct_scalar(node)
+        return super(_SaltYamlSafeConstructor, self).construct_scalar(node)
+
+
+class SaltYamlPySafeLoader(_SaltYamlSafeConstructor, yaml.SafeLoader):
+    '''
+    The salt YAML loader, using the pure python scanner and parser
+    '''
+
+
+if HAS_LIBYAML:
+    class SaltYamlCSafeLoader(_SaltYamlSafeConstructor, yaml.CSafeLoader):
+        '''
+        The salt YAML loader, using the libyaml scanner and parser
+        '''
+
+    SaltYamlSafeLoader = SaltYamlCSafeLoader
+else:
+    SaltYamlSafeLoader = SaltYamlPySafeLoader
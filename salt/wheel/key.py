@@ -81,6 +81,30 @@ def reject_dict(match):
     return skey.reject(match_dict=match)
 
 
+def bulk(accept=None,
+         reject=None,
+         delete=None,
+         include_rejected=False,
+         include_accepted=False):
+    '''
+    Accept, reject and delete many keys at once. Each action takes a glob, a
+    comma separated string or list of globs, or a dict of keys. A single
+    ``salt/key/bulk`` event is fired for the whole batch and the caches of
+    deleted minions are removed by the master's maintenance process.
+
+    .. code-block:: python
+
+        >>> wheel.cmd('key.bulk', accept=['web*', 'db1'], delete='old*')
+        {'accept': ['db1', 'web1', 'web2'], 'reject': [], 'delete': ['old1']}
+    '''
+    skey = salt.key.Key(__opts__)
+    return skey.bulk(accept=accept,
+                     reject=reject,
+                     delete=delete,
+                     include_rejected=include_rejected,
+                     include_accepted=include_accepted)
+
+
 def key_str(match):
     '''
     Return the key strings
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark the bandwidth saved by the delta transfer of updated files
+
+Usage: python tests/perf/file_delta_bench.py [size_in_mb] [edits]
+
+A random file of ``size_in_mb`` megabytes is modified with ``edits`` small
+changes in place, an insertion and a deletion. The bytes a minion sends and
+receives to update its cached copy with :py:mod:`salt.utils.delta` are
+compared with the size of the whole file.
+'''
+
+from __future__ import absolute_import, print_function
+# Import system libs
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Import 3rd-party libs
+import msgpack
+
+# Import salt libs
+from salt.utils import delta
+
+
+def modified(data, edits, rand):
+    '''
+    Return a copy of the data with small changes spread over it
+    '''
+    data = bytearray(data)
+    for _ in range(edits):
+        pos = rand.randrange(len(data) - 64)
+        data[pos:pos + 64] = bytearray(rand.getrandbits(8) for _ in range(64))
+    pos = rand.randrange(len(data))
+    data[pos:pos] = b'inserted line\n' * 10
+    pos = rand.randrange(len(data) - 4096)
+    del data[pos:pos + 4096]
+    return bytes(data)
+
+
+def main():
+    size = int(float(sys.argv[1]) * 1024 * 1024) if len(sys.argv) > 1 \
+        else 16 * 1024 * 1024
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rand = random.Random(0)
+    old = os.urandom(size)
+    new = modified(old, edits, rand)
+    block_size = delta.block_size(len(old))
+
+    start = time.time()
+    sigs = delta.signatures(io.BytesIO(old), block_size)
+    sig_time = time.time() - start
+    start = time.time()
+    ops = delta.delta(io.BytesIO(new), sigs, block_size, len(new) // 2)
+    delta_time = time.time() - start
+    if ops is None:
+        print('The file changed too much, it is sent whole')
+        sys.exit(1)
+    out = io.BytesIO()
+    start = time.time()
+    delta.patch(io.BytesIO(old), ops, block_size, out)
+    patch_time = time.time() - start
+    if out.getvalue() != new:
+        print('The patched file does not match the new file')
+        sys.exit(1)
+
+    sent = len(msgpack.dumps(sigs))
+    received = len(msgpack.dumps(ops))
+    print('{0} bytes, {1} blocks of {2} bytes'.format(
+        len(new), len(sigs), block_size))
+    print('Signatures: {0} bytes sent in {1:.3f}s'.format(sent, sig_time))
+    print('Delta:      {0} bytes received in {1:.3f}s'.format(
+        received, delta_time))
+    print('Patch:      {0:.3f}s'.format(patch_time))
+    print('Transferred {0:.2%} of the file'.format(
+        float(sent + received) / len(new)))
+
+
+if __name__ == '__main__':
+    main()
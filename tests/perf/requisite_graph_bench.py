@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark the resolution of the requisites of a large lowstate
+
+Usage: python tests/perf/requisite_graph_bench.py [chunks] [requisites]
+
+A synthetic lowstate of ``chunks`` file states, each requiring the
+``requisites`` preceding ones and the package of its SLS, is resolved with
+the full scan of the chunks the state system used to do and with the
+:py:class:`~salt.utils.requisite_graph.RequisiteGraph`.
+'''
+
+from __future__ import absolute_import, print_function
+# Import system libs
+import os
+import sys
+import time
+import fnmatch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Import salt libs
+from salt.utils.requisite_graph import RequisiteGraph
+
+
+def lowstate(count, nreqs):
+    '''
+    Return a synthetic lowstate, in groups of 20 states per SLS
+    '''
+    chunks = []
+    for num in range(count):
+        sls = 'app{0}'.format(num // 20)
+        if num % 20 == 0:
+            chunks.append({'state': 'pkg',
+                           'fun': 'installed',
+                           '__id__': '{0}_pkg'.format(sls),
+                           'name': sls,
+                           '__sls__': sls,
+                           'order': num})
+            continue
+        require = [{'pkg': '{0}_pkg'.format(sls)}]
+        for req in range(max(0, num - nreqs), num):
+            require.append({'file': '/srv/{0}/file{1}'.format(sls, req)})
+        chunks.append({'state': 'file',
+                       'fun': 'managed',
+                       '__id__': 'file{0}'.format(num),
+                       'name': '/srv/{0}/file{1}'.format(sls, num),
+                       '__sls__': sls,
+                       'require': require,
+                       'order': num})
+    return chunks
+
+
+def scan(chunks):
+    '''
+    Resolve the requisites by scanning the chunks for each of them
+    '''
+    edges = 0
+    for low in chunks:
+        for req in low.get('require', []):
+            req_key = next(iter(req))
+            req_val = req[req_key]
+            for chunk in chunks:
+                if (fnmatch.fnmatch(chunk['name'], req_val) or
+                        fnmatch.fnmatch(chunk['__id__'], req_val)):
+                    if chunk['state'] == req_key:
+                        edges += 1
+    return edges
+
+
+def indexed(chunks):
+    '''
+    Resolve the requisites with a requisite graph
+    '''
+    edges = 0
+    graph = RequisiteGraph(chunks)
+    for low in chunks:
+        found = graph.resolve(low.get('require', []))[0]
+        edges += len(found)
+    return edges
+
+
+def timed(func, chunks):
+    start = time.time()
+    edges = func(chunks)
+    return edges, time.time() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    nreqs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    chunks = lowstate(count, nreqs)
+    print('{0} chunks, {1} requisites'.format(
+        len(chunks), sum(len(low.get('require', [])) for low in chunks)))
+    graph_edges, graph_time = timed(indexed, chunks)
+    print('Requisite graph: {0} edges in {1:.3f}s'.format(
+        graph_edges, graph_time))
+    scan_edges, scan_time = timed(scan, chunks)
+    print('Full scan:       {0} edges in {1:.3f}s'.format(
+        scan_edges, scan_time))
+    if scan_edges != graph_edges:
+        print('Mismatch between the resolved requisites')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark the parse throughput of the salt YAML loaders
+
+Usage: python tests/perf/yamlloader_bench.py [states] [pillar entries]
+
+A synthetic SLS file with ``states`` states and a generated pillar file with
+``pillar entries`` users are parsed with the pure python and, when libyaml
+is available, the libyaml based salt loader, with the ordered dicts the YAML
+renderer uses.
+'''
+
+from __future__ import absolute_import, print_function
+# Import system libs
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Import salt libs
+from salt.utils import yamlloader
+from salt.utils.odict import OrderedDict
+
+SLS_STATE = '''\
+/srv/app/conf/file{0}.conf:
+  file.managed:
+    - source: salt://app/files/file{0}.conf
+    - template: jinja
+    - user: app
+    - group: app
+    - mode: 0640
+    - require:
+      - pkg: app
+      - user: app
+    - watch_in:
+      - service: app
+
+'''
+
+PILLAR_USER = '''\
+  user{0}:
+    fullname: User Number {0}
+    uid: {1}
+    shell: /bin/bash
+    groups:
+      - users
+      - staff
+    ssh_keys:
+      - ssh-rsa AAAAB3NzaC1yc2EAAAADAQABAAABAQC{0} user{0}@example.com
+    enabled: True
+
+'''
+
+
+def documents(states, users):
+    '''
+    Return the generated SLS and pillar documents
+    '''
+    sls = ''.join(SLS_STATE.format(num) for num in range(states))
+    pillar = 'users:\n' + ''.join(PILLAR_USER.format(num, 10000 + num)
+                                  for num in range(users))
+    return sls, pillar
+
+
+def parse(loader, data):
+    '''
+    Parse a document with the renderer's ordered dicts, return the time
+    it took
+    '''
+    start = time.time()
+    yamlloader.load(
+        data,
+        Loader=lambda stream: loader(stream, dictclass=OrderedDict)
+    )
+    return time.time() - start
+
+
+def main():
+    states = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    loaders = [('python', yamlloader.SaltYamlPySafeLoader)]
+    if yamlloader.HAS_LIBYAML:
+        loaders.append(('libyaml', yamlloader.SaltYamlCSafeLoader))
+    else:
+        print('libyaml is not available')
+    for name, data in zip(('SLS', 'pillar'), documents(states, users)):
+        lines = data.count('\n')
+        for loader_name, loader in loaders:
+            elapsed = parse(loader, data)
+            print('{0:6} {1:7} {2} lines in {3:.3f}s, {4:.0f} lines/s'.format(
+                name, loader_name, lines, elapsed, lines / elapsed))
+
+
+if __name__ == '__main__':
+    main()
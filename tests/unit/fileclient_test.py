@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.fileclient_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the bulk caching of the file client
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import hashlib
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+ensure_in_syspath('../')
+
+# Import salt libs
+import salt.utils
+from salt import fileclient
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class RemoteClientCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.client = fileclient.RemoteClient.__new__(fileclient.RemoteClient)
+        self.client.opts = {'cachedir': self.cachedir,
+                            'file_client_concurrency': 1}
+        self.client.channel = MagicMock()
+        self.cached = os.path.join(self.cachedir, 'files', 'base', 'motd')
+        os.makedirs(os.path.dirname(self.cached))
+        with salt.utils.fopen(self.cached, 'w') as fp_:
+            fp_.write('Welcome')
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def _manifest(self):
+        return {'motd': {'hsum': salt.utils.get_hash(self.cached, 'md5'),
+                         'hash_type': 'md5'},
+                'issue': {'hsum': 'abc', 'hash_type': 'md5'}}
+
+    def test_cache_master_manifest(self):
+        self.client.channel.send.return_value = self._manifest()
+        fetch = MagicMock(side_effect=lambda path, dest, *args: dest)
+        with patch.object(self.client, '_fetch_file', fetch):
+            ret = self.client.cache_master('base')
+        issue = os.path.join(self.cachedir, 'files', 'base', 'issue')
+        self.assertEqual(ret, [issue, self.cached])
+        # Only the file which changed is downloaded, without a hash request
+        fetch.assert_called_once_with('salt://issue', issue, True, 'base')
+        self.assertEqual(self.client.channel.send.call_count, 1)
+
+    def test_cache_dir_old_master(self):
+        # Masters which do not know the manifest request return False
+        self.client.channel.send.side_effect = [
+            False, ['etc/motd', 'etc/issue', 'srv/motd']
+        ]
+        get_file = MagicMock(side_effect=lambda path, dest, *args: dest)
+        with patch.object(self.client, 'get_file', get_file):
+            ret = self.client.cache_dir('salt://etc')
+        self.assertEqual(
+            ret,
+            [os.path.join(self.cachedir, 'files', 'base', 'etc', 'motd'),
+             os.path.join(self.cachedir, 'files', 'base', 'etc', 'issue')]
+        )
+
+    def test_cache_files_parallel(self):
+        self.client.opts['file_client_concurrency'] = 4
+        channels = []
+
+        def _channel(opts):
+            channels.append(MagicMock())
+            return channels[-1]
+
+        get_file = MagicMock(side_effect=lambda path, dest, *args: dest)
+        with patch('salt.transport.Channel.factory',
+                   MagicMock(side_effect=_channel)):
+            with patch.object(fileclient.RemoteClient, 'get_file', get_file):
+                ret = self.client.cache_files(
+                    ['salt://motd', 'salt://issue?saltenv=dev']
+                )
+        self.assertEqual(
+            ret,
+            [self.cached,
+             os.path.join(self.cachedir, 'files', 'dev', 'issue')]
+        )
+        self.assertTrue(1 <= len(channels) <= 2)
+        # The channels of the threads are closed once the files are cached
+        for channel in channels:
+            channel.close.assert_called_once_with()
+
+    def test_prefetch_hashes(self):
+        self.client.hash_cache = {}
+        hsum = {'hsum': 'abc', 'hash_type': 'md5', 'size': 7}
+        self.client.channel.send.return_value = {'motd': hsum, 'issue': ''}
+        ret = self.client.prefetch_hashes(['salt://motd', 'salt://issue'])
+        self.assertEqual(ret, {'salt://motd': hsum, 'salt://issue': ''})
+        self.client.channel.send.assert_called_once_with(
+            {'paths': ['issue', 'motd'],
+             'saltenv': 'base',
+             'cmd': '_file_hashes'}
+        )
+        # The prefetched hashes are not requested again
+        self.assertEqual(self.client.hash_file('salt://motd'), hsum)
+        self.assertEqual(self.client.channel.send.call_count, 1)
+
+    def test_hash_files_old_master(self):
+        self.client.hash_cache = {}
+        hsum = {'hsum': 'abc', 'hash_type': 'md5'}
+        self.client.channel.send.side_effect = [False, hsum]
+        self.assertEqual(self.client.hash_files(['salt://motd?saltenv=dev']),
+                         {'salt://motd?saltenv=dev': hsum})
+        self.client.channel.send.assert_called_with(
+            {'path': 'motd', 'saltenv': 'dev', 'cmd': '_file_hash'}
+        )
+
+    def test_fetch_delta(self):
+        self.client.opts['file_delta_min_size'] = 0
+        self.client.delta = True
+        with salt.utils.fopen(self.cached, 'wb') as fp_:
+            fp_.write(b'a' * 4096 + b'b' * 10)
+        new = b'a' * 4096 + b'c' * 20
+        hash_server = {'hsum': hashlib.md5(new).hexdigest(),
+                       'hash_type': 'md5'}
+        self.client.channel.send.return_value = {'delta': [[0, 2], b'c' * 20],
+                                                 'dest': 'motd'}
+        self.assertTrue(
+            self.client._fetch_delta('salt://motd', self.cached, 'base',
+                                     hash_server)
+        )
+        load = self.client.channel.send.call_args[0][0]
+        self.assertEqual(load['cmd'], '_file_delta')
+        self.assertEqual(len(load['signatures']), 2)
+        with salt.utils.fopen(self.cached, 'rb') as fp_:
+            self.assertEqual(fp_.read(), new)
+
+        # A delta which does not rebuild the file is not applied
+        self.client.channel.send.return_value = {'delta': [[0, 1]],
+                                                 'dest': 'motd'}
+        self.assertFalse(
+            self.client._fetch_delta('salt://motd', self.cached, 'base',
+                                     {'hsum': 'abc', 'hash_type': 'md5'})
+        )
+        with salt.utils.fopen(self.cached, 'rb') as fp_:
+            self.assertEqual(fp_.read(), new)
+        self.assertEqual(os.listdir(os.path.dirname(self.cached)), ['motd'])
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(RemoteClientCacheTestCase, needs_daemon=False)
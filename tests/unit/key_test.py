@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.key_test
+    ~~~~~~~~~~~~~~~~~~~
+
+    Test the bulk key operations
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+ensure_in_syspath('../')
+
+# Import salt libs
+import salt.key
+import salt.utils
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class BulkKeyTestCase(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.opts = {'__role': 'master',
+                     'transport': 'zeromq',
+                     'sock_dir': self.tmpdir,
+                     'pki_dir': os.path.join(self.tmpdir, 'pki'),
+                     'cachedir': os.path.join(self.tmpdir, 'cache'),
+                     'user': 'root',
+                     'serial': 'msgpack',
+                     'rotate_aes_key': False,
+                     'preserve_minion_cache': False}
+        for status in ('minions', 'minions_pre', 'minions_rejected'):
+            os.makedirs(os.path.join(self.opts['pki_dir'], status))
+        for minion in ('web1', 'web2', 'db1'):
+            self._touch('minions_pre', minion)
+            os.makedirs(os.path.join(self.opts['cachedir'], 'minions', minion))
+        self._touch('minions', 'old1')
+        os.makedirs(os.path.join(self.opts['cachedir'], 'minions', 'old1'))
+        self.event = MagicMock()
+        with patch('salt.utils.event.get_event',
+                   MagicMock(return_value=self.event)):
+            self.key = salt.key.Key(self.opts)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _touch(self, status, minion):
+        with salt.utils.fopen(
+                os.path.join(self.opts['pki_dir'], status, minion), 'w') as fp_:
+            fp_.write('key')
+
+    def _cached(self, minion):
+        return os.path.isdir(
+            os.path.join(self.opts['cachedir'], 'minions', minion)
+        )
+
+    def test_bulk(self):
+        ret = self.key.bulk(accept=['web*'], reject='db1', delete='old1')
+        self.assertEqual(ret, {'accept': ['web1', 'web2'],
+                               'reject': ['db1'],
+                               'delete': ['old1']})
+        self.assertEqual(self.key.list_keys(),
+                         {'minions': ['web1', 'web2'],
+                          'minions_pre': [],
+                          'minions_rejected': ['db1'],
+                          'minions_denied': []})
+        self.event.fire_event.assert_called_once_with(
+            dict(ret, result=True, act='bulk'), 'salt/key/bulk'
+        )
+        # The cache of the deleted minion is only removed by the cleanup
+        self.assertTrue(self._cached('old1'))
+        self.assertEqual(self.key.clean_queued_caches(), 1)
+        self.assertFalse(self._cached('old1'))
+        self.assertTrue(self._cached('db1'))
+        self.assertEqual(
+            os.listdir(os.path.join(self.opts['cachedir'],
+                                    salt.key.CACHE_CLEANUP_DIR)),
+            []
+        )
+
+    def test_cleanup_skips_returned_minions(self):
+        self.key.bulk(delete='old1')
+        self._touch('minions_pre', 'old1')
+        self.assertEqual(self.key.clean_queued_caches(), 0)
+        self.assertTrue(self._cached('old1'))
+
+    def test_bulk_nothing_matched(self):
+        ret = self.key.bulk(accept='nope*')
+        self.assertEqual(ret, {'accept': [], 'reject': [], 'delete': []})
+        self.assertFalse(self.event.fire_event.called)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(BulkKeyTestCase, needs_daemon=False)
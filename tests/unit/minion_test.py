@@ -10,7 +10,7 @@ import os
 # Import Salt Testing libs
 from salttesting import TestCase, skipIf
 from salttesting.helpers import ensure_in_syspath
-from salttesting.mock import NO_MOCK, NO_MOCK_REASON, patch
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
 
 # Import salt libs
 from salt import minion
@@ -53,6 +53,39 @@ class MinionTestCase(TestCase):
         self.assertTrue(result)
 
 
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class MatcherTestCase(TestCase):
+    def setUp(self):
+        self.opts = {'id': 'web1',
+                     'grains': {'os': 'Debian', 'ipv4': ['10.0.0.5']},
+                     'pillar': {'role': 'web'}}
+        self.matcher = minion.Matcher(self.opts)
+
+    def test_compound_match(self):
+        self.assertTrue(self.matcher.compound_match(
+            'G@os:Debian and I@role:web and S@10.0.0.0/8'))
+        self.assertTrue(self.matcher.compound_match('db* or not E@db.*'))
+        self.assertTrue(self.matcher.compound_match(
+            ['(', 'web*', 'or', 'db*', ')', 'and', 'L@web1,web2']))
+        self.assertFalse(self.matcher.compound_match('web* and G@os:RedHat'))
+        self.assertFalse(self.matcher.compound_match('web* and'))
+        self.assertFalse(self.matcher.compound_match('N@group'))
+
+    def test_cached_until_refresh(self):
+        with patch('salt.utils.subdict_match',
+                   MagicMock(return_value=True)) as subdict_match:
+            self.assertTrue(self.matcher.grain_match('os:Debian'))
+            self.assertTrue(self.matcher.compound_match('G@os:Debian'))
+            self.assertEqual(subdict_match.call_count, 1)
+            # A grains refresh replaces the grains dict
+            self.opts['grains'] = {'os': 'RedHat'}
+            self.matcher.grain_match('os:Debian')
+            self.assertEqual(subdict_match.call_count, 2)
+            self.matcher.clear_cache()
+            self.matcher.grain_match('os:Debian')
+            self.assertEqual(subdict_match.call_count, 3)
+
+
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(MinionTestCase, needs_daemon=False)
+    run_tests([MinionTestCase, MatcherTestCase], needs_daemon=False)
@@ -924,6 +924,32 @@ class StateTestCase(TestCase):
                                                               None,
                                                               True))
 
+    def test_stream_opts(self):
+        '''
+            Test that only the jobs published by the master are streamed
+        '''
+        stream = {'state_stream_batch': 10, 'state_stream_interval': 5}
+        for kwargs in ({},
+                       {'__pub_tgt': 'salt-call', '__pub_jid': '1'},
+                       {'__pub_schedule': 'nightly', '__pub_jid': '1'}):
+            opts = dict(stream)
+            state._stream_opts(opts, kwargs)
+            self.assertEqual(opts['state_stream_batch'], 0)
+            self.assertEqual(opts['state_stream_interval'], 0)
+
+        opts = dict(stream)
+        state._stream_opts(opts, {'__pub_tgt': '*', '__pub_ret': ''})
+        self.assertEqual(opts, stream)
+
+        # A returner on the minion gets the full results
+        for pub_ret, extra in (('mysql', {}),
+                               ('', {'ext_job_cache': 'redis'}),
+                               ('', {'cache_jobs': True})):
+            opts = dict(stream, **extra)
+            state._stream_opts(opts, {'__pub_tgt': '*', '__pub_ret': pub_ret})
+            self.assertEqual(opts['state_stream_batch'], 10)
+            self.assertFalse(opts['state_stream_stubs'])
+
     @patch('salt.modules.state.tarfile', MockTarFile)
     @patch('salt.modules.state.json', MockJson())
     def test_pkg(self):
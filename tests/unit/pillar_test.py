@@ -9,6 +9,7 @@
 
 # Import python libs
 from __future__ import absolute_import
+import time
 import tempfile
 
 # Import Salt Testing libs
@@ -162,6 +163,87 @@ class PillarTestCase(TestCase):
             }
         })
 
+    @patch('salt.pillar.salt.fileclient.get_file_client', autospec=True)
+    @patch('salt.pillar.salt.minion.Matcher')  # autospec=True disabled due to py3 mock bug
+    def test_ext_pillar_concurrent(self, Matcher, get_file_client):
+        opts = {
+            'renderer': 'yaml',
+            'state_top': '',
+            'pillar_roots': [],
+            'extension_modules': '',
+            'environment': 'base',
+            'file_roots': [],
+            'ext_pillar': [{'slow': {}}, {'broken': {}}, {'fast': {}}],
+            'ext_pillar_concurrency': 3,
+            'ext_pillar_timeout': 5,
+            'ext_pillar_timeouts': {'slow': 0.2},
+        }
+        pillar = salt.pillar.Pillar(opts, {}, 'mocked-minion', 'base')
+
+        def _slow(minion_id, pillar):
+            time.sleep(2)
+            return {'foo': 'slow'}
+
+        def _broken(minion_id, pillar):
+            raise Exception('broken')
+
+        def _fast(minion_id, pillar):
+            return {'foo': 'fast', 'bar': 'fast'}
+
+        pillar.ext_pillars = {'slow': _slow, 'broken': _broken, 'fast': _fast}
+        self.assertEqual(
+            pillar.ext_pillar({'bar': 'base'}, None),
+            {'foo': 'fast', 'bar': 'fast'}
+        )
+        self.assertEqual(pillar.ext_pillar_errors, [])
+        self.assertEqual([key for key, _ in pillar.ext_pillar_timings],
+                         ['slow', 'broken', 'fast'])
+        self.assertIsNone(pillar.ext_pillar_timings[0][1])
+
+        pillar.opts['ext_pillar_fail_mode'] = 'closed'
+        pillar.ext_pillar({}, None)
+        self.assertEqual(len(pillar.ext_pillar_errors), 2)
+
+        # An invalid fail mode is logged and fails closed
+        pillar.opts['ext_pillar_fail_mode'] = 'close'
+        with patch('salt.pillar.log') as log:
+            pillar.ext_pillar({}, None)
+        self.assertEqual(len(pillar.ext_pillar_errors), 2)
+        self.assertTrue(
+            any('ext_pillar_fail_mode' in call[0][0]
+                for call in log.error.call_args_list)
+        )
+
+    @patch('salt.pillar.salt.fileclient.get_file_client', autospec=True)
+    @patch('salt.pillar.salt.minion.Matcher')  # autospec=True disabled due to py3 mock bug
+    def test_compile_pillar_resets_ext_errors(self, Matcher, get_file_client):
+        opts = {
+            'renderer': 'yaml',
+            'state_top': '',
+            'pillar_roots': [],
+            'extension_modules': '',
+            'environment': 'base',
+            'file_roots': [],
+            'pillar_opts': False,
+            'ext_pillar': [{'broken': {}}],
+            'ext_pillar_fail_mode': 'closed',
+        }
+        pillar = salt.pillar.Pillar(opts, {}, 'mocked-minion', 'base')
+
+        def _broken(minion_id, pillar):
+            raise Exception('broken')
+
+        pillar.ext_pillars = {'broken': _broken}
+        with patch.multiple(pillar,
+                            get_top=MagicMock(return_value=({}, [])),
+                            top_matches=MagicMock(return_value={}),
+                            render_pillar=lambda matches: ({}, [])):
+            self.assertEqual(len(pillar.compile_pillar()['_errors']), 1)
+            # The errors of the ext_pillar run are not reported again by a
+            # compile without the external pillars
+            self.assertEqual(pillar.compile_pillar(ext=False), {})
+            self.assertEqual(pillar.ext_pillar_timings, [])
+
     def _setup_test_topfile_mocks(self, Matcher, get_file_client,
             nodegroup_order, glob_order):
         # Write a simple topfile and two pillar state files
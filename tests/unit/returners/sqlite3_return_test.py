@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.returners.sqlite3_return_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import Python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.returners import sqlite3_return
+
+sqlite3_return.__salt__ = {}
+sqlite3_return.__opts__ = {}
+
+RET = {'fun': 'test.ping',
+       'jid': '20150101000000000000',
+       'id': 'minion',
+       'fun_args': [],
+       'return': True,
+       'success': True}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class SQLite3ReturnerTestCase(TestCase):
+    '''
+    Test the sqlite3 returner connection handling
+    '''
+    def setUp(self):
+        self.pool = MagicMock()
+        self.conn = self.pool.acquire.return_value
+        self.cur = self.conn.cursor.return_value
+        patcher = patch.multiple(sqlite3_return,
+                                 _get_pool=MagicMock(return_value=self.pool),
+                                 _get_options=MagicMock(return_value={}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returner(self):
+        sqlite3_return.returner(RET)
+        self.assertEqual(self.cur.execute.call_args[0][1]['jid'], RET['jid'])
+        self.conn.commit.assert_called_once_with()
+        self.pool.release.assert_called_once_with(self.conn)
+
+    def test_returner_failure(self):
+        '''
+        A connection whose insert failed is not leaked nor handed out again
+        '''
+        self.cur.execute.side_effect = Exception('database is locked')
+        self.assertRaises(Exception, sqlite3_return.returner, RET)
+        self.assertFalse(self.conn.commit.called)
+        self.pool.release.assert_called_once_with(self.conn, discard=True)
+
+    def test_get_jids(self):
+        self.cur.fetchall.return_value = [(RET['jid'],)]
+        self.assertEqual(sqlite3_return.get_jids(), [RET['jid']])
+        self.pool.release.assert_called_once_with(self.conn)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(SQLite3ReturnerTestCase, needs_daemon=False)
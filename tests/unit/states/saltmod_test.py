@@ -77,6 +77,39 @@ class SaltmodTestCase(TestCase):
                 self.assertDictEqual(saltmod.state(name, tgt, highstate=True),
                                      ret)
 
+    def test_state_compact(self):
+        '''
+        Test a state run on minions returning compacted state returns
+        '''
+        name = 'state'
+        unchanged = {'__compact__': {
+            'version': 1,
+            'comments': [['File ', ' is in the correct state']],
+            'states': [['file_|-motd_|-/etc/motd_|-managed', 0, None, None,
+                        0, None]]}}
+        changed = {'pkg_|-vim_|-vim_|-installed': {
+            'changes': {'vim': {'new': '7.4', 'old': ''}},
+            'comment': 'Installed vim',
+            'name': 'vim',
+            'result': True}}
+        changed.update(unchanged)
+        mock = MagicMock(return_value={
+            'minion1': {'ret': unchanged, 'out': 'highstate'},
+            'minion2': {'ret': changed, 'out': 'highstate'}})
+        with patch.dict(saltmod.__opts__, {'test': False}):
+            with patch.dict(saltmod.__salt__, {'saltutil.cmd': mock}):
+                ret = saltmod.state(name, 'minion*', highstate=True)
+        self.assertTrue(ret['result'])
+        self.assertEqual(list(ret['changes']['ret']), ['minion2'])
+        self.assertEqual(
+            ret['changes']['ret']['minion2']['file_|-motd_|-/etc/motd_|-managed'],
+            {'changes': {},
+             'comment': 'File /etc/motd is in the correct state',
+             'name': '/etc/motd',
+             '__run_num__': 0,
+             'result': True})
+        self.assertIn('No changes made to minion1', ret['comment'])
+
     # 'function' function tests: 1
 
     def test_function(self):
@@ -8,6 +8,7 @@ import tempfile
 import json
 import datetime
 import pprint
+import shutil
 
 # Import Salt Testing libs
 from salttesting.unit import skipIf, TestCase
@@ -22,10 +23,12 @@ from salt.exceptions import SaltRenderError
 from salt.ext.six.moves import builtins
 from salt.utils import get_context
 from salt.utils.jinja import (
+    SaltBytecodeCache,
     SaltCacheLoader,
     SerializerExtension,
     ensure_sequence_filter
 )
+import salt.utils.templates
 from salt.utils.templates import JINJA, render_jinja_tmpl
 from salt.utils.odict import OrderedDict
 from integration import TMP_CONF_DIR
@@ -447,6 +450,80 @@ class TestGetTemplate(TestCase):
         )
 
 
+class TestJinjaCaches(TestCase):
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        roots = {'test': [os.path.join(TEMPLATES_DIR, 'files', 'test')]}
+        # The templates are read from the roots rather than the cachedir
+        self.opts = {
+            'cachedir': self.cachedir,
+            'file_client': 'local',
+            'file_roots': roots,
+            'pillar_roots': roots,
+            'jinja_bytecode_cache': True,
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def test_env_reuse(self):
+        '''
+        The environment of a saltenv is reused, without keeping the context
+        of the previous renders
+        '''
+        fc = MockFileClient()
+        _fc = SaltCacheLoader.file_client
+        SaltCacheLoader.file_client = lambda loader: fc
+        try:
+            filename = os.path.join(TEMPLATES_DIR, 'files', 'test',
+                                    'hello_import')
+            tmplstr = salt.utils.fopen(filename).read()
+            out = render_jinja_tmpl(
+                tmplstr, dict(opts=self.opts, a='Hi', b='Salt', saltenv='test'),
+                tmplpath=filename)
+            self.assertEqual(out, 'Hey world !Hi Salt !\n')
+            env = salt.utils.templates._get_jinja_env(self.opts, 'test', False)
+            out = render_jinja_tmpl(
+                tmplstr, dict(opts=self.opts, a='Bye', b='Salt', saltenv='test'),
+                tmplpath=filename)
+            self.assertEqual(out, 'Hey world !Bye Salt !\n')
+            self.assertIs(
+                salt.utils.templates._get_jinja_env(self.opts, 'test', False),
+                env
+            )
+            self.assertNotIn('a', env.globals)
+            # The imported template is fetched once per render
+            self.assertEqual(
+                [req['path'] for req in fc.requests],
+                ['salt://macro'] * 2
+            )
+        finally:
+            SaltCacheLoader.file_client = _fc
+
+    def test_bytecode_cache(self):
+        '''
+        Compiled templates are stored on disk and recompiled when their
+        source changes
+        '''
+        directory = os.path.join(self.cachedir, 'jinja')
+        templates = {'hello': 'Hello {{ name }}'}
+        env = Environment(loader=DictLoader(templates),
+                          bytecode_cache=SaltBytecodeCache(directory))
+        self.assertEqual(env.get_template('hello').render(name='world'),
+                         'Hello world')
+        self.assertEqual(len(os.listdir(directory)), 1)
+        # A new process only has the bytecode on disk
+        bcc = SaltBytecodeCache(directory)
+        env = Environment(loader=DictLoader(templates), bytecode_cache=bcc)
+        self.assertEqual(env.get_template('hello').render(name='salt'),
+                         'Hello salt')
+        self.assertEqual(len(bcc.memory), 1)
+        templates['hello'] = 'Bye {{ name }}'
+        env = Environment(loader=DictLoader(templates), bytecode_cache=bcc)
+        self.assertEqual(env.get_template('hello').render(name='salt'),
+                         'Bye salt')
+
+
 class TestCustomExtensions(TestCase):
     def test_serialize_json(self):
         dataset = {
@@ -719,6 +796,7 @@ class TestDotNotationLookup(ModuleCase):
 
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(TestSaltCacheLoader, TestGetTemplate, TestCustomExtensions,
+    run_tests(TestSaltCacheLoader, TestGetTemplate, TestJinjaCaches,
+              TestCustomExtensions,
             TestDotNotationLookup,
               needs_daemon=False)
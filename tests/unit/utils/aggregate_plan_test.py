@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.aggregate_plan_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the planning of the aggregation of low chunks
+'''
+
+# Import python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils import aggregate_plan
+from salt.utils.requisite_graph import RequisiteGraph
+
+
+def _chunk(state, id_, fun='installed', **kwargs):
+    chunk = {'state': state,
+             'fun': fun,
+             '__id__': id_,
+             'name': id_,
+             '__sls__': 'base',
+             '__env__': 'base'}
+    chunk.update(kwargs)
+    return chunk
+
+
+CHUNKS = [
+    _chunk('pkg', 'vim'),
+    _chunk('pkgrepo', 'nginx_repo', fun='managed'),
+    _chunk('pkg', 'nginx', require=[{'pkgrepo': 'nginx_repo'}]),
+    _chunk('pkg', 'git'),
+    _chunk('pkg', 'curl', fromrepo='testing'),
+    _chunk('pkg', 'htop'),
+    _chunk('service', 'htopd', fun='running', watch=[{'pkg': 'htop'}]),
+    _chunk('pkg', 'tmux', onlyif='test -d /srv'),
+    _chunk('pkg', 'emacs', fun='removed'),
+    _chunk('pkg', 'nano', fun='removed'),
+    _chunk('pkg', 'mercurial', version='3.4', require=[{'pkg': 'vim'}]),
+]
+
+
+class AggregatePlanTestCase(TestCase):
+
+    def test_execution_order(self):
+        chunks = [_chunk('pkg', 'nginx', require=[{'pkgrepo': 'nginx_repo'}]),
+                  _chunk('pkg', 'vim'),
+                  _chunk('pkgrepo', 'nginx_repo', fun='managed')]
+        graph = RequisiteGraph(chunks)
+        pos = aggregate_plan.execution_order(graph)
+        self.assertEqual([pos[id(x)] for x in chunks], [1, 2, 0])
+
+    def test_execution_order_recursive(self):
+        chunks = [_chunk('pkg', 'vim', require=[{'pkg': 'git'}]),
+                  _chunk('pkg', 'git', require=[{'pkg': 'vim'}])]
+        pos = aggregate_plan.execution_order(RequisiteGraph(chunks))
+        self.assertEqual(sorted(pos.values()), [0, 1])
+
+    def test_plan(self):
+        groups = aggregate_plan.plan(RequisiteGraph(CHUNKS), set(['pkg']))
+        self.assertEqual(
+            [[chunk['name'] for chunk in group] for group in groups],
+            [['nginx', 'git', 'mercurial'], ['emacs', 'nano']]
+        )
+
+    def test_plan_states(self):
+        self.assertEqual(
+            aggregate_plan.plan(RequisiteGraph(CHUNKS), set(['iptables'])),
+            []
+        )
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(AggregatePlanTestCase, needs_daemon=False)
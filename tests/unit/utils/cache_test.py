@@ -47,6 +47,42 @@ class CacheDictTestCase(TestCase):
         self.assertRaises(KeyError, cd.__getitem__, 'foo')
 
 
+class LRUCacheTestCase(TestCase):
+
+    def test_eviction(self):
+        lru = cache.LRUCache(10)
+        lru['a'] = 'aaaa'
+        lru['b'] = 'bbbb'
+        # Using 'a' makes 'b' the least recently used item
+        self.assertEqual(lru.get('a'), 'aaaa')
+        lru['c'] = 'cccc'
+        self.assertIn('a', lru)
+        self.assertNotIn('b', lru)
+        self.assertIn('c', lru)
+        self.assertEqual(lru.size, 8)
+        self.assertIsNone(lru.get('b'))
+
+    def test_too_large(self):
+        lru = cache.LRUCache(10)
+        lru['a'] = 'aaaa'
+        lru['b'] = 'b' * 11
+        self.assertNotIn('b', lru)
+        self.assertEqual(lru.get('a'), 'aaaa')
+        # Replacing an item accounts for the size of the new value only
+        lru['a'] = 'aa'
+        self.assertEqual(lru.size, 2)
+        self.assertEqual(lru.pop('a'), 'aa')
+        self.assertEqual(lru.size, 0)
+        self.assertEqual(len(lru), 0)
+
+    def test_count(self):
+        lru = cache.LRUCache(2, size=lambda item: 1)
+        for key in range(3):
+            lru[key] = 'x' * 100
+        self.assertEqual(len(lru), 2)
+        self.assertNotIn(0, lru)
+
+
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(CacheDictTestCase, needs_daemon=False)
+    run_tests(CacheDictTestCase, LRUCacheTestCase, needs_daemon=False)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.compact_state_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the compact encoding of state returns
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import copy
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils import compact_state
+
+
+def _unchanged(name, run_num):
+    return {'changes': {},
+            'comment': 'File {0} is in the correct state'.format(name),
+            'name': name,
+            'result': True,
+            '__run_num__': run_num,
+            'start_time': '10:00:0{0}.000000'.format(run_num),
+            'duration': 1.5}
+
+
+RUNNING = {
+    'file_|-motd_|-/etc/motd_|-managed': _unchanged('/etc/motd', 0),
+    'file_|-issue_|-/etc/issue_|-managed': _unchanged('/etc/issue', 1),
+    'file_|-hosts_|-hosts_|-managed': _unchanged('/etc/hosts', 2),
+    'pkg_|-vim_|-vim_|-installed': {'changes': {'vim': {'new': '7.4',
+                                                        'old': ''}},
+                                    'comment': 'Installed vim',
+                                    'name': 'vim',
+                                    'result': True,
+                                    '__run_num__': 3,
+                                    'start_time': '10:00:03.000000',
+                                    'duration': 2000.0},
+    'cmd_|-fail_|-false_|-run': {'changes': {},
+                                 'comment': 'Command "false" run',
+                                 'name': 'false',
+                                 'result': False,
+                                 '__run_num__': 4},
+}
+
+
+class CompactStateTestCase(TestCase):
+
+    def test_compact(self):
+        ret = compact_state.compact(copy.deepcopy(RUNNING))
+        self.assertTrue(compact_state.is_compact(ret))
+        # Failed and changed states are kept in full
+        self.assertEqual(ret['pkg_|-vim_|-vim_|-installed'],
+                         RUNNING['pkg_|-vim_|-vim_|-installed'])
+        self.assertEqual(ret['cmd_|-fail_|-false_|-run'],
+                         RUNNING['cmd_|-fail_|-false_|-run'])
+        self.assertNotIn('file_|-motd_|-/etc/motd_|-managed', ret)
+        data = ret[compact_state.COMPACT_KEY]
+        # The comments of the file states are deduplicated
+        self.assertEqual(data['comments'],
+                         [['File ', ' is in the correct state']])
+        self.assertEqual(len(data['states']), 3)
+
+    def test_expand(self):
+        ret = compact_state.compact(copy.deepcopy(RUNNING))
+        self.assertEqual(compact_state.expand(ret), RUNNING)
+
+    def test_passthrough(self):
+        errors = ['Rendering SLS failed']
+        self.assertIs(compact_state.compact(errors), errors)
+        failed = {'cmd_|-fail_|-false_|-run': RUNNING['cmd_|-fail_|-false_|-run']}
+        self.assertIs(compact_state.compact(failed), failed)
+        self.assertIs(compact_state.expand(failed), failed)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(CompactStateTestCase, needs_daemon=False)
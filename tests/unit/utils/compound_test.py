@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.compound_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the compound target parser and its evaluation on the master
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.utils
+import salt.payload
+import salt.utils.minions
+from salt.utils import compound
+
+MINIONS = {'web1': {'os': 'Debian', 'role': 'web'},
+           'web2': {'os': 'RedHat', 'role': 'web'},
+           'db1': {'os': 'Debian', 'role': 'db'},
+           'db2': None}
+
+
+class ParseTestCase(TestCase):
+
+    def _words(self, expr):
+        return [target.word for target in compound.parse(expr).targets()]
+
+    def test_precedence(self):
+        tree = compound.parse('a or b and not c')
+        self.assertIsInstance(tree, compound.Or)
+        self.assertIsInstance(tree.nodes[1], compound.And)
+        self.assertIsInstance(tree.nodes[1].nodes[1], compound.Not)
+
+    def test_cost_order(self):
+        self.assertEqual(self._words('G@os:Debian and web* and L@web1'),
+                         ['L@web1', 'web*', 'G@os:Debian'])
+        self.assertEqual(self._words(['(', 'a', 'and', 'b', ')', 'and', 'c']),
+                         ['a', 'b', 'c'])
+
+    def test_implied(self):
+        tree = compound.parse('web* not web2 or ( db1')
+        self.assertIsInstance(tree, compound.Or)
+        self.assertIsInstance(tree.nodes[0], compound.And)
+        self.assertIsInstance(tree.nodes[1], compound.Target)
+
+    def test_invalid(self):
+        for expr in ('', 'and a', 'a or', 'a b', 'a )', '( or a )'):
+            self.assertRaises(compound.CompoundError, compound.parse, expr)
+
+    def test_cached(self):
+        self.assertIs(compound.parse('a and b'), compound.parse('a and b'))
+
+    def test_match(self):
+        tree = compound.parse('a and not ( b or c )')
+        checked = []
+
+        def check(target):
+            checked.append(target.word)
+            return target.word == 'b'
+
+        self.assertFalse(compound.match(tree, check))
+        self.assertEqual(checked, ['a'])
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class CompoundMinionsTestCase(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.opts = {'pki_dir': os.path.join(self.tmpdir, 'pki'),
+                     'cachedir': os.path.join(self.tmpdir, 'cache'),
+                     'minion_data_cache': True,
+                     'transport': 'zeromq',
+                     'serial': 'msgpack'}
+        os.makedirs(os.path.join(self.opts['pki_dir'], 'minions'))
+        serial = salt.payload.Serial(self.opts)
+        for minion, grains in MINIONS.items():
+            with salt.utils.fopen(os.path.join(self.opts['pki_dir'],
+                                               'minions', minion), 'w') as fp_:
+                fp_.write('key')
+            cdir = os.path.join(self.opts['cachedir'], 'minions', minion)
+            os.makedirs(cdir)
+            if grains is not None:
+                with salt.utils.fopen(os.path.join(cdir, 'data.p'), 'w+b') as fp_:
+                    serial.dump({'grains': grains, 'pillar': {}}, fp_)
+        self.ckminions = salt.utils.minions.CkMinions(self.opts)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _check(self, expr):
+        return sorted(self.ckminions.check_minions(expr, 'compound'))
+
+    def test_compound(self):
+        self.assertEqual(self._check('G@os:Debian and web*'), ['web1'])
+        # minions without cached data may match
+        self.assertEqual(self._check('G@role:db'), ['db1', 'db2'])
+        self.assertEqual(self._check('web1 or not G@os:Debian'),
+                         ['web1', 'web2'])
+        self.assertEqual(self._check('L@web1,db1 and not E@db.*'), ['web1'])
+        self.assertEqual(self._check('web* and'), [])
+        self.assertEqual(self._check('N@group'), [])
+
+    def test_short_circuit(self):
+        load = self.ckminions.serial.load
+        with patch.object(self.ckminions.serial, 'load',
+                          side_effect=load) as mock:
+            self.assertEqual(self._check('G@os:Debian and nope*'), [])
+            self.assertEqual(mock.call_count, 0)
+            self.assertEqual(self._check('G@os:Debian and G@role:web'),
+                             ['db2', 'web1'])
+            # Each minion data is only loaded once for both grain targets
+            self.assertEqual(mock.call_count, 3)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests([ParseTestCase, CompoundMinionsTestCase], needs_daemon=False)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.dbpool_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the returner connection pool and row batcher
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import time
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, call
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils import dbpool
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class ConnectionPoolTestCase(TestCase):
+
+    def test_reuse(self):
+        pool = dbpool.ConnectionPool(MagicMock, size=1)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(pool.connections_created, 1)
+
+        # A second connection does not fit into a pool of size 1
+        other = pool.acquire()
+        pool.release(conn)
+        pool.release(other)
+        other.close.assert_called_once_with()
+
+    def test_discard_broken(self):
+        def _check(conn):
+            if conn.broken:
+                raise Exception('gone away')
+        pool = dbpool.ConnectionPool(MagicMock, check=_check, check_interval=0)
+        conn = pool.acquire()
+        conn.broken = True
+        pool.release(conn)
+        new = pool.acquire()
+        self.assertIsNot(new, conn)
+        conn.close.assert_called_once_with()
+
+    def test_connection_rollback(self):
+        pool = dbpool.ConnectionPool(MagicMock)
+        with self.assertRaises(ValueError):
+            with pool.connection() as conn:
+                raise ValueError()
+        conn.rollback.assert_called_once_with()
+        self.assertFalse(conn.commit.called)
+        self.assertIs(pool.acquire(), conn)
+
+    def test_get_pool(self):
+        connect = MagicMock()
+        pool = dbpool.get_pool('test', {'host': 'a'}, connect)
+        self.assertIs(dbpool.get_pool('test', {'host': 'a'}, connect), pool)
+        self.assertIsNot(dbpool.get_pool('test', {'host': 'b'}, connect), pool)
+        pool.acquire()
+        connect.assert_called_once_with({'host': 'a'})
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class RowBatcherTestCase(TestCase):
+
+    def setUp(self):
+        self.batches = []
+
+    def test_flush_on_size(self):
+        batcher = dbpool.RowBatcher(self.batches.append, size=2, timeout=60)
+        batcher.add(1)
+        self.assertEqual(self.batches, [])
+        batcher.add(2)
+        batcher.add(3)
+        self.assertEqual(self.batches, [[1, 2]])
+        batcher.flush()
+        self.assertEqual(self.batches, [[1, 2], [3]])
+        self.assertEqual(batcher.rows_written, 3)
+
+    def test_flush_on_timeout(self):
+        batcher = dbpool.RowBatcher(self.batches.append, size=100, timeout=0.1)
+        batcher.add(1)
+        batcher.flush(force=False)
+        self.assertEqual(self.batches, [])
+        time.sleep(0.2)
+        batcher.flush(force=False)
+        self.assertEqual(self.batches, [[1]])
+
+    def test_write_failure(self):
+        write = MagicMock(side_effect=[Exception('gone'), None, None])
+        batcher = dbpool.RowBatcher(write, size=2, timeout=60)
+        batcher.add(1)
+        batcher.add(2)
+        # The failed rows are queued again, and not retried on every row
+        batcher.add(3)
+        batcher.add(4)
+        self.assertEqual(write.call_count, 1)
+        batcher.flush()
+        self.assertEqual([call[0][0] for call in write.call_args_list],
+                         [[1, 2], [1, 2], [3, 4]])
+        self.assertEqual(batcher.rows_written, 4)
+
+    def test_max_queued(self):
+        write = MagicMock(side_effect=Exception('gone'))
+        batcher = dbpool.RowBatcher(write, size=2, timeout=60, max_queued=3)
+        for row in range(5):
+            batcher.add(row)
+        batcher.flush()
+        self.assertEqual(batcher.rows_dropped, 2)
+        write.side_effect = None
+        batcher.flush()
+        self.assertEqual(write.call_args_list[-2:],
+                         [call([2, 3]), call([4])])
+
+    def test_get_batcher(self):
+        options = {'batch_size': 100, 'batch_timeout': 0.1}
+        batcher = dbpool.get_batcher(
+            'test', options, lambda opts, rows: self.batches.append(rows)
+        )
+        self.assertIs(dbpool.get_batcher('test', options, None), batcher)
+        batcher.add(1)
+        # Written by the flusher thread once due
+        for _ in range(20):
+            if self.batches:
+                break
+            time.sleep(0.1)
+        self.assertEqual(self.batches, [[1]])
+        # Written by the exit hook
+        batcher.timeout = 60
+        batcher.add(2)
+        dbpool._flush_all(force=True)
+        self.assertEqual(self.batches, [[1], [2]])
+
+    def test_values_clause(self):
+        self.assertEqual(
+            dbpool.values_clause([(1, 2), (3, 4)]),
+            ('VALUES (%s, %s), (%s, %s)', [1, 2, 3, 4])
+        )
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(ConnectionPoolTestCase, RowBatcherTestCase, needs_daemon=False)
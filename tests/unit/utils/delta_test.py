@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.delta_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the block based delta encoding of files
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import copy
+import io
+import os
+import random
+import shutil
+import tempfile
+import zlib
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.config
+import salt.fileserver
+import salt.utils
+from salt.utils import delta
+
+BLOCK = delta.MIN_BLOCK_SIZE
+
+
+def _data(size, seed=0):
+    rand = random.Random(seed)
+    return bytes(bytearray(rand.randint(0, 255) for _ in range(size)))
+
+
+def _roundtrip(old, new, max_literal=None, max_miss=None):
+    sigs = delta.signatures(io.BytesIO(old), BLOCK)
+    ops = delta.delta(io.BytesIO(new), sigs, BLOCK, max_literal, max_miss)
+    if ops is None:
+        return None, None
+    out = io.BytesIO()
+    delta.patch(io.BytesIO(old), ops, BLOCK, out)
+    return ops, out.getvalue()
+
+
+class DeltaTestCase(TestCase):
+
+    def test_roll(self):
+        data = bytearray(_data(BLOCK + 100))
+        weak = delta.weak_sum(bytes(data[:BLOCK]))
+        for pos in range(100):
+            weak = delta.roll(weak, data[pos], data[pos + BLOCK], BLOCK)
+            self.assertEqual(
+                weak,
+                zlib.adler32(bytes(data[pos + 1:pos + 1 + BLOCK])) & 0xffffffff
+            )
+
+    def test_block_size(self):
+        self.assertEqual(delta.block_size(0), delta.MIN_BLOCK_SIZE)
+        self.assertEqual(delta.block_size(100 * 1024 * 1024), 10240)
+        self.assertEqual(delta.block_size(2 ** 40), delta.MAX_BLOCK_SIZE)
+
+    def test_delta_insert(self):
+        old = _data(BLOCK * 20 + 10)
+        new = old[:BLOCK * 5 + 7] + b'inserted' + old[BLOCK * 5 + 7:BLOCK * 15] \
+            + old[BLOCK * 16:]
+        ops, patched = _roundtrip(old, new)
+        self.assertEqual(patched, new)
+        self.assertEqual(ops[0], [0, 5])
+        literal = sum(len(op) for op in ops if not isinstance(op, list))
+        self.assertTrue(literal < BLOCK * 2)
+
+    def test_delta_max_literal(self):
+        old = _data(BLOCK * 10)
+        new = _data(BLOCK * 10, seed=1)
+        self.assertEqual(_roundtrip(old, new, BLOCK * 5), (None, None))
+        ops, patched = _roundtrip(old, new)
+        self.assertEqual(ops, [new])
+        self.assertEqual(patched, new)
+
+
+    def test_delta_chunks(self):
+        old = _data(BLOCK * 20 + 10)
+        new = b'head' + old[:BLOCK * 5 + 7] + _data(BLOCK * 4, seed=1) \
+            + old[BLOCK * 6:]
+        expected, _ = _roundtrip(old, new)
+        # Chunks which do not fall on block boundaries give the same delta
+        for chunk_size in (BLOCK, BLOCK * 3 + 5):
+            with patch.object(delta, 'CHUNK_SIZE', chunk_size):
+                ops, patched = _roundtrip(old, new)
+            self.assertEqual(patched, new)
+            self.assertEqual([op for op in ops if isinstance(op, list)],
+                             [op for op in expected if isinstance(op, list)])
+            self.assertEqual(b''.join(op for op in ops
+                                      if not isinstance(op, list)),
+                             b''.join(op for op in expected
+                                      if not isinstance(op, list)))
+
+    def test_delta_max_miss(self):
+        old = _data(BLOCK * 10)
+        # A small change at the start is fine
+        new = b'x' * 10 + old
+        ops, patched = _roundtrip(old, new, max_miss=2)
+        self.assertEqual(patched, new)
+        # Nothing found in the first blocks
+        new = _data(BLOCK * 3, seed=1) + old
+        self.assertEqual(_roundtrip(old, new, max_miss=2), (None, None))
+
+
+class FileDeltaTestCase(TestCase):
+    '''
+    Test the deltas returned by the fileserver of the master
+    '''
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp, 'roots')
+        os.makedirs(self.root)
+        self.opts = copy.deepcopy(salt.config.DEFAULT_MASTER_OPTS)
+        self.opts.update({
+            'file_roots': {'base': [self.root]},
+            'cachedir': os.path.join(self.tmp, 'cache'),
+            'fileserver_backend': ['roots'],
+            'fileserver_inotify': False,
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _file_delta(self, old, new, **kwargs):
+        with salt.utils.fopen(os.path.join(self.root, 'big'), 'wb') as fp_:
+            fp_.write(new)
+        size = delta.block_size(len(old))
+        load = {'path': 'big',
+                'saltenv': 'base',
+                'signatures': delta.signatures(io.BytesIO(old), size),
+                'block_size': size}
+        load.update(kwargs)
+        fileserver = salt.fileserver.Fileserver(self.opts)
+        return size, fileserver.file_delta(load)
+
+    def test_file_delta(self):
+        old = _data(BLOCK * 40)
+        new = old[:BLOCK * 10 + 3] + b'inserted' + old[BLOCK * 10 + 3:]
+        size, ret = self._file_delta(old, new)
+        self.assertEqual(ret['dest'], 'big')
+        self.assertIsNotNone(ret['delta'])
+        literal = sum(len(op) for op in ret['delta']
+                      if not isinstance(op, list))
+        self.assertTrue(literal < size * 2)
+        out = io.BytesIO()
+        delta.patch(io.BytesIO(old), ret['delta'], size, out)
+        self.assertEqual(out.getvalue(), new)
+
+    def test_file_delta_changed(self):
+        # No delta when more than half of the file changed
+        old = _data(BLOCK * 40)
+        _, ret = self._file_delta(old, _data(BLOCK * 40, seed=1))
+        self.assertIsNone(ret['delta'])
+
+    def test_file_delta_max_size(self):
+        old = _data(BLOCK * 40)
+        new = old[:BLOCK * 10] + b'inserted' + old[BLOCK * 10:]
+        self.opts['file_delta_max_size'] = BLOCK * 40
+        _, ret = self._file_delta(old, new)
+        self.assertIsNone(ret['delta'])
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(DeltaTestCase, FileDeltaTestCase, needs_daemon=False)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.gitfs_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the file lists built from the git trees by the gitfs providers
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils import gitfs
+
+MODE_FILE = stat.S_IFREG | 0o644
+MODE_LINK = stat.S_IFLNK
+MODE_DIR = stat.S_IFDIR
+
+
+class FakeProvider(gitfs.GitProvider):
+    '''
+    A provider reading the trees from a dict of objects by SHA, trees are
+    tuples of their SHA and their entries
+    '''
+    def __init__(self, root='', mountpoint=''):  # pylint: disable=W0231
+        self.role = 'gitfs'
+        self.id = 'fake'
+        self.cachedir = '/fake'
+        self.root = root
+        self.mountpoint = mountpoint
+        self.objects = {}
+        self.head = None
+        self.reads = []
+        self.files = {}
+
+    def blob(self, data):
+        sha = hashlib.sha1(data).hexdigest()
+        self.objects[sha] = data
+        return sha
+
+    def tree(self, entries):
+        entries = sorted(entries)
+        sha = hashlib.sha1(repr(entries).encode('utf-8')).hexdigest()
+        self.objects[sha] = (sha, entries)
+        return sha
+
+    def get_tree(self, tgt_env):
+        return self.objects.get(self.head)
+
+    def _blob_data(self, sha):
+        return self.objects[sha]
+
+    def _tree_by_sha(self, sha):
+        self.reads.append(sha)
+        return self.objects[sha]
+
+    def _tree_entries(self, tree):
+        return tree[1]
+
+    def _tree_sha(self, tree):
+        return tree[0]
+
+    def find_file(self, path, tgt_env):
+        sha = self.files.get(path)
+        return sha, sha
+
+    def read_blob(self, blob, max_size=None):
+        return self.objects[blob]
+
+    def write_file(self, blob, dest):
+        with open(dest, 'wb') as fp_:
+            fp_.write(self.objects[blob])
+
+
+class GitProviderListsTestCase(TestCase):
+
+    def setUp(self):
+        gitfs._LISTS.clear()
+        self.repo = FakeProvider()
+        repo = self.repo
+        self.nginx = repo.tree([
+            ('init.sls', repo.blob(b'nginx'), MODE_FILE),
+            ('files', repo.tree([
+                ('nginx.conf', repo.blob(b'conf'), MODE_FILE),
+            ]), MODE_DIR),
+        ])
+        self.php = repo.tree([
+            ('init.sls', repo.blob(b'php'), MODE_FILE),
+        ])
+        repo.head = repo.tree([
+            ('top.sls', repo.blob(b'top'), MODE_FILE),
+            ('nginx', self.nginx, MODE_DIR),
+            ('php', self.php, MODE_DIR),
+            ('vendor', 'f' * 40, gitfs.S_IFGITLINK),
+        ])
+
+    def test_walk(self):
+        files, symlinks = self.repo.file_list('base')
+        self.assertEqual(
+            sorted(files),
+            ['nginx/files/nginx.conf', 'nginx/init.sls', 'php/init.sls',
+             'top.sls']
+        )
+        self.assertEqual(symlinks, {})
+        self.assertEqual(sorted(self.repo.dir_list('base')),
+                         ['nginx', 'nginx/files', 'php'])
+
+    def test_root_mountpoint(self):
+        repo = self.repo
+        repo.root = 'nginx'
+        repo.mountpoint = 'web'
+        files, _ = repo.file_list('base')
+        self.assertEqual(sorted(files),
+                         ['web/files/nginx.conf', 'web/init.sls'])
+        self.assertEqual(sorted(repo.dir_list('base')),
+                         ['web', 'web/files'])
+        repo.root = 'missing'
+        self.assertEqual(repo.file_list('base'), (set(), {}))
+
+    def test_diff(self):
+        repo = self.repo
+        repo.file_list('base')
+        repo.reads = []
+        # Change a file, turn a directory into a symlink and add a directory
+        repo.head = repo.tree([
+            ('top.sls', repo.blob(b'new top'), MODE_FILE),
+            ('nginx', self.nginx, MODE_DIR),
+            ('php', repo.blob(b'nginx'), MODE_LINK),
+            ('db', repo.tree([
+                ('init.sls', repo.blob(b'db'), MODE_FILE),
+            ]), MODE_DIR),
+        ])
+        files, symlinks = repo.file_list('base')
+        dirs = repo.dir_list('base')
+        # The unchanged nginx tree was not read again
+        self.assertNotIn(self.nginx, repo.reads)
+
+        gitfs._LISTS.clear()
+        self.assertEqual((files, symlinks), repo.file_list('base'))
+        self.assertEqual(dirs, repo.dir_list('base'))
+        self.assertEqual(symlinks, {'php': b'nginx'})
+        self.assertEqual(sorted(dirs), ['db', 'nginx', 'nginx/files'])
+
+
+class GitFSFindFileTestCase(TestCase):
+
+    def setUp(self):
+        gitfs._WRITTEN.clear()
+        self.cache_root = tempfile.mkdtemp()
+        self.repo = FakeProvider()
+        self.gitfs = gitfs.GitFS.__new__(gitfs.GitFS)
+        self.gitfs.opts = {'gitfs_blob_cache_size': 0}
+        self.gitfs.cache_root = self.cache_root
+        self.gitfs.hash_cachedir = os.path.join(self.cache_root, 'hash')
+        self.gitfs.remotes = [self.repo]
+        patcher = patch.object(gitfs.GitFS, 'envs',
+                               return_value=['base'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        gitfs._WRITTEN.clear()
+        shutil.rmtree(self.cache_root)
+
+    def _read(self, path):
+        with open(path, 'rb') as fp_:
+            return fp_.read()
+
+    def test_rewritten_by_other_process(self):
+        repo = self.repo
+        repo.files['top.sls'] = repo.blob(b'top')
+        fnd = self.gitfs.find_file('top.sls')
+        self.assertEqual(self._read(fnd['path']), b'top')
+
+        # Another process caches a newer blob of the file
+        new_sha = repo.blob(b'new top')
+        with open(fnd['path'], 'wb') as fp_:
+            fp_.write(b'new top')
+        with open(os.path.join(self.gitfs.hash_cachedir, 'base',
+                               'top.sls.hash.blob_sha1'), 'w') as fp_:
+            fp_.write(new_sha)
+
+        # This process still sees the old blob and writes it again
+        fnd = self.gitfs.find_file('top.sls')
+        self.assertEqual(self._read(fnd['path']), b'top')
+
+    def test_not_written_again(self):
+        repo = self.repo
+        repo.files['top.sls'] = repo.blob(b'top')
+        self.gitfs.find_file('top.sls')
+        with patch.object(repo, 'write_file') as write_file:
+            fnd = self.gitfs.find_file('top.sls')
+        self.assertFalse(write_file.called)
+        self.assertEqual(self._read(fnd['path']), b'top')
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(GitProviderListsTestCase, GitFSFindFileTestCase,
+              needs_daemon=False)
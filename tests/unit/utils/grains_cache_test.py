@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.grains_cache_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the per grain function cache
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import time
+import shutil
+import tempfile
+import threading
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils import grains_cache
+
+
+class GrainsFuncCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.opts = {'cachedir': self.cachedir,
+                     'grains_func_cache': True,
+                     'grains_cache_expiration': 300,
+                     'grains_cache_ttl': {'core._hw*': 3600,
+                                          'core.fqdn_ip4': 10}}
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def _grain(self, key, ret):
+        def _fun():
+            self.calls.append(key)
+            return ret
+        return (key, _fun)
+
+    def test_ttl(self):
+        cache = grains_cache.GrainsFuncCache(self.opts)
+        self.assertEqual(cache.ttl('core.fqdn_ip4'), 10)
+        self.assertEqual(cache.ttl('core._hw_data'), 3600)
+        self.assertEqual(cache.ttl('core.hostname'), 300)
+
+    def test_merge_order(self):
+        funcs = [self._grain('core.a', {'foo': 'core'}),
+                 self._grain('custom.b', {'foo': 'custom'})]
+        for parallel in (False, True):
+            ret = grains_cache.generate(
+                dict(self.opts, grains_func_cache=False,
+                     grains_parallel=parallel),
+                funcs
+            )
+            self.assertEqual(ret, {'foo': 'custom'})
+
+    def test_cached_funcs_not_rerun(self):
+        funcs = [self._grain('core._hw_data', {'serial': 'abc'}),
+                 self._grain('core.fqdn_ip4', {'fqdn_ip4': ['10.0.0.1']})]
+        grains_cache.generate(self.opts, funcs)
+        self.assertEqual(self.calls, ['core._hw_data', 'core.fqdn_ip4'])
+
+        # Expire only the network grain
+        cache = grains_cache.GrainsFuncCache(self.opts)
+        entries = cache.load()
+        entries['core.fqdn_ip4']['time'] = time.time() - 60
+        cache.store(entries)
+
+        self.calls = []
+        ret = grains_cache.generate(self.opts, funcs)
+        self.assertEqual(self.calls, ['core.fqdn_ip4'])
+        self.assertEqual(ret, {'serial': 'abc', 'fqdn_ip4': ['10.0.0.1']})
+
+        self.calls = []
+        grains_cache.generate(self.opts, funcs, force_refresh=True)
+        self.assertEqual(self.calls, ['core._hw_data', 'core.fqdn_ip4'])
+
+    def test_refresh_background(self):
+        opts = dict(self.opts, grains_refresh_background=True)
+        funcs = [self._grain('core.fqdn_ip4', {'fqdn_ip4': ['10.0.0.1']})]
+        grains_cache.generate(opts, funcs)
+        cache = grains_cache.GrainsFuncCache(opts)
+        entries = cache.load()
+        entries['core.fqdn_ip4']['time'] = time.time() - 60
+        cache.store(entries)
+
+        funcs = [self._grain('core.fqdn_ip4', {'fqdn_ip4': ['10.0.0.2']})]
+        ret = grains_cache.generate(opts, funcs)
+        # The stale grains are served right away
+        self.assertEqual(ret, {'fqdn_ip4': ['10.0.0.1']})
+        threads = [thread for thread in threading.enumerate()
+                   if thread.name == 'GrainsRefresh']
+        for thread in threads:
+            # A hung refresh does not block the exit of the interpreter
+            self.assertTrue(thread.daemon)
+        # The refresh is waited for at exit
+        grains_cache._join_refreshes()
+        self.assertEqual(cache.load()['core.fqdn_ip4']['data'],
+                         {'fqdn_ip4': ['10.0.0.2']})
+
+    def test_refresh_background_timeout(self):
+        opts = dict(self.opts, grains_refresh_background=True,
+                    grains_refresh_timeout=0.2)
+        funcs = [self._grain('core.fqdn_ip4', {'fqdn_ip4': ['10.0.0.1']})]
+        grains_cache.generate(opts, funcs)
+        cache = grains_cache.GrainsFuncCache(opts)
+        entries = cache.load()
+        entries['core.fqdn_ip4']['time'] = time.time() - 60
+        cache.store(entries)
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def _hung():
+            release.wait(10)
+            return {'fqdn_ip4': ['10.0.0.2']}
+        grains_cache.generate(opts, [('core.fqdn_ip4', _hung)])
+        threads = [thread for thread in threading.enumerate()
+                   if thread.name == 'GrainsRefresh']
+        start = time.time()
+        grains_cache._join_refreshes()
+        self.assertLess(time.time() - start, 5)
+
+        # The abandoned refresh does not update the cache once it returns
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(cache.load()['core.fqdn_ip4']['data'],
+                         {'fqdn_ip4': ['10.0.0.1']})
+
+    def test_timeout(self):
+        def _slow():
+            time.sleep(2)
+            return {'slow': True}
+        funcs = [('core.slow', _slow), self._grain('core.fast', {'a': 1})]
+        ret = grains_cache.call_grain_funcs(funcs, parallel=True, timeout=0.2)
+        self.assertEqual(ret, {'core.fast': {'a': 1}})
+
+    def test_timeout_all_workers(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def _hung():
+            release.wait(10)
+            return {'hung': True}
+        funcs = [('core.hung', _hung), self._grain('core.fast', {'a': 1})]
+        # The only worker is stuck in the hung function, the queued one must
+        # still run
+        start = time.time()
+        ret = grains_cache.call_grain_funcs(funcs, parallel=True, workers=1,
+                                            timeout=0.2)
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(ret, {'core.fast': {'a': 1}})
+
+    def test_failing_func(self):
+        def _broken():
+            raise RuntimeError('broken')
+        funcs = [('custom.broken', _broken), self._grain('core.a', {'a': 1})]
+        ret = grains_cache.call_grain_funcs(funcs)
+        self.assertEqual(ret, {'core.a': {'a': 1}})
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(GrainsFuncCacheTestCase, needs_daemon=False)
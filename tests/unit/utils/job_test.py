@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.job_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test storing minion returns in the master job cache
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+import time
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.payload
+from salt.utils import job
+
+OPTS = {'id': 'master',
+        'master_job_cache': 'local_cache',
+        'job_cache': True,
+        'ext_job_cache': '',
+        'pki_dir': '/etc/salt/pki/master'}
+
+LOAD = {'jid': '20151019123456123456',
+        'id': 'minion',
+        'fun': 'test.ping',
+        'return': True}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class StoreJobTestCase(TestCase):
+
+    def _mminion(self):
+        mminion = MagicMock()
+        mminion.returners = {'local_cache.prep_jid': MagicMock(),
+                             'local_cache.get_load': MagicMock(return_value={}),
+                             'local_cache.save_load': MagicMock(),
+                             'local_cache.returner': MagicMock()}
+        return mminion
+
+    def test_store_job(self):
+        mminion = self._mminion()
+        event = MagicMock()
+        job.store_job(OPTS, dict(LOAD), event=event, mminion=mminion)
+        self.assertTrue(event.fire_event.called)
+        mminion.returners['local_cache.prep_jid'].assert_called_once_with(
+            False, passed_jid=LOAD['jid']
+        )
+        self.assertTrue(mminion.returners['local_cache.returner'].called)
+
+    def test_store_job_queued(self):
+        mminion = self._mminion()
+        event = MagicMock()
+        queue = MagicMock()
+        queue.put.return_value = True
+        job.store_job(OPTS, dict(LOAD), event=event, mminion=mminion,
+                      queue=queue)
+        self.assertTrue(event.fire_event.called)
+        self.assertTrue(queue.put.called)
+        self.assertFalse(mminion.returners['local_cache.prep_jid'].called)
+        self.assertFalse(mminion.returners['local_cache.returner'].called)
+
+        # A full queue makes the caller write the return
+        queue.put.return_value = False
+        job.store_job(OPTS, dict(LOAD), mminion=mminion, queue=queue)
+        self.assertTrue(mminion.returners['local_cache.returner'].called)
+
+    def test_store_job_order(self):
+        # Without a writer the jid is stored before the event is fired, and
+        # the return is written after it
+        calls = []
+        mminion = self._mminion()
+        mminion.returners['local_cache.prep_jid'].side_effect = \
+            lambda *args, **kwargs: calls.append('prep_jid')
+        mminion.returners['local_cache.returner'].side_effect = \
+            lambda *args, **kwargs: calls.append('returner')
+        event = MagicMock()
+        event.fire_event.side_effect = \
+            lambda *args, **kwargs: calls.append('event')
+        job.store_job(OPTS, dict(LOAD), event=event, mminion=mminion)
+        self.assertEqual(calls, ['prep_jid', 'event', 'returner'])
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(not job.HAS_ZMQ, 'zmq is not installed')
+class JobCacheWriterTestCase(TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.opts = dict(OPTS,
+                         cachedir=self.cachedir,
+                         job_cache_writer_batch_size=2,
+                         job_cache_writer_batch_timeout=0.5,
+                         job_cache_writer_hwm=3,
+                         job_cache_writer_durable=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir)
+
+    def _writer(self):
+        writer = job.JobCacheWriter(self.opts)
+        writer.serial = salt.payload.Serial(self.opts)
+        writer.mminion = MagicMock()
+        writer.event = MagicMock()
+        return writer
+
+    def _socket(self, count):
+        serial = salt.payload.Serial(self.opts)
+        msgs = [serial.dumps({'load': dict(LOAD, jid=str(num)),
+                              'endtime': '',
+                              'store_jid': True})
+                for num in range(count)]
+        socket = MagicMock()
+        socket.recv.side_effect = lambda flags: msgs.pop(0)
+        return socket
+
+    def test_receive(self):
+        writer = self._writer()
+        # Only job_cache_writer_hwm returns are read off the socket
+        self.assertEqual(writer.receive(self._socket(5)), 3)
+        writer.fire_stats()
+        self.assertEqual(writer.event.fire_event.call_args[0][0]['queue_depth'],
+                         3)
+
+    def test_journal(self):
+        writer = self._writer()
+        writer.receive(self._socket(3))
+        # The returns are journaled before they are written
+        self.assertTrue(os.path.isfile(writer.journal))
+
+        with patch('salt.utils.job.write_job_cache') as write_job_cache:
+            writer.flush()
+            self.assertEqual(write_job_cache.call_count, 2)
+            # A crashed writer replays the returns it did not write
+            self.assertEqual(self._replayed(), ['2'])
+            writer.flush()
+        self.assertFalse(os.path.isfile(writer.journal))
+        self.assertEqual(writer.stats['written'], 3)
+
+    def _replayed(self):
+        writer = self._writer()
+        # Do not touch the journal of the writer under test
+        with patch('os.remove'):
+            writer._replay_journal()
+        return [item['load']['jid'] for item, _ in writer.queue]
+
+    def test_write_failure(self):
+        writer = self._writer()
+        writer.receive(self._socket(3))
+        with patch('salt.utils.job.write_job_cache',
+                   side_effect=[Exception('down'), None]):
+            writer.flush()
+        # The failed return is queued and journaled again, after the others
+        self.assertEqual([item['load']['jid'] for item, _ in writer.queue],
+                         ['2', '0'])
+        self.assertEqual(self._replayed(), ['2', '0'])
+        self.assertTrue(writer.retry_at > time.time())
+
+        # It is dropped after max_attempts
+        writer.max_attempts = 2
+        with patch('salt.utils.job.write_job_cache',
+                   side_effect=[None, Exception('down')]):
+            writer.flush()
+        self.assertEqual(writer.stats['dropped'], 1)
+        self.assertFalse(writer.queue)
+        self.assertFalse(os.path.isfile(writer.journal))
+
+    def test_journal_compact(self):
+        writer = self._writer()
+        writer.receive(self._socket(3))
+        size = os.path.getsize(writer.journal)
+        with patch('salt.utils.job.write_job_cache'):
+            writer.flush(1)
+            # The written return is skipped by the checkpoint
+            self.assertEqual(os.path.getsize(writer.journal), size)
+            self.assertEqual(self._replayed(), ['1', '2'])
+            writer.journal_compact_size = 1
+            writer.flush(1)
+        self.assertTrue(os.path.getsize(writer.journal) < size / 2)
+        self.assertEqual(self._replayed(), ['2'])
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(StoreJobTestCase, JobCacheWriterTestCase, needs_daemon=False)
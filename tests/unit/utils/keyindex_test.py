@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.keyindex_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the in memory minion key index
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import time
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.utils
+from salt.utils import keyindex
+
+STATUSES = ['minions', 'minions_pre', 'minions_rejected']
+
+
+class KeyIndexTestCase(TestCase):
+
+    def setUp(self):
+        self.pki_dir = tempfile.mkdtemp()
+        for status in STATUSES:
+            os.makedirs(os.path.join(self.pki_dir, status))
+        for minion in ('web1', 'web2', 'Db1', '.hidden'):
+            self._touch('minions', minion)
+        self._touch('minions_pre', 'new1')
+        os.makedirs(os.path.join(self.pki_dir, 'minions', 'not_a_key'))
+        self.index = keyindex.KeyIndex(self.pki_dir, STATUSES)
+
+    def tearDown(self):
+        shutil.rmtree(self.pki_dir, ignore_errors=True)
+
+    def _touch(self, status, minion):
+        with salt.utils.fopen(
+                os.path.join(self.pki_dir, status, minion), 'w') as fp_:
+            fp_.write('key')
+
+    def test_listing(self):
+        self.assertEqual(self.index.all(),
+                         {'minions': ['Db1', 'web1', 'web2'],
+                          'minions_pre': ['new1'],
+                          'minions_rejected': []})
+        self.assertEqual(self.index.status('new1'), 'minions_pre')
+        self.assertIsNone(self.index.status('nope'))
+
+    def test_match(self):
+        self.assertEqual(self.index.glob('minions', 'web*'), ['web1', 'web2'])
+        self.assertEqual(self.index.glob('minions', 'web1'), ['web1'])
+        self.assertEqual(self.index.glob('minions', 'web3'), [])
+        self.assertEqual(self.index.pcre('minions', r'(db|Db)\d'), ['Db1'])
+
+    def test_refresh_on_change(self):
+        self.assertEqual(self.index.keys('minions_pre'), ['new1'])
+        shutil.move(os.path.join(self.pki_dir, 'minions_pre', 'new1'),
+                    os.path.join(self.pki_dir, 'minions', 'new1'))
+        self.assertEqual(self.index.keys('minions_pre'), [])
+        self.assertTrue(self.index.contains('minions', 'new1'))
+
+    def test_cached_listing(self):
+        # Age the directory so that its listing is trusted
+        path = os.path.join(self.pki_dir, 'minions')
+        mtime = time.time() - 60
+        os.utime(path, (mtime, mtime))
+        keys = self.index.keys('minions')
+        self.assertIs(self.index.keys('minions'), keys)
+        self._touch('minions', 'web3')
+        self.assertIn('web3', self.index.keys('minions'))
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(KeyIndexTestCase, needs_daemon=False)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.mine_store_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the in-memory mine index of the master MineStore
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import time
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.payload
+import salt.utils
+import salt.utils.cache
+from salt.utils.master import MineStore
+
+
+class MineStoreTestCase(TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.opts = {'cachedir': self.cachedir,
+                     'sock_dir': self.cachedir,
+                     'serial': 'msgpack'}
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def test_index(self):
+        store = MineStore(self.opts)
+        store.update('web1', {'network.ip_addrs': ['10.0.0.1'],
+                              'grains.items': {'os': 'Debian'}})
+        store.update('web2', {'network.ip_addrs': ['10.0.0.2']})
+        self.assertEqual(
+            store.get('network.ip_addrs'),
+            {'web1': ['10.0.0.1'], 'web2': ['10.0.0.2']}
+        )
+        self.assertEqual(
+            store.get('network.ip_addrs', ['web2', 'db1']),
+            {'web2': ['10.0.0.2']}
+        )
+
+        # An update replaces all of the mine data of the minion
+        store.update('web1', {'network.ip_addrs': ['10.0.0.3']})
+        self.assertEqual(store.get('grains.items'), {})
+
+        store.delete('web2', 'network.ip_addrs')
+        self.assertEqual(store.get('network.ip_addrs'),
+                         {'web1': ['10.0.0.3']})
+        store.flush('web1')
+        self.assertEqual(store.index, {})
+
+    def test_load(self):
+        serial = salt.payload.Serial(self.opts)
+        mdir = os.path.join(self.cachedir, 'minions', 'web1')
+        os.makedirs(mdir)
+        with salt.utils.fopen(os.path.join(mdir, 'mine.p'), 'w+b') as fp_:
+            fp_.write(serial.dumps({'test.ping': True}))
+        store = MineStore(self.opts)
+        store.load()
+        self.assertEqual(store.get('test.ping', ['web1']), {'web1': True})
+
+
+@skipIf(not salt.utils.cache.HAS_ZMQ, 'zmq is not installed')
+class MineStoreCliTestCase(TestCase):
+
+    def setUp(self):
+        self.sock_dir = tempfile.mkdtemp()
+        self.opts = {'sock_dir': self.sock_dir,
+                     'serial': 'msgpack',
+                     'mine_store_timeout': 0.1}
+
+    def tearDown(self):
+        shutil.rmtree(self.sock_dir, ignore_errors=True)
+
+    def test_mine_store_cli(self):
+        client = salt.utils.cache.mine_store_cli(self.opts)
+        self.assertIs(salt.utils.cache.mine_store_cli(self.opts), client)
+
+    def test_retry_interval(self):
+        client = salt.utils.cache.MineStoreCli(self.opts)
+        # Nothing answers on the socket
+        start = time.time()
+        self.assertIsNone(client.get('test.ping'))
+        self.assertGreaterEqual(time.time() - start, 0.1)
+        # The following lookups do not wait for the MineStore
+        start = time.time()
+        self.assertIsNone(client.get('test.ping'))
+        self.assertLess(time.time() - start, 0.1)
+        self.assertIsNone(client.req_out)
+        client.retry_at = 0
+        self.assertIsNone(client.get('test.ping'))
+        self.assertGreater(client.retry_at, time.time())
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(MineStoreTestCase, MineStoreCliTestCase, needs_daemon=False)
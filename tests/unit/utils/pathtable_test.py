@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.pathtable_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the memory mapped tables of the file list caches
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.utils
+import salt.utils.locales
+from salt.utils import pathtable
+
+FILE_LISTS = {
+    'files': ['web/init.sls', 'top.sls', 'web/files/nginx.conf', 'webapp.sls',
+              u'web/files/caf\xe9.html'],
+    'dirs': set(['web', 'web/files']),
+    'empty_dirs': [],
+    'symlinks': {'web/current': 'web/files', 'top': 'top.sls'},
+}
+
+
+class PathTableTestCase(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'base.p')
+        pathtable.write(self.path, FILE_LISTS)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_get(self):
+        table = pathtable.PathTable(self.path)
+        files = table.get('files')
+        self.assertEqual(len(files), 5)
+        self.assertEqual(set(salt.utils.locales.sdecode(x) for x in files),
+                         set(FILE_LISTS['files']))
+        self.assertEqual(table.get('dirs'), ['web', 'web/files'])
+        self.assertEqual(table.get('empty_dirs'), [])
+        self.assertEqual(table.get('links'), [])
+        self.assertEqual(table.get('symlinks'), FILE_LISTS['symlinks'])
+        table.close()
+
+    def test_prefix(self):
+        table = pathtable.PathTable(self.path)
+        self.assertEqual(table.get('files', 'web/files/nginx'),
+                         ['web/files/nginx.conf'])
+        self.assertEqual(len(table.get('files', 'web/')), 3)
+        self.assertEqual(len(table.get('files', 'web')), 4)
+        self.assertEqual(table.get('files', 'zzz'), [])
+        self.assertEqual(table.get('symlinks', 'web/'),
+                         {'web/current': 'web/files'})
+        table.close()
+
+    def test_replace(self):
+        table = pathtable.PathTable(self.path)
+        pathtable.write(self.path, {'files': ['top.sls']})
+        # The mapped table is unchanged, a new mapping sees the new table
+        self.assertEqual(len(table.get('files')), 5)
+        new_table = pathtable.PathTable(self.path)
+        self.assertNotEqual(new_table.key, table.key)
+        self.assertEqual(new_table.get('files'), ['top.sls'])
+        table.close()
+        new_table.close()
+        self.assertEqual(os.listdir(self.tmp), ['base.p'])
+
+    def test_invalid(self):
+        with salt.utils.fopen(self.path, 'wb') as fp_:
+            fp_.write(b'\x84\xa5files\x90')
+        self.assertRaises(ValueError, pathtable.PathTable, self.path)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(PathTableTestCase, needs_daemon=False)
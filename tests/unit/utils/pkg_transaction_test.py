@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.pkg_transaction_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the parsing of the output of package transactions
+'''
+
+# Import python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.utils.pkg.deb
+import salt.utils.pkg.rpm
+
+APT_INSTALL = '''\
+Reading package lists...
+The following NEW packages will be installed:
+  libfoo1:i386 vim
+Preparing to unpack .../vim_2%3a7.4.052-1ubuntu3_amd64.deb ...
+Unpacking vim (2:7.4.052-1ubuntu3) ...
+Unpacking libfoo1:i386 (1.0-1) ...
+Removing nano (2.2.6-1ubuntu1) ...
+Purging configuration files for nano (2.2.6-1ubuntu1) ...
+Setting up vim (2:7.4.052-1ubuntu3) ...
+Setting up libfoo1:i386 (1.0-1) ...
+Processing triggers for man-db (2.6.7.1-1ubuntu1) ...
+'''
+
+APT_POLICY = '''\
+vim:
+  Installed: (none)
+  Candidate: 2:7.4.052-1ubuntu3
+  Version table:
+     2:7.4.052-1ubuntu3 0
+        500 http://archive.ubuntu.com/ubuntu/ trusty/main amd64 Packages
+libfoo1:i386:
+  Installed: 1.0-1
+  Candidate: 1.0-2
+mail-transport-agent:
+  Installed: (none)
+  Candidate: (none)
+'''
+
+YUM_INSTALL = '''\
+Running transaction
+  Installing : 2:vim-common-7.4.160-1.el7.x86_64                         1/4
+  Updating   : glibc-2.17-106.el7_2.1.i686                                2/4
+  Erasing    : nano-2.3.1-10.el7.x86_64                                   3/4
+  Cleanup    : glibc-2.17-105.el7.i686                                    4/4
+  Verifying  : 2:vim-common-7.4.160-1.el7.x86_64                         1/4
+Installed:
+  vim-common.x86_64 2:7.4.160-1.el7
+'''
+
+DNF_INSTALL = '''\
+  Installing  : python3-dnf-plugins-core-0.1.12-2.fc22.noarch             1/1
+  Upgrading   : kernel-core-4.2.3-200.fc22.x86_64                          1/1
+'''
+
+
+class DebTransactionTestCase(TestCase):
+
+    def test_parse_transaction(self):
+        self.assertEqual(salt.utils.pkg.deb.parse_transaction(APT_INSTALL),
+                         set(['vim', 'libfoo1', 'nano']))
+        self.assertEqual(salt.utils.pkg.deb.parse_transaction(''), set())
+        self.assertEqual(salt.utils.pkg.deb.parse_transaction(None), set())
+
+    def test_parse_policy(self):
+        self.assertEqual(salt.utils.pkg.deb.parse_policy(APT_POLICY),
+                         {'vim': '2:7.4.052-1ubuntu3',
+                          'libfoo1:i386': '1.0-2',
+                          'mail-transport-agent': '(none)'})
+
+
+class RpmTransactionTestCase(TestCase):
+
+    def test_nevra_name(self):
+        nevra_name = salt.utils.pkg.rpm.nevra_name
+        self.assertEqual(nevra_name('2:vim-common-7.4.160-1.el7.x86_64'),
+                         'vim-common')
+        self.assertEqual(nevra_name('vim-common-2:7.4.160-1.el7.x86_64'),
+                         'vim-common')
+        self.assertEqual(nevra_name('python2.7-2.7.5-1.noarch'), 'python2.7')
+        self.assertEqual(nevra_name('glibc-2.17-106.el7_2.1'), 'glibc')
+        self.assertIsNone(nevra_name('glibc'))
+
+    def test_parse_transaction(self):
+        self.assertEqual(salt.utils.pkg.rpm.parse_transaction(YUM_INSTALL),
+                         set(['vim-common', 'glibc', 'nano']))
+        self.assertEqual(salt.utils.pkg.rpm.parse_transaction(DNF_INSTALL),
+                         set(['python3-dnf-plugins-core', 'kernel-core']))
+        self.assertEqual(salt.utils.pkg.rpm.parse_transaction(''), set())
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests([DebTransactionTestCase, RpmTransactionTestCase],
+              needs_daemon=False)
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.reactor_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the reactor tag routing
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import copy
+import time
+import shutil
+import tempfile
+import multiprocessing
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.config
+import salt.loader
+import salt.utils
+from salt.utils import reactor
+from salt.utils.jinja import SaltBytecodeCache
+
+# Import 3rd-party libs
+import jinja2
+
+REACT_MAP = [
+    {'salt/minion/*/start': ['/srv/reactor/start.sls']},
+    {'salt/auth': '/srv/reactor/auth.sls'},
+    {'salt/minion/web*/start': '/srv/reactor/web.sls'},
+    {'salt/minion/web1/start': '/srv/reactor/web1.sls'},
+    'not a reactor',
+]
+
+
+class TagRouterTestCase(TestCase):
+
+    def test_match_order(self):
+        router = reactor.TagRouter(REACT_MAP)
+        self.assertEqual(router.match('salt/auth'), ['/srv/reactor/auth.sls'])
+        self.assertEqual(
+            router.match('salt/minion/web1/start'),
+            ['/srv/reactor/start.sls',
+             '/srv/reactor/web.sls',
+             '/srv/reactor/web1.sls']
+        )
+        self.assertEqual(
+            router.match('salt/minion/db1/start'),
+            ['/srv/reactor/start.sls']
+        )
+        self.assertEqual(router.match('salt/job/123/ret/db1'), [])
+
+    def test_match_cache(self):
+        router = reactor.TagRouter(REACT_MAP, cache_size=2)
+        router.match('salt/auth')
+        router.match('salt/minion/db1/start')
+        self.assertEqual(len(router._matches), 2)
+        router.match('salt/minion/db2/start')
+        self.assertEqual(len(router._matches), 1)
+
+
+class ReactorMapTestCase(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.map_file = os.path.join(self.tmpdir, 'reactor.conf')
+        self.reactor = reactor.Reactor.__new__(reactor.Reactor)
+        self.reactor.opts = {'reactor': self.map_file}
+        self.reactor._router = None
+        self.reactor._router_mtime = None
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write_map(self, content, mtime):
+        with salt.utils.fopen(self.map_file, 'w') as fp_:
+            fp_.write(content)
+        os.utime(self.map_file, (mtime, mtime))
+
+    def test_reload_on_change(self):
+        now = time.time()
+        self._write_map('- salt/auth: /srv/reactor/auth.sls\n', now - 10)
+        self.assertEqual(
+            self.reactor.list_reactors('salt/auth'),
+            ['/srv/reactor/auth.sls']
+        )
+        router = self.reactor._router
+        self.reactor.list_reactors('salt/auth')
+        self.assertIs(self.reactor._router, router)
+
+        self._write_map('- salt/auth: /srv/reactor/other.sls\n', now)
+        self.assertEqual(
+            self.reactor.list_reactors('salt/auth'),
+            ['/srv/reactor/other.sls']
+        )
+
+
+REACTION = '''
+notify:
+  local.cmd.run:
+    - tgt: {{ data['id'] }}
+    - arg:
+      - echo {{ tag }}
+'''
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class ReactionTestCase(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.reaction = os.path.join(self.tmpdir, 'notify.sls')
+        with salt.utils.fopen(self.reaction, 'w') as fp_:
+            fp_.write(REACTION)
+        opts = copy.deepcopy(salt.config.DEFAULT_MASTER_OPTS)
+        opts['cachedir'] = self.tmpdir
+        opts['file_roots'] = {'base': [self.tmpdir]}
+        opts['jinja_bytecode_cache'] = False
+        self.reactor = reactor.Reactor.__new__(reactor.Reactor)
+        self.reactor.opts = opts
+        self.reactor.rend = salt.loader.render(opts, {})
+        self.reactor._files = {}
+        self.reactor._sources = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_template_cache(self):
+        compile_ = jinja2.Environment.compile
+        with patch.object(jinja2.Environment, 'compile', autospec=True,
+                          side_effect=compile_) as mock:
+            for minion in ('web1', 'web2'):
+                react = self.reactor.render_reaction(
+                    self.reaction, 'salt/minion/start', {'id': minion}
+                )
+                self.assertEqual(react['notify']['local'][0],
+                                 {'tgt': minion})
+            # The reaction was compiled once for both events
+            self.assertEqual(mock.call_count, 1)
+
+    def test_code_cache(self):
+        get_bucket = SaltBytecodeCache.get_bucket
+        with patch.object(SaltBytecodeCache, 'get_bucket', autospec=True,
+                          side_effect=get_bucket) as mock:
+            for minion in ('web1', 'web2'):
+                self.reactor.render_reaction(
+                    self.reaction, 'salt/minion/start', {'id': minion}
+                )
+            # The code of the unchanged file is reused without checksumming
+            # and loading its bytecode again
+            self.assertEqual(mock.call_count, 1)
+
+            with salt.utils.fopen(self.reaction, 'w') as fp_:
+                fp_.write(REACTION.replace('tgt: {{', 'tgt: web-{{'))
+            mtime = os.stat(self.reaction).st_mtime + 1
+            os.utime(self.reaction, (mtime, mtime))
+            react = self.reactor.render_reaction(
+                self.reaction, 'salt/minion/start', {'id': 'web3'}
+            )
+            self.assertEqual(react['notify']['local'][0],
+                             {'tgt': 'web-web3'})
+            self.assertEqual(mock.call_count, 2)
+
+    def test_non_ascii(self):
+        with salt.utils.fopen(self.reaction, 'wb') as fp_:
+            fp_.write(REACTION.replace('echo', u'echo \xe9t\xe9').encode('utf-8'))
+        react = self.reactor.render_reaction(
+            self.reaction, 'salt/minion/start', {'id': 'web1'}
+        )
+        self.assertEqual(react['notify']['local'][1],
+                         {'arg': [u'echo \xe9t\xe9 salt/minion/start']})
+
+
+class ReactorWorkerTestCase(TestCase):
+
+    def setUp(self):
+        self.reacted = multiprocessing.Queue()
+        self.reactor = reactor.Reactor.__new__(reactor.Reactor)
+        self.reactor.opts = {'reactor_refresh_interval': 60,
+                             'reactor_worker_threads': 1,
+                             'reactor_worker_hwm': 10}
+        self.reactor.react = lambda *item: self.reacted.put(item)
+        self.reactor.workers = [reactor.ReactorWorker(self.reactor, 0)]
+        self.reactor.workers[0].start()
+
+    def tearDown(self):
+        self.reactor.stop_workers(timeout=1)
+
+    def test_dispatch(self):
+        self.reactor.dispatch(0, ('salt/auth', {}, ['auth.sls']))
+        self.assertEqual(self.reacted.get(timeout=5),
+                         ('salt/auth', {}, ['auth.sls']))
+
+    def test_restart_dead_worker(self):
+        worker = self.reactor.workers[0]
+        worker.terminate()
+        worker.join(5)
+        self.reactor.dispatch(0, ('salt/auth', {}, ['auth.sls']))
+        self.assertIsNot(self.reactor.workers[0], worker)
+        self.assertEqual(self.reacted.get(timeout=5),
+                         ('salt/auth', {}, ['auth.sls']))
+
+    def test_stop_workers(self):
+        self.reactor.dispatch(0, ('salt/auth', {}, ['auth.sls']))
+        self.reactor.stop_workers(timeout=5)
+        self.assertFalse(self.reactor.workers[0].is_alive())
+        # The queued events are handled before the worker stops
+        self.assertEqual(self.reacted.get(timeout=1),
+                         ('salt/auth', {}, ['auth.sls']))
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(TagRouterTestCase, ReactorMapTestCase, ReactionTestCase,
+              ReactorWorkerTestCase, needs_daemon=False)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.requisite_graph_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the resolution of requisites over low chunks
+'''
+
+# Import python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils.requisite_graph import RequisiteGraph
+
+
+def _chunk(state, id_, name=None, sls='base', **kwargs):
+    chunk = {'state': state,
+             'fun': 'managed',
+             '__id__': id_,
+             'name': name or id_,
+             '__sls__': sls}
+    chunk.update(kwargs)
+    return chunk
+
+
+CHUNKS = [
+    _chunk('pkg', 'nginx'),
+    _chunk('file', 'nginx_conf', '/etc/nginx/nginx.conf', sls='web.nginx'),
+    _chunk('file', 'site_conf', '/etc/nginx/sites/default', sls='web.nginx'),
+    _chunk('service', 'nginx', sls='web.nginx',
+           listen=[{'file': 'nginx_conf'}]),
+    _chunk('cmd', 'reload', sls='web.app',
+           listen_in=[{'service': 'nginx'}]),
+]
+
+
+class RequisiteGraphTestCase(TestCase):
+
+    def setUp(self):
+        self.graph = RequisiteGraph(CHUNKS)
+
+    def test_find(self):
+        self.assertEqual(self.graph.find('pkg', 'nginx'), [CHUNKS[0]])
+        # Both the ID and the name of a chunk can be referenced
+        self.assertEqual(self.graph.find('file', 'nginx_conf'), [CHUNKS[1]])
+        self.assertEqual(self.graph.find('file', '/etc/nginx/nginx.conf'),
+                         [CHUNKS[1]])
+        self.assertEqual(self.graph.find('file', 'nginx'), [])
+        self.assertEqual(self.graph.find('file', None), [])
+
+    def test_find_glob(self):
+        self.assertEqual(self.graph.find('file', '/etc/nginx/*'),
+                         [CHUNKS[1], CHUNKS[2]])
+        self.assertEqual(self.graph.find('sls', 'web.*'), CHUNKS[1:])
+        self.assertEqual(self.graph.find('sls', 'web.nginx'), CHUNKS[1:4])
+
+    def test_resolve(self):
+        found, lost = self.graph.resolve([{'pkg': 'nginx'},
+                                          {'file': 'site_conf'},
+                                          {'cmd': 'missing'}])
+        self.assertEqual(found, [CHUNKS[0], CHUNKS[2]])
+        self.assertEqual(lost, [{'cmd': 'missing'}])
+
+    def test_listen(self):
+        self.assertIs(self.graph.refs[('service', 'nginx')], CHUNKS[3])
+        self.assertEqual(self.graph.listeners,
+                         [{('service', 'nginx'): [{'file': 'nginx_conf'}]},
+                          {('service', 'nginx'): [{'cmd': 'reload'}]}])
+
+    def test_compiled_for(self):
+        chunks = list(CHUNKS)
+        graph = RequisiteGraph(chunks)
+        self.assertTrue(graph.compiled_for(chunks))
+        self.assertFalse(graph.compiled_for(CHUNKS))
+        chunks.pop()
+        self.assertFalse(graph.compiled_for(chunks))
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(RequisiteGraphTestCase, needs_daemon=False)
@@ -234,6 +234,53 @@ class ScheduleTestCase(TestCase):
         self.schedule.opts = {'schedule': ''}
         self.assertRaises(ValueError, Schedule.eval, self.schedule)
 
+    def test_eval_only_due_jobs(self):
+        '''
+        Tests that jobs are compiled once and only evaluated when due
+        '''
+        self.schedule.functions = {'test.ping': MagicMock()}
+        self.schedule.opts = {'schedule': {'job1': {'function': 'test.ping',
+                                                    'seconds': 60},
+                                           'job2': {'function': 'test.ping',
+                                                    'minutes': 5}},
+                              'pillar': {}, 'grains': {},
+                              'sock_dir': SOCK_DIR}
+        run_job = MagicMock(
+            side_effect=lambda job, func, data, now:
+                self.schedule.intervals.__setitem__(job, now)
+        )
+        compile_job = MagicMock(side_effect=self.schedule._compile_job)
+        with patch.object(self.schedule, '_run_job', run_job), \
+                patch.object(self.schedule, '_compile_job', compile_job), \
+                patch('time.time', MagicMock(return_value=1000)):
+            self.schedule.eval()
+        self.assertEqual(run_job.call_count, 2)
+        self.assertEqual(compile_job.call_count, 2)
+        self.assertEqual(self.schedule.loop_interval, 60)
+
+        def _eval(now):
+            run_job.reset_mock()
+            with patch.object(self.schedule, '_run_job', run_job), \
+                    patch.object(self.schedule, '_compile_job', compile_job), \
+                    patch('time.time', MagicMock(return_value=now)):
+                self.schedule.eval()
+            return [call[0][0] for call in run_job.call_args_list]
+
+        self.assertEqual(_eval(1030), [])
+        self.assertEqual(_eval(1060), ['job1'])
+        self.assertEqual(_eval(1300), ['job1', 'job2'])
+        self.assertEqual(compile_job.call_count, 2)
+
+        # Only the modified job is compiled again
+        self.schedule.modify_job('job1', {'function': 'test.ping',
+                                          'seconds': 10}, persist=False)
+        self.assertEqual(_eval(1301), ['job1'])
+        self.assertEqual(compile_job.call_count, 3)
+
+        self.schedule.delete_job('job1', persist=False)
+        self.assertEqual(_eval(1400), [])
+        self.assertNotIn('job1', self.schedule._jobs)
+
 
 if __name__ == '__main__':
     from integration import run_tests
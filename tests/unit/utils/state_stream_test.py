@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.state_stream_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the streaming of state results
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils import state_stream
+
+JID = '20150101010101010101'
+
+
+def _chunk(num, changes=False):
+    return {'changes': {'diff': 'New file'} if changes else {},
+            'comment': 'File /tmp/{0} updated'.format(num),
+            'name': '/tmp/{0}'.format(num),
+            'result': True,
+            '__run_num__': num}
+
+
+def _tag(num):
+    return 'file_|-{0}_|-/tmp/{0}_|-managed'.format(num)
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class ChunkStreamTestCase(TestCase):
+
+    def test_batches(self):
+        send = MagicMock()
+        stream = state_stream.ChunkStream(send, JID, 'minion1', batch_size=2)
+        self.assertIsNone(stream.add(_tag(0), _chunk(0), 3))
+        self.assertEqual(stream.add(_tag(1), _chunk(1), 3),
+                         (0, [_tag(0), _tag(1)]))
+        send.assert_called_once_with(
+            {'ret': {_tag(0): _chunk(0), _tag(1): _chunk(1)},
+             'seq': 0,
+             'len': 3},
+            'salt/job/{0}/prog/minion1/batch/0'.format(JID)
+        )
+        stream.add(_tag(2), _chunk(2), 3)
+        self.assertEqual(stream.flush(3), (1, [_tag(2)]))
+        self.assertEqual(stream.flush(3), (2, []))
+
+    def test_send_failure(self):
+        stream = state_stream.ChunkStream(
+            MagicMock(side_effect=IOError), JID, 'minion1', batch_size=1
+        )
+        self.assertEqual(stream.add(_tag(0), _chunk(0)), (0, []))
+        self.assertEqual(stream.seq, 0)
+
+    def test_stub(self):
+        stub = state_stream.stub(_chunk(3, changes=True), 1)
+        self.assertTrue(stub['result'])
+        self.assertTrue(stub['changes'])
+        self.assertEqual(stub['__run_num__'], 3)
+        self.assertEqual(stub[state_stream.STREAM_KEY], 1)
+        self.assertFalse(state_stream.stub(_chunk(4), 1)['changes'])
+
+
+class AssembleTestCase(TestCase):
+
+    def setUp(self):
+        self.opts = {'cachedir': tempfile.mkdtemp(), 'serial': 'msgpack'}
+
+    def tearDown(self):
+        shutil.rmtree(self.opts['cachedir'], ignore_errors=True)
+
+    def test_parse_tag(self):
+        self.assertEqual(
+            state_stream.parse_tag(state_stream.stream_tag(JID, 'minion1', 4)),
+            (JID, 'minion1', 4)
+        )
+        self.assertIsNone(
+            state_stream.parse_tag('salt/job/{0}/prog/minion1/3'.format(JID))
+        )
+
+    def test_assemble(self):
+        for seq in (0, 1):
+            self.assertTrue(state_stream.save_batch(self.opts, {
+                'id': 'minion1',
+                'tag': state_stream.stream_tag(JID, 'minion1', seq),
+                'data': {'ret': {_tag(seq): _chunk(seq)}, 'seq': seq},
+            }))
+        # Batches can only be sent by the minion they belong to
+        self.assertFalse(state_stream.save_batch(self.opts, {
+            'id': 'minion2',
+            'tag': state_stream.stream_tag(JID, 'minion1', 2),
+            'data': {'ret': {}},
+        }))
+        load = {'id': 'minion1',
+                'jid': JID,
+                'return': {_tag(0): state_stream.stub(_chunk(0), 0),
+                           _tag(1): state_stream.stub(_chunk(1), 1),
+                           _tag(2): _chunk(2)}}
+        ret = state_stream.assemble(self.opts, load)['return']
+        self.assertEqual(ret, {_tag(0): _chunk(0),
+                               _tag(1): _chunk(1),
+                               _tag(2): _chunk(2)})
+        self.assertFalse(os.path.isdir(os.path.join(
+            self.opts['cachedir'], state_stream.STREAM_DIR, JID, 'minion1'
+        )))
+
+    def test_assemble_without_stubs(self):
+        # The results were streamed but kept in the return
+        self.assertTrue(state_stream.save_batch(self.opts, {
+            'id': 'minion1',
+            'tag': state_stream.stream_tag(JID, 'minion1', 0),
+            'data': {'ret': {_tag(0): _chunk(0)}, 'seq': 0},
+        }))
+        load = {'id': 'minion1', 'jid': JID, 'return': {_tag(0): _chunk(0)}}
+        self.assertEqual(state_stream.assemble(self.opts, load), load)
+        self.assertFalse(os.path.isdir(os.path.join(
+            self.opts['cachedir'], state_stream.STREAM_DIR, JID, 'minion1'
+        )))
+        # salt-call returns with the 'req' jid
+        load = {'id': 'minion1', 'jid': 'req', 'return': {_tag(0): _chunk(0)}}
+        self.assertEqual(state_stream.assemble(self.opts, load), load)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(ChunkStreamTestCase, AssembleTestCase, needs_daemon=False)
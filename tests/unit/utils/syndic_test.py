@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.syndic_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the syndic return aggregation
+'''
+
+# Import python libs
+from __future__ import absolute_import
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.utils import syndic
+
+JID = '20150101010101010101'
+
+
+def _ret(minion, jid=JID):
+    return {'tag': 'salt/job/{0}/ret/{1}'.format(jid, minion),
+            'data': {'jid': jid, 'id': minion, 'fun': 'test.ping',
+                     'return': True}}
+
+
+class JidCacheTestCase(TestCase):
+
+    def test_lru_eviction(self):
+        cache = syndic.JidCache(2)
+        cache.add('1', {})
+        cache.add('2', {})
+        cache.get('1')
+        cache.add('3', {})
+        self.assertIn('1', cache)
+        self.assertNotIn('2', cache)
+        self.assertIn('3', cache)
+        self.assertEqual(len(cache), 2)
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class ReturnForwarderTestCase(TestCase):
+
+    def setUp(self):
+        self.get_load = MagicMock(return_value={'fun': 'test.ping'})
+        self.forwarder = syndic.ReturnForwarder(
+            {'syndic_forward_batch_size': 2,
+             'syndic_jid_forward_cache_hwm': 10},
+            self.get_load
+        )
+
+    def test_is_job_return(self):
+        self.assertTrue(syndic.is_job_return(_ret('minion1')))
+        self.assertFalse(syndic.is_job_return(
+            {'tag': 'salt/auth', 'data': {}}
+        ))
+
+    def test_streaming_batches(self):
+        tag = 'salt/job/{0}/ret'.format(JID)
+        first = dict(_ret('minion1'), tag=tag)
+        self.assertFalse(self.forwarder.add_return(first))
+        self.assertTrue(
+            self.forwarder.add_return(dict(_ret('minion2'), tag=tag))
+        )
+        self.assertEqual(self.forwarder.backlog, 2)
+
+        events, returns = self.forwarder.take(flush=False)
+        self.assertEqual(events, [])
+        self.assertEqual(len(returns), 1)
+        self.assertEqual(returns[0]['__load__'], {'fun': 'test.ping'})
+        self.assertEqual(returns[0]['minion1'], True)
+
+        # The load is only fetched and forwarded once per jid
+        self.forwarder.add_return(dict(_ret('minion3'), tag=tag))
+        events, returns = self.forwarder.take()
+        self.assertEqual(returns[0]['__load__'], {})
+        self.get_load.assert_called_once_with(JID)
+        self.assertEqual(self.forwarder.backlog, 0)
+        self.assertEqual(self.forwarder.stats['returns_forwarded'], 3)
+
+    def test_event_batches(self):
+        for num in range(5):
+            self.forwarder.add_event({'tag': 'foo', 'data': {'num': num}})
+        events, _ = self.forwarder.take(flush=False)
+        self.assertEqual([len(batch) for batch in events], [2, 2])
+        events, _ = self.forwarder.take()
+        self.assertEqual([len(batch) for batch in events], [1])
+
+    def test_collect_stats(self):
+        self.assertIsNone(self.forwarder.collect_stats(60))
+        self.forwarder.add_return(_ret('minion1'))
+        stats = self.forwarder.collect_stats(0.000001)
+        self.assertEqual(stats['backlog'], 1)
+        self.assertEqual(stats['load_fetches'], 1)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests([JidCacheTestCase, ReturnForwarderTestCase], needs_daemon=False)
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.treewatch_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the index of directory trees watched with inotify
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import copy
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.config
+import salt.fileserver
+import salt.utils
+from salt.utils import treewatch
+
+
+class TreeWatchTestCase(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for path in ('top.sls', 'web/init.sls', 'web/files/nginx.conf'):
+            self._write(path)
+        os.makedirs(os.path.join(self.root, 'empty'))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _write(self, path):
+        full = os.path.join(self.root, path)
+        if not os.path.isdir(os.path.dirname(full)):
+            os.makedirs(os.path.dirname(full))
+        with salt.utils.fopen(full, 'w') as fp_:
+            fp_.write(path)
+
+    def test_scan(self):
+        tree = treewatch.TreeWatch([self.root + os.sep], watch=False)
+        self.assertFalse(tree.watching)
+        self.assertEqual(tree.roots, [self.root])
+        self.assertEqual(
+            sorted(tree.files[self.root]),
+            ['top.sls', 'web/files/nginx.conf', 'web/init.sls']
+        )
+        self.assertEqual(sorted(tree.dirs[self.root]),
+                         ['.', 'empty', 'web', 'web/files'])
+        self.assertEqual(tree.empty_dirs(self.root), ['empty'])
+        self.assertEqual(
+            sorted(tree.mtime_map()),
+            sorted(os.path.join(self.root, x)
+                   for x in tree.files[self.root])
+        )
+
+    def test_update(self):
+        tree = treewatch.TreeWatch([self.root], watch=False)
+        shutil.rmtree(os.path.join(self.root, 'web'))
+        tree._update(self.root, 'web')
+        self._write('empty/db.sls')
+        tree._update(self.root, 'empty')
+        self.assertEqual(sorted(tree.files[self.root]),
+                         ['empty/db.sls', 'top.sls'])
+        self.assertEqual(sorted(tree.dirs[self.root]), ['.', 'empty'])
+        self.assertEqual(tree.empty_dirs(self.root), [])
+
+    def _link_shared(self):
+        # Two symlinks to the same directory, and a symlink loop
+        shared = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, shared, ignore_errors=True)
+        with salt.utils.fopen(os.path.join(shared, 'x'), 'w') as fp_:
+            fp_.write('x')
+        os.symlink(shared, os.path.join(self.root, 'a'))
+        os.symlink(shared, os.path.join(self.root, 'b'))
+        os.symlink(self.root, os.path.join(self.root, 'web', 'loop'))
+        return shared
+
+    def test_shared_symlinks(self):
+        self._link_shared()
+        tree = treewatch.TreeWatch([self.root], watch=False)
+        files = sorted(tree.files[self.root])
+        self.assertIn('a/x', files)
+        self.assertIn('b/x', files)
+        self.assertFalse([x for x in files if x.startswith('web/loop/')])
+
+    def test_empty_root(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        tree = treewatch.TreeWatch([root], watch=False)
+        self.assertEqual(tree.empty_dirs(root), [])
+
+    @skipIf(not treewatch.HAS_PYINOTIFY, 'pyinotify is not installed')
+    def test_poll_shared_symlinks(self):
+        shared = self._link_shared()
+        tree = treewatch.TreeWatch([self.root])
+        with salt.utils.fopen(os.path.join(shared, 'y'), 'w') as fp_:
+            fp_.write('y')
+        self.assertTrue(tree.poll())
+        self.assertIn('a/y', tree.files[self.root])
+        self.assertIn('b/y', tree.files[self.root])
+
+    @skipIf(not treewatch.HAS_PYINOTIFY, 'pyinotify is not installed')
+    def test_poll(self):
+        tree = treewatch.TreeWatch([self.root])
+        self.assertTrue(tree.watching)
+        self.assertFalse(tree.poll())
+        self._write('web/files/php.ini')
+        self._write('db/init.sls')
+        os.remove(os.path.join(self.root, 'top.sls'))
+        generation = tree.generation
+        self.assertTrue(tree.poll())
+        self.assertNotEqual(tree.generation, generation)
+        self.assertEqual(
+            sorted(tree.files[self.root]),
+            ['db/init.sls', 'web/files/nginx.conf', 'web/files/php.ini',
+             'web/init.sls']
+        )
+        # A file created in a directory created after the scan is seen too
+        self._write('db/files/my.cnf')
+        self.assertTrue(tree.poll())
+        self.assertIn('db/files/my.cnf', tree.files[self.root])
+        self.assertFalse(tree.poll())
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(not treewatch.HAS_PYINOTIFY, 'pyinotify is not installed')
+class RootsWatchTestCase(TestCase):
+    '''
+    Test the file lists of the roots fileserver backend kept up to date by
+    the process watching the file_roots
+    '''
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp, 'roots')
+        os.makedirs(os.path.join(self.root, 'web'))
+        with salt.utils.fopen(os.path.join(self.root, 'top.sls'), 'w') as fp_:
+            fp_.write('base: {}')
+        self.opts = copy.deepcopy(salt.config.DEFAULT_MASTER_OPTS)
+        self.opts.update({
+            'file_roots': {'base': [self.root]},
+            'cachedir': os.path.join(self.tmp, 'cache'),
+            'fileserver_backend': ['roots'],
+            'fileserver_inotify': True,
+        })
+        self.fileserver = salt.fileserver.Fileserver(self.opts)
+        self.trees = self.fileserver.servers['roots.watch'].__globals__['_TREE']
+
+    def tearDown(self):
+        tree = self.trees.pop('tree', None)
+        if tree is not None:
+            tree.close()
+        for thread in threading.enumerate():
+            if thread.name == 'roots-watch':
+                thread.join(5)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _file_list(self):
+        return self.fileserver.file_list({'saltenv': 'base'})
+
+    def test_watch(self):
+        self.fileserver.watch()
+        tree = self.trees['tree']
+        self.assertTrue(tree.watching)
+        self.assertEqual(self._file_list(), ['top.sls'])
+
+        # The other processes read the caches written by the watcher, they
+        # do not walk the file_roots
+        with patch('os.walk', MagicMock(side_effect=AssertionError)):
+            with salt.utils.fopen(
+                    os.path.join(self.root, 'web', 'init.sls'), 'w') as fp_:
+                fp_.write('nginx: {}')
+            for _ in range(50):
+                if 'web/init.sls' in self._file_list():
+                    break
+                time.sleep(0.1)
+            self.assertEqual(sorted(self._file_list()),
+                             ['top.sls', 'web/init.sls'])
+
+        # Watching the same file_roots again keeps the watch
+        self.fileserver.watch()
+        self.assertIs(self.trees['tree'], tree)
+        # Other file_roots replace it, the old inotify instance is closed
+        self.opts['file_roots']['dev'] = [os.path.join(self.root, 'web')]
+        self.fileserver.watch()
+        self.assertIsNot(self.trees['tree'], tree)
+        self.assertFalse(tree.watching)
+
+    def test_write_locked(self):
+        self.fileserver.watch()
+        tree = self.trees['tree']
+        write_tree_lists = \
+            self.fileserver.servers['roots.watch'].__globals__['_write_tree_lists']
+        list_cache = os.path.join(self.opts['cachedir'], 'file_lists', 'roots',
+                                  'base.p')
+        w_lock = os.path.join(os.path.dirname(list_cache), '.base.w')
+        os.remove(list_cache)
+        # A worker refreshing the cache holds the lock
+        os.mkdir(w_lock)
+        self.assertFalse(write_tree_lists(tree))
+        self.assertFalse(os.path.exists(list_cache))
+        os.rmdir(w_lock)
+        self.assertTrue(write_tree_lists(tree))
+        self.assertTrue(os.path.exists(list_cache))
+        self.assertFalse(os.path.exists(w_lock))
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(TreeWatchTestCase, RootsWatchTestCase, needs_daemon=False)
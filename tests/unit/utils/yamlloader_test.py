@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.yamlloader_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the salt YAML loaders
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import textwrap
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.exceptions import SaltRenderError
+from salt.renderers import yaml as yaml_renderer
+from salt.utils import yamlloader
+from salt.utils.odict import OrderedDict
+
+# Import 3rd-party libs
+from yaml.constructor import ConstructorError
+
+SLS = textwrap.dedent('''\
+    nginx:
+      pkg.installed: []
+      service.running:
+        - require:
+          - pkg: nginx
+
+    /etc/nginx/nginx.conf:
+      file.managed:
+        - mode: 0644
+        - source: salt://nginx/nginx.conf
+    ''')
+
+
+class _YamlLoaderTests(object):
+    '''
+    The tests shared by the pure python and the libyaml loaders
+    '''
+    loader = None
+
+    def load(self, data, dictclass=OrderedDict):
+        return yamlloader.load(
+            data,
+            Loader=lambda stream: self.loader(stream, dictclass=dictclass)
+        )
+
+    def test_ordered(self):
+        ret = self.load(SLS)
+        self.assertIsInstance(ret, OrderedDict)
+        self.assertEqual(list(ret), ['nginx', '/etc/nginx/nginx.conf'])
+        self.assertEqual(list(ret['nginx']), ['pkg.installed',
+                                              'service.running'])
+        self.assertIsInstance(self.load(SLS, dictclass=dict), dict)
+
+    def test_octal(self):
+        ret = self.load(SLS)
+        # Octal modes are kept as their decimal digits
+        self.assertEqual(ret['/etc/nginx/nginx.conf']['file.managed'][0],
+                         {'mode': 644})
+        self.assertEqual(self.load('a: 000'), {'a': 0})
+
+    def test_duplicate_keys(self):
+        self.assertRaises(ConstructorError, self.load, 'a: 1\nb: 2\na: 3\n')
+
+    def test_render_errors(self):
+        with patch.object(yaml_renderer, 'SaltYamlSafeLoader', self.loader):
+            for data, error in (('a:\n\tb: 1\n', 'Illegal tab character'),
+                                ('a: 1\nb: @c\n',
+                                 "found character '@' that cannot start any "
+                                 "token")):
+                with self.assertRaises(SaltRenderError) as exc:
+                    yaml_renderer.render(data)
+                self.assertEqual(exc.exception.error, error)
+                self.assertEqual(exc.exception.line_num, 2)
+
+
+class PySafeLoaderTestCase(_YamlLoaderTests, TestCase):
+    loader = yamlloader.SaltYamlPySafeLoader
+
+
+@skipIf(not yamlloader.HAS_LIBYAML, 'libyaml is not available')
+class CSafeLoaderTestCase(_YamlLoaderTests, TestCase):
+    loader = getattr(yamlloader, 'SaltYamlCSafeLoader', None)
+
+    def test_default(self):
+        self.assertIs(yamlloader.SaltYamlSafeLoader,
+                      yamlloader.SaltYamlCSafeLoader)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests([PySafeLoaderTestCase, CSafeLoaderTestCase], needs_daemon=False)